@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""Compare process-per-call and pre-started-session Claude CLI completions.
+
+Usage:
+    python scripts/benchmark_claude_sessions.py [--requests N] [--claude-command CMD]
+
+Without --claude-command a simulated CLI pays a fixed startup cost when it
+starts and a fixed cost per answer. Sessions start while earlier requests
+are answered, so the difference between the modes is the startup cost
+hidden per request; pass the real CLI to measure it.
+"""
+
+import argparse
+import concurrent.futures
+import os
+import stat
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from inklink.adapters.claude_cli_adapter import ClaudeCliAdapter  # noqa: E402
+from inklink.adapters.claude_cli_pool import close_shared_pools  # noqa: E402
+
+FAKE_CLI = """\
+#!{python}
+import json, sys, time
+time.sleep({startup})
+if "stream-json" not in sys.argv:
+    sys.stdin.read()
+    time.sleep({answer})
+    print("answer")
+    sys.exit(0)
+for line in sys.stdin:
+    time.sleep({answer})
+    print(json.dumps({{"type": "result", "is_error": False, "result": "answer"}}))
+    sys.stdout.flush()
+"""
+
+
+def write_fake_cli(directory, startup, answer):
+    """Write the simulated CLI and return its path."""
+    path = os.path.join(directory, "claude")
+    with open(path, "w") as f:
+        f.write(FAKE_CLI.format(python=sys.executable, startup=startup, answer=answer))
+    os.chmod(path, os.stat(path).st_mode | stat.S_IEXEC)
+    return path
+
+
+def run_mode(adapter, requests, concurrency):
+    """Send the requests; return seconds taken."""
+    started = time.perf_counter()
+    with concurrent.futures.ThreadPoolExecutor(max_workers=concurrency) as executor:
+        results = list(
+            executor.map(
+                lambda i: adapter.generate_completion(f"Question {i}"),
+                range(requests),
+            )
+        )
+    elapsed = time.perf_counter() - started
+    failures = [result for success, result in results if not success]
+    if failures:
+        raise RuntimeError(failures[0])
+    return elapsed
+
+
+def main():
+    """Run the benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=12)
+    parser.add_argument("--sessions", type=int, default=2)
+    parser.add_argument("--claude-command", help="Real Claude CLI to call")
+    parser.add_argument("--startup", type=float, default=0.8)
+    parser.add_argument("--answer", type=float, default=0.2)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        command = args.claude_command or write_fake_cli(
+            temp_dir, args.startup, args.answer
+        )
+        mode = "real" if args.claude_command else "simulated"
+        print(f"{args.requests} requests, {args.sessions} concurrent, {mode} CLI")
+        for name, pool_size in (("per-call", 0), ("sessions", args.sessions)):
+            adapter = ClaudeCliAdapter(
+                claude_command=command, session_pool_size=pool_size
+            )
+            try:
+                seconds = run_mode(adapter, args.requests, args.sessions)
+            finally:
+                close_shared_pools()
+            print(
+                f"{name:>9}: {seconds:.2f} s total, "
+                f"{seconds / args.requests * 1000:.0f} ms/request"
+            )
+
+
+if __name__ == "__main__":
+    main()
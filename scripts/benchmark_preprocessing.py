@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""Compare PIL and in-memory NumPy preprocessing of page images.
+
+Usage:
+    python scripts/benchmark_preprocessing.py [page.png ...] [--pages N]
+
+Without page images, synthetic 300 DPI pages with lines of writing on paper
+that darkens towards one edge are used. The PIL path is the adapter's
+file-based preprocess_image; the NumPy path is preprocess_image_bytes, once
+serially and once over a process pool.
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+import numpy as np  # noqa: E402
+from PIL import Image, ImageDraw, ImageFont  # noqa: E402
+
+from inklink.adapters.claude_vision_adapter import ClaudeVisionAdapter  # noqa: E402
+from inklink.utils.image_preprocessing import preprocess_batch  # noqa: E402
+
+
+def synthetic_pages(directory, count):
+    """Write shaded page renders with several lines of writing."""
+    font = ImageFont.load_default(size=40)
+    shade = np.linspace(250, 170, 1864).astype(np.uint8)
+    paths = []
+    for i in range(count):
+        image = Image.fromarray(np.tile(shade, (2485, 1)))
+        draw = ImageDraw.Draw(image)
+        for line in range(20):
+            draw.text(
+                (120, 150 + 100 * line),
+                f"Page {i + 1} line {line + 1}",
+                fill=90,
+                font=font,
+            )
+        path = os.path.join(directory, f"page_{i + 1}.png")
+        image.save(path)
+        paths.append(path)
+    return paths
+
+
+def timed(function):
+    """Run function once; return (result, seconds)."""
+    started = time.perf_counter()
+    result = function()
+    return result, time.perf_counter() - started
+
+
+def main():
+    """Run the benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("paths", nargs="*", help="Rendered page images")
+    parser.add_argument("--pages", type=int, default=8)
+    parser.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        paths = args.paths or synthetic_pages(temp_dir, args.pages)
+        adapter = ClaudeVisionAdapter(claude_command="true", crop_to_ink=False)
+
+        def pil_path():
+            outputs = [adapter.preprocess_image(path, "text") for path in paths]
+            sizes = [os.path.getsize(output) for output in outputs]
+            for output in outputs:
+                if output not in paths:
+                    os.unlink(output)
+            return sizes
+
+        options = {
+            "contrast_factor": adapter.contrast_factor,
+            "brightness_factor": adapter.brightness_factor,
+        }
+        pil_sizes, pil_seconds = timed(pil_path)
+        serial, serial_seconds = timed(
+            lambda: preprocess_batch(paths, max_workers=1, **options)
+        )
+        pooled, pooled_seconds = timed(
+            lambda: preprocess_batch(paths, max_workers=args.workers, **options)
+        )
+        assert pooled == serial
+
+        print(f"{len(paths)} pages, text profile")
+        for name, seconds, sizes in (
+            ("PIL file", pil_seconds, pil_sizes),
+            ("NumPy serial", serial_seconds, [len(data) for data in serial]),
+            ("NumPy pool", pooled_seconds, [len(data) for data in pooled]),
+        ):
+            print(
+                f"{name:>12}: {seconds / len(paths) * 1000:.0f} ms/page, "
+                f"{sum(sizes) / len(sizes) / 1024:.0f} KiB/page"
+            )
+
+
+if __name__ == "__main__":
+    main()
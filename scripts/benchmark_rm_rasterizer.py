@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+"""Benchmark the native .rm rasterizer against the rM2svg + Inkscape chain.
+
+Usage:
+    python scripts/benchmark_rm_rasterizer.py [page.rm | notebook.rmdoc ...]
+
+Without arguments a synthetic page of handwriting-like strokes is used. The
+external chain is timed only when ``rM2svg`` and Inkscape (or cairosvg) are
+installed.
+"""
+
+import argparse
+import io
+import math
+import os
+import random
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from inklink.utils.rm_rasterizer import DEFAULT_DPI, render_page_png  # noqa: E402
+from inklink.utils.rmdoc_archive import RmdocArchive  # noqa: E402
+
+
+def synthetic_page(strokes: int = 400, seed: int = 0) -> bytes:
+    """Build a page of wavy ballpoint strokes laid out like lines of text."""
+    from rmscene import CrdtId, si, write_blocks
+    from rmscene.crdt_sequence import CrdtSequenceItem
+    from rmscene.scene_stream import SceneLineItemBlock
+
+    rng = random.Random(seed)
+    blocks = []
+    for i in range(strokes):
+        x0 = -600 + (i % 20) * 60
+        y0 = 150 + (i // 20) * 80
+        points = [
+            si.Point(
+                x=x0 + step * 2.5,
+                y=y0 + 12 * math.sin(step / 3 + rng.random()),
+                speed=0,
+                direction=0,
+                width=rng.randint(10, 18),
+                pressure=rng.randint(60, 255),
+            )
+            for step in range(20)
+        ]
+        line = si.Line(
+            color=si.PenColor.BLACK,
+            tool=si.Pen.BALLPOINT_2,
+            points=points,
+            thickness_scale=1.0,
+            starting_length=0.0,
+        )
+        blocks.append(
+            SceneLineItemBlock(
+                parent_id=CrdtId(0, 11),
+                item=CrdtSequenceItem(
+                    item_id=CrdtId(1, 20 + i),
+                    left_id=CrdtId(0, 0),
+                    right_id=CrdtId(0, 0),
+                    deleted_length=0,
+                    value=line,
+                ),
+            )
+        )
+    buffer = io.BytesIO()
+    write_blocks(buffer, blocks)
+    return buffer.getvalue()
+
+
+def load_pages(paths):
+    """Read .rm pages from .rm files and .rmdoc archives."""
+    pages = []
+    for path in paths:
+        if RmdocArchive.is_archive(path):
+            with RmdocArchive(path) as archive:
+                pages.extend(archive.read_page(p) for p in archive.page_ids())
+        else:
+            with open(path, "rb") as f:
+                pages.append(f.read())
+    return pages
+
+
+def time_native(pages, dpi, repeat):
+    """Per-page seconds for the native rasterizer."""
+    timings = []
+    for _ in range(repeat):
+        for data in pages:
+            started = time.perf_counter()
+            render_page_png(data, dpi)
+            timings.append(time.perf_counter() - started)
+    return timings
+
+
+def time_external(pages, dpi, repeat):
+    """Per-page seconds for rM2svg + Inkscape/cairosvg, or None if missing."""
+    rm2svg = shutil.which("rM2svg")
+    inkscape = shutil.which("inkscape")
+    if not rm2svg:
+        return None
+    try:
+        import cairosvg
+    except ImportError:
+        cairosvg = None
+    if not inkscape and not cairosvg:
+        return None
+
+    timings = []
+    with tempfile.TemporaryDirectory() as temp_dir:
+        for _ in range(repeat):
+            for i, data in enumerate(pages):
+                rm_path = os.path.join(temp_dir, f"{i}.rm")
+                svg_path = os.path.join(temp_dir, f"{i}.svg")
+                png_path = os.path.join(temp_dir, f"{i}.png")
+                with open(rm_path, "wb") as f:
+                    f.write(data)
+
+                started = time.perf_counter()
+                subprocess.run([rm2svg, rm_path, "-o", svg_path], check=True)
+                if inkscape:
+                    subprocess.run(
+                        [
+                            inkscape,
+                            "--export-filename",
+                            png_path,
+                            "--export-dpi",
+                            str(dpi),
+                            svg_path,
+                        ],
+                        check=True,
+                        capture_output=True,
+                    )
+                else:
+                    cairosvg.svg2png(url=svg_path, write_to=png_path, dpi=dpi)
+                timings.append(time.perf_counter() - started)
+    return timings
+
+
+def report(name, timings):
+    """Print a timing summary."""
+    if timings is None:
+        print(f"{name:>10}: not available")
+        return
+    print(
+        f"{name:>10}: {len(timings)} pages, "
+        f"median {statistics.median(timings) * 1000:.1f} ms, "
+        f"mean {statistics.mean(timings) * 1000:.1f} ms"
+    )
+
+
+def main():
+    """Run the benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("paths", nargs="*", help=".rm files or .rmdoc archives")
+    parser.add_argument("--dpi", type=int, default=DEFAULT_DPI)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--strokes", type=int, default=400)
+    args = parser.parse_args()
+
+    pages = load_pages(args.paths) if args.paths else [synthetic_page(args.strokes)]
+    print(f"Rendering {len(pages)} page(s) at {args.dpi} DPI, {args.repeat} rounds")
+
+    report("native", time_native(pages, args.dpi, args.repeat))
+    report("external", time_external(pages, args.dpi, args.repeat))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""Micro-benchmark of recognition cache keys for a dense synthetic page.
+
+Compares the former JSON-serializing stroke hash with the packed float32
+fingerprint, with and without quantization.
+
+Usage:
+    python scripts/benchmark_stroke_fingerprint.py [--points 10000]
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import random
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from inklink.services.handwriting_recognition_cache import (  # noqa: E402
+    compute_stroke_fingerprint,
+)
+
+
+def synthetic_strokes(points: int, points_per_stroke: int = 50, seed: int = 0):
+    """Build strokes with float coordinates and pressure like a dense page."""
+    rng = random.Random(seed)
+    strokes = []
+    for _ in range(max(1, points // points_per_stroke)):
+        x0, y0 = rng.uniform(0, 1404), rng.uniform(0, 1872)
+        strokes.append(
+            {
+                "x": [x0 + i * 0.8 + rng.random() for i in range(points_per_stroke)],
+                "y": [y0 + rng.uniform(-3, 3) for _ in range(points_per_stroke)],
+                "pressure": [rng.random() for _ in range(points_per_stroke)],
+            }
+        )
+    return strokes
+
+
+def json_hash(strokes):
+    """The former cache key: JSON of every value, then SHA-256."""
+    serializable = [
+        {
+            "x": s.get("x", []),
+            "y": s.get("y", []),
+            "p": s.get("pressure", []) if s.get("pressure") else s.get("p", []),
+        }
+        for s in strokes
+    ]
+    return hashlib.sha256(json.dumps(serializable, sort_keys=True).encode()).hexdigest()
+
+
+def main():
+    """Run the benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--points", type=int, default=10000)
+    parser.add_argument("--number", type=int, default=50)
+    args = parser.parse_args()
+
+    strokes = synthetic_strokes(args.points)
+    candidates = {
+        "json": lambda: json_hash(strokes),
+        "float32": lambda: compute_stroke_fingerprint(strokes),
+        "quantized": lambda: compute_stroke_fingerprint(strokes, 0.5, 1 / 64),
+    }
+
+    print(f"{len(strokes)} strokes, {args.points} points, {args.number} runs each")
+    baseline = None
+    for name, func in candidates.items():
+        seconds = min(timeit.repeat(func, number=args.number, repeat=3)) / args.number
+        baseline = baseline or seconds
+        print(
+            f"{name:>10}: {seconds * 1000:.2f} ms per page "
+            f"({baseline / seconds:.1f}x vs json)"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""Compare per-page and tiled Claude Vision requests for sparse notebook pages.
+
+Usage:
+    python scripts/benchmark_vision_tiling.py [page.png ...] [--claude-command CMD]
+
+Without page images, synthetic 300 DPI pages holding a few lines of writing
+are used. Without --claude-command a simulated CLI answers every request
+after a fixed per-request overhead plus a per-megabyte upload cost, so the
+request counts are exact and the latencies show the shape of the trade-off;
+pass the real CLI to measure actual latencies.
+"""
+
+import argparse
+import os
+import stat
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from PIL import Image, ImageDraw, ImageFont  # noqa: E402
+
+from inklink.adapters.claude_vision_adapter import ClaudeVisionAdapter  # noqa: E402
+
+FAKE_CLI = """\
+#!{python}
+import os, re, sys, time
+args = sys.argv[1:]
+if "--version" in args:
+    print("simulated-claude 0")
+    sys.exit(0)
+images = [a for a in args if os.path.isfile(a)]
+upload = sum(os.path.getsize(p) for p in images) / 1e6
+time.sleep({overhead} + {per_mb} * upload)
+labels = sorted(set(re.findall(r"PAGE (\\d+)", args[-1])), key=int) or ["1"]
+print("\\n".join(f"=== PAGE {{n}} ===\\ntranscribed text" for n in labels))
+"""
+
+
+def synthetic_pages(directory, count):
+    """Write sparse page renders with a few lines of large writing."""
+    font = ImageFont.load_default(size=48)
+    paths = []
+    for i in range(count):
+        image = Image.new("L", (1864, 2485), 255)
+        draw = ImageDraw.Draw(image)
+        for line in range(1 + i % 3):
+            draw.text(
+                (150, 200 + 90 * line), f"Note {i + 1}, line {line + 1}", font=font
+            )
+        path = os.path.join(directory, f"page_{i + 1}.png")
+        image.save(path)
+        paths.append(path)
+    return paths
+
+
+def write_fake_cli(directory, overhead, per_mb):
+    """Write the simulated CLI and return its path."""
+    path = os.path.join(directory, "claude")
+    with open(path, "w") as f:
+        f.write(
+            FAKE_CLI.format(python=sys.executable, overhead=overhead, per_mb=per_mb)
+        )
+    os.chmod(path, os.stat(path).st_mode | stat.S_IEXEC)
+    return path
+
+
+def run_mode(adapter, paths, tiling):
+    """Recognize the pages once; return (requests, seconds)."""
+    real_run = subprocess.run
+    calls = []
+
+    def counting_run(*args, **kwargs):
+        if kwargs.get("shell"):
+            calls.append(args[0])
+        return real_run(*args, **kwargs)
+
+    subprocess.run = counting_run
+    try:
+        started = time.perf_counter()
+        success, result = adapter.process_multiple_images(
+            paths,
+            maintain_context=False,
+            use_parallel=False,
+            preprocess=False,
+            use_tiling=tiling,
+        )
+        elapsed = time.perf_counter() - started
+    finally:
+        subprocess.run = real_run
+
+    if not success:
+        raise RuntimeError(result)
+    return len(calls), elapsed
+
+
+def main():
+    """Run the benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("paths", nargs="*", help="Rendered page images")
+    parser.add_argument("--pages", type=int, default=8)
+    parser.add_argument("--tile-budget", type=int, default=4)
+    parser.add_argument("--claude-command", help="Real Claude CLI to call")
+    parser.add_argument("--overhead", type=float, default=0.5)
+    parser.add_argument("--per-mb", type=float, default=0.5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        paths = args.paths or synthetic_pages(temp_dir, args.pages)
+        command = args.claude_command or write_fake_cli(
+            temp_dir, args.overhead, args.per_mb
+        )
+        adapter = ClaudeVisionAdapter(
+            claude_command=command, tile_budget=args.tile_budget
+        )
+
+        mode = "real" if args.claude_command else "simulated"
+        print(f"{len(paths)} pages, tile budget {args.tile_budget}, {mode} CLI")
+        for name, tiling in (("per-page", False), ("tiled", True)):
+            requests, seconds = run_mode(adapter, paths, tiling)
+            print(
+                f"{name:>9}: {requests} requests, {seconds:.2f} s total, "
+                f"{seconds / len(paths) * 1000:.0f} ms/page, "
+                f"{requests / len(paths):.2f} requests/page"
+            )
+        stats = adapter.get_image_stats()
+        print(
+            f"per-page images: {stats['bytes_before']} -> "
+            f"{stats['bytes_after']} bytes after cropping"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -4,6 +4,7 @@ This module provides an adapter that extends the RmapiAdapter with tag detection
 monitoring, and image conversion functionality for the Cassidy assistant workflow.
 """
 
+import hashlib
 import json
 import logging
 import os
@@ -13,28 +14,53 @@ import subprocess
 import tempfile
 import time
 import uuid
-import zipfile
-from typing import Any, Dict, List, Optional, Set, Tuple
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
 
-from src.inklink.adapters.rmapi_adapter import RmapiAdapter
+from inklink.adapters.rmapi_adapter import RmapiAdapter
+from inklink.services.rendered_page_cache import (
+    RenderedPageCache,
+    get_shared_render_cache,
+)
+from inklink.utils.rm_rasterizer import DEFAULT_DPI, render_page, to_png_bytes
+from inklink.utils.rmdoc_archive import RmdocArchive
 
 logger = logging.getLogger(__name__)
 
+# Kinds of change reported by CassidyAdapter.check_for_updates
+CHANGE_CREATED = "created"
+CHANGE_MODIFIED = "modified"
+CHANGE_DELETED = "deleted"
+
 
 class CassidyAdapter(RmapiAdapter):
     """Adapter for interfacing between reMarkable and Claude Code's 'Cassidy' workflow."""
 
-    def __init__(self, rmapi_path: Optional[str] = None, tag: str = "Cass"):
+    def __init__(
+        self,
+        rmapi_path: Optional[str] = None,
+        tag: str = "Cass",
+        snapshot_path: Optional[str] = None,
+        render_cache: Optional[RenderedPageCache] = None,
+    ):
         """
         Initialize the Cassidy adapter.
 
         Args:
             rmapi_path: Path to the rmapi executable
             tag: Tag to use for identifying notebooks for Cassidy (default: 'Cass')
+            snapshot_path: File persisting the listing seen by check_for_updates
+                           (defaults to a file in the system temp directory)
+            render_cache: Cache of rendered pages (default: the shared cache)
         """
         super().__init__(rmapi_path)
         self.tag = tag
         self.last_check_time = time.time()
+        self.snapshot_path = snapshot_path or os.path.join(
+            tempfile.gettempdir(), f"cassidy_{tag}_listing_snapshot.json"
+        )
+        self.render_cache = render_cache
+        # (previous, new) snapshot of a check whose saving was deferred
+        self._pending_snapshot: Optional[Tuple[Dict, Dict]] = None
 
     def find_tagged_notebooks(self) -> List[Dict[str, Any]]:
         """
@@ -49,44 +75,41 @@ class CassidyAdapter(RmapiAdapter):
 
         tagged_notebooks = []
 
-        # List all documents with long format to get details
-        success, stdout, stderr = self.run_command("ls", "-l")
-        if not success:
-            logger.error(f"Failed to list documents: {stderr}")
+        # Use the shared listing so monitors polling together fetch it once
+        document_index = self.get_document_index()
+        if not document_index.refresh():
+            logger.error("Failed to list documents")
             return []
 
         try:
-            # Process the text output to get document names
+            # Collect named documents from the index
             documents = []
-            for line in stdout.split("\n"):
-                line = line.strip()
-                if line and line.startswith("[f]"):
-                    # Extract document name
-                    doc_name = line[3:].strip()
-                    # Skip empty or "Unnamed" documents
-                    if doc_name and doc_name != "Unnamed":
-                        documents.append(doc_name)
-                    else:
-                        logger.info(f"Skipping empty or unnamed document: '{doc_name}'")
-
-            logger.info(
-                f"Parsed {len(documents)} valid document names from rmapi ls output"
-            )
+            for doc in document_index.documents():
+                # Skip empty or "Unnamed" documents
+                if doc.name and doc.name != "Unnamed":
+                    documents.append(doc)
+                else:
+                    logger.info(f"Skipping empty or unnamed document: '{doc.name}'")
 
             logger.info(f"Found {len(documents)} documents to check for tags")
 
             # Process each document by name
-            for doc_name in documents:
+            for doc in documents:
+                doc_name = doc.name
                 logger.info(f"Checking document: {doc_name}")
 
-                # Get document ID with stat command
-                success, stdout, stderr = self.run_command("stat", doc_name)
-                if not success:
-                    logger.error(f"Failed to get metadata for {doc_name}: {stderr}")
-                    continue
+                # Only stat documents whose ID the listing did not include
+                stdout = None
+                if not doc.has_cloud_id:
+                    success, stdout, stderr = self.run_command("stat", doc_name)
+                    if not success:
+                        logger.error(f"Failed to get metadata for {doc_name}: {stderr}")
+                        continue
 
                 try:
-                    metadata = json.loads(stdout)
+                    metadata = (
+                        json.loads(stdout) if stdout is not None else doc.to_entry()
+                    )
                     doc_id = metadata.get("ID")
 
                     if not doc_id:
@@ -126,7 +149,7 @@ class CassidyAdapter(RmapiAdapter):
 
     def _check_document_for_tag(
         self, doc_id: str, tag: str
-    ) -> Tuple[bool, Dict[str, Any]]:
+    ) -> Tuple[Optional[bool], Dict[str, Any]]:
         """
         Check if a document has the specified tag by downloading and examining its content file.
 
@@ -135,7 +158,8 @@ class CassidyAdapter(RmapiAdapter):
             tag: Tag to search for
 
         Returns:
-            Tuple of (has_tag, metadata)
+            Tuple of (has_tag, metadata); has_tag is None if the document could
+            not be downloaded or read
         """
         temp_dir = tempfile.mkdtemp(prefix="remarkable_")
         zip_path = os.path.join(temp_dir, f"{doc_id}.zip")
@@ -145,25 +169,15 @@ class CassidyAdapter(RmapiAdapter):
             success, message = self.download_file(doc_id, zip_path, "zip")
             if not success:
                 logger.error(f"Failed to download document: {message}")
-                return False, {}
+                return None, {}
 
-            # Extract the content file
-            with zipfile.ZipFile(zip_path, "r") as zip_ref:
-                content_files = [
-                    f for f in zip_ref.namelist() if f.endswith(".content")
-                ]
-                if not content_files:
+            # Read the content file straight from the archive
+            with RmdocArchive(zip_path) as archive:
+                if not archive.content_name:
                     logger.warning(f"No content file found in document {doc_id}")
                     return False, {}
 
-                # Extract the content file
-                content_file = content_files[0]
-                zip_ref.extract(content_file, temp_dir)
-
-                # Read the content file
-                content_path = os.path.join(temp_dir, content_file)
-                with open(content_path, "r") as f:
-                    content_data = json.load(f)
+                content_data = archive.content
 
                 # Check if the tag exists
                 tags = content_data.get("tags", [])
@@ -173,7 +187,7 @@ class CassidyAdapter(RmapiAdapter):
 
         except Exception as e:
             logger.error(f"Error checking document for tag: {str(e)}")
-            return False, {}
+            return None, {}
 
         finally:
             # Clean up
@@ -256,8 +270,19 @@ class CassidyAdapter(RmapiAdapter):
 
             os.makedirs(extract_dir, exist_ok=True)
 
-            with zipfile.ZipFile(zip_path, "r") as zip_ref:
-                zip_ref.extractall(extract_dir)
+            # Write only the content/metadata files and the page .rm files,
+            # read straight from the archive, in the archive's own layout
+            with RmdocArchive(zip_path) as archive:
+                for name in (archive.content_name, archive.metadata_name):
+                    if name:
+                        with open(
+                            os.path.join(extract_dir, os.path.basename(name)), "wb"
+                        ) as f:
+                            f.write(archive.read_member(name))
+
+                pages_dir = os.path.join(extract_dir, archive.doc_id or "pages")
+                for page_id in archive.page_ids():
+                    archive.extract_page(page_id, pages_dir)
 
             return True, extract_dir
 
@@ -268,6 +293,55 @@ class CassidyAdapter(RmapiAdapter):
             logger.error(traceback.format_exc())
             return False, f"Error extracting notebook: {str(e)}"
 
+    def _download_archive(self, doc_id: str, temp_dir: str) -> Tuple[bool, str]:
+        """
+        Download a notebook's .rmdoc archive without extracting it.
+
+        Args:
+            doc_id: Document ID or name
+            temp_dir: Directory to download into
+
+        Returns:
+            Tuple of (success, archive path or error message)
+        """
+        zip_path = os.path.join(temp_dir, f"{doc_id}.rmdoc")
+        success, message = self.download_file(doc_id, zip_path, "zip")
+        if not success:
+            return False, f"Failed to download document: {message}"
+        if not os.path.exists(zip_path):
+            return False, f"Download reported success but file not found at {zip_path}"
+        return True, zip_path
+
+    def _upload_updated(
+        self,
+        archive: RmdocArchive,
+        doc_id: str,
+        temp_dir: str,
+        content_data: Dict[str, Any],
+        updates: Optional[Dict[str, bytes]] = None,
+    ) -> Tuple[bool, str]:
+        """
+        Upload a copy of a notebook with its content file and some members changed.
+
+        Members that did not change are copied from the download as-is.
+
+        Args:
+            archive: The downloaded notebook
+            doc_id: Document ID
+            temp_dir: Directory to write the updated archive to
+            content_data: New content file data
+            updates: Other members to add or replace
+
+        Returns:
+            Tuple of (success, message)
+        """
+        updates = dict(updates or {})
+        updates[archive.content_name] = json.dumps(content_data)
+        zip_path = archive.write_updated(
+            os.path.join(temp_dir, f"{doc_id}_updated.zip"), updates
+        )
+        return self.upload_file(zip_path, content_data.get("visibleName", doc_id))
+
     def add_tag_to_notebook(self, doc_id: str) -> Tuple[bool, str]:
         """
         Add the Cassidy tag to a notebook.
@@ -278,60 +352,33 @@ class CassidyAdapter(RmapiAdapter):
         Returns:
             Tuple of (success, message)
         """
-        # First download and extract the notebook
         temp_dir = tempfile.mkdtemp(prefix="remarkable_tag_")
 
         try:
-            success, extract_dir = self.download_notebook(doc_id, temp_dir)
+            success, zip_path = self._download_archive(doc_id, temp_dir)
             if not success:
-                return False, extract_dir  # Error message
-
-            # Find the content file
-            content_files = []
-            for root, _, files in os.walk(extract_dir):
-                for file in files:
-                    if file.endswith(".content"):
-                        content_files.append(os.path.join(root, file))
-
-            if not content_files:
-                return False, "No content file found in notebook"
+                return False, zip_path  # Error message
 
-            # Read the content file
-            content_path = content_files[0]
-            with open(content_path, "r") as f:
-                content_data = json.load(f)
+            with RmdocArchive(zip_path) as archive:
+                if not archive.content_name:
+                    return False, "No content file found in notebook"
+                content_data = archive.content
 
-            # Add the tag if it doesn't exist
-            tags = content_data.get("tags", [])
-            if self.tag not in tags:
+                # Add the tag if it doesn't exist
+                tags = content_data.get("tags", [])
+                if self.tag in tags:
+                    return True, f"Tag '{self.tag}' already exists on notebook"
                 tags.append(self.tag)
                 content_data["tags"] = tags
 
-                # Write back the updated content file
-                with open(content_path, "w") as f:
-                    json.dump(content_data, f)
-
-                # Repackage the notebook
-                zip_path = os.path.join(temp_dir, f"{doc_id}_updated.zip")
-                with zipfile.ZipFile(zip_path, "w") as zip_ref:
-                    for root, _, files in os.walk(extract_dir):
-                        for file in files:
-                            if (
-                                file != f"{doc_id}_updated.zip"
-                            ):  # Avoid adding the zip to itself
-                                file_path = os.path.join(root, file)
-                                arcname = os.path.relpath(file_path, extract_dir)
-                                zip_ref.write(file_path, arcname)
-
                 # Upload the updated notebook
-                success, message = self.upload_file(
-                    zip_path, content_data.get("visibleName", doc_id)
+                success, message = self._upload_updated(
+                    archive, doc_id, temp_dir, content_data
                 )
-                if not success:
-                    return False, f"Failed to upload updated notebook: {message}"
+            if not success:
+                return False, f"Failed to upload updated notebook: {message}"
 
-                return True, f"Successfully added tag '{self.tag}' to notebook"
-            return True, f"Tag '{self.tag}' already exists on notebook"
+            return True, f"Successfully added tag '{self.tag}' to notebook"
 
         except Exception as e:
             return False, f"Error adding tag to notebook: {str(e)}"
@@ -353,60 +400,33 @@ class CassidyAdapter(RmapiAdapter):
         Returns:
             Tuple of (success, message)
         """
-        # First download and extract the notebook
         temp_dir = tempfile.mkdtemp(prefix="remarkable_tag_")
 
         try:
-            success, extract_dir = self.download_notebook(doc_id, temp_dir)
+            success, zip_path = self._download_archive(doc_id, temp_dir)
             if not success:
-                return False, extract_dir  # Error message
+                return False, zip_path  # Error message
 
-            # Find the content file
-            content_files = []
-            for root, _, files in os.walk(extract_dir):
-                for file in files:
-                    if file.endswith(".content"):
-                        content_files.append(os.path.join(root, file))
+            with RmdocArchive(zip_path) as archive:
+                if not archive.content_name:
+                    return False, "No content file found in notebook"
+                content_data = archive.content
 
-            if not content_files:
-                return False, "No content file found in notebook"
-
-            # Read the content file
-            content_path = content_files[0]
-            with open(content_path, "r") as f:
-                content_data = json.load(f)
-
-            # Remove the tag if it exists
-            tags = content_data.get("tags", [])
-            if self.tag in tags:
+                # Remove the tag if it exists
+                tags = content_data.get("tags", [])
+                if self.tag not in tags:
+                    return True, f"Tag '{self.tag}' does not exist on notebook"
                 tags.remove(self.tag)
                 content_data["tags"] = tags
 
-                # Write back the updated content file
-                with open(content_path, "w") as f:
-                    json.dump(content_data, f)
-
-                # Repackage the notebook
-                zip_path = os.path.join(temp_dir, f"{doc_id}_updated.zip")
-                with zipfile.ZipFile(zip_path, "w") as zip_ref:
-                    for root, _, files in os.walk(extract_dir):
-                        for file in files:
-                            if (
-                                file != f"{doc_id}_updated.zip"
-                            ):  # Avoid adding the zip to itself
-                                file_path = os.path.join(root, file)
-                                arcname = os.path.relpath(file_path, extract_dir)
-                                zip_ref.write(file_path, arcname)
-
                 # Upload the updated notebook
-                success, message = self.upload_file(
-                    zip_path, content_data.get("visibleName", doc_id)
+                success, message = self._upload_updated(
+                    archive, doc_id, temp_dir, content_data
                 )
-                if not success:
-                    return False, f"Failed to upload updated notebook: {message}"
+            if not success:
+                return False, f"Failed to upload updated notebook: {message}"
 
-                return True, f"Successfully removed tag '{self.tag}' from notebook"
-            return True, f"Tag '{self.tag}' does not exist on notebook"
+            return True, f"Successfully removed tag '{self.tag}' from notebook"
 
         except Exception as e:
             return False, f"Error removing tag from notebook: {str(e)}"
@@ -436,74 +456,48 @@ class CassidyAdapter(RmapiAdapter):
         temp_dir = tempfile.mkdtemp(prefix="remarkable_page_tag_")
 
         try:
-            # Download and extract the notebook
-            success, extract_dir = self.download_notebook(doc_id, temp_dir)
+            success, zip_path = self._download_archive(doc_id, temp_dir)
             if not success:
-                return False, extract_dir  # Error message
+                return False, zip_path  # Error message
 
-            # Find the content file
-            content_files = []
-            for root, _, files in os.walk(extract_dir):
-                for file in files:
-                    if file.endswith(".content"):
-                        content_files.append(os.path.join(root, file))
+            with RmdocArchive(zip_path) as archive:
+                if not archive.content_name:
+                    return False, "No content file found in notebook"
+                content_data = archive.content
 
-            if not content_files:
-                return False, "No content file found in notebook"
+                # Get the pageTags section
+                page_tags = content_data.get("pageTags", [])
+                if page_tags is None:
+                    page_tags = []
+
+                # Find the tag entry for this page and remove it
+                tag_removed = False
+                new_page_tags = []
+
+                for page_tag in page_tags:
+                    # Skip this tag entry if it matches our criteria
+                    if page_tag.get("pageId") == page_id and (
+                        page_tag.get("tag") == tag
+                        or page_tag.get("tag", "").lower() == tag.lower()
+                    ):
+                        tag_removed = True
+                        logger.info(
+                            f"Removing tag '{page_tag.get('tag')}' from page {page_id}"
+                        )
+                    else:
+                        new_page_tags.append(page_tag)
 
-            # Read the content file
-            content_path = content_files[0]
-            with open(content_path, "r") as f:
-                content_data = json.load(f)
-
-            # Get the pageTags section
-            page_tags = content_data.get("pageTags", [])
-            if page_tags is None:
-                page_tags = []
-
-            # Find the tag entry for this page and remove it
-            tag_removed = False
-            new_page_tags = []
-
-            for page_tag in page_tags:
-                # Skip this tag entry if it matches our criteria
-                if page_tag.get("pageId") == page_id and (
-                    page_tag.get("tag") == tag
-                    or page_tag.get("tag", "").lower() == tag.lower()
-                ):
-                    tag_removed = True
-                    logger.info(
-                        f"Removing tag '{page_tag.get('tag')}' from page {page_id}"
-                    )
-                else:
-                    new_page_tags.append(page_tag)
-
-            # If no tag was removed, we're done
-            if not tag_removed:
-                return True, f"Page {page_id} does not have tag '{tag}'"
-
-            # Update the content data with the new page tags
-            content_data["pageTags"] = new_page_tags
-
-            # Write back the updated content file
-            with open(content_path, "w") as f:
-                json.dump(content_data, f)
-
-            # Repackage the notebook
-            zip_path = os.path.join(temp_dir, f"{doc_id}_updated.zip")
-            with zipfile.ZipFile(zip_path, "w") as zip_ref:
-                for root, _, files in os.walk(extract_dir):
-                    for file in files:
-                        if (
-                            file != f"{doc_id}_updated.zip"
-                        ):  # Avoid adding the zip to itself
-                            file_path = os.path.join(root, file)
-                            arcname = os.path.relpath(file_path, extract_dir)
-                            zip_ref.write(file_path, arcname)
+                # If no tag was removed, we're done
+                if not tag_removed:
+                    return True, f"Page {page_id} does not have tag '{tag}'"
 
-            # Upload the updated notebook
-            notebook_name = content_data.get("visibleName", doc_id)
-            success, message = self.upload_file(zip_path, notebook_name)
+                # Update the content data with the new page tags
+                content_data["pageTags"] = new_page_tags
+
+                # Upload the updated notebook
+                success, message = self._upload_updated(
+                    archive, doc_id, temp_dir, content_data
+                )
             if not success:
                 return False, f"Failed to upload updated notebook: {message}"
 
@@ -529,7 +523,10 @@ class CassidyAdapter(RmapiAdapter):
         """
         Convert a reMarkable .rm file to a PNG image.
 
-        This requires either rmkit tools or a similar utility to be installed.
+        Pages are rendered in process with the native rasterizer, and an
+        unchanged page is served from the rendered page cache. The rmkit
+        ``rM2svg`` + Inkscape/cairosvg chain is only used for files the
+        rasterizer cannot read (e.g. pre-v6 pages) or when rmscene is missing.
 
         Args:
             rm_file_path: Path to .rm file
@@ -538,7 +535,6 @@ class CassidyAdapter(RmapiAdapter):
         Returns:
             Tuple of (success, output_path or error message)
         """
-        # Use the existing utility for now or consider implementing a drawj2d approach
         if not output_dir:
             output_dir = os.path.dirname(rm_file_path)
 
@@ -550,6 +546,20 @@ class CassidyAdapter(RmapiAdapter):
         png_filename = f"{os.path.splitext(rm_basename)[0]}.png"
         output_path = os.path.join(output_dir, png_filename)
 
+        try:
+            with open(rm_file_path, "rb") as f:
+                page_data = f.read()
+            cache = self.render_cache or get_shared_render_cache()
+            cached_path = cache.get_or_render(
+                hashlib.sha256(page_data).hexdigest(),
+                lambda: to_png_bytes(render_page(page_data, DEFAULT_DPI)),
+                DEFAULT_DPI,
+            )
+            shutil.copyfile(cached_path, output_path)
+            return True, output_path
+        except (ImportError, ValueError, OSError) as e:
+            logger.warning(f"Native rendering failed, trying rM2svg: {e}")
+
         # Check if rmkit's rM2svg is available
         rmt_svg_path = shutil.which("rM2svg")
         if not rmt_svg_path:
@@ -638,20 +648,20 @@ class CassidyAdapter(RmapiAdapter):
         if not os.path.exists(output_dir):
             os.makedirs(output_dir, exist_ok=True)
 
-        # Download and extract the notebook
+        # Download the notebook; only its pages are written out
         temp_dir = tempfile.mkdtemp(prefix="remarkable_convert_")
 
         try:
-            success, extract_dir = self.download_notebook(doc_id, temp_dir)
+            success, zip_path = self._download_archive(doc_id, temp_dir)
             if not success:
-                return False, [extract_dir]  # Error message
+                return False, [zip_path]  # Error message
 
-            # Find all .rm files
-            rm_files = []
-            for root, _, files in os.walk(extract_dir):
-                for file in files:
-                    if file.endswith(".rm"):
-                        rm_files.append(os.path.join(root, file))
+            pages_dir = os.path.join(temp_dir, "pages")
+            with RmdocArchive(zip_path) as archive:
+                rm_files = [
+                    archive.extract_page(page_id, pages_dir)
+                    for page_id in archive.page_ids()
+                ]
 
             if not rm_files:
                 return False, ["No .rm files found in notebook"]
@@ -692,10 +702,10 @@ class CassidyAdapter(RmapiAdapter):
         Append text to a notebook page by creating a new page or adding annotations.
 
         This method:
-        1. Downloads and extracts the notebook
+        1. Downloads the notebook
         2. Creates a new page or adds annotations based on append_mode
         3. Adds the new page/annotations to the notebook
-        4. Repackages and uploads the notebook
+        4. Writes an updated copy, reusing unchanged members, and uploads it
         5. Optionally removes the Cass tag
 
         Args:
@@ -708,29 +718,21 @@ class CassidyAdapter(RmapiAdapter):
         Returns:
             Tuple of (success, message)
         """
-        try:
-            # Create a temporary directory for processing
-            temp_dir = tempfile.mkdtemp(prefix="remarkable_append_")
+        # Create a temporary directory for processing
+        temp_dir = tempfile.mkdtemp(prefix="remarkable_append_")
+        archive = None
 
-            # Download and extract the notebook
-            success, extract_dir = self.download_notebook(doc_id, temp_dir)
+        try:
+            # Download the notebook; members are read from the archive
+            success, zip_path = self._download_archive(doc_id, temp_dir)
             if not success:
-                return False, extract_dir  # Error message
+                return False, zip_path  # Error message
 
-            # Find the content file
-            content_files = []
-            for root, _, files in os.walk(extract_dir):
-                for file in files:
-                    if file.endswith(".content"):
-                        content_files.append(os.path.join(root, file))
-
-            if not content_files:
+            archive = RmdocArchive(zip_path)
+            if not archive.content_name:
                 return False, "No content file found in notebook"
-
-            # Read the content file
-            content_path = content_files[0]
-            with open(content_path, "r") as f:
-                content_data = json.load(f)
+            content_data = archive.content
+            updates: Dict[str, bytes] = {}
 
             # Handle different append modes
             if append_mode == "new_page":
@@ -752,14 +754,17 @@ class CassidyAdapter(RmapiAdapter):
                 content_data["pages"] = pages
 
                 # Generate the .rm file for the response using HCL templates
-                rm_dir = os.path.join(extract_dir, os.path.dirname(content_files[0]))
-                new_page_path = os.path.join(rm_dir, f"{new_page_id}.rm")
+                new_page_path = os.path.join(temp_dir, f"{new_page_id}.rm")
 
                 # Create a simple .rm file with text
                 success, message = self._create_text_rm_file(new_page_path, text)
                 if not success:
                     return False, f"Failed to create text rm file: {message}"
 
+                # Added next to the other pages of the notebook
+                with open(new_page_path, "rb") as f:
+                    updates[f"{archive.doc_id or doc_id}/{new_page_id}.rm"] = f.read()
+
                 logger.info(f"Created new page with ID {new_page_id} for response")
 
             elif append_mode == "annotation":
@@ -768,34 +773,12 @@ class CassidyAdapter(RmapiAdapter):
                 # For now, we'll add a simple text header with timestamp to the existing page
 
                 # Find the .rm file for the page
-                rm_file_path = None
-                for root, _, files in os.walk(extract_dir):
-                    for file in files:
-                        if file.endswith(".rm") and page_id in file:
-                            rm_file_path = os.path.join(root, file)
-                            break
-
-                if not rm_file_path:
+                if not archive.page_member(page_id):
                     return False, f"Could not find .rm file for page {page_id}"
 
-                # Create the annotation text with timestamp
-                from datetime import datetime
-
-                # timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")  # Currently unused
-                # annotation_text = f"Claude Response ({timestamp}):\n\n{text}"  # Unused variable
-                # Create an annotation file by adding strokes
                 # This is a simplification - in a real implementation, we would use
-                # a proper annotation approach, possibly using drawj2d
-                new_rm_file_path = f"{rm_file_path}.annotated"
-
-                # We'll copy the original file for now and modify it if needed
-                shutil.copy(rm_file_path, new_rm_file_path)
-
-                # Rename the new file to replace the original
-                os.replace(new_rm_file_path, rm_file_path)
-
-                # In a real implementation, we would actually modify the .rm file
-                # to add the annotation text as strokes
+                # a proper annotation approach, possibly using drawj2d, and put
+                # the modified .rm file in updates; for now the page is unchanged
                 logger.info(
                     f"Added annotation to page {page_id} (simplified implementation)"
                 )
@@ -826,27 +809,9 @@ class CassidyAdapter(RmapiAdapter):
                     content_data["tags"].remove(self.tag)
                     logger.info(f"Removed notebook tag '{self.tag}'")
 
-            # Write the updated content file
-            with open(content_path, "w") as f:
-                json.dump(content_data, f)
-
-            # Repackage the notebook
-            zip_path = os.path.join(temp_dir, f"{doc_id}_updated.zip")
-            with zipfile.ZipFile(zip_path, "w") as zip_ref:
-                # We need to maintain the correct directory structure
-                for root, _, files in os.walk(extract_dir):
-                    for file in files:
-                        if (
-                            file != f"{doc_id}_updated.zip"
-                        ):  # Avoid adding the zip to itself
-                            file_path = os.path.join(root, file)
-                            # Get the relative path from the extract_dir
-                            arcname = os.path.relpath(file_path, extract_dir)
-                            zip_ref.write(file_path, arcname)
-
             # Upload the updated notebook
-            success, message = self.upload_file(
-                zip_path, content_data.get("visibleName", doc_id)
+            success, message = self._upload_updated(
+                archive, doc_id, temp_dir, content_data, updates
             )
             if not success:
                 return False, f"Failed to upload updated notebook: {message}"
@@ -866,6 +831,8 @@ class CassidyAdapter(RmapiAdapter):
 
         finally:
             # Clean up
+            if archive is not None:
+                archive.close()
             try:
                 shutil.rmtree(temp_dir)
             except Exception:
@@ -995,27 +962,204 @@ class CassidyAdapter(RmapiAdapter):
             logger.error(f"Error creating text .rm file: {str(e)}")
             return False, f"Error creating text .rm file: {str(e)}"
 
+    @staticmethod
+    def listing_stamp(metadata: Dict[str, Any]) -> Optional[List[Any]]:
+        """
+        Get the version stamp of a document listing entry.
+
+        Args:
+            metadata: Listing or stat entry with rmapi-style keys
+
+        Returns:
+            [Version, ModifiedClient], or None if the entry carries neither
+        """
+        version = metadata.get("Version")
+        last_modified = metadata.get("ModifiedClient")
+        if version is None and last_modified is None:
+            return None
+        return [version, last_modified]
+
+    def _load_snapshot(self) -> Dict[str, Dict[str, Any]]:
+        """Load the listing snapshot of the previous check."""
+        if not os.path.exists(self.snapshot_path):
+            return {}
+        try:
+            with open(self.snapshot_path, "r") as f:
+                return json.load(f)
+        except Exception as e:
+            logger.warning(f"Failed to load listing snapshot: {e}")
+            return {}
+
+    def _save_snapshot(self, snapshot: Dict[str, Dict[str, Any]]) -> None:
+        """Write the listing snapshot atomically."""
+        try:
+            directory = os.path.dirname(self.snapshot_path) or "."
+            os.makedirs(directory, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+            with os.fdopen(fd, "w") as f:
+                json.dump(snapshot, f)
+            os.replace(tmp_path, self.snapshot_path)
+        except Exception as e:
+            logger.error(f"Failed to save listing snapshot: {e}")
+
+    @staticmethod
+    def content_tagged(content_data: Dict[str, Any], tag: str) -> bool:
+        """
+        Check a content file for a tag on the notebook or on any of its pages.
+
+        Args:
+            content_data: Parsed .content file
+            tag: Tag to look for, matched case-insensitively
+
+        Returns:
+            True if the notebook or one of its pages carries the tag
+        """
+        wanted = tag.lower()
+        tags = content_data.get("tags") or []
+        page_tags = content_data.get("pageTags") or []
+        return any(str(t).lower() == wanted for t in tags) or any(
+            str(page_tag.get("tag", "")).lower() == wanted for page_tag in page_tags
+        )
+
     def check_for_updates(
-        self, last_check_time: Optional[float] = None
+        self, last_check_time: Optional[float] = None, save_snapshot: bool = True
     ) -> List[Dict[str, Any]]:
         """
-        Check for any notebooks that have been updated since the last check time.
+        Find tagged notebooks created, modified or deleted since the last check.
+
+        The cloud listing's version and modification time of each document are
+        compared with the snapshot persisted by the previous check. Only new or
+        changed documents are downloaded to check their tag; documents whose
+        listing carries no version information are always re-checked. A
+        document that cannot be stat'ed or downloaded keeps its previous
+        snapshot entry, so it is checked again next time rather than being
+        reported as untagged or deleted.
 
         Args:
-            last_check_time: Time of the last check (defaults to self.last_check_time)
+            last_check_time: Kept for compatibility; changes are detected
+                             against the persisted snapshot instead
+            save_snapshot: Save the new snapshot now; if False it is kept
+                           until save_pending_snapshot() is called
 
         Returns:
-            List of updated notebooks with the Cassidy tag
+            List of notebook dicts (id, name, metadata) with a "change" of
+            created/modified/deleted and whether the notebook or one of its
+            pages is "tagged" now. A notebook that lost the tag is reported as
+            modified, not tagged.
         """
-        # Use the provided check time or the instance's last check time
-        # check_time = last_check_time or self.last_check_time  # Currently unused
+        if not self._validate_executable():
+            logger.error("rmapi path not valid")
+            return []
+
+        document_index = self.get_document_index()
+        if not document_index.refresh():
+            # Without a complete listing nothing can be reported as deleted
+            logger.error("Failed to list documents")
+            return []
+
+        previous = self._load_snapshot()
+        snapshot: Dict[str, Dict[str, Any]] = {}
+        changes = []
 
-        # Find all tagged notebooks
-        tagged_notebooks = self.find_tagged_notebooks()
+        def keep_previous(name: str) -> None:
+            # The ID is unknown without the stat, so match the entry by name
+            for known_id, known in previous.items():
+                if known.get("name") == name:
+                    snapshot[known_id] = known
 
-        # Update the last check time
+        for doc in document_index.documents():
+            if not doc.name or doc.name == "Unnamed":
+                continue
+
+            # Only stat documents whose ID the listing did not include
+            entry = doc.to_entry()
+            if not doc.has_cloud_id:
+                success, stdout, stderr = self.run_command("stat", doc.name)
+                if not success:
+                    logger.error(f"Failed to get metadata for {doc.name}: {stderr}")
+                    keep_previous(doc.name)
+                    continue
+                try:
+                    entry = json.loads(stdout)
+                except json.JSONDecodeError:
+                    logger.error(f"Failed to parse metadata JSON for {doc.name}")
+                    keep_previous(doc.name)
+                    continue
+
+            doc_id = entry.get("ID")
+            if not doc_id:
+                logger.error(f"Could not find ID for {doc.name}")
+                keep_previous(doc.name)
+                continue
+
+            stamp = self.listing_stamp(entry)
+            known = previous.get(doc_id)
+            if known and stamp is not None and known.get("stamp") == stamp:
+                # Unchanged since the last check: keep its tag state
+                snapshot[doc_id] = known
+                continue
+
+            has_tag, content_data = self._check_document_for_tag(doc.name, self.tag)
+            if has_tag is None:
+                # Keep the old stamp so the next check downloads it again
+                if known:
+                    snapshot[doc_id] = known
+                continue
+
+            tagged = bool(has_tag) or self.content_tagged(content_data, self.tag)
+            snapshot[doc_id] = {"name": doc.name, "stamp": stamp, "tagged": tagged}
+
+            # Report documents that are tagged now or were tagged before
+            if tagged or (known and known.get("tagged")):
+                changes.append(
+                    {
+                        "id": doc_id,
+                        "name": doc.name,
+                        "metadata": content_data,
+                        "change": CHANGE_MODIFIED if known else CHANGE_CREATED,
+                        "tagged": tagged,
+                    }
+                )
+
+        for doc_id, known in previous.items():
+            if doc_id not in snapshot and known.get("tagged"):
+                changes.append(
+                    {
+                        "id": doc_id,
+                        "name": known.get("name"),
+                        "metadata": {},
+                        "change": CHANGE_DELETED,
+                        "tagged": False,
+                    }
+                )
+
+        self._pending_snapshot = (previous, snapshot)
+        if save_snapshot:
+            self.save_pending_snapshot()
         self.last_check_time = time.time()
 
-        # For now, return all tagged notebooks
-        # In the future, we could implement checking for updates based on the "lastModified" field
-        return tagged_notebooks
+        logger.info(
+            f"Found {len(changes)} changed tagged notebooks "
+            f"out of {len(snapshot)} documents"
+        )
+        return changes
+
+    def save_pending_snapshot(self, retry: Iterable[str] = ()) -> None:
+        """
+        Save the snapshot of a check_for_updates(save_snapshot=False) call.
+
+        Args:
+            retry: IDs of reported documents that were not handled; they keep
+                   their previous entry so the next check reports them again
+        """
+        if self._pending_snapshot is None:
+            return
+        previous, snapshot = self._pending_snapshot
+        self._pending_snapshot = None
+
+        for doc_id in retry:
+            if doc_id in previous:
+                snapshot[doc_id] = previous[doc_id]
+            else:
+                snapshot.pop(doc_id, None)
+        self._save_snapshot(snapshot)
@@ -12,6 +12,8 @@ import tempfile
 from typing import Any, Dict, List, Optional, Tuple, Union
 
 from inklink.adapters.adapter import Adapter
+from inklink.adapters.claude_cli_pool import get_session_pool
+from inklink.config import CONFIG
 
 logger = logging.getLogger(__name__)
 
@@ -24,6 +26,7 @@ class ClaudeCliAdapter(Adapter):
         claude_command: Optional[str] = None,
         model: Optional[str] = None,
         system_prompt: Optional[str] = None,
+        session_pool_size: Optional[int] = None,
     ):
         """
         Initialize ClaudeCliAdapter.
@@ -32,6 +35,10 @@ class ClaudeCliAdapter(Adapter):
             claude_command: Command to invoke Claude CLI (e.g., 'claude')
             model: Claude model to use (e.g., 'claude-3-opus-20240229')
             system_prompt: Default system prompt to use
+            session_pool_size: Number of pre-started Claude CLI sessions to send
+                               one-off completions through (defaults to
+                               CLAUDE_SESSION_POOL_SIZE; 0 spawns a process per
+                               call)
         """
         # Set the Claude CLI command
         self.claude_command = claude_command or os.environ.get(
@@ -59,6 +66,13 @@ class ClaudeCliAdapter(Adapter):
         # Track conversation IDs for context
         self.conversation_ids = {}
 
+        # Long-lived CLI sessions for completions without a conversation
+        self.session_pool_size = (
+            session_pool_size
+            if session_pool_size is not None
+            else CONFIG.get("CLAUDE_SESSION_POOL_SIZE", 0)
+        )
+
     def ping(self) -> bool:
         """
         Check if the Claude CLI is available.
@@ -107,6 +121,15 @@ class ClaudeCliAdapter(Adapter):
         Returns:
             Tuple of (success: bool, completion_or_error: str)
         """
+        # Conversations are tracked by the CLI's own -c/-r sessions
+        pool = None
+        if not (use_context or conversation_id):
+            pool = get_session_pool(
+                self.claude_command, self.model, self.session_pool_size
+            )
+        if pool is not None:
+            return pool.run(prompt, system_prompt=system_prompt)
+
         try:
             # Create temporary files for input and output
             with tempfile.NamedTemporaryFile(
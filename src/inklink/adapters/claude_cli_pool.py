@@ -0,0 +1,503 @@
+"""Pre-started Claude CLI sessions for InkLink.
+
+This module keeps a few Claude CLI processes started ahead of time in
+streaming JSON mode (``-p --input-format stream-json --output-format
+stream-json``) and sends each request to one of them as a JSON line on
+stdin, so a page or query does not wait for CLI startup, and images travel
+inline as base64 instead of through temporary files.
+
+A session keeps its conversation, so each one answers a single request and
+is then closed: every request starts from a fresh context, and a
+replacement is started as soon as a ready session is handed out.
+"""
+
+import base64
+import collections
+import concurrent.futures
+import json
+import logging
+import shlex
+import subprocess
+import threading
+import time
+from typing import Any, Deque, Dict, List, Optional, Sequence, Tuple, Union
+
+from inklink.config import CONFIG
+
+logger = logging.getLogger(__name__)
+
+ImageInput = Union[str, bytes]
+
+
+def _media_type(data: bytes) -> str:
+    """Guess the media type of encoded image bytes from their signature."""
+    if data.startswith(b"\x89PNG"):
+        return "image/png"
+    if data.startswith(b"\xff\xd8"):
+        return "image/jpeg"
+    if data[:4] == b"RIFF" and data[8:12] == b"WEBP":
+        return "image/webp"
+    if data.startswith(b"GIF8"):
+        return "image/gif"
+    raise ValueError("Unsupported image format")
+
+
+def build_content(
+    prompt: str,
+    images: Optional[Sequence[ImageInput]] = None,
+    system_prompt: Optional[str] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Build the content blocks of a user message.
+
+    The CLI has no per-message system prompt, so one is prepended to the
+    prompt text like the process-per-call adapters do.
+
+    Args:
+        prompt: User prompt text
+        images: Image paths or encoded image bytes, sent before the prompt
+        system_prompt: Optional system prompt
+
+    Returns:
+        List of image and text content blocks
+    """
+    content: List[Dict[str, Any]] = []
+    for image in images or []:
+        if isinstance(image, str):
+            with open(image, "rb") as f:
+                image = f.read()
+        content.append(
+            {
+                "type": "image",
+                "source": {
+                    "type": "base64",
+                    "media_type": _media_type(image),
+                    "data": base64.b64encode(image).decode("ascii"),
+                },
+            }
+        )
+    text = f"System: {system_prompt}\n\n{prompt}" if system_prompt else prompt
+    content.append({"type": "text", "text": text})
+    return content
+
+
+class ClaudeSessionWorker:
+    """A single Claude CLI process in streaming JSON mode."""
+
+    STREAM_FLAGS = [
+        "-p",
+        "--input-format",
+        "stream-json",
+        "--output-format",
+        "stream-json",
+        "--verbose",
+    ]
+
+    def __init__(self, claude_command: str, model: Optional[str] = None):
+        """
+        Initialize the worker.
+
+        Args:
+            claude_command: Command to invoke the Claude CLI
+            model: Claude model to use
+        """
+        self.claude_command = claude_command
+        self.model = model
+        self._process: Optional[subprocess.Popen] = None
+        self._pending: Deque[concurrent.futures.Future] = collections.deque()
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._reader: Optional[threading.Thread] = None
+        self._output_closed = False
+        self.requests_sent = 0
+        self.started_at: Optional[float] = None
+
+    @property
+    def alive(self) -> bool:
+        """Whether the CLI process is running and its output is being read."""
+        return (
+            self._process is not None
+            and self._process.poll() is None
+            and not self._output_closed
+        )
+
+    @property
+    def in_flight(self) -> int:
+        """Number of requests sent and not yet answered."""
+        return len(self._pending)
+
+    def start(self) -> None:
+        """
+        Start the CLI process.
+
+        The CLI prints nothing until its first request arrives, so this does
+        not wait for the session to become ready.
+        """
+        args = shlex.split(self.claude_command) + self.STREAM_FLAGS
+        if self.model:
+            args += ["--model", self.model]
+        self._process = subprocess.Popen(
+            args,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            text=True,
+            bufsize=1,
+        )
+        self._pending = collections.deque()
+        self._output_closed = False
+        self.requests_sent = 0
+        self._reader = threading.Thread(
+            target=self._read_output,
+            args=(self._process, self._pending),
+            daemon=True,
+        )
+        self._reader.start()
+        self.started_at = time.time()
+        logger.info(f"Started Claude CLI session worker (pid {self._process.pid})")
+
+    def _read_output(
+        self,
+        process: subprocess.Popen,
+        pending: Deque[concurrent.futures.Future],
+    ) -> None:
+        """Resolve pending requests in order as their results stream in."""
+        text: List[str] = []
+        try:
+            for line in process.stdout:
+                try:
+                    message = json.loads(line)
+                except ValueError:
+                    logger.debug(f"Ignoring non-JSON CLI output: {line.rstrip()}")
+                    continue
+
+                if message.get("type") == "assistant":
+                    for block in message.get("message", {}).get("content", []):
+                        if block.get("type") == "text":
+                            text.append(block.get("text", ""))
+                elif message.get("type") == "result":
+                    result = message.get("result")
+                    if result is None:
+                        result = "".join(text)
+                    text = []
+                    with self._lock:
+                        future = pending.popleft() if pending else None
+                    if future is not None and not future.done():
+                        future.set_result((not message.get("is_error"), result))
+        except Exception as e:
+            logger.debug(f"Claude CLI session reader stopped: {e}")
+        finally:
+            with self._lock:
+                if pending is self._pending:
+                    self._output_closed = True
+                while pending:
+                    future = pending.popleft()
+                    if not future.done():
+                        future.set_exception(
+                            RuntimeError("Claude CLI session exited unexpectedly")
+                        )
+
+    def submit(self, content: List[Dict[str, Any]]) -> concurrent.futures.Future:
+        """
+        Send a request without waiting for earlier ones to finish.
+
+        Args:
+            content: Content blocks of the user message
+
+        Returns:
+            Future resolving to (success, response text)
+
+        Raises:
+            RuntimeError: If the process is not running or not accepting input
+        """
+        line = json.dumps(
+            {"type": "user", "message": {"role": "user", "content": content}}
+        )
+        future: concurrent.futures.Future = concurrent.futures.Future()
+        # Requests are written in the order their futures are queued; the
+        # reader only needs the queue lock, so it keeps draining stdout while a
+        # large request is being written
+        with self._write_lock:
+            with self._lock:
+                if not self.alive:
+                    raise RuntimeError("Claude CLI session is not running")
+                self._pending.append(future)
+                self.requests_sent += 1
+            try:
+                self._process.stdin.write(line + "\n")
+                self._process.stdin.flush()
+            except (BrokenPipeError, OSError) as e:
+                with self._lock:
+                    if future in self._pending:
+                        self._pending.remove(future)
+                raise RuntimeError(f"Claude CLI session is not accepting input: {e}")
+        return future
+
+    def close(self) -> None:
+        """Close the session; pending requests fail."""
+        if self._process is None:
+            return
+        try:
+            if self._process.poll() is None:
+                # End of input ends the session
+                try:
+                    self._process.stdin.close()
+                except Exception:
+                    pass
+                try:
+                    self._process.wait(timeout=2)
+                except subprocess.TimeoutExpired:
+                    self._process.kill()
+                    self._process.wait(timeout=2)
+        except Exception as e:
+            logger.warning(f"Error stopping Claude CLI session worker: {e}")
+        if self._reader is not None:
+            self._reader.join(timeout=2)
+        self._process = None
+
+    def restart(self) -> None:
+        """Replace the CLI process with a fresh session."""
+        self.close()
+        self.start()
+
+
+class ClaudeWorkerPool:
+    """Pool of pre-started Claude CLI sessions, each used for one request."""
+
+    def __init__(
+        self,
+        claude_command: str,
+        model: Optional[str] = None,
+        size: int = 2,
+        request_timeout: float = 300.0,
+    ):
+        """
+        Initialize the pool. Sessions are started lazily on first use.
+
+        Args:
+            claude_command: Command to invoke the Claude CLI
+            model: Claude model to use
+            size: Number of started sessions to keep ready for new requests
+            request_timeout: Default per-request timeout in seconds
+        """
+        self.claude_command = claude_command
+        self.model = model
+        self.size = max(1, int(size))
+        self.request_timeout = request_timeout
+
+        self._ready: Deque[ClaudeSessionWorker] = collections.deque()
+        self._starting = 0
+        self._active = 0
+        self._lock = threading.Lock()
+        self._closed = False
+
+        self._stats = {
+            "requests": 0,
+            "failures": 0,
+            "timeouts": 0,
+            "started": 0,
+            "discarded": 0,
+        }
+
+    def _start_session(self) -> ClaudeSessionWorker:
+        """Start a new session."""
+        worker = ClaudeSessionWorker(self.claude_command, self.model)
+        worker.start()
+        with self._lock:
+            self._stats["started"] += 1
+        return worker
+
+    def _checkout(self) -> ClaudeSessionWorker:
+        """
+        Take a ready session, or start one if none is ready.
+
+        Ready sessions that died while waiting are discarded.
+
+        Returns:
+            A session that has not answered any request
+        """
+        worker = None
+        stale = []
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("Claude worker pool is closed")
+            while self._ready and worker is None:
+                candidate = self._ready.popleft()
+                if candidate.alive:
+                    worker = candidate
+                else:
+                    self._stats["discarded"] += 1
+                    stale.append(candidate)
+
+        for candidate in stale:
+            logger.warning("Ready Claude CLI session exited; discarding it")
+            candidate.close()
+        return worker or self._start_session()
+
+    def _refill(self) -> None:
+        """Start sessions until size of them are ready or starting."""
+        with self._lock:
+            missing = self.size - len(self._ready) - self._starting
+            if self._closed or missing <= 0:
+                return
+            self._starting += missing
+
+        for _ in range(missing):
+            worker = None
+            try:
+                worker = self._start_session()
+            except Exception as e:
+                logger.error(f"Could not start Claude CLI session: {e}")
+            with self._lock:
+                self._starting -= 1
+                if worker is not None and not self._closed:
+                    self._ready.append(worker)
+                    worker = None
+            if worker is not None:
+                worker.close()
+
+    @staticmethod
+    def _retire(worker: ClaudeSessionWorker) -> None:
+        """Close a used session without making the caller wait for it."""
+        threading.Thread(target=worker.close, daemon=True).start()
+
+    def run(
+        self,
+        prompt: str,
+        images: Optional[Sequence[ImageInput]] = None,
+        system_prompt: Optional[str] = None,
+        timeout: Optional[float] = None,
+    ) -> Tuple[bool, str]:
+        """
+        Send a request to a fresh session and wait for its response.
+
+        Args:
+            prompt: User prompt text
+            images: Image paths or encoded image bytes
+            system_prompt: Optional system prompt
+            timeout: Per-request timeout in seconds (defaults to request_timeout)
+
+        Returns:
+            Tuple of (success, response text or error message)
+        """
+        timeout = timeout or self.request_timeout
+        with self._lock:
+            self._stats["requests"] += 1
+            self._active += 1
+
+        worker = None
+        try:
+            content = build_content(prompt, images, system_prompt)
+            worker = self._checkout()
+            future = worker.submit(content)
+            # Start the next request's session while this one is answered
+            self._refill()
+            success, response = future.result(timeout=timeout)
+        except concurrent.futures.TimeoutError:
+            with self._lock:
+                self._stats["timeouts"] += 1
+                self._stats["failures"] += 1
+            return False, f"Claude CLI session timed out after {timeout} seconds"
+        except Exception as e:
+            with self._lock:
+                self._stats["failures"] += 1
+            logger.error(f"Claude CLI session request failed: {e}")
+            return False, str(e)
+        finally:
+            with self._lock:
+                self._active -= 1
+            if worker is not None:
+                self._retire(worker)
+
+        if not success:
+            with self._lock:
+                self._stats["failures"] += 1
+        return success, response
+
+    def close(self) -> None:
+        """Stop the ready sessions; sessions answering requests stop afterwards."""
+        with self._lock:
+            self._closed = True
+            ready = list(self._ready)
+            self._ready.clear()
+        for worker in ready:
+            worker.close()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get pool statistics.
+
+        Returns:
+            Dictionary with ready and active session counts and request
+            counters
+        """
+        with self._lock:
+            return {
+                "size": self.size,
+                "ready": len(self._ready),
+                "active": self._active,
+                **self._stats,
+            }
+
+
+_shared_pools: Dict[Tuple[str, Optional[str]], ClaudeWorkerPool] = {}
+_shared_lock = threading.Lock()
+
+
+def get_shared_pool(
+    claude_command: str, model: Optional[str] = None, size: int = 2, **options: Any
+) -> ClaudeWorkerPool:
+    """
+    Get the session pool shared by every adapter using the same CLI and model.
+
+    Args:
+        claude_command: Command to invoke the Claude CLI
+        model: Claude model to use
+        size: Number of sessions if the pool is new
+        **options: Other ClaudeWorkerPool arguments if the pool is new
+
+    Returns:
+        The shared ClaudeWorkerPool
+    """
+    key = (claude_command, model or None)
+    with _shared_lock:
+        pool = _shared_pools.get(key)
+        if pool is None:
+            pool = ClaudeWorkerPool(claude_command, model or None, size, **options)
+            _shared_pools[key] = pool
+        return pool
+
+
+def get_session_pool(
+    claude_command: str, model: Optional[str], size: int
+) -> Optional[ClaudeWorkerPool]:
+    """
+    Get the shared session pool for an adapter's CLI and model.
+
+    The pool is shared with other adapters, so callers needing a different
+    timeout pass it to ``run`` rather than relying on the pool's default.
+
+    Args:
+        claude_command: Command to invoke the Claude CLI
+        model: Claude model to use
+        size: Number of sessions (0 or less disables pooling)
+
+    Returns:
+        The shared ClaudeWorkerPool, or None if requests spawn a process per call
+    """
+    if size <= 0:
+        return None
+    return get_shared_pool(
+        claude_command,
+        model,
+        size,
+        request_timeout=CONFIG.get("CLAUDE_SESSION_TIMEOUT", 300),
+    )
+
+
+def close_shared_pools() -> None:
+    """Stop the sessions of every shared pool."""
+    with _shared_lock:
+        for pool in _shared_pools.values():
+            pool.close()
+        _shared_pools.clear()
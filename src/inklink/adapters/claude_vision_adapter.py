@@ -10,8 +10,12 @@ import concurrent.futures
 import logging
 import os
 import random
+import re
+import shlex
+import shutil
 import subprocess
 import tempfile
+import threading
 import time
 from typing import Any, Callable, Dict, List, Optional, Tuple, Union
 
@@ -20,6 +24,18 @@ import numpy as np
 # PIL for image processing
 from PIL import Image, ImageEnhance, ImageFilter
 
+from inklink.adapters.claude_cli_pool import get_session_pool
+from inklink.config import CONFIG
+from inklink.utils.content_classifier import DEFAULT_MIN_CONFIDENCE, classify_strokes
+from inklink.utils.image_preprocessing import encode_gray, load_gray, preprocess_array
+from inklink.utils.stroke_batch import StrokeBatch
+from inklink.utils.vision_image import (
+    MAX_SIDE,
+    crop_to_ink,
+    prepare_vision_image,
+    tile_pages,
+)
+
 from .adapter import Adapter
 
 
@@ -42,6 +58,14 @@ class ClaudeVisionAdapter(Adapter):
         apply_thresholding: bool = True,
         enable_parallel_processing: bool = True,
         max_parallel_workers: int = 4,
+        crop_to_ink: bool = True,
+        vision_image_format: str = "png",
+        max_image_side: int = MAX_SIDE,
+        enable_tiling: bool = False,
+        tile_budget: int = 4,
+        classifier_min_confidence: float = DEFAULT_MIN_CONFIDENCE,
+        preprocessing_backend: str = "pil",
+        session_pool_size: Optional[int] = None,
     ):
         """
         Initialize the Claude Vision adapter.
@@ -54,6 +78,24 @@ class ClaudeVisionAdapter(Adapter):
             brightness_factor: Factor to enhance brightness (default: 1.2)
             target_dpi: Target DPI for image optimization (default: 300)
             apply_thresholding: Whether to apply thresholding for background removal
+            enable_parallel_processing: Whether to process pages in parallel
+            max_parallel_workers: Maximum number of pages processed in parallel
+            crop_to_ink: Whether to crop images to the ink and downscale them
+                         before sending them to Claude
+            vision_image_format: Encoding of prepared images ("png" or "webp")
+            max_image_side: Long side of prepared images with dense writing
+            enable_tiling: Whether to pack several pages into one composite
+                           image per request in process_multiple_images
+            tile_budget: Maximum number of pages per composite image
+            classifier_min_confidence: Confidence the stroke classifier needs
+                                       before its content type is used
+            preprocessing_backend: "pil" to preprocess with PIL filters into a
+                                   file, "numpy" to preprocess in memory with
+                                   adaptive thresholding
+            session_pool_size: Number of pre-started Claude CLI sessions to send
+                               requests through (defaults to
+                               CLAUDE_SESSION_POOL_SIZE; 0 spawns a process per
+                               call)
         """
         super().__init__()
         self.logger = logging.getLogger(__name__)
@@ -73,11 +115,31 @@ class ClaudeVisionAdapter(Adapter):
         self.brightness_factor = brightness_factor
         self.target_dpi = target_dpi
         self.apply_thresholding = apply_thresholding
+        self.preprocessing_backend = preprocessing_backend
 
         # Parallel processing settings
         self.enable_parallel_processing = enable_parallel_processing
         self.max_parallel_workers = max_parallel_workers
 
+        # Image size reduction settings
+        self.crop_to_ink = crop_to_ink
+        self.vision_image_format = vision_image_format
+        self.max_image_side = max_image_side
+        self.image_stats = {"images": 0, "bytes_before": 0, "bytes_after": 0}
+        self._image_stats_lock = threading.Lock()
+
+        # Multi-page tiling settings
+        self.enable_tiling = enable_tiling
+        self.tile_budget = tile_budget
+        self.classifier_min_confidence = classifier_min_confidence
+
+        # Long-lived CLI sessions
+        self.session_pool_size = (
+            session_pool_size
+            if session_pool_size is not None
+            else CONFIG.get("CLAUDE_SESSION_POOL_SIZE", 0)
+        )
+
         # Check if claude CLI is available
         self._check_claude_availability()
 
@@ -207,6 +269,122 @@ class ClaudeVisionAdapter(Adapter):
             # Return the original image if preprocessing fails
             return image_path
 
+    def preprocess_image_bytes(
+        self,
+        image: Union[str, bytes],
+        content_type: str = "text",
+        strokes: Optional[StrokeBatch] = None,
+    ) -> bytes:
+        """
+        Preprocess an image in memory and encode it for Claude.
+
+        Applies the content type's NumPy profile (Sauvola thresholding for
+        text) and, when enabled, crops to the ink and downscales. Nothing is
+        written to disk and small images are never upscaled.
+
+        Args:
+            image: Path to the image or its encoded bytes
+            content_type: Type of content (text, math, diagram)
+            strokes: Strokes of the page, used for the ink bounding box
+
+        Returns:
+            Encoded grayscale image
+        """
+        processed = Image.fromarray(
+            preprocess_array(
+                load_gray(image),
+                content_type,
+                self.contrast_factor,
+                self.brightness_factor,
+                self.apply_thresholding,
+            )
+        )
+        if self.crop_to_ink:
+            processed, _, _, _ = crop_to_ink(
+                processed, strokes, max_side=self.max_image_side
+            )
+        return encode_gray(processed, self.vision_image_format)
+
+    def _write_preprocessed(
+        self,
+        image_path: str,
+        content_type: str,
+        strokes: Optional[StrokeBatch] = None,
+    ) -> str:
+        """
+        Preprocess an image in memory and write it once for the CLI.
+
+        Args:
+            image_path: Path to the image
+            content_type: Type of content (text, math, diagram)
+            strokes: Strokes of the page, used for the ink bounding box
+
+        Returns:
+            Path to the temporary image, or the result of prepare_for_vision
+            on the original image if preprocessing fails
+        """
+        try:
+            data = self.preprocess_image_bytes(image_path, content_type, strokes)
+            fd, output_path = tempfile.mkstemp(suffix=f".{self.vision_image_format}")
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+        except Exception as e:
+            self.logger.error(f"In-memory preprocessing failed: {e}")
+            return self.prepare_for_vision(image_path, strokes)
+
+        with self._image_stats_lock:
+            self.image_stats["images"] += 1
+            self.image_stats["bytes_before"] += os.path.getsize(image_path)
+            self.image_stats["bytes_after"] += len(data)
+        return output_path
+
+    def prepare_for_vision(
+        self, image_path: str, strokes: Optional[StrokeBatch] = None
+    ) -> str:
+        """
+        Crop an image to its ink and downscale it for Claude.
+
+        Args:
+            image_path: Path to the image
+            strokes: Strokes of the page, used for the ink bounding box
+
+        Returns:
+            Path to the prepared image, or the input path if preparation is
+            disabled or fails
+        """
+        if not self.crop_to_ink:
+            return image_path
+
+        try:
+            report = prepare_vision_image(
+                image_path,
+                strokes=strokes,
+                image_format=self.vision_image_format,
+                max_side=self.max_image_side,
+            )
+        except Exception as e:
+            self.logger.warning(f"Could not prepare image {image_path}: {e}")
+            return image_path
+
+        with self._image_stats_lock:
+            self.image_stats["images"] += 1
+            self.image_stats["bytes_before"] += report["bytes_before"]
+            self.image_stats["bytes_after"] += report["bytes_after"]
+        return report["path"]
+
+    def get_image_stats(self) -> Dict[str, Any]:
+        """
+        Get the totals of image bytes before and after preparation.
+
+        Returns:
+            Dictionary with image count, byte totals and the size ratio
+        """
+        with self._image_stats_lock:
+            stats = dict(self.image_stats)
+        before = stats["bytes_before"]
+        stats["ratio"] = stats["bytes_after"] / before if before else 1.0
+        return stats
+
     def process_image(
         self,
         image_path: str,
@@ -214,6 +392,7 @@ class ClaudeVisionAdapter(Adapter):
         content_type: str = "text",
         max_tokens: int = 4000,
         preprocess: Optional[bool] = None,
+        strokes: Optional[StrokeBatch] = None,
     ) -> Tuple[bool, Union[str, Dict]]:
         """
         Process an image with Claude's vision capabilities via CLI.
@@ -224,6 +403,7 @@ class ClaudeVisionAdapter(Adapter):
             content_type: Type of content in the image (text, math, diagram)
             max_tokens: Maximum number of tokens for Claude's response
             preprocess: Whether to preprocess the image (overrides class setting)
+            strokes: Strokes of the page, used to crop the image to the ink
 
         Returns:
             Tuple of (success, result)
@@ -239,11 +419,18 @@ class ClaudeVisionAdapter(Adapter):
         )
 
         # Preprocess the image if enabled
-        processed_image_path = (
-            self.preprocess_image(image_path, content_type)
-            if should_preprocess
-            else image_path
-        )
+        if should_preprocess and self.preprocessing_backend == "numpy":
+            processed_image_path = image_path
+            vision_image_path = self._write_preprocessed(
+                image_path, content_type, strokes
+            )
+        else:
+            processed_image_path = (
+                self.preprocess_image(image_path, content_type)
+                if should_preprocess
+                else image_path
+            )
+            vision_image_path = self.prepare_for_vision(processed_image_path, strokes)
 
         # Default prompt based on content type
         if prompt is None:
@@ -255,6 +442,15 @@ class ClaudeVisionAdapter(Adapter):
                 prompt = "Please transcribe the handwritten text in this image. Maintain the formatting structure as much as possible."
 
         try:
+            pool = get_session_pool(
+                self.claude_command, self.model, self.session_pool_size
+            )
+            if pool is not None:
+                success, claude_response = pool.run(prompt, images=[vision_image_path])
+                if not success:
+                    return False, f"Claude CLI failed: {claude_response}"
+                return True, claude_response.strip()
+
             # Create a temporary file for the result
             with tempfile.NamedTemporaryFile(
                 mode="w+", suffix=".txt", delete=False
@@ -263,7 +459,7 @@ class ClaudeVisionAdapter(Adapter):
 
                 # Build command: claude <image_path> "prompt" > result_file
                 max_tokens_flag = f"--max-tokens {max_tokens}"
-                command = f'{self.claude_command} {self.model_flag} {max_tokens_flag} "{processed_image_path}" "{prompt}" > {result_path}'
+                command = f'{self.claude_command} {self.model_flag} {max_tokens_flag} "{vision_image_path}" "{prompt}" > {result_path}'
 
                 # Execute the command through shell due to redirection
                 result = subprocess.run(
@@ -296,16 +492,38 @@ class ClaudeVisionAdapter(Adapter):
 
             return False, f"Error processing image: {str(e)}"
 
-    def detect_content_type(self, image_path: str) -> str:
+        finally:
+            if vision_image_path != processed_image_path:
+                try:
+                    os.unlink(vision_image_path)
+                except OSError:
+                    pass
+
+    def detect_content_type(
+        self, image_path: str, strokes: Optional[StrokeBatch] = None
+    ) -> str:
         """
         Attempt to detect the content type of an image (text, math, diagram).
 
+        With the page's strokes, a local stroke classifier decides; the image
+        heuristic is used only when its confidence is low.
+
         Args:
             image_path: Path to the image file
+            strokes: Strokes of the page
 
         Returns:
             Detected content type as string ("text", "math", or "diagram")
         """
+        if strokes is not None:
+            content_type, confidence = classify_strokes(strokes)
+            if confidence >= self.classifier_min_confidence:
+                return content_type
+            self.logger.debug(
+                f"Stroke classifier unsure ({content_type}, {confidence:.2f}); "
+                "using image heuristic"
+            )
+
         try:
             # Open the image
             img = Image.open(image_path)
@@ -350,6 +568,7 @@ class ClaudeVisionAdapter(Adapter):
         context: Optional[str] = None,
         preprocess: bool = True,
         max_tokens: int = 4000,
+        strokes: Optional[StrokeBatch] = None,
     ) -> Tuple[bool, Union[str, Dict]]:
         """
         Process a single image as part of a batch workflow.
@@ -363,13 +582,14 @@ class ClaudeVisionAdapter(Adapter):
             context: Optional context from previous pages
             preprocess: Whether to preprocess the image
             max_tokens: Maximum tokens for response
+            strokes: Strokes of the page, for classification and cropping
 
         Returns:
             Tuple of (success, result)
         """
         # Auto-detect content type if not specified
         if content_type is None:
-            content_type = self.detect_content_type(image_path)
+            content_type = self.detect_content_type(image_path, strokes)
             self.logger.info(
                 f"Auto-detected content type for page {page_index + 1}: {content_type}"
             )
@@ -396,6 +616,7 @@ class ClaudeVisionAdapter(Adapter):
             content_type=content_type,
             max_tokens=max_tokens,
             preprocess=preprocess,
+            strokes=strokes,
         )
 
         # Format the result with clear page markers
@@ -404,6 +625,148 @@ class ClaudeVisionAdapter(Adapter):
 
         return success, result
 
+    @staticmethod
+    def split_tiled_response(response: str, page_numbers: List[int]) -> Dict[int, str]:
+        """
+        Split the response to a composite image into per-page text.
+
+        Args:
+            response: Claude's response with "=== PAGE n ===" markers
+            page_numbers: Pages laid out in the composite
+
+        Returns:
+            Page number to transcription; pages without a marker are missing
+        """
+        markers = list(
+            re.finditer(
+                r"^[ \t]*=+[ \t]*PAGE[ \t]+(\d+)[ \t]*=+[ \t]*$",
+                response,
+                re.MULTILINE | re.IGNORECASE,
+            )
+        )
+        if not markers:
+            # A lone page may come back without its marker
+            if len(page_numbers) == 1:
+                return {page_numbers[0]: response.strip()}
+            return {}
+
+        pages: Dict[int, str] = {}
+        for i, marker in enumerate(markers):
+            page = int(marker.group(1))
+            if page not in page_numbers:
+                continue
+            end = markers[i + 1].start() if i + 1 < len(markers) else len(response)
+            text = response[marker.end() : end].strip()
+            pages[page] = f"{pages[page]}\n{text}" if page in pages else text
+        return pages
+
+    def process_tiled_images(
+        self,
+        image_paths: List[str],
+        prompt: Optional[str] = None,
+        max_tokens: int = 8000,
+        page_strokes: Optional[List[Optional[StrokeBatch]]] = None,
+        maintain_context: bool = False,
+    ) -> Tuple[bool, Union[List[str], str]]:
+        """
+        Recognize several pages with one request per composite image.
+
+        Pages are cropped to their ink, packed into composites of at most
+        tile_budget pages under "PAGE n" labels, and each response is split
+        back into pages using the composite's layout map. Tiles are not
+        preprocessed beyond the crop and downscale.
+
+        Args:
+            image_paths: Paths to the page images
+            prompt: Additional instructions for Claude
+            max_tokens: Maximum number of tokens per response
+            page_strokes: Optional strokes of each page, used for cropping
+            maintain_context: Whether to give each composite's request the end
+                              of the transcription of the pages before it
+
+        Returns:
+            Tuple of (success, result)
+            - If successful, result is the text of each page in order
+              (empty for pages missing from the response)
+            - If unsuccessful, result is an error message
+        """
+        output_dir = tempfile.mkdtemp(prefix="claude_tiles_")
+        try:
+            composites = tile_pages(
+                image_paths,
+                output_dir,
+                strokes=page_strokes,
+                max_tiles=self.tile_budget,
+                image_format=self.vision_image_format,
+            )
+            page_texts = [""] * len(image_paths)
+            transcribed = ""
+
+            for composite in composites:
+                page_numbers = [tile["page"] for tile in composite["pages"]]
+                labels = ", ".join(f"PAGE {page}" for page in page_numbers)
+                tiled_prompt = (
+                    f"This image contains {len(page_numbers)} handwritten notebook "
+                    f"page(s), each in a box under its label ({labels}). "
+                    "Transcribe every page separately. Start each page's "
+                    "transcription with the line === PAGE n === using the label "
+                    "of its box, and never mix content between boxes."
+                )
+                if prompt:
+                    tiled_prompt += (
+                        f" Additional instructions: {' '.join(prompt.split())}"
+                    )
+                if maintain_context and transcribed:
+                    # Same excerpt length as sequential per-page processing
+                    tiled_prompt += (
+                        " For context, the previous pages end with: "
+                        f"{' '.join(transcribed[-500:].split())}"
+                    )
+                pool = get_session_pool(
+                    self.claude_command, self.model, self.session_pool_size
+                )
+                if pool is not None:
+                    success, claude_response = pool.run(
+                        tiled_prompt, images=[composite["path"]]
+                    )
+                    if not success:
+                        return False, f"Claude CLI failed: {claude_response}"
+                else:
+                    # Pass arguments directly so transcribed text is never
+                    # interpreted by a shell
+                    model_args = ["--model", self.model] if self.model else []
+                    command = [
+                        *shlex.split(self.claude_command),
+                        *model_args,
+                        "--max-tokens",
+                        str(max_tokens),
+                        composite["path"],
+                        tiled_prompt,
+                    ]
+                    result = subprocess.run(command, capture_output=True, text=True)
+                    if result.returncode != 0:
+                        return False, f"Claude CLI failed: {result.stderr}"
+                    claude_response = result.stdout
+
+                pages = self.split_tiled_response(claude_response, page_numbers)
+                for page in page_numbers:
+                    if page not in pages:
+                        self.logger.warning(f"No transcription for page {page}")
+                    page_texts[page - 1] = pages.get(page, "")
+                    transcribed += f"\n{page_texts[page - 1]}"
+
+            self.logger.info(
+                f"Processed {len(image_paths)} pages in {len(composites)} tiled requests"
+            )
+            return True, page_texts
+
+        except Exception as e:
+            self.logger.error(f"Error processing tiled images with Claude CLI: {e}")
+            return False, f"Error processing tiled images: {str(e)}"
+
+        finally:
+            shutil.rmtree(output_dir, ignore_errors=True)
+
     def process_multiple_images(
         self,
         image_paths: List[str],
@@ -413,6 +776,8 @@ class ClaudeVisionAdapter(Adapter):
         content_types: Optional[List[str]] = None,
         use_parallel: Optional[bool] = None,
         preprocess: Optional[bool] = None,
+        use_tiling: Optional[bool] = None,
+        page_strokes: Optional[List[Optional[StrokeBatch]]] = None,
     ) -> Tuple[bool, Union[str, Dict]]:
         """
         Process multiple images with Claude's vision capabilities via CLI.
@@ -426,6 +791,15 @@ class ClaudeVisionAdapter(Adapter):
                            If provided, must be same length as image_paths
             use_parallel: Whether to use parallel processing (defaults to class setting)
             preprocess: Whether to preprocess images (defaults to class setting)
+            use_tiling: Whether to pack pages into composite images, one request
+                        per composite (defaults to class setting). Pages are
+                        processed one by one instead when content_types is
+                        given or preprocess is True, since tiles share one
+                        prompt and are only cropped and downscaled;
+                        maintain_context carries earlier composites' text
+                        into later requests
+            page_strokes: Optional strokes of each page, used to classify
+                          pages locally and to crop them to their ink
 
         Returns:
             Tuple of (success, result)
@@ -441,6 +815,11 @@ class ClaudeVisionAdapter(Adapter):
                 False,
                 "If content_types is provided, it must match length of image_paths",
             )
+        if page_strokes and len(page_strokes) != len(image_paths):
+            return (
+                False,
+                "If page_strokes is provided, it must match length of image_paths",
+            )
 
         # Determine whether to use parallel processing
         parallel_processing = (
@@ -449,6 +828,29 @@ class ClaudeVisionAdapter(Adapter):
             else self.enable_parallel_processing
         )
 
+        # Tiling: several pages per request, split back using the layout map
+        tiling = use_tiling if use_tiling is not None else self.enable_tiling
+        if tiling and (content_types or preprocess):
+            self.logger.info(
+                "Processing pages one by one for per-page content types "
+                "or preprocessing"
+            )
+            tiling = False
+        if tiling and len(image_paths) > 1:
+            success, page_texts = self.process_tiled_images(
+                image_paths, prompt, max_tokens, page_strokes, maintain_context
+            )
+            if not success:
+                return False, page_texts
+            if prompt is not None:
+                # Callers of the legacy approach split on "PAGE X:" markers
+                return True, "\n\n".join(
+                    f"PAGE {i + 1}:\n{text}" for i, text in enumerate(page_texts)
+                )
+            return True, "".join(
+                f"--- PAGE {i + 1} ---\n{text}\n" for i, text in enumerate(page_texts)
+            )
+
         # For backward compatibility, if prompt is provided, use the legacy approach
         if prompt is not None:
             # Default prompt for multiple images (backward compatibility)
@@ -466,7 +868,20 @@ class ClaudeVisionAdapter(Adapter):
                     Please transcribe each page separately, clearly indicating where each page begins and ends.
                     """
 
+            vision_paths = [
+                self.prepare_for_vision(path, page_strokes[i] if page_strokes else None)
+                for i, path in enumerate(image_paths)
+            ]
             try:
+                pool = get_session_pool(
+                    self.claude_command, self.model, self.session_pool_size
+                )
+                if pool is not None:
+                    success, claude_response = pool.run(prompt, images=vision_paths)
+                    if not success:
+                        return False, f"Claude CLI failed: {claude_response}"
+                    return True, claude_response.strip()
+
                 # Create a temporary file for the result
                 with tempfile.NamedTemporaryFile(
                     mode="w+", suffix=".txt", delete=False
@@ -474,7 +889,7 @@ class ClaudeVisionAdapter(Adapter):
                     result_path = temp_file.name
 
                     # Build command with multiple images
-                    image_arguments = " ".join([f'"{path}"' for path in image_paths])
+                    image_arguments = " ".join([f'"{path}"' for path in vision_paths])
                     max_tokens_flag = f"--max-tokens {max_tokens}"
                     command = f'{self.claude_command} {self.model_flag} {max_tokens_flag} {image_arguments} "{prompt}" > {result_path}'
 
@@ -504,6 +919,14 @@ class ClaudeVisionAdapter(Adapter):
                 )
                 return False, f"Error processing images: {str(e)}"
 
+            finally:
+                for path, vision_path in zip(image_paths, vision_paths):
+                    if vision_path != path:
+                        try:
+                            os.unlink(vision_path)
+                        except OSError:
+                            pass
+
         # Use new approach: sequential or parallel processing depending on context needs
         try:
             total_pages = len(image_paths)
@@ -513,6 +936,9 @@ class ClaudeVisionAdapter(Adapter):
                 preprocess if preprocess is not None else self.enable_preprocessing
             )
 
+            def strokes_of(index: int) -> Optional[StrokeBatch]:
+                return page_strokes[index] if page_strokes else None
+
             # If context matters, we need to process sequentially
             if maintain_context:
                 self.logger.info(
@@ -527,7 +953,7 @@ class ClaudeVisionAdapter(Adapter):
                     page_content_type = (
                         content_types[i]
                         if content_types
-                        else self.detect_content_type(image_path)
+                        else self.detect_content_type(image_path, strokes_of(i))
                     )
 
                     self.logger.info(
@@ -543,6 +969,7 @@ class ClaudeVisionAdapter(Adapter):
                         context=current_context if i > 0 else None,
                         preprocess=should_preprocess,
                         max_tokens=max_tokens // 2,  # Leave room for context
+                        strokes=strokes_of(i),
                     )
 
                     if not success:
@@ -581,7 +1008,7 @@ class ClaudeVisionAdapter(Adapter):
                     page_ct = (
                         content_types[idx]
                         if content_types
-                        else self.detect_content_type(img_path)
+                        else self.detect_content_type(img_path, strokes_of(idx))
                     )
                     return self._process_single_image_for_batch(
                         image_path=img_path,
@@ -590,6 +1017,7 @@ class ClaudeVisionAdapter(Adapter):
                         content_type=page_ct,
                         preprocess=should_preprocess,
                         max_tokens=max_tokens,
+                        strokes=strokes_of(idx),
                     )
 
                 # Process pages in parallel
@@ -637,7 +1065,7 @@ class ClaudeVisionAdapter(Adapter):
                     page_content_type = (
                         content_types[i]
                         if content_types
-                        else self.detect_content_type(image_path)
+                        else self.detect_content_type(image_path, strokes_of(i))
                     )
 
                     self.logger.info(
@@ -652,6 +1080,7 @@ class ClaudeVisionAdapter(Adapter):
                         content_type=page_content_type,
                         preprocess=should_preprocess,
                         max_tokens=max_tokens,
+                        strokes=strokes_of(i),
                     )
 
                     if success:
@@ -5,11 +5,14 @@ This module provides adapters for CLI-based AI tools (Claude, GitHub Copilot CLI
 
 import logging
 import os
+import shlex
 import subprocess
 import tempfile
 from typing import Any, Dict, List, Optional, Tuple, Union
 
 from inklink.adapters.adapter import Adapter
+from inklink.adapters.claude_cli_pool import ClaudeWorkerPool, get_session_pool
+from inklink.config import CONFIG
 
 logger = logging.getLogger(__name__)
 
@@ -27,6 +30,7 @@ class CLIAIAdapter(Adapter):
         system_prompt: Optional[str] = None,
         temperature: float = 0.7,
         timeout: int = 30,
+        session_pool_size: Optional[int] = None,
     ):
         """
         Initialize CLIAIAdapter.
@@ -38,6 +42,10 @@ class CLIAIAdapter(Adapter):
             system_prompt: Default system prompt
             temperature: Temperature for sampling (0.0-1.0)
             timeout: Command timeout in seconds
+            session_pool_size: Number of pre-started Claude CLI sessions to send
+                               Claude requests through (defaults to
+                               CLAUDE_SESSION_POOL_SIZE; 0 spawns a process per
+                               call)
         """
         # Validate CLI type
         self.cli_type = cli_type.lower()
@@ -60,6 +68,25 @@ class CLIAIAdapter(Adapter):
         self.system_prompt = system_prompt
         self.temperature = temperature
         self.timeout = timeout
+        self.session_pool_size = (
+            session_pool_size
+            if session_pool_size is not None
+            else CONFIG.get("CLAUDE_SESSION_POOL_SIZE", 0)
+        )
+
+    def _get_session_pool(self) -> Optional[ClaudeWorkerPool]:
+        """
+        Get the shared Claude CLI session pool.
+
+        Returns:
+            The session pool, or None if pooling is disabled or the CLI is not
+            Claude
+        """
+        if self.cli_type != "claude" or not self.cli_path:
+            return None
+        return get_session_pool(
+            shlex.quote(self.cli_path), self.model, self.session_pool_size
+        )
 
     def _find_cli_path(self) -> Optional[str]:
         """
@@ -189,6 +216,15 @@ class CLIAIAdapter(Adapter):
         Returns:
             Tuple of (success: bool, completion_or_error: str)
         """
+        # Sessions are started once, so per-request sampling flags do not apply
+        pool = self._get_session_pool()
+        if pool is not None:
+            return pool.run(
+                prompt,
+                system_prompt=system_prompt or self.system_prompt,
+                timeout=self.timeout,
+            )
+
         # Build Claude CLI command
         cmd = [self.cli_path]
 
@@ -0,0 +1,364 @@
+"""Cached index of documents in the reMarkable Cloud.
+
+The monitors used to run ``rmapi ls -l`` once per candidate document and
+re-parse the same output every time. This module fetches the listing once
+per poll, parses it into documents keyed by ID, and keeps a secondary
+tag -> IDs index so tag and pre-filter queries are dictionary lookups.
+"""
+
+import json
+import logging
+import os
+import re
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+UUID_PATTERN = re.compile(
+    r"^[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}$", re.IGNORECASE
+)
+VERSION_PATTERN = re.compile(r"^v(?:ersion)?[:=]?\s*(\d+)$", re.IGNORECASE)
+TAGS_PATTERN = re.compile(r"^(?:tags?[:=]\s*)?\[(.*)\]$|^tags?[:=]\s*(.*)$", re.I)
+HASHTAG_PATTERN = re.compile(r"#(\w+)")
+TIMESTAMP_PATTERN = re.compile(
+    r"^\d{4}-\d{2}-\d{2}([ T]\d{2}:\d{2}(:\d{2})?(\.\d+)?(Z|[+-]\d{2}:?\d{2})?)?$"
+)
+
+# Registry of shared indexes, keyed by rmapi executable
+_shared_indexes: Dict[str, "CloudDocumentIndex"] = {}
+_shared_lock = threading.Lock()
+
+
+@dataclass
+class CloudDocument:
+    """A single entry from the cloud listing."""
+
+    id: str
+    name: str
+    type: str = "DocumentType"
+    version: Optional[int] = None
+    last_modified: Optional[str] = None
+    tags: List[str] = field(default_factory=list)
+    parent: str = ""
+    raw: str = ""
+
+    @property
+    def has_cloud_id(self) -> bool:
+        """Whether ``id`` is a real cloud UUID rather than the document name."""
+        return bool(UUID_PATTERN.match(self.id or ""))
+
+    def to_entry(self) -> Dict[str, Any]:
+        """
+        Convert to the dictionary format returned by RmapiAdapter.list_files.
+
+        Returns:
+            Document dictionary with rmapi-style keys
+        """
+        return {
+            "ID": self.id,
+            "VissibleName": self.name,
+            "Type": self.type,
+            "Version": self.version,
+            "ModifiedClient": self.last_modified,
+            "Tags": list(self.tags),
+        }
+
+
+class CloudDocumentIndex:
+    """Index over one ``ls -l`` listing, refreshed at most once per poll."""
+
+    def __init__(self, adapter, max_age: float = 0.0):
+        """
+        Initialize the index.
+
+        Args:
+            adapter: RmapiAdapter (or subclass) used to fetch the listing
+            max_age: Seconds a listing stays fresh; refresh() within this window
+                     reuses it, so monitors polling together share one fetch
+        """
+        self.adapter = adapter
+        self.max_age = max_age
+
+        self._documents: Dict[str, CloudDocument] = {}
+        self._by_name: Dict[str, str] = {}
+        self._by_tag: Dict[str, Set[str]] = {}
+        self._lock = threading.RLock()
+
+        self.last_refresh: Optional[float] = None
+        self.fetch_count = 0
+
+    def refresh(self, force: bool = False) -> bool:
+        """
+        Fetch and parse the cloud listing unless a fresh one is cached.
+
+        Args:
+            force: Fetch even if the cached listing is still fresh
+
+        Returns:
+            True if the index holds a usable listing, False otherwise
+        """
+        with self._lock:
+            if (
+                not force
+                and self.last_refresh is not None
+                and time.time() - self.last_refresh < self.max_age
+            ):
+                return True
+
+            success, stdout, stderr = self.adapter.run_command("ls", "-l")
+            if not success:
+                logger.error(f"Failed to fetch cloud listing: {stderr}")
+                return self.last_refresh is not None
+
+            self.load_listing(stdout)
+            self.fetch_count += 1
+            return True
+
+    def load_listing(self, listing: str) -> None:
+        """
+        Replace the index contents with a parsed listing.
+
+        Args:
+            listing: Raw output of ``rmapi ls -l`` (text or JSON)
+        """
+        documents = self.parse_listing(listing)
+
+        with self._lock:
+            self._documents = {}
+            self._by_name = {}
+            self._by_tag = {}
+            for position, doc in enumerate(documents):
+                key = doc.id
+                if key in self._documents and not doc.has_cloud_id:
+                    # Same-named documents without cloud IDs stay separate
+                    key = f"{doc.id}\0{position}"
+                self._documents[key] = doc
+                self._by_name.setdefault(doc.name, doc.id)
+                for tag in doc.tags:
+                    self._by_tag.setdefault(tag.lower(), set()).add(doc.id)
+            self.last_refresh = time.time()
+
+        logger.info(f"Indexed {len(documents)} cloud documents")
+
+    @classmethod
+    def parse_listing(cls, listing: str) -> List[CloudDocument]:
+        """
+        Parse rmapi listing output into documents.
+
+        Args:
+            listing: Raw output of ``rmapi ls -l`` (text or JSON)
+
+        Returns:
+            List of parsed documents
+        """
+        stripped = listing.strip()
+        if stripped.startswith(("[{", "{")):
+            try:
+                data = json.loads(stripped)
+                entries = data if isinstance(data, list) else [data]
+                return [cls._parse_json_entry(e) for e in entries if e]
+            except json.JSONDecodeError:
+                pass
+
+        documents = []
+        for line in listing.split("\n"):
+            doc = cls._parse_line(line)
+            if doc:
+                documents.append(doc)
+        return documents
+
+    @staticmethod
+    def _parse_json_entry(entry: Dict[str, Any]) -> CloudDocument:
+        """Build a document from a JSON listing entry."""
+        name = entry.get("VissibleName") or entry.get("Name") or entry.get("ID", "")
+        version = entry.get("Version")
+        return CloudDocument(
+            id=entry.get("ID") or name,
+            name=name,
+            type=entry.get("Type", "DocumentType"),
+            version=int(version) if version is not None else None,
+            last_modified=entry.get("ModifiedClient") or entry.get("LastModified"),
+            tags=[str(t) for t in entry.get("Tags") or []],
+            parent=entry.get("Parent", "") or "",
+            raw=json.dumps(entry),
+        )
+
+    @staticmethod
+    def _parse_line(line: str) -> Optional[CloudDocument]:
+        """
+        Parse one text listing line such as ``[f]\\t<fields...>\\t<name>``.
+
+        Fields other than the name are recognised by shape: a UUID is the ID,
+        a timestamp is lastModified, ``v<n>`` is the version and bracketed or
+        ``tags:`` fields are tags. The remaining field is the name; if every
+        field matched another shape, the fields are the name after all.
+        """
+        raw = line.rstrip()
+        line = line.strip()
+        if line.startswith("[f]"):
+            doc_type = "DocumentType"
+        elif line.startswith("[d]"):
+            doc_type = "CollectionType"
+        else:
+            return None
+
+        body = line[3:].strip()
+        fields = [f.strip() for f in body.split("\t") if f.strip()]
+        if not fields:
+            return None
+
+        doc_id = None
+        version = None
+        last_modified = None
+        tags: List[str] = []
+        name_fields = []
+
+        for value in fields:
+            version_match = VERSION_PATTERN.match(value)
+            tags_match = TAGS_PATTERN.match(value)
+            if doc_id is None and UUID_PATTERN.match(value):
+                doc_id = value
+            elif version is None and version_match:
+                version = int(version_match.group(1))
+            elif last_modified is None and _looks_like_timestamp(value):
+                last_modified = value
+            elif tags_match:
+                tag_text = tags_match.group(1) or tags_match.group(2) or ""
+                tags.extend(
+                    t.strip().strip("'\"#")
+                    for t in tag_text.split(",")
+                    if t.strip().strip("'\"#")
+                )
+            else:
+                name_fields.append(value)
+
+        if not name_fields:
+            # The name itself looked like a field (e.g. "2024-05-01" or
+            # "[Draft]"): keep every non-ID field as the name instead
+            version, last_modified, tags = None, None, []
+            name_fields = ["\t".join(f for f in fields if f != doc_id) or body]
+
+        name = name_fields[0]
+        # Hashtags after the name (e.g. "Notes #HasLilly") are tags too
+        for extra in name_fields[1:]:
+            tags.extend(HASHTAG_PATTERN.findall(extra) or [extra])
+
+        return CloudDocument(
+            id=doc_id or name,
+            name=name,
+            type=doc_type,
+            version=version,
+            last_modified=last_modified,
+            tags=tags,
+            raw=raw,
+        )
+
+    def get(self, doc_id_or_name: str) -> Optional[CloudDocument]:
+        """
+        Look up a document by ID or name.
+
+        Args:
+            doc_id_or_name: Document ID or visible name
+
+        Returns:
+            The document, or None if not in the listing
+        """
+        with self._lock:
+            doc = self._documents.get(doc_id_or_name)
+            if doc is None and doc_id_or_name in self._by_name:
+                doc = self._documents.get(self._by_name[doc_id_or_name])
+            return doc
+
+    def documents(
+        self, doc_type: Optional[str] = "DocumentType"
+    ) -> List[CloudDocument]:
+        """
+        Get all indexed documents.
+
+        Args:
+            doc_type: Only return entries of this type (None returns all)
+
+        Returns:
+            List of documents in listing order
+        """
+        with self._lock:
+            return [
+                d
+                for d in self._documents.values()
+                if doc_type is None or d.type == doc_type
+            ]
+
+    def ids_with_tag(self, tag: str) -> Set[str]:
+        """
+        Get IDs of documents carrying a document-level tag (case-insensitive).
+
+        Args:
+            tag: Tag to look up
+
+        Returns:
+            Set of document IDs
+        """
+        with self._lock:
+            return set(self._by_tag.get(tag.lower(), set()))
+
+    def has_tag(self, doc_id_or_name: str, tag: str) -> bool:
+        """
+        Check whether a document carries a tag in the listing.
+
+        Args:
+            doc_id_or_name: Document ID or visible name
+            tag: Tag to check for
+
+        Returns:
+            True if the listing shows the tag for this document
+        """
+        doc = self.get(doc_id_or_name)
+        if doc is None:
+            return False
+        with self._lock:
+            return doc.id in self._by_tag.get(tag.lower(), set())
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get index statistics.
+
+        Returns:
+            Dictionary with document, tag and fetch counts
+        """
+        with self._lock:
+            return {
+                "documents": len(self._documents),
+                "tags": len(self._by_tag),
+                "fetch_count": self.fetch_count,
+                "last_refresh": self.last_refresh,
+            }
+
+
+def _looks_like_timestamp(value: str) -> bool:
+    """Check whether a listing field is a date/time or epoch-millisecond value."""
+    if value.isdigit() and len(value) >= 10:
+        return True
+    return bool(TIMESTAMP_PATTERN.match(value))
+
+
+def get_shared_document_index(adapter, max_age: float = 5.0) -> CloudDocumentIndex:
+    """
+    Get the index shared by every monitor using the same rmapi executable.
+
+    Args:
+        adapter: RmapiAdapter used to fetch the listing if the index is new
+        max_age: Seconds a listing stays fresh across monitors
+
+    Returns:
+        The shared CloudDocumentIndex
+    """
+    key = os.path.abspath(adapter.rmapi_path or "rmapi")
+    with _shared_lock:
+        index = _shared_indexes.get(key)
+        if index is None:
+            index = CloudDocumentIndex(adapter, max_age=max_age)
+            _shared_indexes[key] = index
+        return index
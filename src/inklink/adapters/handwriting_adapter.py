@@ -10,6 +10,7 @@ import os
 from typing import Any, Dict, List, Optional, Tuple
 
 from inklink.adapters.adapter import Adapter
+from inklink.utils.stroke_batch import StrokeBatch
 
 logger = logging.getLogger(__name__)
 
@@ -87,58 +88,41 @@ class HandwritingAdapter(Adapter):
             logger.error(f"Failed to initialize MyScript iink SDK: {e}")
             return False
 
-    def extract_strokes_from_rm_file(self, rm_file_path: str) -> List[Dict[str, Any]]:
+    def extract_stroke_batch(self, rm_file_path: str) -> Optional[StrokeBatch]:
         """
-        Extract strokes from a reMarkable file.
+        Extract strokes from a reMarkable file into columnar form.
 
         Args:
             rm_file_path: Path to .rm file
 
         Returns:
-            List of stroke dictionaries
+            StrokeBatch of the page, or None if the file cannot be parsed
         """
         try:
-            # Import rmscene for parsing .rm files
-            try:
-                import rmscene
-            except ImportError:
-                logger.error("rmscene not installed - cannot parse .rm files")
-                return []
-
-            # Parse .rm file
-            with open(rm_file_path, "rb") as f:
-                scene = rmscene.Scene.from_bytes(f.read())
-
-            # Convert strokes to the format needed for iink SDK
-            strokes = []
-            for layer in scene.layers:
-                for line in layer.lines:
-                    stroke = {
-                        "points": [],
-                        "width": line.width,
-                        "color": line.color,
-                        "timestamp": line.timestamp_ms,
-                    }
-
-                    # Convert points
-                    for point in line.points:
-                        stroke["points"].append(
-                            {
-                                "x": point.x,
-                                "y": point.y,
-                                "pressure": point.pressure,
-                                "timestamp": point.timestamp_ms,
-                            }
-                        )
-
-                    strokes.append(stroke)
-
-            return strokes
-
+            return StrokeBatch.from_rm_file(rm_file_path)
+        except ImportError:
+            logger.error("rmscene not installed - cannot parse .rm files")
         except Exception as e:
             logger.error(f"Failed to extract strokes from .rm file: {e}")
+        return None
+
+    def extract_strokes_from_rm_file(self, rm_file_path: str) -> List[Dict[str, Any]]:
+        """
+        Extract strokes from a reMarkable file.
+
+        Args:
+            rm_file_path: Path to .rm file
+
+        Returns:
+            List of stroke dictionaries
+        """
+        batch = self.extract_stroke_batch(rm_file_path)
+        if batch is None:
             return []
 
+        # Convert strokes to the format needed for iink SDK
+        return batch.to_point_dicts()
+
     def convert_to_iink_format(self, strokes: List[Dict[str, Any]]) -> Dict[str, Any]:
         """
         Convert reMarkable strokes to iink SDK compatible format.
@@ -18,6 +18,7 @@ import requests
 
 from inklink.adapters.adapter import Adapter
 from inklink.utils.retry import retry
+from inklink.utils.stroke_batch import StrokeBatch
 
 logger = logging.getLogger(__name__)
 
@@ -139,6 +140,25 @@ class HandwritingWebAdapter(Adapter):
         # Return the base64 encoded digest
         return base64.b64encode(h.digest()).decode("utf-8")
 
+    @staticmethod
+    def extract_stroke_batch(rm_file_path: str) -> Optional[StrokeBatch]:
+        """
+        Extract strokes from a reMarkable file into columnar form.
+
+        Args:
+            rm_file_path: Path to .rm file
+
+        Returns:
+            StrokeBatch of the page, or None if the file cannot be parsed
+        """
+        try:
+            return StrokeBatch.from_rm_file(rm_file_path)
+        except ImportError:
+            logger.error("rmscene not installed - cannot parse .rm files")
+        except Exception as e:
+            logger.error(f"Failed to extract strokes from .rm file: {e}")
+        return None
+
     @staticmethod
     def extract_strokes_from_rm_file(rm_file_path: str) -> List[Dict[str, Any]]:
         """
@@ -150,82 +170,17 @@ class HandwritingWebAdapter(Adapter):
         Returns:
             List of stroke dictionaries
         """
-        try:
-            # Import rmscene for parsing .rm files
-            try:
-                from rmscene.scene_items import Line
-                from rmscene.scene_stream import read_tree
-            except ImportError:
-                logger.error("rmscene not installed - cannot parse .rm files")
-                return []
-
-            # Parse .rm file using current rmscene API (v0.7.0+)
-            with open(rm_file_path, "rb") as f:
-                try:
-                    # Try using the newer rmscene API
-                    scene_tree = read_tree(f)
-
-                    # Convert strokes to the format needed for MyScript Web API
-                    strokes = []
-
-                    # Find all Line items in the tree
-                    for item_id, item in scene_tree.items.items():
-                        if isinstance(item, Line):
-                            # Extract x, y, pressure and timestamps for each point
-                            x_points = []
-                            y_points = []
-                            pressures = []
-                            timestamps = []
-
-                            for point in item.points:
-                                x_points.append(point.x)
-                                y_points.append(point.y)
-                                pressures.append(point.pressure)
-                                # Use 't' attribute for timestamp in newer API
-                                timestamps.append(point.t if hasattr(point, "t") else 0)
-
-                            # Create stroke in MyScript format
-                            stroke = {
-                                "id": str(item_id),
-                                "x": x_points,
-                                "y": y_points,
-                                "p": pressures,
-                                "t": timestamps,
-                                "color": (
-                                    str(item.color)
-                                    if hasattr(item, "color")
-                                    else "#000000"
-                                ),
-                                "width": (
-                                    float(item.pen.value)
-                                    if hasattr(item, "pen")
-                                    else 2.0
-                                ),
-                            }
-
-                            strokes.append(stroke)
-
-                    if strokes:
-                        logger.info(
-                            f"Extracted {len(strokes)} strokes using current rmscene API"
-                        )
-                        return strokes
-                    logger.warning("No strokes found in file using current rmscene API")
-
-                except Exception as scene_tree_error:
-                    logger.error(
-                        f"Failed to use current rmscene API: {scene_tree_error}"
-                    )
-                    # Older .rm files might need a different approach
-                    logger.warning("Trying fallback extraction method...")
-                    return []
-
+        batch = HandwritingWebAdapter.extract_stroke_batch(rm_file_path)
+        if batch is None:
             return []
-
-        except Exception as e:
-            logger.error(f"Failed to extract strokes from .rm file: {e}")
+        if not len(batch):
+            logger.warning("No strokes found in file using current rmscene API")
             return []
 
+        logger.info(f"Extracted {len(batch)} strokes using current rmscene API")
+        # Convert strokes to the format needed for MyScript Web API
+        return batch.to_dicts()
+
     @staticmethod
     def convert_to_iink_format(strokes: List[Dict[str, Any]]) -> Dict[str, Any]:
         """
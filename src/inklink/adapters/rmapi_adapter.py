@@ -4,32 +4,97 @@ This module provides an adapter for interacting with the reMarkable Cloud API
 via the rmapi tool, including authentication handling.
 """
 
+import concurrent.futures
 import json
 import logging
 import os
 import shutil
 import subprocess
 import tempfile
+import threading
 import time
 import zipfile
 from typing import Any, Dict, List, Optional, Set, Tuple
 
+from inklink.adapters.cloud_document_index import (
+    CloudDocumentIndex,
+    get_shared_document_index,
+)
+from inklink.adapters.rmapi_pool import RmapiWorkerPool
+from inklink.config import CONFIG
+from inklink.utils.rmdoc_archive import RmdocArchive
+
 logger = logging.getLogger(__name__)
 
 
 class RmapiAdapter:
     """Adapter for interacting with reMarkable Cloud via rmapi tool."""
 
-    def __init__(self, rmapi_path: Optional[str] = None):
+    def __init__(
+        self,
+        rmapi_path: Optional[str] = None,
+        pool_size: Optional[int] = None,
+        command_timeout: Optional[int] = None,
+    ):
         """
         Initialize the rmapi adapter.
 
         Args:
             rmapi_path: Path to the rmapi executable
+            pool_size: Number of long-lived rmapi shells to reuse across calls
+                       (defaults to RMAPI_POOL_SIZE; 0 spawns a process per call)
+            command_timeout: Per-command timeout in seconds
         """
         self.rmapi_path = rmapi_path
+        self.pool_size = (
+            pool_size if pool_size is not None else CONFIG.get("RMAPI_POOL_SIZE", 0)
+        )
+        self.command_timeout = command_timeout or CONFIG.get(
+            "RMAPI_COMMAND_TIMEOUT", 60
+        )
+        self._pool: Optional[RmapiWorkerPool] = None
+        self._pool_lock = threading.Lock()
         self._validate_executable()
 
+    def _get_pool(self) -> Optional[RmapiWorkerPool]:
+        """
+        Get the shared rmapi worker pool, creating it on first use.
+
+        Returns:
+            The worker pool, or None if pooling is disabled
+        """
+        if self.pool_size <= 0:
+            return None
+        with self._pool_lock:
+            if self._pool is None or self._pool.rmapi_path != self.rmapi_path:
+                if self._pool is not None:
+                    # Shells still running a command are stopped when released
+                    self._pool.close()
+                self._pool = RmapiWorkerPool(
+                    self.rmapi_path,
+                    size=self.pool_size,
+                    command_timeout=self.command_timeout,
+                )
+            return self._pool
+
+    def get_document_index(self) -> CloudDocumentIndex:
+        """
+        Get the cloud document index shared by all monitors using this rmapi.
+
+        Returns:
+            The shared CloudDocumentIndex
+        """
+        return get_shared_document_index(
+            self, max_age=CONFIG.get("CLOUD_INDEX_MAX_AGE", 5.0)
+        )
+
+    def close(self) -> None:
+        """Stop any pooled rmapi shells."""
+        with self._pool_lock:
+            if self._pool is not None:
+                self._pool.close()
+                self._pool = None
+
     def _validate_executable(self) -> bool:
         """
         Validate that the rmapi executable exists and is executable.
@@ -226,8 +291,7 @@ class RmapiAdapter:
             mode="w", suffix=".exp", delete=False
         ) as expect_file:
             expect_path = expect_file.name
-            expect_file.write(
-                f"""#!/usr/bin/expect -f
+            expect_file.write(f"""#!/usr/bin/expect -f
                 set timeout 30
                 set code "{code}"
 
@@ -247,8 +311,7 @@ class RmapiAdapter:
                         exit 2
                     }}
                 }}
-                """
-            )
+                """)
 
         try:
             # Make the script executable
@@ -341,9 +404,15 @@ class RmapiAdapter:
         if not self._validate_executable():
             return False, "", "rmapi path not valid"
 
+        pool = self._get_pool()
+        if pool is not None:
+            return pool.run_command(command, *args)
+
         try:
             cmd = [self.rmapi_path, command] + list(args)
-            process = subprocess.run(cmd, capture_output=True, text=True, timeout=60)
+            process = subprocess.run(
+                cmd, capture_output=True, text=True, timeout=self.command_timeout
+            )
 
             if process.returncode == 0:
                 return True, process.stdout, process.stderr
@@ -368,8 +437,9 @@ class RmapiAdapter:
         if not self._validate_executable():
             return False, "rmapi path not valid"
 
-        # First use 'put' to upload the file
-        success, stdout, stderr = self.run_command("put", file_path)
+        # First use 'put' to upload the file. The path must be absolute because
+        # pooled shells run in their own working directory.
+        success, stdout, stderr = self.run_command("put", os.path.abspath(file_path))
         if not success:
             return False, f"Failed to upload: {stderr}"
 
@@ -423,24 +493,30 @@ class RmapiAdapter:
         # Ensure output directory exists
         os.makedirs(output_dir, exist_ok=True)
 
+        pool = self._get_pool()
+        if pool is not None:
+            success = self._download_with_pool(pool, doc_id_or_name, output_path)
+            if success:
+                return True, f"Downloaded document {doc_id_or_name}"
+            return False, f"Failed to download document {doc_id_or_name}"
+
         # Create a working directory
         with tempfile.TemporaryDirectory() as working_dir:
             success = False
 
             try:
-                # Use single quotes around the notebook name and absolute path for rmapi
-                rmapi_abs_path = os.path.abspath(self.rmapi_path)
-                cmd = f"{rmapi_abs_path} get '{doc_id_or_name}'"
-
-                # Change to the working directory to execute the command
-                original_dir = os.getcwd()
-                os.chdir(working_dir)
-
+                # Run without a shell in the working directory, leaving the
+                # process cwd untouched so concurrent downloads do not interfere
+                cmd = [os.path.abspath(self.rmapi_path), "get", doc_id_or_name]
                 logger.info(
                     f"Running download command: {cmd} in directory {working_dir}"
                 )
                 result = subprocess.run(
-                    cmd, shell=True, capture_output=True, text=True, timeout=60
+                    cmd,
+                    capture_output=True,
+                    text=True,
+                    timeout=self.command_timeout,
+                    cwd=working_dir,
                 )
                 logger.info(f"Command output: {result.stdout}")
                 logger.info(f"Command error (if any): {result.stderr}")
@@ -468,15 +544,8 @@ class RmapiAdapter:
                 else:
                     logger.error(f"No files were downloaded for '{doc_id_or_name}'")
 
-                # Restore original directory
-                os.chdir(original_dir)
-
             except Exception as e:
                 logger.error(f"Error executing download command: {e}")
-                try:
-                    os.chdir(original_dir)  # Make sure we restore the directory
-                except Exception:
-                    pass
                 return False, f"Failed to download: {str(e)}"
 
         # Verify successful download
@@ -492,6 +561,108 @@ class RmapiAdapter:
         )
         return False, f"Failed to download document {doc_id_or_name}"
 
+    def download_many(
+        self,
+        doc_ids_or_names: List[str],
+        dest_dir: str,
+        max_parallel: int = 4,
+        export_format: str = "zip",
+    ) -> Dict[str, Tuple[bool, str]]:
+        """
+        Download several documents concurrently.
+
+        Each document is saved as ``<dest_dir>/<id or name>.rmdoc``.
+
+        Args:
+            doc_ids_or_names: Document IDs or names to download
+            dest_dir: Directory to save the downloaded files in
+            max_parallel: Maximum number of concurrent downloads
+            export_format: Format to export (passed to download_file)
+
+        Returns:
+            Dictionary mapping each ID or name to (success, output path or
+            error message)
+        """
+        os.makedirs(dest_dir, exist_ok=True)
+        unique_ids = list(dict.fromkeys(doc_ids_or_names))
+        results: Dict[str, Tuple[bool, str]] = {}
+
+        def download_one(doc_id_or_name: str) -> Tuple[bool, str]:
+            file_name = doc_id_or_name.replace(os.sep, "_")
+            output_path = os.path.join(dest_dir, f"{file_name}.rmdoc")
+            success, message = self.download_file(
+                doc_id_or_name, output_path, export_format
+            )
+            return (True, output_path) if success else (False, message)
+
+        with concurrent.futures.ThreadPoolExecutor(
+            max_workers=max(1, max_parallel), thread_name_prefix="rmapi-download"
+        ) as executor:
+            futures = {
+                executor.submit(download_one, doc_id): doc_id for doc_id in unique_ids
+            }
+            for future in concurrent.futures.as_completed(futures):
+                doc_id = futures[future]
+                try:
+                    results[doc_id] = future.result()
+                except Exception as e:
+                    logger.error(f"Error downloading {doc_id}: {e}")
+                    results[doc_id] = (False, str(e))
+
+        succeeded = sum(1 for success, _ in results.values() if success)
+        logger.info(f"Downloaded {succeeded}/{len(unique_ids)} documents")
+        return results
+
+    def _download_with_pool(
+        self, pool: RmapiWorkerPool, doc_id_or_name: str, output_path: str
+    ) -> bool:
+        """
+        Download a document through a pooled rmapi shell.
+
+        The shell writes into its private working directory, which is ours for
+        as long as the worker is checked out.
+
+        Args:
+            pool: Worker pool to use
+            doc_id_or_name: Document ID or name to download
+            output_path: Path where to save the downloaded file
+
+        Returns:
+            True if the document was downloaded, False otherwise
+        """
+        try:
+            with pool.acquire() as worker:
+                # Clear leftovers from earlier downloads
+                for leftover in os.listdir(worker.workdir):
+                    leftover_path = os.path.join(worker.workdir, leftover)
+                    if os.path.isdir(leftover_path):
+                        shutil.rmtree(leftover_path, ignore_errors=True)
+                    else:
+                        os.unlink(leftover_path)
+
+                try:
+                    success, stdout, stderr = worker.execute(
+                        "get", doc_id_or_name, timeout=self.command_timeout
+                    )
+                except (TimeoutError, RuntimeError) as e:
+                    logger.error(f"Pooled download of '{doc_id_or_name}' failed: {e}")
+                    worker.restart()
+                    return False
+
+                logger.info(f"Command output: {stdout}")
+                downloaded_path = worker.downloaded_path(doc_id_or_name)
+                if not success or downloaded_path is None:
+                    logger.error(f"Failed to download '{doc_id_or_name}': {stderr}")
+                    return False
+
+                shutil.move(downloaded_path, output_path)
+
+        except Exception as e:
+            logger.error(f"Error executing pooled download: {e}")
+            return False
+
+        return os.path.exists(output_path) and os.path.getsize(output_path) > 0
+
     def ping(self) -> bool:
         """
         Check if the reMarkable Cloud API is available and authenticated.
@@ -608,16 +779,19 @@ class RmapiAdapter:
 
         tagged_notebooks = []
 
-        # Use improved list_files method to get all documents
-        success, documents = self.list_files()
+        if pre_filter_tag:
+            logger.info(f"Using pre-filter tag '{pre_filter_tag}' to reduce downloads")
+            # One detailed listing selects the candidates without downloading
+            success, documents = self.list_documents_with_tag(pre_filter_tag)
+        else:
+            # Use improved list_files method to get all documents
+            success, documents = self.list_files()
         if not success:
             logger.error("Failed to list documents")
             return []
 
         # Log the number of documents found
         logger.info(f"Found {len(documents)} documents to check for tag '{tag}'")
-        if pre_filter_tag:
-            logger.info(f"Using pre-filter tag '{pre_filter_tag}' to reduce downloads")
 
         try:
             # Process each document to check for tags
@@ -638,34 +812,6 @@ class RmapiAdapter:
                     )
                     continue
 
-                # If pre-filtering is enabled, first check if notebook has the pre-filter tag
-                # This avoids downloading every notebook for detailed tag checking
-                if pre_filter_tag:
-                    # For pre-filtering, we can use "ls -l" to check document-level tags
-                    # without downloading the entire notebook
-                    success, stdout, _ = self.run_command("ls", "-l")
-                    has_prefilter_tag = False
-
-                    if success:
-                        # Look for the notebook name in the output and check if the tag is there
-                        lines = stdout.split("\n")
-                        for line in lines:
-                            if f"[f]\t{name}" in line or f"[f] {name}" in line:
-                                # If this is the line for our notebook, check for the tag
-                                # Tags are typically shown after the name in the detailed listing
-                                if pre_filter_tag in line:
-                                    has_prefilter_tag = True
-                                    logger.info(
-                                        f"Document {name} has pre-filter tag '{pre_filter_tag}'"
-                                    )
-                                    break
-
-                    if not has_prefilter_tag:
-                        logger.info(
-                            f"Document {name} does not have pre-filter tag '{pre_filter_tag}', skipping detailed check"
-                        )
-                        continue
-
                 # Get detailed metadata for this document
                 has_tag, metadata = self._check_document_for_tag(doc_id, tag)
 
@@ -715,6 +861,35 @@ class RmapiAdapter:
             logger.error(traceback.format_exc())
             return []
 
+    def list_documents_with_tag(self, tag: str) -> Tuple[bool, List[Dict[str, Any]]]:
+        """
+        List documents whose cloud listing carries a document-level tag.
+
+        The answer comes from one detailed listing in the shared document
+        index, so no document is downloaded.
+
+        Args:
+            tag: Document-level tag to look for (case-insensitive)
+
+        Returns:
+            Tuple of (success, list of documents in the list_files format)
+        """
+        if not self._validate_executable():
+            logger.error("rmapi path not valid")
+            return False, []
+
+        document_index = self.get_document_index()
+        if not document_index.refresh():
+            logger.error("Failed to fetch detailed listing")
+            return False, []
+
+        tagged_ids = document_index.ids_with_tag(tag)
+        documents = [
+            doc.to_entry() for doc in document_index.documents() if doc.id in tagged_ids
+        ]
+        logger.info(f"Listing shows {len(documents)} documents with tag '{tag}'")
+        return True, documents
+
     def _check_document_for_tag(
         self, doc_id_or_name: str, tag: str
     ) -> Tuple[bool, Dict[str, Any]]:
@@ -816,49 +991,34 @@ class RmapiAdapter:
                 )
                 return False, {}
 
-            # Extract the content file
+            # Read the content file straight from the archive
             try:
-                with zipfile.ZipFile(zip_path, "r") as zip_ref:
+                with RmdocArchive(zip_path) as archive:
                     # Check if there are any entries in the zip file
-                    if not zip_ref.namelist():
+                    if not archive.members:
                         logger.error(f"Zip file is empty: {zip_path}")
                         return False, {}
 
                     # List all entries for debugging
-                    logger.info(f"Zip contents: {zip_ref.namelist()}")
-
-                    # Find all content files
-                    content_files = [
-                        f for f in zip_ref.namelist() if f.endswith(".content")
-                    ]
+                    logger.info(f"Zip contents: {list(archive.members)}")
 
-                    if not content_files:
+                    if not archive.content_name:
                         logger.warning(
                             f"No content file found in document {doc_id_or_name}"
                         )
                         return False, {}
 
-                    # Extract the content file
-                    content_file = content_files[0]
-                    zip_ref.extract(content_file, temp_dir)
+                    raw_content = archive.read_member(archive.content_name)
             except zipfile.BadZipFile:
                 logger.error(f"Bad zip file: {zip_path}")
                 return False, {}
 
-            # Read the content file
-            content_path = os.path.join(temp_dir, content_file)
             try:
-                with open(content_path, "r") as f:
-                    content_data = json.load(f)
+                content_data = json.loads(raw_content)
             except json.JSONDecodeError as je:
                 logger.error(f"Error parsing content file: {je}")
-                # Try to read the raw content for debugging
-                with open(content_path, "r") as f:
-                    raw_content = f.read(200)  # First 200 chars
-                logger.error(f"Content file start: {raw_content}")
-                return False, {}
-            except Exception as e:
-                logger.error(f"Error reading content file: {e}")
+                # Log the raw content for debugging
+                logger.error(f"Content file start: {raw_content[:200]}")
                 return False, {}
 
             # Check for tags in content and also in page metadata
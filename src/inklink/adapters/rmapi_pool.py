@@ -0,0 +1,443 @@
+"""Pooled rmapi executor for InkLink.
+
+This module keeps a small number of long-lived ``rmapi`` interactive shells
+running and multiplexes commands over their stdin/stdout, so that repeated
+cloud calls reuse a warm session instead of paying process startup, token
+loading and TLS handshakes on every ``ls``, ``get``, ``put`` or ``mv``.
+"""
+
+import logging
+import os
+import queue
+import re
+import shutil
+import subprocess
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class RmapiShellWorker:
+    """A single long-lived rmapi interactive shell."""
+
+    # Command sent after every real command. It prints the shell's current
+    # directory, which stays at the root because workers never change it, and
+    # unlike an error message its output does not depend on rmapi's wording.
+    # Listings prefix entries with their type and transfers print messages,
+    # so no command output line is the bare root path.
+    SENTINEL_COMMAND = "pwd"
+    SENTINEL_OUTPUT = "/"
+
+    # Output lines that indicate the preceding command failed. rmapi reports
+    # errors with a leading "Error:"/"failed to", or as Go errors appended to
+    # the path, e.g. "open Notes: no such file or directory".
+    ERROR_PATTERN = re.compile(
+        r"^\s*(error|failed|fatal)\b"
+        r"|\b(no such file or directory|not found|doesn't exist|does not exist"
+        r"|permission denied)\b",
+        re.IGNORECASE,
+    )
+
+    # Listing entries are document names, never errors
+    LISTING_PREFIXES = ("[f]", "[d]")
+
+    # Extensions rmapi gives files written by ``get``
+    DOWNLOAD_EXTENSIONS = (".rmdoc", ".zip")
+
+    def __init__(self, rmapi_path: str, workdir: Optional[str] = None):
+        """
+        Initialize the worker.
+
+        Args:
+            rmapi_path: Path to the rmapi executable
+            workdir: Private working directory for the shell (created if omitted)
+        """
+        self.rmapi_path = rmapi_path
+        self._owns_workdir = workdir is None
+        self.workdir = workdir or tempfile.mkdtemp(prefix="rmapi_worker_")
+        self._process: Optional[subprocess.Popen] = None
+        self._lines: "queue.Queue[Optional[str]]" = queue.Queue()
+        self._reader: Optional[threading.Thread] = None
+        self.commands_run = 0
+        self.started_at: Optional[float] = None
+
+    @property
+    def alive(self) -> bool:
+        """Whether the underlying shell process is running."""
+        return self._process is not None and self._process.poll() is None
+
+    def start(self, timeout: float = 30.0) -> None:
+        """
+        Start the rmapi shell process and wait until it accepts commands.
+
+        Args:
+            timeout: Seconds to wait for the shell to become ready
+
+        Raises:
+            TimeoutError: If the shell does not respond in time
+            RuntimeError: If the shell exits during startup
+        """
+        os.makedirs(self.workdir, exist_ok=True)
+        self._lines = queue.Queue()
+        self._process = subprocess.Popen(
+            [os.path.abspath(self.rmapi_path)],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+            cwd=self.workdir,
+            text=True,
+            bufsize=1,
+        )
+        self._reader = threading.Thread(
+            target=self._read_output, args=(self._process, self._lines), daemon=True
+        )
+        self._reader.start()
+
+        # Round-trip a sentinel so the startup banner is consumed before use
+        self._run_until_marker(None, timeout)
+        self.started_at = time.time()
+        logger.info(
+            f"Started rmapi shell worker (pid {self._process.pid}) in {self.workdir}"
+        )
+
+    @staticmethod
+    def _read_output(process: subprocess.Popen, lines: "queue.Queue") -> None:
+        """Forward shell output lines to the worker's queue until EOF."""
+        try:
+            for line in process.stdout:
+                lines.put(line.rstrip("\n"))
+        except Exception:
+            pass
+        finally:
+            lines.put(None)
+
+    @staticmethod
+    def _quote(arg: str) -> str:
+        """Quote an argument for the rmapi shell if needed."""
+        arg = str(arg)
+        if arg and not any(c.isspace() or c in "\"'" for c in arg):
+            return arg
+        return '"' + arg.replace("\\", "\\\\").replace('"', '\\"') + '"'
+
+    def _run_until_marker(self, line: Optional[str], timeout: float) -> List[str]:
+        """
+        Send a command line followed by a sentinel and read output up to it.
+
+        Args:
+            line: Command line to send, or None to send only the sentinel
+            timeout: Seconds to wait for the sentinel
+
+        Returns:
+            Output lines produced before the sentinel's output
+        """
+        payload = f"{self.SENTINEL_COMMAND}\n"
+        if line is not None:
+            payload = f"{line}\n{payload}"
+        try:
+            self._process.stdin.write(payload)
+            self._process.stdin.flush()
+        except (BrokenPipeError, OSError) as e:
+            raise RuntimeError(f"rmapi shell is not accepting input: {e}")
+
+        output: List[str] = []
+        deadline = time.monotonic() + timeout
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise TimeoutError(f"rmapi command '{line}' timed out")
+            try:
+                out_line = self._lines.get(timeout=remaining)
+            except queue.Empty:
+                raise TimeoutError(f"rmapi command '{line}' timed out")
+            if out_line is None:
+                raise RuntimeError("rmapi shell exited unexpectedly")
+            if out_line.strip() == self.SENTINEL_OUTPUT:
+                return output
+            output.append(out_line)
+
+    def execute(
+        self, command: str, *args, timeout: float = 60.0
+    ) -> Tuple[bool, str, str]:
+        """
+        Run a command in the shell and collect its output.
+
+        Args:
+            command: The rmapi command to run
+            *args: Additional arguments for the command
+            timeout: Seconds to wait for the command to finish
+
+        Returns:
+            Tuple containing (success status, stdout, stderr)
+
+        Raises:
+            ValueError: If the command would change the shell's directory
+            TimeoutError: If the command does not finish within the timeout
+            RuntimeError: If the shell process is not running or exits
+        """
+        if command == "cd":
+            raise ValueError("Pooled rmapi shells must stay in the root directory")
+        if not self.alive:
+            raise RuntimeError("rmapi shell is not running")
+
+        line = " ".join([command] + [self._quote(a) for a in args])
+        output = self._run_until_marker(line, timeout)
+
+        self.commands_run += 1
+        errors = [out_line for out_line in output if self._is_error(out_line)]
+        if command == "get" and args and not errors:
+            if self.downloaded_path(args[0]) is None:
+                errors.append(f"get did not write a file for '{args[0]}'")
+        stdout = "\n".join(output) + ("\n" if output else "")
+        return not errors, stdout, "\n".join(errors)
+
+    def _is_error(self, line: str) -> bool:
+        """Check whether an output line reports a failure."""
+        line = line.strip()
+        if line.startswith(self.LISTING_PREFIXES):
+            return False
+        return bool(self.ERROR_PATTERN.search(line))
+
+    def downloaded_path(self, remote_path: str) -> Optional[str]:
+        """
+        Get the file a ``get`` of a remote path wrote to the working directory.
+
+        Args:
+            remote_path: Remote path or name passed to ``get``
+
+        Returns:
+            Path of the downloaded file, or None if it does not exist
+        """
+        name = os.path.basename(str(remote_path).rstrip("/"))
+        for extension in self.DOWNLOAD_EXTENSIONS:
+            path = os.path.join(self.workdir, name + extension)
+            if os.path.isfile(path):
+                return path
+        return None
+
+    def close(self) -> None:
+        """Terminate the shell process and remove its private working directory."""
+        if self._process is not None:
+            try:
+                if self._process.poll() is None:
+                    try:
+                        self._process.stdin.write("exit\n")
+                        self._process.stdin.flush()
+                    except Exception:
+                        pass
+                    try:
+                        self._process.wait(timeout=2)
+                    except subprocess.TimeoutExpired:
+                        self._process.kill()
+                        self._process.wait(timeout=2)
+            except Exception as e:
+                logger.warning(f"Error stopping rmapi shell worker: {e}")
+            self._process = None
+
+        if self._owns_workdir:
+            shutil.rmtree(self.workdir, ignore_errors=True)
+
+    def restart(self) -> None:
+        """Replace the shell process with a fresh one, keeping the working directory."""
+        owns_workdir = self._owns_workdir
+        self._owns_workdir = False
+        self.close()
+        self._owns_workdir = owns_workdir
+        self.start()
+
+
+class RmapiWorkerPool:
+    """Pool of long-lived rmapi shells shared by concurrent callers."""
+
+    def __init__(
+        self,
+        rmapi_path: str,
+        size: int = 2,
+        command_timeout: float = 60.0,
+        acquire_timeout: Optional[float] = None,
+    ):
+        """
+        Initialize the pool. Workers are started lazily on first use.
+
+        Args:
+            rmapi_path: Path to the rmapi executable
+            size: Number of shells to keep running
+            command_timeout: Default per-command timeout in seconds
+            acquire_timeout: Seconds to wait for a free worker (None waits forever)
+        """
+        self.rmapi_path = rmapi_path
+        self.size = max(1, int(size))
+        self.command_timeout = command_timeout
+        self.acquire_timeout = acquire_timeout
+
+        self._idle: "queue.LifoQueue[RmapiShellWorker]" = queue.LifoQueue()
+        self._workers: List[RmapiShellWorker] = []
+        self._lock = threading.Lock()
+        self._closed = False
+
+        self._stats = {
+            "commands": 0,
+            "failures": 0,
+            "timeouts": 0,
+            "restarts": 0,
+        }
+
+    def _count(self, *counters: str) -> None:
+        """Increment statistics counters."""
+        with self._lock:
+            for counter in counters:
+                self._stats[counter] += 1
+
+    def _reserve_worker(self) -> Optional[RmapiShellWorker]:
+        """Register a new, not yet started worker if the pool is not full."""
+        with self._lock:
+            if len(self._workers) >= self.size:
+                return None
+            worker = RmapiShellWorker(self.rmapi_path)
+            self._workers.append(worker)
+            return worker
+
+    def _start_worker(self, worker: RmapiShellWorker) -> RmapiShellWorker:
+        """Start a reserved worker, giving its slot back if that fails."""
+        try:
+            worker.start()
+        except Exception:
+            worker.close()
+            with self._lock:
+                if worker in self._workers:
+                    self._workers.remove(worker)
+            raise
+        return worker
+
+    def _checkout(self) -> RmapiShellWorker:
+        """Take an idle worker, starting one if the pool is not yet full."""
+        if self._closed:
+            raise RuntimeError("rmapi worker pool is closed")
+
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+
+        # Starting rmapi can take a while; only the slot is taken under the lock
+        worker = self._reserve_worker()
+        if worker is not None:
+            return self._start_worker(worker)
+
+        try:
+            return self._idle.get(timeout=self.acquire_timeout)
+        except queue.Empty:
+            raise TimeoutError("Timed out waiting for a free rmapi worker")
+
+    @contextmanager
+    def acquire(self) -> Iterator[RmapiShellWorker]:
+        """
+        Check out a worker for exclusive use.
+
+        Crashed workers are restarted before being handed out. The worker's
+        ``workdir`` belongs to the caller until the context exits, which makes
+        it safe to use for commands such as ``get`` that write to the cwd.
+
+        Yields:
+            A running RmapiShellWorker
+        """
+        worker = self._checkout()
+        try:
+            if not worker.alive:
+                if worker.started_at is not None:
+                    logger.warning("rmapi shell worker died; restarting")
+                    self._count("restarts")
+                worker.restart()
+            yield worker
+        finally:
+            if self._closed:
+                self._retire(worker)
+            else:
+                self._idle.put(worker)
+                # The pool may have been closed while the worker was in use
+                if self._closed:
+                    self._stop_idle_workers()
+
+    def run_command(
+        self, command: str, *args, timeout: Optional[float] = None
+    ) -> Tuple[bool, str, str]:
+        """
+        Run an rmapi command on a pooled shell.
+
+        Args:
+            command: The rmapi command to run
+            *args: Additional arguments for the command
+            timeout: Per-call timeout in seconds (defaults to command_timeout)
+
+        Returns:
+            Tuple containing (success status, stdout, stderr)
+        """
+        timeout = timeout or self.command_timeout
+        self._count("commands")
+        try:
+            with self.acquire() as worker:
+                try:
+                    success, stdout, stderr = worker.execute(
+                        command, *args, timeout=timeout
+                    )
+                except (TimeoutError, RuntimeError) as e:
+                    # The shell is in an unknown state; replace it
+                    if isinstance(e, TimeoutError):
+                        self._count("timeouts")
+                    self._count("restarts", "failures")
+                    logger.error(f"rmapi worker failed running '{command}': {e}")
+                    worker.restart()
+                    return False, "", str(e)
+        except Exception as e:
+            self._count("failures")
+            logger.error(f"Error running pooled rmapi command: {e}")
+            return False, "", str(e)
+
+        if not success:
+            self._count("failures")
+        return success, stdout, stderr
+
+    def _retire(self, worker: RmapiShellWorker) -> None:
+        """Stop a worker and drop it from the pool."""
+        worker.close()
+        with self._lock:
+            if worker in self._workers:
+                self._workers.remove(worker)
+
+    def close(self) -> None:
+        """
+        Stop all workers.
+
+        Idle workers are stopped now; workers checked out by another thread
+        finish their command and are stopped when released.
+        """
+        self._closed = True
+        self._stop_idle_workers()
+
+    def _stop_idle_workers(self) -> None:
+        """Stop every worker waiting in the idle queue."""
+        while True:
+            try:
+                worker = self._idle.get_nowait()
+            except queue.Empty:
+                return
+            self._retire(worker)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get pool statistics.
+
+        Returns:
+            Dictionary with worker counts and command counters
+        """
+        with self._lock:
+            return {
+                "size": self.size,
+                "workers": len(self._workers),
+                "alive": sum(1 for w in self._workers if w.alive),
+                "idle": self._idle.qsize(),
+                **self._stats,
+            }
@@ -25,6 +25,19 @@ CONFIG = {
     # External tools
     "RMAPI_PATH": os.environ.get("INKLINK_RMAPI", "./local-rmapi"),
     "DRAWJ2D_PATH": os.environ.get("INKLINK_DRAWJ2D", "/usr/local/bin/drawj2d"),
+    # Number of long-lived rmapi shells to keep warm (0 spawns a process per call)
+    "RMAPI_POOL_SIZE": int(os.environ.get("INKLINK_RMAPI_POOL_SIZE", 0)),
+    "RMAPI_COMMAND_TIMEOUT": int(os.environ.get("INKLINK_RMAPI_COMMAND_TIMEOUT", 60)),
+    # Number of Claude CLI sessions the Claude adapters keep started ahead of
+    # requests (0 spawns a process per call); each session answers one request
+    "CLAUDE_SESSION_POOL_SIZE": int(
+        os.environ.get("INKLINK_CLAUDE_SESSION_POOL_SIZE", 0)
+    ),
+    "CLAUDE_SESSION_TIMEOUT": int(
+        os.environ.get("INKLINK_CLAUDE_SESSION_TIMEOUT", 300)
+    ),
+    # Seconds a cloud listing is reused by monitors polling at the same time
+    "CLOUD_INDEX_MAX_AGE": float(os.environ.get("INKLINK_CLOUD_INDEX_MAX_AGE", 5)),
     # Remarkable settings
     # Default remote folder on reMarkable device
     "RM_FOLDER": os.environ.get("INKLINK_RM_FOLDER", "InkLink"),
@@ -61,6 +74,68 @@ CONFIG = {
     "RM_PAGE_WIDTH": int(os.environ.get("RM_PAGE_WIDTH", 1404)),
     "RM_PAGE_HEIGHT": int(os.environ.get("RM_PAGE_HEIGHT", 1872)),
     "RM_RENDER_DPI": int(os.environ.get("RM_RENDER_DPI", 300)),
+    # Notebooks the penpal monitor processes in parallel per poll
+    "PENPAL_MAX_CONCURRENT_NOTEBOOKS": int(
+        os.environ.get("INKLINK_PENPAL_MAX_CONCURRENT_NOTEBOOKS", 4)
+    ),
+    # Tag detection mode for monitored pages:
+    # - "full": recognize every page and search the text for #tags
+    # - "metadata": recognize only pages with metadata tags or ink in the top
+    #   margin (TAG_MARGIN_HEIGHT page units), where handwritten tags go
+    "TAG_DETECTION_MODE": os.environ.get("INKLINK_TAG_DETECTION_MODE", "full"),
+    "TAG_MARGIN_HEIGHT": float(os.environ.get("INKLINK_TAG_MARGIN_HEIGHT", 200)),
+    # Page transcript cache (defaults to a directory under the Lilly root)
+    "TRANSCRIPT_CACHE_DIR": os.environ.get("INKLINK_TRANSCRIPT_CACHE_DIR", ""),
+    "TRANSCRIPT_CACHE_MAX_ENTRIES": int(
+        os.environ.get("INKLINK_TRANSCRIPT_CACHE_MAX_ENTRIES", 10000)
+    ),
+    "TRANSCRIPT_CACHE_MAX_BYTES": int(
+        os.environ.get("INKLINK_TRANSCRIPT_CACHE_MAX_BYTES", 50 * 1024 * 1024)
+    ),
+    # The cache file is rewritten after this many new transcripts or this many
+    # seconds with unsaved ones, whichever comes first
+    "TRANSCRIPT_CACHE_SAVE_EVERY": int(
+        os.environ.get("INKLINK_TRANSCRIPT_CACHE_SAVE_EVERY", 50)
+    ),
+    "TRANSCRIPT_CACHE_SAVE_INTERVAL": float(
+        os.environ.get("INKLINK_TRANSCRIPT_CACHE_SAVE_INTERVAL", 60)
+    ),
+    # Rendered page image cache (defaults to render_cache under TEMP_DIR)
+    "RENDER_CACHE_DIR": os.environ.get("INKLINK_RENDER_CACHE_DIR", ""),
+    "RENDER_CACHE_MAX_BYTES": int(
+        os.environ.get("INKLINK_RENDER_CACHE_MAX_BYTES", 512 * 1024 * 1024)
+    ),
+    # Crop pages to their ink and downscale them before sending them to vision
+    # models; prepared images are grayscale "png" or lossless "webp"
+    "VISION_CROP_TO_INK": os.environ.get("INKLINK_VISION_CROP_TO_INK", "true").lower()
+    == "true",
+    "VISION_IMAGE_FORMAT": os.environ.get("INKLINK_VISION_IMAGE_FORMAT", "png"),
+    # Pack several pages into one composite image per vision request, with at
+    # most VISION_TILE_BUDGET pages per composite
+    "VISION_TILING": os.environ.get("INKLINK_VISION_TILING", "false").lower() == "true",
+    "VISION_TILE_BUDGET": int(os.environ.get("INKLINK_VISION_TILE_BUDGET", 4)),
+    # Confidence the local stroke classifier needs before its content type is
+    # used instead of asking the vision model
+    "CLASSIFIER_MIN_CONFIDENCE": float(
+        os.environ.get("INKLINK_CLASSIFIER_MIN_CONFIDENCE", 0.15)
+    ),
+    # Image preprocessing before vision requests: "numpy" preprocesses in
+    # memory with adaptive thresholding, "pil" uses the PIL filter chain
+    "VISION_PREPROCESSING_BACKEND": os.environ.get(
+        "INKLINK_VISION_PREPROCESSING_BACKEND", "pil"
+    ),
+    # SQLite ledger of processed pages shared by the monitors (defaults to
+    # processed_pages.db under the Lilly root)
+    "PROCESSED_LEDGER_PATH": os.environ.get("INKLINK_PROCESSED_LEDGER_PATH", ""),
+    # Shared polling scheduler: job bodies running at once, random spread of
+    # poll delays, and how far intervals shrink after activity / grow when idle
+    # (jobs may set their own cap; a max backoff of 1 turns idle backoff off)
+    "SCHEDULER_MAX_WORKERS": int(os.environ.get("INKLINK_SCHEDULER_MAX_WORKERS", 4)),
+    "SCHEDULER_JITTER": float(os.environ.get("INKLINK_SCHEDULER_JITTER", 0.1)),
+    "SCHEDULER_ACTIVE_FACTOR": float(
+        os.environ.get("INKLINK_SCHEDULER_ACTIVE_FACTOR", 0.25)
+    ),
+    "SCHEDULER_MAX_BACKOFF": float(os.environ.get("INKLINK_SCHEDULER_MAX_BACKOFF", 8)),
     # Claude settings
     "CLAUDE_SYSTEM_PROMPT": os.environ.get(
         "INKLINK_CLAUDE_SYSTEM_PROMPT", "You are a helpful assistant."
@@ -4,18 +4,22 @@ This module provides a service that monitors reMarkable Cloud for notebooks
 tagged with 'Cass' and processes them with Claude Code.
 """
 
-import json
+import functools
+import hashlib
 import logging
 import os
-import shutil
 import tempfile
-import threading
 import time
-import zipfile
 from typing import Any, Callable, Dict, List, Optional, Set, Tuple
 
 from inklink.adapters.cassidy_adapter import CassidyAdapter
 from inklink.config import CONFIG
+from inklink.services.polling_scheduler import PollingJob, get_shared_scheduler
+from inklink.services.processed_page_ledger import (
+    STATUS_FAILED,
+    get_shared_ledger,
+)
+from inklink.utils.rmdoc_archive import RmdocArchive
 
 logger = logging.getLogger(__name__)
 
@@ -23,6 +27,9 @@ logger = logging.getLogger(__name__)
 class CassidyMonitor:
     """Service that monitors reMarkable Cloud for notebooks tagged with 'Cass'."""
 
+    # Name this monitor records processed pages under in the shared ledger
+    LEDGER_MONITOR = "cassidy"
+
     def __init__(
         self,
         adapter: Optional[CassidyAdapter] = None,
@@ -46,11 +53,15 @@ class CassidyMonitor:
         self.rmapi_path = (
             rmapi_path or os.environ.get("RMAPI_PATH") or CONFIG.get("RMAPI_PATH")
         )
-        self.adapter = adapter or CassidyAdapter(self.rmapi_path, tag)
         self.polling_interval = polling_interval
         self.output_dir = output_dir or os.path.join(
             CONFIG.get("TEMP_DIR", "/tmp"), "cassidy_monitor"
         )
+        self.adapter = adapter or CassidyAdapter(
+            self.rmapi_path,
+            tag,
+            snapshot_path=os.path.join(self.output_dir, "listing_snapshot.json"),
+        )
         self.tag = tag
         self.callback = callback
 
@@ -60,335 +71,192 @@ class CassidyMonitor:
         # State tracking
         self.running = False
         self.last_check_time = time.time()
-        self.known_notebooks: Dict[str, Dict[str, Any]] = {}  # ID -> metadata
-        self.monitoring_thread = None
 
-        # Timestamps file for persistent tracking
-        self.timestamps_file = os.path.join(self.output_dir, "notebook_timestamps.json")
-        self._load_timestamps()
+        # Checks run as a job on the scheduler shared with the other monitors
+        self.scheduler = get_shared_scheduler()
+        self._job_name = f"{type(self).__name__.lower()}-{tag}-{id(self):x}"
 
-    def _load_timestamps(self):
-        """Load notebook timestamps from file, if it exists."""
-        if os.path.exists(self.timestamps_file):
-            try:
-                with open(self.timestamps_file, "r") as f:
-                    self.known_notebooks = json.load(f)
-                logger.info(
-                    f"Loaded {len(self.known_notebooks)} notebook timestamps from file"
-                )
-            except Exception as e:
-                logger.error(f"Failed to load timestamps file: {e}")
-                self.known_notebooks = {}
-
-    def _save_timestamps(self):
-        """Save notebook timestamps to file."""
-        try:
-            with open(self.timestamps_file, "w") as f:
-                json.dump(self.known_notebooks, f)
-        except Exception as e:
-            logger.error(f"Failed to save timestamps file: {e}")
+        # Pages already handled, persisted across restarts
+        self.ledger = get_shared_ledger()
 
     def start(self):
-        """Start the monitoring service in a background thread."""
+        """Start polling on the scheduler shared with the other monitors."""
         if self.running:
             logger.warning("Monitoring service already running")
             return
 
         self.running = True
-        self.monitoring_thread = threading.Thread(
-            target=self._monitoring_loop, daemon=True
+        self.scheduler.add_job(
+            PollingJob(
+                name=self._job_name,
+                func=functools.partial(
+                    self._check_for_tagged_notebooks, raise_errors=True
+                ),
+                interval=self.polling_interval,
+                # Tagged pages wait for an answer, so back off less when idle
+                max_interval=self.polling_interval * 4,
+                jitter=CONFIG.get("SCHEDULER_JITTER", 0.1),
+                # Retry failed checks sooner
+                error_interval=10,
+            )
         )
-        self.monitoring_thread.start()
         logger.info(f"Started monitoring for notebooks tagged with '{self.tag}'")
 
     def stop(self):
-        """Stop the monitoring service."""
+        """Stop the monitoring service, letting a running check finish."""
         if not self.running:
             logger.warning("Monitoring service not running")
             return
 
         self.running = False
-        if self.monitoring_thread and self.monitoring_thread.is_alive():
-            self.monitoring_thread.join(timeout=5.0)
+        self.scheduler.remove_job(self._job_name)
         logger.info("Stopped monitoring service")
-        self._save_timestamps()
+        self.ledger.flush()
 
-    def _monitoring_loop(self):
-        """Background loop for monitoring notebooks."""
-        while self.running:
-            try:
-                # Check for tagged notebooks
-                self._check_for_tagged_notebooks()
-
-                # Sleep until next check
-                for _ in range(int(self.polling_interval)):
-                    if not self.running:
-                        break
-                    time.sleep(1)
-
-            except Exception as e:
-                logger.error(f"Error in monitoring loop: {e}")
-                # Sleep before retry on error
-                time.sleep(10)
-
-    def _check_for_tagged_notebooks(self):
-        """Check for notebooks tagged with 'Cass' at notebook or page level."""
+    def _check_for_tagged_notebooks(self, raise_errors: bool = False) -> bool:
+        """
+        Check for notebooks tagged with 'Cass' at notebook or page level.
+
+        Args:
+            raise_errors: Re-raise errors after logging them, so the scheduler
+                          retries the check sooner
+
+        Returns:
+            True if a tagged document is new or changed since the last check,
+            so the scheduler polls again sooner
+        """
         try:
-            # Find all tagged notebooks
+            # Only documents changed since the last check are returned
             tagged_notebooks = self.find_tagged_documents(self.tag)
+            unprocessed = [doc["id"] for doc in tagged_notebooks]
 
-            if tagged_notebooks:
-                logger.info(
-                    f"Found {len(tagged_notebooks)} documents with tag '{self.tag}'"
-                )
+            try:
+                if tagged_notebooks:
+                    logger.info(
+                        f"Found {len(tagged_notebooks)} documents with tag '{self.tag}'"
+                    )
+                else:
+                    logger.info(f"No documents found with tag '{self.tag}'")
 
-                # Process each tagged notebook
+                # Process each tagged notebook, keeping failed ones for a retry
                 for doc in tagged_notebooks:
-                    self._process_tagged_document(doc)
+                    if self._process_tagged_document(doc):
+                        unprocessed.remove(doc["id"])
+            finally:
+                # Documents that failed or that an interrupted check did not
+                # process are retried
+                self.adapter.save_pending_snapshot(retry=unprocessed)
+                self.ledger.flush()
 
-                # Save timestamps after processing
-                self._save_timestamps()
-            else:
-                logger.info(f"No documents found with tag '{self.tag}'")
+            return bool(tagged_notebooks)
 
         except Exception as e:
             logger.error(f"Error checking for tagged notebooks: {e}")
             import traceback
 
             logger.error(traceback.format_exc())
+            if raise_errors:
+                raise
+            return False
 
     def find_tagged_documents(self, tag: str = "Cass") -> List[Dict[str, Any]]:
         """
-        Find all documents that have a specific tag (notebook or page level).
+        Find documents changed since the last check that have a specific tag.
+
+        Changes come from the adapter's check_for_updates, which downloads only
+        documents whose listing changed since its saved snapshot. The new
+        snapshot is left pending until the caller calls the adapter's
+        save_pending_snapshot once the documents are processed.
 
         Args:
-            tag: Tag to check for
+            tag: Tag to check for (notebook or page level)
 
         Returns:
             List of dictionaries with document info
         """
         tagged_docs = []
+        for change in self.adapter.check_for_updates(save_snapshot=False):
+            doc_name = change["name"]
+            if not change["tagged"]:
+                logger.info(
+                    f"Document {doc_name} was {change['change']} and is not tagged"
+                )
+                continue
+
+            content = change["metadata"]
+            tagged_docs.append(
+                {
+                    "id": change["id"],
+                    "name": doc_name,
+                    "metadata": content,
+                    "has_notebook_tag": self._has_notebook_tag(doc_name, tag, content),
+                    "tagged_pages": self._check_document_for_page_tags(
+                        doc_name, tag, content
+                    ),
+                    "content": content,
+                }
+            )
+        return tagged_docs
 
-        # Get all documents from rmapi
-        success, stdout, stderr = self.adapter.run_command("ls", "-l")
-        if not success:
-            logger.error(f"Failed to list documents: {stderr}")
-            return []
-
-        try:
-            # Process the text output to get document names
-            documents = []
-            for line in stdout.split("\n"):
-                line = line.strip()
-                if line and line.startswith("[f]"):
-                    # Extract document name
-                    doc_name = line[3:].strip()
-
-                    # Skip empty or "Unnamed" documents
-                    if doc_name and doc_name != "Unnamed":
-                        documents.append(doc_name)
-                    else:
-                        logger.info(f"Skipping empty or unnamed document: '{doc_name}'")
-
-            logger.info(f"Found {len(documents)} documents to check for tags")
-
-            # Process each document by name
-            for doc_name in documents:
-                try:
-                    logger.info(f"Checking document: {doc_name}")
-
-                    # Get document ID with stat command
-                    success, stdout, stderr = self.adapter.run_command("stat", doc_name)
-                    if not success:
-                        logger.error(f"Failed to get metadata for {doc_name}: {stderr}")
-                        continue
-
-                    metadata = json.loads(stdout)
-                    doc_id = metadata.get("ID")
-
-                    if not doc_id:
-                        logger.error(f"Could not find ID for {doc_name}")
-                        continue
-
-                    # Check for the tag at notebook level
-                    has_notebook_tag, notebook_content = self._check_document_for_tag(
-                        doc_name, tag
-                    )
-
-                    # Check for the tag at page level
-                    tagged_pages = self._check_document_for_page_tags(
-                        doc_name, tag, notebook_content
-                    )
-
-                    # Update known notebooks
-                    self.known_notebooks[doc_id] = metadata
-
-                    # If the document has tags at either level, add it to the result
-                    if has_notebook_tag or tagged_pages:
-                        tagged_docs.append(
-                            {
-                                "id": doc_id,
-                                "name": doc_name,
-                                "metadata": metadata,
-                                "has_notebook_tag": has_notebook_tag,
-                                "tagged_pages": tagged_pages,
-                                "content": notebook_content,
-                            }
-                        )
-                except Exception as e:
-                    logger.error(f"Error processing document {doc_name}: {e}")
-                    import traceback
-
-                    logger.error(traceback.format_exc())
-
-            return tagged_docs
-
-        except Exception as e:
-            logger.error(f"Error finding tagged notebooks: {e}")
-            import traceback
-
-            logger.error(traceback.format_exc())
-            return []
-
-    def _check_document_for_tag(
-        self, doc_name: str, tag: str
-    ) -> Tuple[bool, Dict[str, Any]]:
+    @staticmethod
+    def _has_notebook_tag(
+        doc_name: str, tag: str, content_data: Dict[str, Any]
+    ) -> bool:
         """
         Check if a document has the specified tag at notebook level.
 
         Args:
             doc_name: Document name
             tag: Tag to search for
+            content_data: Content data dictionary from the document
 
         Returns:
-            Tuple of (has_tag, content_data)
+            True if the notebook carries the tag
         """
-        # Create a temporary directory for the document
-        with tempfile.TemporaryDirectory() as temp_dir:
-            # Create a temporary subdirectory for downloading
-            # rmapi puts files in the current directory
-            current_dir = os.getcwd()
-            try:
-                # Change to temp dir for download
-                os.chdir(temp_dir)
+        # Check for tags
+        tags = content_data.get("tags") or []
+        logger.info(f"Document {doc_name} has notebook tags: {tags}")
 
-                # First download the document by name to current directory
-                expected_file = f"{doc_name}.rmdoc"
-                logger.info(
-                    f"Downloading {doc_name} to {os.path.join(temp_dir, expected_file)}"
+        # Write all tags to a log file for debugging
+        try:
+            with open("/home/ryan/Cassidy/all_tags.txt", "a") as log_file:
+                log_file.write(
+                    f"{time.strftime('%Y-%m-%d %H:%M:%S')} - Document '{doc_name}' has notebook tags: {tags}\n"
                 )
-                success, stdout, stderr = self.adapter.run_command("get", doc_name, ".")
-                if not success:
-                    logger.error(f"Failed to download {doc_name}: {stderr}")
-                    return False, {}
-
-                # Verify file was downloaded
-                if not os.path.exists(expected_file):
-                    logger.error(
-                        f"Download reported success but file not found at {expected_file}"
-                    )
+        except Exception as e:
+            logger.error(f"Error writing to log file: {e}")
 
-                    # Try to find any .rmdoc files in the temp directory
-                    rmdoc_files = [f for f in os.listdir(".") if f.endswith(".rmdoc")]
-                    if rmdoc_files:
-                        logger.info(
-                            f"Found alternative downloaded file: {rmdoc_files[0]}"
-                        )
-                        expected_file = rmdoc_files[0]
-                    else:
-                        logger.error("No .rmdoc files found in temp directory")
-                        return False, {}
-
-                # Set zip_path to the actual downloaded file
-                zip_path = os.path.join(temp_dir, expected_file)
-                logger.info(f"Found downloaded file at {zip_path}")
-
-                # Extract and check for the tag
-                content_data = {}
-                try:
-                    # See if there's a content file
-                    with zipfile.ZipFile(zip_path, "r") as zipf:
-                        content_files = [
-                            f for f in zipf.namelist() if f.endswith(".content")
-                        ]
-
-                        if not content_files:
-                            logger.warning(f"No content file found in {doc_name}")
-                            return False, {}
-
-                        # Extract and check the first content file
-                        content_file = content_files[0]
-                        zipf.extract(content_file, temp_dir)
-
-                        # Read the content file
-                        content_path = os.path.join(temp_dir, content_file)
-                        with open(content_path, "r") as f:
-                            content_data = json.load(f)
-
-                        # Check for tags
-                        tags = content_data.get("tags", [])
-                        logger.info(f"Document {doc_name} has notebook tags: {tags}")
-
-                        # Write all tags to a log file for debugging
-                        try:
-                            with open(
-                                "/home/ryan/Cassidy/all_tags.txt", "a"
-                            ) as log_file:
-                                log_file.write(
-                                    f"{time.strftime('%Y-%m-%d %H:%M:%S')} - Document '{doc_name}' has notebook tags: {tags}\n"
-                                )
-                        except Exception as e:
-                            logger.error(f"Error writing to log file: {e}")
-
-                        if tag in tags:
-                            logger.info(
-                                f"Document '{doc_name}' has notebook tag '{tag}'"
+        if tag in tags:
+            logger.info(f"Document '{doc_name}' has notebook tag '{tag}'")
+            # Write to special log file
+            try:
+                with open("/home/ryan/Cassidy/tagged_docs.txt", "a") as log_file:
+                    log_file.write(
+                        f"{time.strftime('%Y-%m-%d %H:%M:%S')} - Found document '{doc_name}' with notebook tag '{tag}'\n"
+                    )
+            except Exception:
+                pass
+            return True
+
+        # If we're looking for tag 'Cass' but it's not in tags, check case variations
+        if tag.lower() == "cass":
+            for t in tags:
+                if t.lower() == "cass":
+                    logger.info(
+                        f"Document '{doc_name}' has tag with case variation: {t}"
+                    )
+                    try:
+                        with open(
+                            "/home/ryan/Cassidy/case_issues.txt", "a"
+                        ) as log_file:
+                            log_file.write(
+                                f"{time.strftime('%Y-%m-%d %H:%M:%S')} - Document '{doc_name}' has tag '{t}' instead of '{tag}'\n"
                             )
-                            # Write to special log file
-                            try:
-                                with open(
-                                    "/home/ryan/Cassidy/tagged_docs.txt", "a"
-                                ) as log_file:
-                                    log_file.write(
-                                        f"{time.strftime('%Y-%m-%d %H:%M:%S')} - Found document '{doc_name}' with notebook tag '{tag}'\n"
-                                    )
-                            except Exception:
-                                pass
-                            return True, content_data
-
-                        # If we're looking for tag 'Cass' but it's not in tags, check case variations
-                        if tag.lower() == "cass":
-                            for t in tags:
-                                if t.lower() == "cass":
-                                    logger.info(
-                                        f"Document '{doc_name}' has tag with case variation: {t}"
-                                    )
-                                    try:
-                                        with open(
-                                            "/home/ryan/Cassidy/case_issues.txt", "a"
-                                        ) as log_file:
-                                            log_file.write(
-                                                f"{time.strftime('%Y-%m-%d %H:%M:%S')} - Document '{doc_name}' has tag '{t}' instead of '{tag}'\n"
-                                            )
-                                    except Exception:
-                                        pass
-                                    return (
-                                        True,
-                                        content_data,
-                                    )  # Return true for case-insensitive matches too
-
-                        return False, content_data
-
-                except Exception as e:
-                    logger.error(f"Error checking {doc_name} for tag: {e}")
-                    import traceback
-
-                    logger.error(traceback.format_exc())
-                    return False, {}
+                    except Exception:
+                        pass
+                    return True  # Case-insensitive matches count too
 
-            finally:
-                # Change back to original directory
-                os.chdir(current_dir)
+        return False
 
     @staticmethod
     def _check_document_for_page_tags(
@@ -458,19 +326,23 @@ class CassidyMonitor:
 
         return tagged_pages
 
-    def _process_tagged_document(self, doc: Dict[str, Any]):
+    def _process_tagged_document(self, doc: Dict[str, Any]) -> bool:
         """
         Process a document that has been tagged with 'Cass'.
 
         Args:
             doc: Document data including ID, name, metadata and tag info
+
+        Returns:
+            True if the notebook and all its tagged pages were processed, False
+            if something failed and the document should be checked again
         """
         doc_id = doc.get("id")
         doc_name = doc.get("name")
 
         if not doc_id or not doc_name:
             logger.error("Missing document ID or name")
-            return
+            return False
 
         logger.info(f"Processing tagged document: {doc_name} ({doc_id})")
 
@@ -488,20 +360,27 @@ class CassidyMonitor:
         os.makedirs(document_dir, exist_ok=True)
 
         # If document has notebook tag, process the whole notebook
+        success = True
         if doc.get("has_notebook_tag", False):
-            self._process_notebook(doc)
+            success = self._process_notebook(doc)
 
-        # Process each tagged page
+        # Extract all tagged pages in one pass, then process each of them
         tagged_pages = doc.get("tagged_pages", [])
-        for page in tagged_pages:
-            self._process_page(doc, page)
+        extracted_all, extracted_pages = self._extract_tagged_pages(doc, tagged_pages)
+        for extracted in extracted_pages:
+            if not self._process_page(doc, extracted):
+                success = False
+        return success and extracted_all
 
-    def _process_notebook(self, doc: Dict[str, Any]):
+    def _process_notebook(self, doc: Dict[str, Any]) -> bool:
         """
         Process a notebook that has the Cass tag at notebook level.
 
         Args:
             doc: Document data including ID, name, metadata and tag info
+
+        Returns:
+            True if the notebook was downloaded and converted
         """
         doc_id = doc.get("id")
         doc_name = doc.get("name")
@@ -518,7 +397,7 @@ class CassidyMonitor:
             logger.error(
                 f"Failed to download and extract notebook {doc_name}: {extract_dir}"
             )
-            return
+            return False
 
         # Convert pages to PNG
         success, png_paths = self.adapter.convert_notebook_pages_to_png(
@@ -526,7 +405,7 @@ class CassidyMonitor:
         )
         if not success:
             logger.error(f"Failed to convert notebook {doc_name} to PNG: {png_paths}")
-            return
+            return False
 
         logger.info(f"Converted {len(png_paths)} pages of {doc_name} to PNG")
 
@@ -547,122 +426,139 @@ class CassidyMonitor:
         # success, message = self.adapter.remove_tag_from_notebook(doc_id, self.tag)
         # if not success:
         #     logger.error(f"Failed to remove tag from {doc_name}: {message}")
+        return True
 
-    def _process_page(self, doc: Dict[str, Any], page: Dict[str, Any]):
+    def _extract_tagged_pages(
+        self, doc: Dict[str, Any], pages: List[Dict[str, Any]]
+    ) -> Tuple[bool, List[Dict[str, Any]]]:
         """
-        Process a single page that has the Cass tag.
+        Download a notebook once and extract and render all its tagged pages.
+
+        The archive is downloaded and opened a single time however many pages
+        are tagged. Page versions recorded as processed in the ledger are
+        skipped before anything is written to disk.
 
         Args:
             doc: Document data including ID, name, metadata and tag info
-            page: Page data including ID, index, and template
+            pages: Tagged page data including ID, index, and template
+
+        Returns:
+            Tuple of (success, pages): success is False if the download or the
+            rendering of a page failed. Pages holds one entry per page ready
+            for processing, with the page data, the hash of its .rm contents
+            and the paths of its .rm file and PNG
         """
         doc_id = doc.get("id")
         doc_name = doc.get("name")
-        page_id = page.get("id")
-        page_index = page.get("index")
-
-        logger.info(
-            f"Processing page {page_index} (ID: {page_id}) in document {doc_name} ({doc_id})"
-        )
+        if not pages:
+            return True, []
 
-        # Create directory for this page if it doesn't exist
-        page_dir = os.path.join(self.output_dir, doc_id, page_id)
-        os.makedirs(page_dir, exist_ok=True)
-
-        # Create a temporary directory for processing
+        success = True
+        extracted_pages = []
         with tempfile.TemporaryDirectory() as temp_dir:
-            # Create a temporary subdirectory for downloading
-            current_dir = os.getcwd()
-            try:
-                # Change to temp dir for download
-                os.chdir(temp_dir)
-
-                # Download the document
-                expected_file = f"{doc_name}.rmdoc"
-                logger.info(
-                    f"Downloading {doc_name} to {os.path.join(temp_dir, expected_file)}"
-                )
-                success, stdout, stderr = self.adapter.run_command("get", doc_name, ".")
-                if not success:
-                    logger.error(f"Failed to download {doc_name}: {stderr}")
-                    return
-
-                # Verify file was downloaded
-                if not os.path.exists(expected_file):
-                    logger.error(
-                        f"Download reported success but file not found at {expected_file}"
-                    )
+            # Download the document into the temporary directory
+            zip_path = os.path.join(temp_dir, f"{doc_name}.rmdoc")
+            logger.info(f"Downloading {doc_name} to {zip_path}")
+            downloaded, message = self.adapter.download_file(doc_name, zip_path, "zip")
+            if not downloaded:
+                logger.error(f"Failed to download {doc_name}: {message}")
+                return False, []
+
+            with RmdocArchive(zip_path) as archive:
+                for page in pages:
+                    page_id = page.get("id")
+                    if not archive.page_member(page_id):
+                        logger.error(f"No .rm file found for page ID {page_id}")
+                        continue
 
-                    # Try to find any .rmdoc files in the temp directory
-                    rmdoc_files = [f for f in os.listdir(".") if f.endswith(".rmdoc")]
-                    if rmdoc_files:
+                    # Skip page versions handled before, including before a restart
+                    page_hash = hashlib.sha256(archive.read_page(page_id)).hexdigest()
+                    if self.ledger.is_processed(
+                        doc_id, page_id, page_hash, self.LEDGER_MONITOR
+                    ):
                         logger.info(
-                            f"Found alternative downloaded file: {rmdoc_files[0]}"
+                            f"Page {page_id} unchanged since processed, skipping"
                         )
-                        expected_file = rmdoc_files[0]
-                    else:
-                        logger.error("No .rmdoc files found in temp directory")
-                        return
-
-                # Set zip_path to the actual downloaded file
-                zip_path = os.path.join(temp_dir, expected_file)
-                logger.info(f"Found downloaded file at {zip_path}")
-
-                # Extract the specific page
-                with zipfile.ZipFile(zip_path, "r") as zipf:
-                    # Look for .rm file with the page ID
-                    rm_paths = [
-                        f for f in zipf.namelist() if f.endswith(".rm") and page_id in f
-                    ]
-
-                    if not rm_paths:
-                        logger.error(f"No .rm file found for page ID {page_id}")
-                        return
-
-                    # Extract the .rm file
-                    rm_path = rm_paths[0]
-                    zipf.extract(rm_path, temp_dir)
-
-                    # Get path to the extracted file
-                    extracted_rm_path = os.path.join(temp_dir, rm_path)
-                    logger.info(f"Extracted page file to {extracted_rm_path}")
+                        continue
 
-                    # Copy the file to the page directory
-                    shutil.copy(extracted_rm_path, page_dir)
+                    # Write only the tagged page into its page directory
+                    page_dir = os.path.join(self.output_dir, doc_id, page_id)
+                    rm_path = archive.extract_page(page_id, page_dir)
+                    logger.info(f"Extracted page file to {rm_path}")
 
-                    # Convert the page to PNG
-                    rm_file_name = os.path.basename(rm_path)
-                    success, result = self.adapter.convert_rm_to_png(
-                        extracted_rm_path, page_dir
+                    converted, result = self.adapter.convert_rm_to_png(
+                        rm_path, page_dir
                     )
-
-                    if not success:
+                    if not converted:
                         logger.error(f"Failed to convert page to PNG: {result}")
-                        return
+                        success = False
+                        self.ledger.mark(
+                            doc_id,
+                            page_id,
+                            page_hash,
+                            self.LEDGER_MONITOR,
+                            status=STATUS_FAILED,
+                            detail=str(result),
+                        )
+                        continue
 
                     logger.info(f"Converted page to PNG: {result}")
-
-                    # If we have a callback, call it with the page info
-                    if self.callback:
-                        page_info = {
-                            "doc_id": doc_id,
-                            "doc_name": doc_name,
-                            "page_id": page_id,
-                            "page_index": page_index,
-                            "rm_path": os.path.join(page_dir, rm_file_name),
+                    extracted_pages.append(
+                        {
+                            "page": page,
+                            "hash": page_hash,
+                            "rm_path": rm_path,
                             "png_path": result,
-                            "type": "page",
                         }
-                        self.callback(page_info)
+                    )
+
+        logger.info(
+            f"Extracted {len(extracted_pages)} of {len(pages)} tagged pages "
+            f"from {doc_name}"
+        )
+        return success, extracted_pages
+
+    def _process_page(self, doc: Dict[str, Any], extracted: Dict[str, Any]) -> bool:
+        """
+        Process a single page that has the Cass tag.
 
-                    # After processing, remove the tag (optional)
-                    # success, message = self.adapter.remove_tag_from_page(doc_id, page_id, self.tag)
-                    # if not success:
-                    #     logger.error(f"Failed to remove tag from page {page_id}: {message}")
+        Args:
+            doc: Document data including ID, name, metadata and tag info
+            extracted: Page entry returned by _extract_tagged_pages
 
-            finally:
-                # Change back to original directory
-                os.chdir(current_dir)
+        Returns:
+            True if the page was processed
+        """
+        doc_id = doc.get("id")
+        doc_name = doc.get("name")
+        page = extracted["page"]
+        page_id = page.get("id")
+        page_index = page.get("index")
+
+        logger.info(
+            f"Processing page {page_index} (ID: {page_id}) in document {doc_name} ({doc_id})"
+        )
+
+        # If we have a callback, call it with the page info
+        if self.callback:
+            page_info = {
+                "doc_id": doc_id,
+                "doc_name": doc_name,
+                "page_id": page_id,
+                "page_index": page_index,
+                "rm_path": extracted["rm_path"],
+                "png_path": extracted["png_path"],
+                "type": "page",
+            }
+            self.callback(page_info)
+
+        self.ledger.mark(doc_id, page_id, extracted["hash"], self.LEDGER_MONITOR)
+
+        # After processing, remove the tag (optional)
+        # success, message = self.adapter.remove_tag_from_page(doc_id, page_id, self.tag)
+        # if not success:
+        #     logger.error(f"Failed to remove tag from page {page_id}: {message}")
+        return True
 
     def check_now(self) -> List[Dict[str, Any]]:
         """
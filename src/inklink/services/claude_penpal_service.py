@@ -9,6 +9,7 @@ This service provides a penpal-style interaction with Claude, where:
 - Responses are inserted directly after query pages
 """
 
+import hashlib
 import json
 import logging
 import os
@@ -17,7 +18,6 @@ import subprocess
 import tempfile
 import threading
 import time
-import uuid
 from typing import Any, Dict, List, Optional, Set, Tuple
 
 from inklink.adapters.rmapi_adapter import RmapiAdapter
@@ -26,6 +26,12 @@ from inklink.services.document_service import DocumentService
 from inklink.services.handwriting_recognition_service import (
     HandwritingRecognitionService,
 )
+from inklink.services.notebook_change_set import NotebookChangeSet
+from inklink.services.page_transcript_cache import get_shared_transcript_cache
+from inklink.services.polling_scheduler import PollingJob, get_shared_scheduler
+from inklink.services.processed_page_ledger import get_shared_ledger
+from inklink.utils.rmdoc_archive import RmdocArchive
+from inklink.utils.tag_detection import get_page_tags, has_ink_in_top_margin
 
 logger = logging.getLogger(__name__)
 
@@ -33,6 +39,9 @@ logger = logging.getLogger(__name__)
 class ClaudePenpalService:
     """Service for monitoring and processing handwritten queries for Claude."""
 
+    # Name this service records processed pages under in the shared ledger
+    LEDGER_MONITOR = "penpal"
+
     def __init__(
         self,
         rmapi_path: Optional[str] = None,
@@ -51,6 +60,8 @@ class ClaudePenpalService:
         syntax_highlighting: bool = True,
         remove_tags_after_processing: bool = True,
         use_conversation_ids: bool = True,
+        tag_detection_mode: Optional[str] = None,
+        max_concurrent_notebooks: Optional[int] = None,
     ):
         """Initialize the service with necessary components.
 
@@ -72,6 +83,12 @@ class ClaudePenpalService:
             syntax_highlighting: Whether to enable syntax highlighting for code
             remove_tags_after_processing: Whether to remove tags after processing
             use_conversation_ids: Whether to use separate Claude conversation IDs per notebook
+            tag_detection_mode: "full" recognizes every page to find #tags;
+                               "metadata" only recognizes pages with metadata tags
+                               or ink in the top margin
+            max_concurrent_notebooks: Number of notebooks processed in parallel
+                                     per poll, within the worker budget of
+                                     the shared scheduler
         """
         self.rmapi_path = rmapi_path or CONFIG.get("RMAPI_PATH")
         self.claude_command = claude_command or CONFIG.get(
@@ -99,6 +116,14 @@ class ClaudePenpalService:
         self.syntax_highlighting = syntax_highlighting
         self.remove_tags_after_processing = remove_tags_after_processing
         self.use_conversation_ids = use_conversation_ids
+        self.tag_detection_mode = tag_detection_mode or CONFIG.get(
+            "TAG_DETECTION_MODE", "full"
+        )
+        self.max_concurrent_notebooks = max(
+            1,
+            max_concurrent_notebooks
+            or CONFIG.get("PENPAL_MAX_CONCURRENT_NOTEBOOKS", 4),
+        )
         self.temp_dir = CONFIG.get("TEMP_DIR")
         os.makedirs(self.temp_dir, exist_ok=True)
 
@@ -128,10 +153,23 @@ class ClaudePenpalService:
         # Load existing conversation IDs if available
         self._load_conversation_ids()
 
+        # Cloud version and local rmdoc hash of each notebook at its last scan,
+        # used to skip notebooks that have not changed since
+        self.notebook_state_path = os.path.join(self.lilly_dir, "notebook_state.json")
+        self.notebook_states: Dict[str, Dict[str, Any]] = {}
+        self._load_notebook_states()
+        self.notebook_stats = {"skipped": 0, "refreshed": 0}
+
         # Initialize components
         self.rmapi_adapter = RmapiAdapter(self.rmapi_path)
+        self.transcript_cache = get_shared_transcript_cache(
+            CONFIG.get("TRANSCRIPT_CACHE_DIR")
+            or os.path.join(self.lilly_dir, "transcript_cache")
+        )
         self.handwriting_service = HandwritingRecognitionService(
-            claude_command=self.claude_command, model=self.model
+            claude_command=self.claude_command,
+            model=self.model,
+            transcript_cache=self.transcript_cache,
         )
         self.document_service = DocumentService(
             temp_dir=self.temp_dir, drawj2d_path=CONFIG.get("DRAWJ2D_PATH")
@@ -147,86 +185,188 @@ class ClaudePenpalService:
             logger.warning("Knowledge graph service not available")
             self.kg_service = None
 
-        # Set up tracking for processed queries by page ID
-        self.processed_pages = set()
+        # Processed pages survive restarts in the ledger shared by all monitors
+        self.ledger = get_shared_ledger()
         self._running = False
-        self._monitor_thread = None
+
+        # Polls run as a job on the scheduler shared with the other monitors
+        self.scheduler = get_shared_scheduler()
+        self._job_name = f"penpal-{id(self):x}"
+
+        # Workers hold a notebook's lock while downloading and writing it back
+        self._notebook_locks: Dict[str, threading.Lock] = {}
+        self._notebook_locks_guard = threading.Lock()
+        # Guards shared state saved to disk and counters updated by workers
+        self._state_lock = threading.Lock()
+        self._queue_depth = 0
+        self.poll_metrics = {
+            "polls": 0,
+            "last_poll_seconds": 0.0,
+            "last_poll_notebooks": 0,
+            "last_max_queue_depth": 0,
+        }
 
         logger.info("Claude Penpal service initialized")
 
     def start_monitoring(self):
-        """Start the monitoring thread."""
+        """Start polling for tagged pages on the shared scheduler."""
         if self._running:
             logger.warning("Monitoring already active")
             return
 
         self._running = True
-        self._monitor_thread = threading.Thread(target=self._monitor_loop, daemon=True)
-        self._monitor_thread.start()
+        self.scheduler.add_job(
+            PollingJob(
+                name=self._job_name,
+                func=self._poll_once,
+                interval=self.poll_interval,
+                # Someone waiting for a reply is kept waiting a few polls at most
+                max_interval=self.poll_interval * 4,
+                jitter=CONFIG.get("SCHEDULER_JITTER", 0.1),
+                error_interval=self.poll_interval,
+            )
+        )
         logger.info("Started monitoring for tagged pages")
 
     def stop_monitoring(self):
-        """Stop the monitoring thread."""
+        """Stop polling, letting a running poll finish."""
         self._running = False
-        if self._monitor_thread:
-            self._monitor_thread.join(timeout=5.0)
+        if self.scheduler.remove_job(self._job_name):
             logger.info("Stopped monitoring")
+        self.ledger.flush()
+        self.transcript_cache.save()
 
-    def _monitor_loop(self):
-        """Main monitoring loop for finding tagged pages within notebooks."""
-        while self._running:
-            try:
-                # Use pre-filtering with the HasLilly tag to optimize notebook checking
-                if self.pre_filter_tag:
-                    logger.info(
-                        f"Using pre-filter tag '{self.pre_filter_tag}' to optimize notebook selection"
-                    )
-                    filtered_notebooks = self.rmapi_adapter.find_tagged_notebooks(
-                        tag=self.pre_filter_tag,
-                        pre_filter_tag=None,  # No recursive pre-filtering
-                    )
+    def _poll_once(self) -> bool:
+        """Check all candidate notebooks for tagged pages once.
 
-                    if not filtered_notebooks:
-                        logger.warning(
-                            f"No notebooks found with pre-filter tag '{self.pre_filter_tag}'"
-                        )
-                        time.sleep(self.poll_interval)
-                        continue
+        Returns:
+            True if any notebook changed since its last scan, so the scheduler
+            polls again sooner
+        """
+        with self._state_lock:
+            refreshed_before = self.notebook_stats["refreshed"]
 
-                    logger.info(
-                        f"Found {len(filtered_notebooks)} notebooks with pre-filter tag '{self.pre_filter_tag}'"
-                    )
+        # Use pre-filtering with the HasLilly tag to optimize notebook checking
+        if self.pre_filter_tag:
+            logger.info(
+                f"Using pre-filter tag '{self.pre_filter_tag}' to optimize notebook selection"
+            )
+            # One detailed listing selects the notebooks and supplies their
+            # versions; notebooks without the tag are never downloaded
+            success, notebooks = self.rmapi_adapter.list_documents_with_tag(
+                self.pre_filter_tag
+            )
+            if not success:
+                logger.error("Failed to list notebooks")
+                return False
 
-                    # Convert to the same format as list_files() for compatibility
-                    notebooks = []
-                    for nb in filtered_notebooks:
-                        notebooks.append(
-                            {
-                                "ID": nb.get("id"),
-                                "VissibleName": nb.get("name"),
-                                "Type": "DocumentType",
-                            }
-                        )
-                else:
-                    # If no pre-filtering, use the standard method to list all notebooks
-                    success, notebooks = self.rmapi_adapter.list_files()
-                    if not success:
-                        logger.error("Failed to list notebooks")
-                        time.sleep(self.poll_interval)
-                        continue
+            if not notebooks:
+                logger.warning(
+                    f"No notebooks found with pre-filter tag '{self.pre_filter_tag}'"
+                )
+                return False
+
+            logger.info(
+                f"Found {len(notebooks)} notebooks with pre-filter tag '{self.pre_filter_tag}'"
+            )
+        else:
+            # One detailed listing per poll supplies cloud versions
+            self.rmapi_adapter.get_document_index().refresh()
 
-                # Process each notebook to check for tagged pages
-                for notebook in notebooks:
-                    self._check_notebook_for_tagged_pages(notebook)
+            # If no pre-filtering, use the standard method to list all notebooks
+            success, notebooks = self.rmapi_adapter.list_files()
+            if not success:
+                logger.error("Failed to list notebooks")
+                return False
+
+        # Process notebooks concurrently to check for tagged pages
+        self._process_notebooks(notebooks)
+
+        with self._state_lock:
+            return self.notebook_stats["refreshed"] > refreshed_before
+
+    def _process_notebooks(self, notebooks):
+        """Check notebooks for tagged pages on a bounded worker pool.
 
-            except Exception as e:
-                logger.error(f"Error in monitoring loop: {e}")
-                import traceback
+        Args:
+            notebooks: Notebook information from rmapi
+        """
+        start_time = time.monotonic()
+
+        # A notebook listed twice would only contend for its own lock
+        unique_notebooks = list(
+            {nb.get("ID") or nb.get("VissibleName"): nb for nb in notebooks}.values()
+        )
+
+        with self._state_lock:
+            self._queue_depth = len(unique_notebooks)
+            max_queue_depth = self._queue_depth
+
+        def run_queued(notebook):
+            with self._state_lock:
+                self._queue_depth -= 1
+            self._check_notebook_locked(notebook)
+
+        # Notebooks run on the scheduler's workers, within the budget shared
+        # with the other monitors
+        futures = self.scheduler.run_batch(
+            run_queued, unique_notebooks, max_parallel=self.max_concurrent_notebooks
+        )
+        for notebook, future in zip(unique_notebooks, futures):
+            if future.exception() is not None:
+                notebook_id = notebook.get("ID")
+                logger.error(
+                    f"Error processing notebook {notebook_id}: {future.exception()}"
+                )
+
+        # Commit the pages processed during this poll in one transaction
+        self.ledger.flush()
+        # Rewrite the transcript cache once per poll, not once per page
+        self.transcript_cache.save()
+
+        elapsed = time.monotonic() - start_time
+        with self._state_lock:
+            self.poll_metrics["polls"] += 1
+            self.poll_metrics["last_poll_seconds"] = elapsed
+            self.poll_metrics["last_poll_notebooks"] = len(unique_notebooks)
+            self.poll_metrics["last_max_queue_depth"] = max_queue_depth
+
+        logger.info(
+            f"Processed {len(unique_notebooks)} notebooks in {elapsed:.2f}s "
+            f"with {self.max_concurrent_notebooks} workers"
+        )
 
-                logger.error(traceback.format_exc())
+    def _get_notebook_lock(self, notebook_id) -> threading.Lock:
+        """Get the lock serializing work on a single notebook."""
+        with self._notebook_locks_guard:
+            lock = self._notebook_locks.get(notebook_id)
+            if lock is None:
+                lock = self._notebook_locks[notebook_id] = threading.Lock()
+            return lock
 
-            # Wait for next poll interval
-            time.sleep(self.poll_interval)
+    def _check_notebook_locked(self, notebook):
+        """Check a notebook for tagged pages while holding its lock.
+
+        Args:
+            notebook: Notebook information from rmapi
+        """
+        notebook_id = notebook.get("ID") or notebook.get("VissibleName")
+        with self._get_notebook_lock(notebook_id):
+            self._check_notebook_for_tagged_pages(notebook)
+
+    def get_poll_metrics(self) -> Dict[str, Any]:
+        """Get wall-clock and queue-depth metrics for monitor polls.
+
+        Returns:
+            Dictionary with the last poll's duration, notebook count and
+            maximum queue depth, and the current queue depth
+        """
+        with self._state_lock:
+            return {
+                **self.poll_metrics,
+                "queue_depth": self._queue_depth,
+                "max_concurrent_notebooks": self.max_concurrent_notebooks,
+            }
 
     def _load_conversation_ids(self):
         """Load saved conversation IDs from storage."""
@@ -244,12 +384,107 @@ class ClaudePenpalService:
     def _save_conversation_ids(self):
         """Save conversation IDs to storage."""
         try:
-            with open(self.conversation_storage_path, "w") as f:
-                json.dump(self.notebook_conversation_ids, f)
-            logger.info(f"Saved {len(self.notebook_conversation_ids)} conversation IDs")
+            # Workers may update other notebooks meanwhile
+            with self._state_lock, open(self.conversation_storage_path, "w") as f:
+                conversation_ids = dict(self.notebook_conversation_ids)
+                json.dump(conversation_ids, f)
+            logger.info(f"Saved {len(conversation_ids)} conversation IDs")
         except Exception as e:
             logger.error(f"Error saving conversation IDs: {e}")
 
+    def _load_notebook_states(self):
+        """Load saved notebook versions and hashes from storage."""
+        try:
+            if os.path.exists(self.notebook_state_path):
+                with open(self.notebook_state_path, "r") as f:
+                    self.notebook_states = json.load(f)
+                    logger.info(
+                        f"Loaded state for {len(self.notebook_states)} notebooks"
+                    )
+        except Exception as e:
+            logger.error(f"Error loading notebook states: {e}")
+            self.notebook_states = {}
+
+    def _save_notebook_states(self):
+        """Save notebook versions and hashes to storage."""
+        try:
+            # Workers may update other notebooks meanwhile
+            with self._state_lock, open(self.notebook_state_path, "w") as f:
+                notebook_states = dict(self.notebook_states)
+                json.dump(notebook_states, f)
+        except Exception as e:
+            logger.error(f"Error saving notebook states: {e}")
+
+    def _get_cloud_version(self, notebook) -> Dict[str, Any]:
+        """Get a notebook's cloud version and modification time.
+
+        Args:
+            notebook: Notebook information from rmapi
+
+        Returns:
+            Dictionary with "version" and "last_modified" (None when unknown)
+        """
+        version = notebook.get("Version")
+        last_modified = notebook.get("ModifiedClient")
+
+        if version is None and last_modified is None:
+            # Plain listings carry no versions; use the detailed cloud index
+            index = self.rmapi_adapter.get_document_index()
+            doc = index.get(notebook.get("ID")) or index.get(
+                notebook.get("VissibleName")
+            )
+            if doc:
+                version, last_modified = doc.version, doc.last_modified
+
+        return {"version": version, "last_modified": last_modified}
+
+    @staticmethod
+    def _hash_file(path) -> Optional[str]:
+        """Compute the SHA-256 of a file, or None if it cannot be read."""
+        try:
+            digest = hashlib.sha256()
+            with open(path, "rb") as f:
+                for chunk in iter(lambda: f.read(1024 * 1024), b""):
+                    digest.update(chunk)
+            return digest.hexdigest()
+        except OSError:
+            return None
+
+    def _is_notebook_unchanged(self, notebook_id, cloud_version, download_path):
+        """Check whether a notebook matches the state recorded at its last scan.
+
+        A notebook is unchanged when the cloud reports a version or
+        modification time equal to the recorded one and the local rmdoc still
+        has the recorded hash.
+
+        Args:
+            notebook_id: ID of the notebook
+            cloud_version: Result of _get_cloud_version
+            download_path: Path of the local rmdoc copy
+
+        Returns:
+            True if download, extraction and scanning can be skipped
+        """
+        state = self.notebook_states.get(notebook_id)
+        if not state:
+            return False
+        if cloud_version["version"] is None and cloud_version["last_modified"] is None:
+            return False
+        if (
+            state.get("version") != cloud_version["version"]
+            or state.get("last_modified") != cloud_version["last_modified"]
+        ):
+            return False
+        return state.get("rmdoc_hash") == self._hash_file(download_path)
+
+    def get_notebook_stats(self) -> Dict[str, Any]:
+        """Get counters for skipped and refreshed notebooks.
+
+        Returns:
+            Dictionary with "skipped", "refreshed" and "tracked" counts
+        """
+        return {**self.notebook_stats, "tracked": len(self.notebook_states)}
+
     def _check_notebook_for_tagged_pages(self, notebook):
         """Check a notebook for pages with tags.
 
@@ -259,7 +494,20 @@ class ClaudePenpalService:
         notebook_id = notebook.get("ID")
         notebook_name = notebook.get("VissibleName", "Notebook")  # Note: typo from API
 
-        # First, see if we have metadata for this notebook to determine the subject
+        # Skip notebooks unchanged since their last scan. This only needs the
+        # listing entry and the local copy recorded with the state, so nothing
+        # is downloaded for them.
+        cloud_version = self._get_cloud_version(notebook)
+        recorded_path = self.notebook_states.get(notebook_id, {}).get("download_path")
+        if recorded_path and self._is_notebook_unchanged(
+            notebook_id, cloud_version, recorded_path
+        ):
+            logger.debug(f"Notebook {notebook_name} unchanged, skipping")
+            with self._state_lock:
+                self.notebook_stats["skipped"] += 1
+            return
+
+        # See if we have metadata for this notebook to determine the subject
         metadata = self._get_notebook_metadata(notebook_id, notebook_name)
 
         # Create or get the notebook-specific directory based on metadata
@@ -267,8 +515,9 @@ class ClaudePenpalService:
 
         try:
             # Create paths for notebook files
-            download_path = os.path.join(notebook_dir, f"{notebook_name}.rmdoc")
-            extract_dir = os.path.join(notebook_dir, "extracted")
+            # Keyed by ID: notebooks with the same name share notebook_dir
+            download_path = os.path.join(notebook_dir, f"{notebook_id}.rmdoc")
+            extract_dir = os.path.join(notebook_dir, "extracted", notebook_id)
             os.makedirs(extract_dir, exist_ok=True)
 
             # Download notebook
@@ -281,22 +530,40 @@ class ClaudePenpalService:
                 logger.warning(f"Failed to download notebook {notebook_id}")
                 return
 
+            with self._state_lock:
+                self.notebook_stats["refreshed"] += 1
+            notebook_state = {
+                **cloud_version,
+                "rmdoc_hash": self._hash_file(download_path),
+                "download_path": download_path,
+            }
+
             # Extract and scan for tagged pages
             pages_data = self._extract_notebook_pages(download_path, extract_dir)
 
             if not pages_data:
                 logger.debug(f"No pages found in notebook {notebook_id}")
+                with self._state_lock:
+                    self.notebook_states[notebook_id] = notebook_state
+                self._save_notebook_states()
                 return
 
             # Find query pages
             query_pages = [p for p in pages_data if self._has_tag(p, self.query_tag)]
 
+            # Responses and tag removals are written back together after the scan
+            change_set = NotebookChangeSet(
+                notebook_id, notebook_name, download_path, notebook_dir
+            )
+            # Pages are marked processed only once the write-back succeeded
+            handled_pages = []
+
             # Process each query page
             for query_page in query_pages:
                 page_id = query_page["id"]
 
                 # Skip if already processed
-                if page_id in self.processed_pages:
+                if self._is_page_processed(notebook_id, query_page):
                     continue
 
                 logger.info(
@@ -311,17 +578,19 @@ class ClaudePenpalService:
                     logger.info(
                         f"New conversation requested for notebook {notebook_name}"
                     )
-                    self.notebook_contexts[notebook_id] = False
+                    with self._state_lock:
+                        self.notebook_contexts[notebook_id] = False
+                        reset_id = (
+                            self.use_conversation_ids
+                            and self.notebook_conversation_ids.pop(notebook_id, None)
+                            is not None
+                        )
 
                     # Reset conversation ID if using separate IDs
-                    if (
-                        self.use_conversation_ids
-                        and notebook_id in self.notebook_conversation_ids
-                    ):
+                    if reset_id:
                         logger.info(
                             f"Resetting conversation ID for notebook {notebook_id}"
                         )
-                        del self.notebook_conversation_ids[notebook_id]
                         self._save_conversation_ids()
 
                 # Find context pages (must come before the query page)
@@ -346,10 +615,9 @@ class ClaudePenpalService:
                     mcp_tools=mcp_tools,
                     new_conversation=start_new_conversation,
                     all_pages=pages_data,
+                    change_set=change_set,
                 )
-
-                # Mark as processed
-                self.processed_pages.add(page_id)
+                handled_pages.append(query_page)
 
             # Find knowledge graph pages
             kg_pages = [
@@ -361,7 +629,7 @@ class ClaudePenpalService:
                 page_id = kg_page["id"]
 
                 # Skip if already processed
-                if page_id in self.processed_pages:
+                if self._is_page_processed(notebook_id, kg_page):
                     continue
 
                 logger.info(
@@ -376,10 +644,36 @@ class ClaudePenpalService:
                     notebook_dir=notebook_dir,
                     kg_page=kg_page,
                     all_pages=pages_data,
+                    change_set=change_set,
                 )
+                handled_pages.append(kg_page)
 
-                # Mark as processed
-                self.processed_pages.add(page_id)
+            # One rewrite and one upload for everything this poll changed
+            if not self._commit_change_set(change_set):
+                # Leave pages and state untouched so the next poll retries
+                logger.warning(
+                    f"Write-back of notebook {notebook_name} failed, "
+                    f"{len(handled_pages)} pages will be retried"
+                )
+                return
+
+            if change_set.skipped_pages:
+                # Responses that could not be placed were never written back
+                logger.warning(
+                    f"{len(change_set.skipped_pages)} pages of notebook "
+                    f"{notebook_name} could not be answered and will be retried"
+                )
+                handled_pages = [
+                    p for p in handled_pages if p["id"] not in change_set.skipped_pages
+                ]
+            self._mark_pages_processed(notebook_id, handled_pages)
+            if change_set.skipped_pages:
+                return
+
+            # Record the scanned state only once every page was handled
+            with self._state_lock:
+                self.notebook_states[notebook_id] = notebook_state
+            self._save_notebook_states()
 
         except Exception as e:
             logger.error(f"Error processing notebook {notebook_id}: {e}")
@@ -481,6 +775,38 @@ class ClaudePenpalService:
             logger.error(f"Error retrieving notebook metadata: {e}")
             return {}
 
+    def _is_page_processed(self, notebook_id, page) -> bool:
+        """Check the ledger for this version of a page.
+
+        Args:
+            notebook_id: ID of the notebook
+            page: Page data dictionary
+
+        Returns:
+            True if the page's current contents were already processed
+        """
+        return self.ledger.is_processed(
+            notebook_id, page["id"], page.get("hash", ""), self.LEDGER_MONITOR
+        )
+
+    def _mark_pages_processed(self, notebook_id, pages):
+        """Record page versions whose write-back was confirmed as processed.
+
+        Call this only after the notebook was uploaded. The entries are
+        flushed at once, so a restart does not answer the pages again.
+
+        Args:
+            notebook_id: ID of the notebook
+            pages: Page data dictionaries
+        """
+        if not pages:
+            return
+        for page in pages:
+            self.ledger.mark(
+                notebook_id, page["id"], page.get("hash", ""), self.LEDGER_MONITOR
+            )
+        self.ledger.flush()
+
     def _has_tag(self, page, tag):
         """Check if a page has a specific tag."""
         # Check explicit tags
@@ -520,122 +846,81 @@ class ClaudePenpalService:
         return list(set(tools))  # Remove duplicates
 
     def _extract_notebook_pages(self, notebook_path, extract_dir):
-        """Extract pages from notebook and gather metadata.
+        """Read pages from a notebook archive and gather metadata.
+
+        Pages are read from the archive in memory; a page's .rm file is only
+        written under extract_dir when it has to be sent for recognition.
 
         Args:
             notebook_path: Path to notebook zip file
-            extract_dir: Directory to extract files to
+            extract_dir: Directory to write pages needing recognition to
 
         Returns:
             List of page data dictionaries with page ID, filename, content, tags
         """
         try:
-            import zipfile
-
-            # Check if extract_dir already has content files
-            content_files = []
-            for root, _, files in os.walk(extract_dir):
-                for file in files:
-                    if file.endswith(".content"):
-                        content_files.append(os.path.join(root, file))
-
-            # If no content files found in extract_dir and notebook_path is a zip file, extract it
-            if (
-                not content_files
-                and os.path.exists(notebook_path)
-                and zipfile.is_zipfile(notebook_path)
-            ):
-                # Extract notebook
-                with zipfile.ZipFile(notebook_path, "r") as zip_ref:
-                    zip_ref.extractall(extract_dir)
-
-                # Refresh content files list
-                content_files = []
-                for root, _, files in os.walk(extract_dir):
-                    for file in files:
-                        if file.endswith(".content"):
-                            content_files.append(os.path.join(root, file))
-
-            # Check if we found any content files
-            if not content_files:
-                logger.warning(
-                    f"No content file found in notebook {notebook_path} or extraction directory {extract_dir}"
-                )
+            if not RmdocArchive.is_archive(notebook_path):
+                logger.warning(f"Notebook {notebook_path} is not a readable archive")
                 return []
 
-            # Parse content file (usually only one)
-            content_file = content_files[0]
-            logger.info(f"Using content file: {content_file}")
-
-            with open(content_file, "r") as f:
-                notebook_content = json.load(f)
+            with RmdocArchive(notebook_path) as archive:
+                if not archive.content_name:
+                    logger.warning(f"No content file found in notebook {notebook_path}")
+                    return []
 
-            # Get pages structure
-            pages = notebook_content.get("pages", [])
-            logger.info(f"Found {len(pages)} pages in content file")
+                logger.info(f"Using content file: {archive.content_name}")
+                notebook_content = archive.content
 
-            # Find all page files and match with content
-            page_files = []
-            for root, _, files in os.walk(extract_dir):
-                for file in files:
-                    if file.endswith(".rm"):
-                        page_files.append(
-                            {
-                                "id": os.path.splitext(file)[0],
-                                "path": os.path.join(root, file),
-                            }
-                        )
-
-            logger.info(f"Found {len(page_files)} .rm files")
-
-            # Match pages with their metadata and extract tags
-            pages_data = []
-            for page_file in page_files:
-                page_id = page_file["id"]
-
-                # Find page metadata from content file
-                page_meta = next((p for p in pages if p.get("id") == page_id), {})
-
-                # Get page tags
-                tags = page_meta.get("tags", [])
-                logger.info(f"Page {page_id} has tags: {tags}")
-
-                # Extract text from page
-                page_text = self._extract_text_from_page(page_file["path"])
-
-                # Look for tag indicators like #Lilly, #Context, #kg
-                tag_matches = re.findall(r"#(\w+)", page_text)
-                for tag in tag_matches:
-                    if tag not in tags:
-                        tags.append(tag)
-
-                # Add page data
-                pages_data.append(
-                    {
-                        "id": page_id,
-                        "path": page_file["path"],
-                        "metadata": page_meta,
-                        "tags": tags,
-                        "text": page_text,
-                    }
-                )
+                # Page entries with metadata (older notebooks list plain IDs)
+                pages = [
+                    p for p in notebook_content.get("pages", []) if isinstance(p, dict)
+                ]
+                page_ids = archive.page_ids()
+                logger.info(f"Found {len(page_ids)} .rm files")
+
+                # Match pages with their metadata and extract tags
+                pages_data = []
+                for page_id in page_ids:
+                    # Find page metadata from content file
+                    page_meta = next((p for p in pages if p.get("id") == page_id), {})
+
+                    # Get page tags from the notebook and page metadata
+                    tags = get_page_tags(
+                        notebook_content, page_id, archive.page_metadata(page_id)
+                    )
+                    logger.info(f"Page {page_id} has tags: {tags}")
 
-            # Sort pages by position in notebook
-            pages_with_meta = [
-                (p, next((meta for meta in pages if meta.get("id") == p["id"]), {}))
-                for p in pages_data
-            ]
-            try:
-                pages_data = [
-                    p[0]
-                    for p in sorted(
-                        pages_with_meta,
-                        key=lambda x: pages.index(x[1]) if x[1] else 999999,
+                    # Extract text from page, skipping pages that cannot carry tags
+                    page_data = archive.read_page(page_id)
+                    page_path = os.path.join(
+                        extract_dir, archive.doc_id or "", f"{page_id}.rm"
                     )
-                ]
-            except Exception as e:
-                logger.warning(f"Failed to sort pages: {e}")
-                # If sorting fails, keep original order
+                    if self._is_tag_candidate(page_data, tags):
+                        page_text = self._extract_text_from_page(page_path, page_data)
+                    else:
+                        logger.debug(f"Page {page_id} has no tag candidates, skipping")
+                        page_text = ""
+
+                    # Look for tag indicators like #Lilly, #Context, #kg
+                    tag_matches = re.findall(r"#(\w+)", page_text)
+                    for tag in tag_matches:
+                        if tag not in tags:
+                            tags.append(tag)
+
+                    # Add page data
+                    pages_data.append(
+                        {
+                            "id": page_id,
+                            "path": page_path if os.path.exists(page_path) else None,
+                            "metadata": page_meta,
+                            "tags": tags,
+                            "text": page_text,
+                            "hash": self.transcript_cache.compute_data_hash(page_data),
+                        }
+                    )
+
+            # Transcripts recognized during this scan are saved with the poll
+            self.transcript_cache.save_if_due()
 
             # If we found pages with the Lilly tag, log them
             lilly_pages = [p for p in pages_data if self.query_tag in p["tags"]]
@@ -655,19 +940,72 @@ class ClaudePenpalService:
             logger.error(traceback.format_exc())
             return []
 
-    def _extract_text_from_page(self, page_path):
+    def _is_tag_candidate(self, page, tags):
+        """Check whether a page needs full recognition to discover its tags.
+
+        In "full" mode every page is a candidate. In "metadata" mode only pages
+        with a watched metadata tag or ink in the top margin are.
+
+        Args:
+            page: Path to the .rm file or its bytes
+            tags: Tags already known from metadata
+
+        Returns:
+            True if the page should be recognized
+        """
+        if self.tag_detection_mode != "metadata":
+            return True
+
+        watched_tags = {
+            t.lower()
+            for t in [
+                self.query_tag,
+                self.context_tag,
+                self.knowledge_graph_tag,
+                self.new_conversation_tag,
+                *self.mcp_tool_tags,
+            ]
+        }
+        if any(tag.lower() in watched_tags for tag in tags):
+            return True
+
+        return has_ink_in_top_margin(
+            page, margin_height=CONFIG.get("TAG_MARGIN_HEIGHT", 200.0)
+        )
+
+    def _extract_text_from_page(self, page_path, page_data=None):
         """Extract text from a single page.
 
         Args:
             page_path: Path to .rm file
+            page_data: The page's .rm bytes, if already read from the archive;
+                       they are written to page_path only if recognition runs
 
         Returns:
             Extracted text
         """
         try:
+            # Unchanged pages reuse the transcript from an earlier poll without
+            # being written out; the handwriting service fills the cache
+            if page_data is None:
+                page_hash = self.transcript_cache.compute_page_hash(page_path)
+            else:
+                page_hash = self.transcript_cache.compute_data_hash(page_data)
+            cached_text = self.transcript_cache.get(
+                page_hash, self.handwriting_service.model, "Text", "en_US"
+            )
+            if cached_text is not None:
+                logger.debug(f"Using cached transcript for {page_path}")
+                return cached_text
+
+            if page_data is not None:
+                os.makedirs(os.path.dirname(page_path), exist_ok=True)
+                with open(page_path, "wb") as f:
+                    f.write(page_data)
+
             # Use handwriting service to extract text
             result = self.handwriting_service.recognize_from_ink(
-                file_path=page_path, content_type="Text"
+                file_path=page_path, content_type="Text", language="en_US"
             )
 
             if result.get("success", False):
@@ -690,6 +1028,7 @@ class ClaudePenpalService:
         mcp_tools,
         new_conversation,
         all_pages,
+        change_set=None,
     ):
         """Process a query page with its context and insert response.
 
@@ -703,6 +1042,7 @@ class ClaudePenpalService:
             mcp_tools: List of MCP tools to enforce
             new_conversation: Whether to start a new conversation
             all_pages: List of all pages in the notebook
+            change_set: Change set collecting this poll's edits to the notebook
         """
         try:
             # Extract query text
@@ -747,6 +1087,7 @@ class ClaudePenpalService:
                 query_page=query_page,
                 response_text=response_text,
                 all_pages=all_pages,
+                change_set=change_set,
             )
 
             # Remove tags if configured
@@ -764,6 +1105,7 @@ class ClaudePenpalService:
                     notebook_name=notebook_name,
                     page_id=query_page["id"],
                     tags_to_remove=tags_to_remove,
+                    change_set=change_set,
                 )
 
                 # Remove tags from context pages
@@ -773,6 +1115,7 @@ class ClaudePenpalService:
                         notebook_name=notebook_name,
                         page_id=ctx_page["id"],
                         tags_to_remove=[self.context_tag],
+                        change_set=change_set,
                     )
 
         except Exception as e:
@@ -809,19 +1152,26 @@ class ClaudePenpalService:
             # Prepare Claude command
             model_flag = f"--model {self.model}" if self.model else ""
 
-            # Determine which context mode to use
-            use_context = not new_conversation and notebook_id in self.notebook_contexts
+            # Determine which context mode to use; other notebooks' workers
+            # update these dicts concurrently
+            with self._state_lock:
+                use_context = (
+                    not new_conversation and notebook_id in self.notebook_contexts
+                )
+                conversation_id = self.notebook_conversation_ids.get(notebook_id)
+            capture_id = self.use_conversation_ids and (
+                new_conversation or conversation_id is None
+            )
 
             # Build command based on context strategy
             if self.use_conversation_ids:
                 # Use -r flag with conversation ID if we have one
-                if use_context and notebook_id in self.notebook_conversation_ids:
-                    conversation_id = self.notebook_conversation_ids[notebook_id]
+                if use_context and conversation_id is not None:
                     context_flag = f"-r {conversation_id}"
                     cmd = f"{self.claude_command} {model_flag} {context_flag} < {input_path} > {output_path}"
                 else:
                     # New conversation, will capture and save the ID
-                    cmd = f"{self.claude_command} {model_flag} < {input_path} > {output_path} 2> /tmp/claude_stderr.txt"
+                    cmd = f"{self.claude_command} {model_flag} < {input_path} > {output_path}"
             else:
                 # Use simple -c flag
                 context_flag = "-c" if use_context else ""
@@ -829,36 +1179,30 @@ class ClaudePenpalService:
 
             logger.info(f"Executing Claude command: {cmd}")
 
-            # Execute command
-            subprocess.run(cmd, shell=True, check=True)
+            # Execute command; stderr is captured per call so concurrent
+            # notebooks never read each other's conversation IDs
+            result = subprocess.run(
+                cmd, shell=True, check=True, stderr=subprocess.PIPE, text=True
+            )
 
             # If using conversation IDs and this is a new conversation, try to capture the ID
-            if self.use_conversation_ids and (
-                new_conversation or notebook_id not in self.notebook_conversation_ids
-            ):
-                try:
-                    # Read stderr which might contain the conversation ID
-                    if os.path.exists("/tmp/claude_stderr.txt"):
-                        with open("/tmp/claude_stderr.txt", "r") as stderr_file:
-                            stderr_content = stderr_file.read()
-                            # Look for conversation ID, usually printed like "Conversation: abc123"
-                            id_match = re.search(
-                                r"Conversation:\s+([a-zA-Z0-9]+)", stderr_content
-                            )
-                            if id_match:
-                                conversation_id = id_match.group(1)
-                                self.notebook_conversation_ids[notebook_id] = (
-                                    conversation_id
-                                )
-                                logger.info(
-                                    f"Saved conversation ID {conversation_id} for notebook {notebook_id}"
-                                )
-                                self._save_conversation_ids()
-                except Exception as e:
-                    logger.error(f"Failed to capture conversation ID: {e}")
+            if capture_id:
+                # Look for conversation ID, usually printed like "Conversation: abc123"
+                id_match = re.search(
+                    r"Conversation:\s+([a-zA-Z0-9]+)", result.stderr or ""
+                )
+                if id_match:
+                    conversation_id = id_match.group(1)
+                    with self._state_lock:
+                        self.notebook_conversation_ids[notebook_id] = conversation_id
+                    logger.info(
+                        f"Saved conversation ID {conversation_id} for notebook {notebook_id}"
+                    )
+                    self._save_conversation_ids()
 
             # Mark this notebook as having an active context after successful execution
-            self.notebook_contexts[notebook_id] = True
+            with self._state_lock:
+                self.notebook_contexts[notebook_id] = True
 
             # Read response
             with open(output_path, "r") as f:
@@ -867,8 +1211,6 @@ class ClaudePenpalService:
             # Clean up temp files
             os.unlink(input_path)
             os.unlink(output_path)
-            if os.path.exists("/tmp/claude_stderr.txt"):
-                os.unlink("/tmp/claude_stderr.txt")
 
             return response
 
@@ -885,6 +1227,7 @@ class ClaudePenpalService:
         query_page,
         response_text,
         all_pages,
+        change_set=None,
     ):
         """Insert response page after query page in notebook.
 
@@ -896,169 +1239,77 @@ class ClaudePenpalService:
             query_page: Query page data
             response_text: Response text to insert
             all_pages: List of all pages in the notebook
+            change_set: Change set collecting this poll's edits; when omitted
+                the response is written back and uploaded immediately
         """
         try:
-            import zipfile
-
-            # Create temporary directory for modified notebook
-            with tempfile.TemporaryDirectory() as temp_dir:
-                # Extract notebook
-                with zipfile.ZipFile(notebook_path, "r") as zip_ref:
-                    zip_ref.extractall(temp_dir)
-
-                # Find content file
-                content_file_path = None
-                for root, _, files in os.walk(temp_dir):
-                    for file in files:
-                        if file.endswith(".content"):
-                            content_file_path = os.path.join(root, file)
-                            break
-
-                if not content_file_path:
-                    logger.error(f"No content file found in notebook {notebook_path}")
-                    return
-
-                # Load content
-                with open(content_file_path, "r") as f:
-                    content = json.load(f)
-
-                # Find and load metadata file
-                metadata_file_path = None
-                content_id = os.path.splitext(os.path.basename(content_file_path))[0]
-                metadata_file_path = os.path.join(
-                    os.path.dirname(content_file_path), f"{content_id}.metadata"
-                )
-
-                metadata = {}
-                if os.path.exists(metadata_file_path):
-                    try:
-                        with open(metadata_file_path, "r") as f:
-                            metadata = json.load(f)
-                    except json.JSONDecodeError:
-                        logger.warning(
-                            f"Failed to parse metadata file: {metadata_file_path}"
-                        )
-
-                # Generate a new page ID
-                response_page_id = str(uuid.uuid4())
-
-                # Find position of query page
-                pages = content.get("pages", [])
-                query_idx = next(
-                    (i for i, p in enumerate(pages) if p.get("id") == query_page["id"]),
-                    -1,
-                )
-
-                if query_idx == -1:
-                    logger.error(
-                        f"Query page {query_page['id']} not found in notebook content"
-                    )
-                    return
+            pending = change_set or NotebookChangeSet(
+                notebook_id, notebook_name, notebook_path, notebook_dir
+            )
 
-                # Create response page metadata
-                query_title = query_page.get("metadata", {}).get("visibleName", "Query")
-                if not query_title or query_title == "Query":
-                    query_title = query_page.get("visibleName", "Query")
-
-                # FIXED VERSION: Use millisecond timestamp as string
-                now_ms = str(int(time.time() * 1000))
-                response_page = {
-                    "id": response_page_id,
-                    "lastModified": now_ms,  # String representation of milliseconds
-                    "lastOpened": now_ms,  # String representation of milliseconds
-                    "lastOpenedPage": 0,
-                    "pinned": False,
-                    "type": "DocumentType",
-                    "visibleName": f"Response to {query_title}",
-                }
-
-                # Insert response page after query page
-                pages.insert(query_idx + 1, response_page)
-                content["pages"] = pages
-
-                # Update notebook metadata - FIXED VERSION
-                # The key issue is that we need to:
-                # 1. Use millisecond timestamps as strings
-                # 2. Ensure synced is true, not false
-                # 3. Set parent to "" if not specified
-                now_ms = str(int(time.time() * 1000))
-                metadata.update(
-                    {
-                        "lastModified": now_ms,
-                        "lastOpened": now_ms,
-                        "lastOpenedPage": 0,
-                        "parent": metadata.get("parent", "")
-                        or "",  # Ensure parent is never None
-                        "version": metadata.get("version", 1) + 1,
-                        "pinned": False,
-                        "synced": True,  # Must be true for reMarkable
-                        "modified": False,
-                        "deleted": False,
-                        "metadatamodified": False,
-                    }
-                )
+            # Parse response for structured content if needed
+            self._parse_response_for_highlighting(response_text)
 
-                # Write updated content
-                with open(content_file_path, "w") as f:
-                    json.dump(content, f)
+            response_page = pending.add_response(query_page, response_text)
+            logger.info(
+                f"Queued response page {response_page['id']} after query page "
+                f"{query_page['id']} in notebook {notebook_name}"
+            )
 
-                # Write updated metadata
-                with open(metadata_file_path, "w") as f:
-                    json.dump(metadata, f)
+            if change_set is None:
+                self._commit_change_set(pending)
 
-                # Parse response for structured content if needed
-                self._parse_response_for_highlighting(response_text)
+        except Exception as e:
+            logger.error(f"Error inserting response: {e}")
+            import traceback
 
-                # For now, just create basic text page
-                # In a real implementation, this would use document service to create .rm file
-                # with proper formatting and syntax highlighting
-                rm_file_path = os.path.join(
-                    os.path.dirname(content_file_path), f"{response_page_id}.rm"
-                )
+            logger.error(traceback.format_exc())
 
-                # Write simple rm file (this is a placeholder, real implementation would use document service)
-                with open(rm_file_path, "w") as f:
-                    f.write(response_text)
+    def _commit_change_set(self, change_set) -> bool:
+        """Write all queued edits of a notebook and upload it once.
 
-                # Create modified notebook zip in the notebook-specific directory
-                modified_filename = (
-                    f"modified_{notebook_name}_{time.strftime('%Y%m%d_%H%M%S')}.rmdoc"
-                )
-                modified_path = os.path.join(notebook_dir, modified_filename)
-                self._create_zip_from_directory(temp_dir, modified_path)
+        Args:
+            change_set: NotebookChangeSet to apply
 
-                # FIXED VERSION: Refresh to sync with remote state before upload
-                logger.info(
-                    "Refreshing rmapi to sync with remote state before upload..."
-                )
-                refresh_success, stdout, stderr = self.rmapi_adapter.run_command(
-                    "refresh"
-                )
-                if not refresh_success:
-                    logger.warning(f"Failed to refresh rmapi: {stderr}")
-                else:
-                    logger.info("Successfully refreshed rmapi")
+        Returns:
+            True if the notebook was uploaded or had nothing to write, False
+            if it could not be written or uploaded
+        """
+        if not change_set.has_changes():
+            return True
 
-                # Wait a moment to ensure refresh is complete
-                time.sleep(1)
+        notebook_name = change_set.notebook_name
+        modified_filename = (
+            f"modified_{change_set.notebook_id}_{time.strftime('%Y%m%d_%H%M%S')}.rmdoc"
+        )
+        modified_path = os.path.join(change_set.notebook_dir, modified_filename)
+        try:
+            if not change_set.write(modified_path):
+                return True
+        except ValueError as e:
+            logger.error(f"Failed to write modified notebook: {e}")
+            return False
+
+        # FIXED VERSION: Refresh to sync with remote state before upload
+        logger.info("Refreshing rmapi to sync with remote state before upload...")
+        refresh_success, stdout, stderr = self.rmapi_adapter.run_command("refresh")
+        if not refresh_success:
+            logger.warning(f"Failed to refresh rmapi: {stderr}")
+        else:
+            logger.info("Successfully refreshed rmapi")
 
-                # Upload modified notebook
-                logger.info(f"Uploading modified notebook: {notebook_name}")
-                success, message = self.rmapi_adapter.upload_file(
-                    modified_path, notebook_name
-                )
-                if success:
-                    logger.info(
-                        f"Inserted response to query page {query_page['id']} in notebook {notebook_name}"
-                    )
-                else:
-                    logger.error(f"Failed to upload modified notebook: {message}")
+        # Wait a moment to ensure refresh is complete
+        time.sleep(1)
 
-        except Exception as e:
-            logger.error(f"Error inserting response: {e}")
-            import traceback
-
-            logger.error(traceback.format_exc())
+        logger.info(
+            f"Uploading modified notebook {notebook_name} with "
+            f"{len(change_set.responses)} responses and "
+            f"{len(change_set.tag_removals)} tag removals"
+        )
+        success, message = self.rmapi_adapter.upload_file(modified_path, notebook_name)
+        if not success:
+            logger.error(f"Failed to upload modified notebook: {message}")
+        return success
 
     def _parse_response_for_highlighting(self, response_text):
         """Parse response text for code blocks and apply syntax highlighting.
@@ -1109,31 +1360,6 @@ class ClaudePenpalService:
 
         return items
 
-    def _create_zip_from_directory(self, directory, output_path):
-        """Create a zip file from a directory.
-
-        Args:
-            directory: Directory to zip
-            output_path: Path to save the zip file
-
-        Returns:
-            Path to created zip file
-        """
-        try:
-            import zipfile
-
-            with zipfile.ZipFile(output_path, "w") as zipf:
-                for root, _, files in os.walk(directory):
-                    for file in files:
-                        file_path = os.path.join(root, file)
-                        zipf.write(file_path, os.path.relpath(file_path, directory))
-
-            return output_path
-
-        except Exception as e:
-            logger.error(f"Error creating zip from directory: {e}")
-            return None
-
     def _process_page_for_knowledge_graph(
         self,
         notebook_id,
@@ -1142,6 +1368,7 @@ class ClaudePenpalService:
         notebook_dir,
         kg_page,
         all_pages,
+        change_set=None,
     ):
         """Process a page for knowledge graph extraction.
 
@@ -1152,6 +1379,7 @@ class ClaudePenpalService:
             notebook_dir: Directory for notebook files
             kg_page: Knowledge graph page data
             all_pages: List of all pages in the notebook
+            change_set: Change set collecting this poll's edits to the notebook
         """
         try:
             # Check if KG service is available
@@ -1168,6 +1396,7 @@ class ClaudePenpalService:
                     query_page=kg_page,
                     response_text=f"Error: {error_msg}\n\nKnowledge graph processing is not available.",
                     all_pages=all_pages,
+                    change_set=change_set,
                 )
                 return
 
@@ -1283,6 +1512,7 @@ class ClaudePenpalService:
                     query_page=kg_page,
                     response_text=summary,
                     all_pages=all_pages,
+                    change_set=change_set,
                 )
 
                 # Remove tags if configured
@@ -1292,6 +1522,7 @@ class ClaudePenpalService:
                         notebook_name=notebook_name,
                         page_id=kg_page["id"],
                         tags_to_remove=[self.knowledge_graph_tag],
+                        change_set=change_set,
                     )
 
             except json.JSONDecodeError as je:
@@ -1307,6 +1538,7 @@ class ClaudePenpalService:
                     query_page=kg_page,
                     response_text=f"Error: {error_msg}\n\nCould not process page for knowledge graph.",
                     all_pages=all_pages,
+                    change_set=change_set,
                 )
 
         except Exception as e:
@@ -1316,7 +1548,7 @@ class ClaudePenpalService:
             logger.error(traceback.format_exc())
 
     def _remove_tags_from_page(
-        self, notebook_id, notebook_name, page_id, tags_to_remove
+        self, notebook_id, notebook_name, page_id, tags_to_remove, change_set=None
     ):
         """Remove tags from a page.
 
@@ -1325,10 +1557,16 @@ class ClaudePenpalService:
             notebook_name: Name of the notebook
             page_id: ID of the page
             tags_to_remove: List of tags to remove
+            change_set: Change set collecting this poll's edits; when omitted
+                the notebook is downloaded, updated and uploaded immediately
         """
         try:
             logger.info(f"Removing tags {tags_to_remove} from page {page_id}")
 
+            if change_set is not None:
+                change_set.remove_tags(page_id, tags_to_remove)
+                return
+
             # Download the notebook
             with tempfile.TemporaryDirectory() as temp_dir:
                 download_path = os.path.join(temp_dir, f"{notebook_id}.zip")
@@ -1343,69 +1581,12 @@ class ClaudePenpalService:
                     )
                     return
 
-                # Extract the notebook
-                with zipfile.ZipFile(download_path, "r") as zip_ref:
-                    zip_ref.extractall(temp_dir)
-
-                # Find content file
-                content_file_path = None
-                for root, _, files in os.walk(temp_dir):
-                    for file in files:
-                        if file.endswith(".content"):
-                            content_file_path = os.path.join(root, file)
-                            break
-
-                if not content_file_path:
-                    logger.error(f"No content file found in notebook {notebook_id}")
-                    return
-
-                # Load content file
-                with open(content_file_path, "r") as f:
-                    content = json.load(f)
-
-                # Find the page and remove tags
-                pages = content.get("pages", [])
-                page_updated = False
-
-                for page in pages:
-                    if page.get("id") == page_id:
-                        # Update explicit tags
-                        if "tags" in page:
-                            original_tags = (
-                                page["tags"].copy()
-                                if isinstance(page["tags"], list)
-                                else []
-                            )
-                            page["tags"] = [
-                                tag
-                                for tag in original_tags
-                                if tag not in tags_to_remove
-                            ]
-                            if original_tags != page["tags"]:
-                                page_updated = True
-
-                if page_updated:
-                    # Save the updated content file
-                    with open(content_file_path, "w") as f:
-                        json.dump(content, f)
-
-                    # Create the modified notebook zip
-                    modified_path = os.path.join(
-                        self.temp_dir, f"modified_{notebook_id}.zip"
-                    )
-                    self._create_zip_from_directory(temp_dir, modified_path)
-
-                    # Upload the modified notebook
-                    success, message = self.rmapi_adapter.upload_file(
-                        modified_path, notebook_name
-                    )
-
-                    if success:
-                        logger.info(f"Successfully removed tags from page {page_id}")
-                    else:
-                        logger.error(f"Failed to upload modified notebook: {message}")
-                else:
-                    logger.info(f"No tags were removed from page {page_id}")
+                pending = NotebookChangeSet(
+                    notebook_id, notebook_name, download_path, temp_dir
+                )
+                pending.remove_tags(page_id, tags_to_remove)
+                if self._commit_change_set(pending):
+                    logger.info(f"Successfully removed tags from page {page_id}")
 
         except Exception as e:
             logger.error(f"Error removing tags: {e}")
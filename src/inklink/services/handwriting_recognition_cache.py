@@ -2,37 +2,155 @@
 
 This module provides a caching mechanism for handwriting recognition results,
 helping to reduce duplicate API calls and improve performance.
+
+Entries live in a single SQLite database inside the cache directory. Results
+are stored zlib-compressed, expiry is an indexed column so cleanup is one
+range delete, the total stored size is bounded by evicting least recently
+used entries, and entry counts are kept in memory so statistics need no scan.
 """
 
 import hashlib
 import json
 import logging
 import os
+import re
+import sqlite3
+import threading
 import time
-from typing import Any, Dict, List, Optional, Tuple
+import zlib
+from collections import Counter
+from itertools import chain
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+import numpy as np
+
+from inklink.utils.stroke_batch import StrokeBatch, pack_float32
 
 logger = logging.getLogger(__name__)
 
+# Entry files of the former layout: <stroke hash>_<content type>_<language>.json
+LEGACY_FILE_PATTERN = re.compile(r"^[0-9a-f]{64}_[^_]+_.+\.json$")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS recognition_cache (
+    cache_key TEXT PRIMARY KEY,
+    content_type TEXT NOT NULL,
+    language TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    expires_at REAL NOT NULL,
+    last_used REAL NOT NULL,
+    size_bytes INTEGER NOT NULL,
+    stroke_count INTEGER NOT NULL,
+    point_count INTEGER NOT NULL,
+    result BLOB NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_recognition_cache_expires
+    ON recognition_cache (expires_at);
+CREATE INDEX IF NOT EXISTS idx_recognition_cache_last_used
+    ON recognition_cache (last_used);
+"""
+
+
+def compute_stroke_fingerprint(
+    strokes: Union[List[Dict[str, Any]], StrokeBatch],
+    coord_quantum: Optional[float] = None,
+    pressure_quantum: Optional[float] = None,
+) -> str:
+    """
+    Fingerprint the x, y and pressure values of strokes.
+
+    All coordinates and all pressure values are packed into two contiguous
+    float32 buffers which are hashed together with the per-stroke lengths,
+    instead of serializing every value to JSON. With a quantum, values are
+    snapped to a grid of that step first, so jitter smaller than the step does
+    not change the fingerprint (values straddling a grid boundary still may).
+
+    Args:
+        strokes: Stroke dictionaries with "x", "y" and "pressure" (or "p")
+                 lists, or a StrokeBatch (hashed from its columns directly)
+        coord_quantum: Grid step for x and y (default: exact values)
+        pressure_quantum: Grid step for pressure (default: exact values)
+
+    Returns:
+        SHA-256 hex digest of the packed stroke data
+    """
+    if isinstance(strokes, StrokeBatch):
+        return strokes.fingerprint(coord_quantum, pressure_quantum)
+
+    xs, ys, ps = [], [], []
+    for stroke in strokes:
+        xs.append(stroke.get("x") or [])
+        ys.append(stroke.get("y") or [])
+        ps.append(stroke.get("pressure") or stroke.get("p") or [])
+
+    lengths = np.array(
+        [(len(x), len(y), len(p)) for x, y, p in zip(xs, ys, ps)], dtype=np.uint32
+    )
+    coords = list(chain.from_iterable(chain.from_iterable(zip(xs, ys))))
+    pressures = list(chain.from_iterable(ps))
+
+    digest = hashlib.sha256()
+    digest.update(lengths.tobytes())
+    digest.update(pack_float32(coords, coord_quantum))
+    digest.update(pack_float32(pressures, pressure_quantum))
+    return digest.hexdigest()
+
 
 class HandwritingRecognitionCache:
     """Cache for handwriting recognition results."""
 
-    def __init__(self, cache_dir: str, max_age_seconds: int = 3600 * 24 * 7):
+    DB_FILENAME = "recognition_cache.db"
+
+    def __init__(
+        self,
+        cache_dir: str,
+        max_age_seconds: int = 3600 * 24 * 7,
+        max_bytes: int = 100 * 1024 * 1024,
+        coord_quantum: Optional[float] = None,
+        pressure_quantum: Optional[float] = None,
+    ):
         """
         Initialize the cache.
 
         Args:
-            cache_dir: Directory to store cache files
+            cache_dir: Directory to store the cache database in
             max_age_seconds: Maximum age of cache entries in seconds (default: 7 days)
+            max_bytes: Maximum total size of compressed results in bytes
+            coord_quantum: Grid step coordinates are snapped to before hashing,
+                           so sub-step jitter keeps the same key (default: exact)
+            pressure_quantum: Grid step for pressure values (default: exact)
         """
         self.cache_dir = cache_dir
         self.max_age_seconds = max_age_seconds
+        self.max_bytes = max_bytes
+        self.coord_quantum = coord_quantum
+        self.pressure_quantum = pressure_quantum
+        self.db_path = os.path.join(cache_dir, self.DB_FILENAME)
 
         # Create cache directory if it doesn't exist
         os.makedirs(cache_dir, exist_ok=True)
 
+        # Recognition runs on worker threads; access is serialized below
+        self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(_SCHEMA)
+        self._conn.commit()
+        self._lock = threading.RLock()
+
+        # Running totals so get_stats needs no table scan
+        self._entry_count = 0
+        self._size_bytes = 0
+        self._content_types: Counter = Counter()
+        self._languages: Counter = Counter()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
         # Cleanup on initialization
+        self._load_totals()
         self._cleanup_cache()
+        self._remove_legacy_files()
 
         logger.info(f"Handwriting recognition cache initialized at {cache_dir}")
 
@@ -48,42 +166,139 @@ class HandwritingRecognitionCache:
         Returns:
             Hash string representing the strokes
         """
-        # Create a serializable representation of the essential stroke data
-        # We only care about x, y, and pressure values for recognition
-        serializable_strokes = []
-
-        for stroke in strokes:
-            serializable_stroke = {
-                "x": stroke.get("x", []),
-                "y": stroke.get("y", []),
-                "p": (
-                    stroke.get("pressure", [])
-                    if stroke.get("pressure")
-                    else stroke.get("p", [])
-                ),
-            }
-            serializable_strokes.append(serializable_stroke)
+        return compute_stroke_fingerprint(
+            strokes, self.coord_quantum, self.pressure_quantum
+        )
+
+    @staticmethod
+    def _make_key(stroke_hash: str, content_type: str, language: str) -> str:
+        """Build the cache key for a stroke hash, content type and language."""
+        return f"{stroke_hash}_{content_type}_{language}"
+
+    def _load_totals(self) -> None:
+        """Initialize the running totals with one aggregate query."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT content_type, language, COUNT(*), SUM(size_bytes) "
+                "FROM recognition_cache GROUP BY content_type, language"
+            ).fetchall()
+            self._entry_count = 0
+            self._size_bytes = 0
+            self._content_types.clear()
+            self._languages.clear()
+            self._count_rows(rows, 1)
+
+    def _count_rows(
+        self, rows: List[Tuple[str, str, int, Optional[int]]], sign: int
+    ) -> None:
+        """Add (sign=1) or subtract (sign=-1) grouped rows from the totals."""
+        for content_type, language, count, size in rows:
+            self._entry_count += sign * count
+            self._size_bytes += sign * (size or 0)
+            self._content_types[content_type] += sign * count
+            self._languages[language] += sign * count
+        self._content_types += Counter()
+        self._languages += Counter()
+
+    def _delete_where(self, condition: str, params: Tuple[Any, ...]) -> int:
+        """Delete matching entries in one transaction, keeping totals in sync."""
+        with self._lock:
+            with self._conn:
+                rows = self._conn.execute(
+                    "SELECT content_type, language, COUNT(*), SUM(size_bytes) "
+                    f"FROM recognition_cache WHERE {condition} "
+                    "GROUP BY content_type, language",
+                    params,
+                ).fetchall()
+                self._conn.execute(
+                    f"DELETE FROM recognition_cache WHERE {condition}", params
+                )
+            self._count_rows(rows, -1)
+            return sum(row[2] for row in rows)
 
-        # Convert to JSON string and compute hash
-        strokes_json = json.dumps(serializable_strokes, sort_keys=True)
-        return hashlib.sha256(strokes_json.encode()).hexdigest()
+    def _insert(
+        self,
+        key: str,
+        content_type: str,
+        language: str,
+        created_at: float,
+        result: Dict[str, Any],
+        stroke_count: int,
+        point_count: int,
+    ) -> None:
+        """Store a compressed entry, replacing any previous one for the key."""
+        blob = zlib.compress(json.dumps(result).encode("utf-8"))
+        with self._lock:
+            self._delete_where("cache_key = ?", (key,))
+            with self._conn:
+                self._conn.execute(
+                    "INSERT INTO recognition_cache (cache_key, content_type, "
+                    "language, created_at, expires_at, last_used, size_bytes, "
+                    "stroke_count, point_count, result) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (
+                        key,
+                        content_type,
+                        language,
+                        created_at,
+                        created_at + self.max_age_seconds,
+                        time.time(),
+                        len(blob),
+                        stroke_count,
+                        point_count,
+                        blob,
+                    ),
+                )
+            self._count_rows([(content_type, language, 1, len(blob))], 1)
+            self._evict()
+
+    def _evict(self) -> None:
+        """Drop least recently used entries until the size limit is met."""
+        with self._lock:
+            while self._size_bytes > self.max_bytes and self._entry_count > 1:
+                # Remove roughly the excess in one batch
+                excess = self._size_bytes - self.max_bytes
+                keys = []
+                freed = 0
+                for key, size in self._conn.execute(
+                    "SELECT cache_key, size_bytes FROM recognition_cache "
+                    "ORDER BY last_used LIMIT 64"
+                ):
+                    keys.append(key)
+                    freed += size
+                    if freed >= excess:
+                        break
+                if not keys:
+                    break
+                placeholders = ", ".join("?" for _ in keys)
+                self.evictions += self._delete_where(
+                    f"cache_key IN ({placeholders})", tuple(keys)
+                )
 
-    def _get_cache_path(
-        self, stroke_hash: str, content_type: str, language: str
-    ) -> str:
+    def _remove_legacy_files(self) -> int:
         """
-        Get the path to the cache file for the given parameters.
+        Delete entry files of the former one-file-per-entry layout.
 
-        Args:
-            stroke_hash: Hash of the strokes
-            content_type: Content type (Text, Math, Diagram, etc.)
-            language: Language code
+        Their keys were hashes of the JSON-serialized strokes, which the
+        current fingerprint never produces, so they are dropped rather than
+        imported. Only files named like those entries are removed.
 
         Returns:
-            Path to the cache file
+            Number of files removed
         """
-        filename = f"{stroke_hash}_{content_type}_{language}.json"
-        return os.path.join(self.cache_dir, filename)
+        removed = 0
+        for cache_file in os.listdir(self.cache_dir):
+            if not LEGACY_FILE_PATTERN.match(cache_file):
+                continue
+            try:
+                os.remove(os.path.join(self.cache_dir, cache_file))
+                removed += 1
+            except OSError as e:
+                logger.warning(f"Could not remove legacy cache file {cache_file}: {e}")
+
+        if removed:
+            logger.info(f"Removed {removed} legacy cache files")
+        return removed
 
     def get(
         self, strokes: List[Dict[str, Any]], content_type: str, language: str
@@ -101,32 +316,38 @@ class HandwritingRecognitionCache:
         """
         # Compute hash for strokes
         stroke_hash = self._compute_stroke_hash(strokes)
-
-        # Get cache file path
-        cache_path = self._get_cache_path(stroke_hash, content_type, language)
-
-        # Check if cache file exists
-        if not os.path.exists(cache_path):
-            return None
+        key = self._make_key(stroke_hash, content_type, language)
 
         try:
-            # Read cache file
-            with open(cache_path, "r") as f:
-                cache_data = json.load(f)
+            with self._lock:
+                row = self._conn.execute(
+                    "SELECT expires_at, result FROM recognition_cache "
+                    "WHERE cache_key = ?",
+                    (key,),
+                ).fetchone()
+                if row is None:
+                    self.misses += 1
+                    return None
 
-            # Check if cache is expired
-            timestamp = cache_data.get("timestamp", 0)
-            current_time = time.time()
-
-            if current_time - timestamp > self.max_age_seconds:
-                logger.info(f"Cache expired for {stroke_hash}")
-                # Remove expired cache
-                os.remove(cache_path)
-                return None
+                # Check if cache is expired
+                expires_at, blob = row
+                if time.time() > expires_at:
+                    logger.info(f"Cache expired for {stroke_hash}")
+                    self._delete_where("cache_key = ?", (key,))
+                    self.misses += 1
+                    return None
+
+                with self._conn:
+                    self._conn.execute(
+                        "UPDATE recognition_cache SET last_used = ? "
+                        "WHERE cache_key = ?",
+                        (time.time(), key),
+                    )
+                self.hits += 1
 
             # Cache hit
             logger.info(f"Cache hit for {stroke_hash}")
-            return cache_data.get("result")
+            return json.loads(zlib.decompress(blob).decode("utf-8"))
 
         except Exception as e:
             logger.warning(f"Error reading cache: {e}")
@@ -154,26 +375,16 @@ class HandwritingRecognitionCache:
         # Compute hash for strokes
         stroke_hash = self._compute_stroke_hash(strokes)
 
-        # Get cache file path
-        cache_path = self._get_cache_path(stroke_hash, content_type, language)
-
         try:
-            # Create cache data with timestamp
-            cache_data = {
-                "timestamp": time.time(),
-                "result": result,
-                "metadata": {
-                    "content_type": content_type,
-                    "language": language,
-                    "stroke_count": len(strokes),
-                    "point_count": sum(len(s.get("x", [])) for s in strokes),
-                },
-            }
-
-            # Write to cache file
-            with open(cache_path, "w") as f:
-                json.dump(cache_data, f)
-
+            self._insert(
+                self._make_key(stroke_hash, content_type, language),
+                content_type,
+                language,
+                time.time(),
+                result,
+                len(strokes),
+                sum(len(s.get("x", [])) for s in strokes),
+            )
             logger.info(f"Cached result for {stroke_hash}")
             return True
 
@@ -197,21 +408,15 @@ class HandwritingRecognitionCache:
         """
         # Compute hash for strokes
         stroke_hash = self._compute_stroke_hash(strokes)
+        key = self._make_key(stroke_hash, content_type, language)
 
-        # Get cache file path
-        cache_path = self._get_cache_path(stroke_hash, content_type, language)
-
-        # Remove cache file if it exists
-        if os.path.exists(cache_path):
-            try:
-                os.remove(cache_path)
+        try:
+            if self._delete_where("cache_key = ?", (key,)):
                 logger.info(f"Invalidated cache for {stroke_hash}")
-                return True
-            except Exception as e:
-                logger.warning(f"Error invalidating cache: {e}")
-                return False
-
-        return True  # Nothing to invalidate
+            return True
+        except Exception as e:
+            logger.warning(f"Error invalidating cache: {e}")
+            return False
 
     def _cleanup_cache(self) -> int:
         """
@@ -220,37 +425,11 @@ class HandwritingRecognitionCache:
         Returns:
             Number of cache entries removed
         """
-        removed_count = 0
-        current_time = time.time()
-
-        # Iterate through cache files
-        for cache_file in os.listdir(self.cache_dir):
-            cache_path = os.path.join(self.cache_dir, cache_file)
-
-            # Skip directories
-            if os.path.isdir(cache_path):
-                continue
-
-            try:
-                # Read cache file
-                with open(cache_path, "r") as f:
-                    cache_data = json.load(f)
-
-                # Check if cache is expired
-                timestamp = cache_data.get("timestamp", 0)
-
-                if current_time - timestamp > self.max_age_seconds:
-                    # Remove expired cache
-                    os.remove(cache_path)
-                    removed_count += 1
-
-            except Exception:
-                # If there's an error reading the file, remove it
-                try:
-                    os.remove(cache_path)
-                    removed_count += 1
-                except Exception:
-                    pass
+        try:
+            removed_count = self._delete_where("expires_at < ?", (time.time(),))
+        except sqlite3.Error as e:
+            logger.warning(f"Error cleaning up cache: {e}")
+            return 0
 
         if removed_count > 0:
             logger.info(f"Removed {removed_count} expired cache entries")
@@ -264,26 +443,15 @@ class HandwritingRecognitionCache:
         Returns:
             Number of cache entries removed
         """
-        removed_count = 0
-
-        # Iterate through cache files
-        for cache_file in os.listdir(self.cache_dir):
-            cache_path = os.path.join(self.cache_dir, cache_file)
-
-            # Skip directories
-            if os.path.isdir(cache_path):
-                continue
-
-            try:
-                # Remove cache file
-                os.remove(cache_path)
-                removed_count += 1
-            except Exception:
-                pass
-
+        removed_count = self._delete_where("1 = 1", ())
         logger.info(f"Cleared {removed_count} cache entries")
         return removed_count
 
+    def close(self) -> None:
+        """Close the cache database."""
+        with self._lock:
+            self._conn.close()
+
     def get_stats(self) -> Dict[str, Any]:
         """
         Get statistics about the cache.
@@ -291,47 +459,17 @@ class HandwritingRecognitionCache:
         Returns:
             Dictionary with cache statistics
         """
-        stats = {
-            "cache_dir": self.cache_dir,
-            "max_age_seconds": self.max_age_seconds,
-            "entry_count": 0,
-            "total_size_bytes": 0,
-            "content_types": {},
-            "languages": {},
-        }
-
-        # Iterate through cache files
-        for cache_file in os.listdir(self.cache_dir):
-            cache_path = os.path.join(self.cache_dir, cache_file)
-
-            # Skip directories
-            if os.path.isdir(cache_path):
-                continue
-
-            try:
-                # Get file size
-                file_size = os.path.getsize(cache_path)
-                stats["total_size_bytes"] += file_size
-                stats["entry_count"] += 1
-
-                # Read cache file to get metadata
-                with open(cache_path, "r") as f:
-                    cache_data = json.load(f)
-
-                # Extract metadata
-                metadata = cache_data.get("metadata", {})
-                content_type = metadata.get("content_type", "unknown")
-                language = metadata.get("language", "unknown")
-
-                # Update content type stats
-                stats["content_types"][content_type] = (
-                    stats["content_types"].get(content_type, 0) + 1
-                )
-
-                # Update language stats
-                stats["languages"][language] = stats["languages"].get(language, 0) + 1
-
-            except Exception:
-                pass
-
-        return stats
+        with self._lock:
+            return {
+                "cache_dir": self.cache_dir,
+                "db_path": self.db_path,
+                "max_age_seconds": self.max_age_seconds,
+                "max_bytes": self.max_bytes,
+                "entry_count": self._entry_count,
+                "total_size_bytes": self._size_bytes,
+                "content_types": dict(self._content_types),
+                "languages": dict(self._languages),
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
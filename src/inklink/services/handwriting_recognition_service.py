@@ -1,5 +1,7 @@
 """Handwriting recognition service using Claude Vision CLI."""
 
+import copy
+import hashlib
 import logging
 import os
 import re
@@ -11,10 +13,26 @@ import requests
 from inklink.adapters.claude_vision_adapter import ClaudeVisionAdapter
 from inklink.config import CONFIG
 from inklink.services.interfaces import IHandwritingRecognitionService
+from inklink.services.page_transcript_cache import (
+    PageTranscriptCache,
+    get_shared_transcript_cache,
+)
+from inklink.services.rendered_page_cache import (
+    RenderedPageCache,
+    get_shared_render_cache,
+)
 from inklink.utils import format_error
+from inklink.utils.content_classifier import DEFAULT_MIN_CONFIDENCE, classify_strokes
+from inklink.utils.rm_rasterizer import render_page_png
+from inklink.utils.single_flight import SingleFlight
+from inklink.utils.stroke_batch import StrokeBatch
 
 logger = logging.getLogger(__name__)
 
+# Recognitions in flight, shared by every service of this process so that
+# monitors and the server handling the same page make one model call
+_shared_single_flight = SingleFlight()
+
 
 class HandwritingRecognitionService(IHandwritingRecognitionService):
     """
@@ -27,6 +45,9 @@ class HandwritingRecognitionService(IHandwritingRecognitionService):
         claude_command: Optional[str] = None,
         model: Optional[str] = None,
         handwriting_adapter: Optional[ClaudeVisionAdapter] = None,
+        render_cache: Optional[RenderedPageCache] = None,
+        transcript_cache: Optional[PageTranscriptCache] = None,
+        single_flight: Optional[SingleFlight] = None,
     ):
         """
         Initialize the handwriting recognition service.
@@ -35,6 +56,13 @@ class HandwritingRecognitionService(IHandwritingRecognitionService):
             claude_command: Optional command to invoke Claude CLI
             model: Optional model specification for Claude CLI
             handwriting_adapter: Optional pre-configured adapter
+            render_cache: Cache of rendered pages (default: the shared cache)
+            transcript_cache: Cache that successful recognitions are stored in
+                              and answered from, keyed by page content hash
+                              (default: the shared cache, saved after each
+                              new transcript; callers save their own cache)
+            single_flight: Group deduplicating concurrent recognitions of the
+                           same page (default: the group shared in-process)
         """
         # Get command from environment variables or config
         self.claude_command = (
@@ -48,9 +76,23 @@ class HandwritingRecognitionService(IHandwritingRecognitionService):
 
         logger.info("Using Claude Vision CLI for handwriting recognition")
 
+        self.render_cache = render_cache
+        self.transcript_cache = transcript_cache or get_shared_transcript_cache()
+        self._save_transcripts = transcript_cache is None
+        self.single_flight = single_flight or _shared_single_flight
+
         # Use provided adapter or create a new one
         self.adapter = handwriting_adapter or ClaudeVisionAdapter(
-            claude_command=self.claude_command, model=self.model
+            claude_command=self.claude_command,
+            model=self.model,
+            crop_to_ink=CONFIG.get("VISION_CROP_TO_INK", True),
+            vision_image_format=CONFIG.get("VISION_IMAGE_FORMAT", "png"),
+            enable_tiling=CONFIG.get("VISION_TILING", False),
+            tile_budget=CONFIG.get("VISION_TILE_BUDGET", 4),
+            classifier_min_confidence=CONFIG.get(
+                "CLASSIFIER_MIN_CONFIDENCE", DEFAULT_MIN_CONFIDENCE
+            ),
+            preprocessing_backend=CONFIG.get("VISION_PREPROCESSING_BACKEND", "pil"),
         )
 
         if not self.adapter.ping():
@@ -58,17 +100,24 @@ class HandwritingRecognitionService(IHandwritingRecognitionService):
                 "Claude CLI not available or configured correctly; handwriting recognition may not function"
             )
 
-    def classify_region(self, image_path: str) -> str:
+    def classify_region(self, image_path: str, rm_file: Optional[str] = None) -> str:
         """
         Classify a region as 'text', 'math', or 'diagram' based on content.
-        Uses a simple prompt to Claude Vision.
+        With the region's .rm file, the strokes are classified locally and
+        Claude Vision is only asked when that is not confident.
 
         Args:
             image_path: Path to rendered image
+            rm_file: Path to the .rm file the image was rendered from
 
         Returns:
             Content type classification ("Text", "Math", or "Diagram")
         """
+        if rm_file:
+            content_type = self._classify_strokes(self._load_strokes(rm_file))
+            if content_type:
+                return content_type
+
         if not self.adapter.ping():
             # Default to Text if classification is not available
             return "Text"
@@ -87,6 +136,29 @@ class HandwritingRecognitionService(IHandwritingRecognitionService):
         # Default to Text on failure
         return "Text"
 
+    @staticmethod
+    def _classify_strokes(strokes: Optional[StrokeBatch]) -> Optional[str]:
+        """
+        Classify strokes locally, without a model call.
+
+        Args:
+            strokes: Strokes of the region, or None if they could not be read
+
+        Returns:
+            "Text", "Math" or "Diagram", or None if the classifier is not
+            confident
+        """
+        if strokes is None:
+            return None
+        try:
+            content_type, confidence = classify_strokes(strokes)
+        except Exception as e:
+            logger.warning(f"Could not classify strokes: {e}")
+            return None
+        if confidence < CONFIG.get("CLASSIFIER_MIN_CONFIDENCE", DEFAULT_MIN_CONFIDENCE):
+            return None
+        return content_type.capitalize()
+
     def initialize_api(self, claude_command: str, model: str = None) -> bool:
         """
         Initialize the adapter with a new command/model.
@@ -266,6 +338,9 @@ class HandwritingRecognitionService(IHandwritingRecognitionService):
         High-level method: Accepts ink data or file path, renders to image,
         and performs recognition with Claude Vision CLI.
 
+        Concurrent calls for the same page content, model, content type and
+        language share one recognition; see get_recognition_stats.
+
         Args:
             ink_data: Binary ink data
             file_path: Path to .rm file
@@ -276,36 +351,195 @@ class HandwritingRecognitionService(IHandwritingRecognitionService):
             Recognition results
         """
         try:
-            # Handle the case where ink_data is provided (save to temp file)
-            if ink_data is not None:
-                fd, temp_path = tempfile.mkstemp(suffix=".rm")
-                os.close(fd)
-                with open(temp_path, "wb") as f:
-                    f.write(ink_data)
-                use_path = temp_path
-            elif file_path is not None:
-                use_path = file_path
-            else:
+            if ink_data is None and file_path is None:
                 raise ValueError("Either ink_data or file_path must be provided")
 
+            content_type = content_type or "Text"
             try:
-                # Process the file with the adapter
-                result = self.adapter.process_rm_file(
-                    use_path, content_type or "Text", language
-                )
-                return result
-            finally:
-                # Clean up temporary file if created
-                if ink_data is not None and os.path.exists(temp_path):
-                    try:
-                        os.unlink(temp_path)
-                    except Exception as e:
-                        logger.warning(f"Failed to remove temporary file: {e}")
+                if ink_data is not None:
+                    page_hash = PageTranscriptCache.compute_data_hash(ink_data)
+                else:
+                    page_hash = PageTranscriptCache.compute_page_hash(file_path)
+            except OSError:
+                # Nothing to key on; let the adapter report the problem
+                return self._recognize_ink(ink_data, file_path, content_type, language)
+
+            result, shared = self.single_flight.do(
+                (page_hash, self.model, content_type, language),
+                self._recognize_page,
+                page_hash,
+                ink_data,
+                file_path,
+                content_type,
+                language,
+            )
+            if shared:
+                logger.info(f"Shared in-flight recognition of page {page_hash[:12]}")
+                # Callers may modify their result
+                return copy.copy(result)
+            return result
 
         except Exception as e:
             logger.error(f"Handwriting recognition pipeline failed: {e}")
             return {"success": False, "error": str(e)}
 
+    def _recognize_page(
+        self,
+        page_hash: str,
+        ink_data: Optional[bytes],
+        file_path: Optional[str],
+        content_type: str,
+        language: str,
+    ) -> Dict[str, Any]:
+        """
+        Recognize a page unless the transcript cache has it.
+
+        Successful results are cached before the in-flight call completes, so
+        callers arriving just after it still avoid a model call.
+
+        Args:
+            page_hash: SHA-256 of the page's .rm bytes
+            ink_data: Binary ink data
+            file_path: Path to .rm file
+            content_type: Content type (Text, Diagram, Math) or 'auto'
+            language: Language code
+
+        Returns:
+            Recognition results
+        """
+        text = self.transcript_cache.get(page_hash, self.model, content_type, language)
+        if text is not None:
+            return {"success": True, "text": text}
+
+        result = self._recognize_ink(ink_data, file_path, content_type, language)
+
+        if (
+            isinstance(result, dict)
+            and result.get("success")
+            and isinstance(result.get("text"), str)
+        ):
+            self.transcript_cache.put(
+                page_hash, self.model, content_type, result["text"], language
+            )
+            if self._save_transcripts:
+                self.transcript_cache.save_if_due()
+        return result
+
+    def _recognize_ink(
+        self,
+        ink_data: Optional[bytes],
+        file_path: Optional[str],
+        content_type: str,
+        language: str,
+    ) -> Dict[str, Any]:
+        """
+        Recognize ink data or an .rm file with the adapter.
+
+        Args:
+            ink_data: Binary ink data
+            file_path: Path to .rm file
+            content_type: Content type (Text, Diagram, Math) or 'auto'
+            language: Language code
+
+        Returns:
+            Recognition results
+        """
+        # Handle the case where ink_data is provided (save to temp file)
+        if ink_data is not None:
+            fd, temp_path = tempfile.mkstemp(suffix=".rm")
+            os.close(fd)
+            with open(temp_path, "wb") as f:
+                f.write(ink_data)
+            use_path = temp_path
+        else:
+            use_path = file_path
+
+        try:
+            # Process the file with the adapter
+            return self.adapter.process_rm_file(use_path, content_type, language)
+        finally:
+            # Clean up temporary file if created
+            if ink_data is not None and os.path.exists(temp_path):
+                try:
+                    os.unlink(temp_path)
+                except Exception as e:
+                    logger.warning(f"Failed to remove temporary file: {e}")
+
+    def get_recognition_stats(self) -> Dict[str, Any]:
+        """
+        Get recognition deduplication statistics.
+
+        Returns:
+            Dictionary with the single-flight counters (calls, executions,
+            collapsed duplicate calls, in_flight) and the transcript cache
+            statistics under "transcript_cache"
+        """
+        stats = self.single_flight.get_stats()
+        stats["transcript_cache"] = self.transcript_cache.get_stats()
+        return stats
+
+    def _render_page(self, rm_file: str) -> str:
+        """
+        Render a page natively unless the rendered page cache has it.
+
+        Pages the native rasterizer cannot render (e.g. pre-v6 files or a
+        missing rmscene) are rendered by the adapter's render_rm_file instead,
+        and the adapter's image is moved into the cache.
+
+        Args:
+            rm_file: Path to the .rm file
+
+        Returns:
+            Path to the rendered image, owned by the cache
+
+        Raises:
+            OSError: If the file cannot be read
+            ValueError: If neither the rasterizer nor the adapter can render
+        """
+        cache = self.render_cache or get_shared_render_cache()
+        dpi = CONFIG.get("RM_RENDER_DPI", 300)
+        with open(rm_file, "rb") as f:
+            page_data = f.read()
+        page_hash = hashlib.sha256(page_data).hexdigest()
+        try:
+            return cache.get_or_render(
+                page_hash, lambda: render_page_png(page_data, dpi), dpi
+            )
+        except (ImportError, ValueError, OSError) as e:
+            render_rm_file = getattr(self.adapter, "render_rm_file", None)
+            if render_rm_file is None:
+                raise
+            logger.warning(f"Native rendering of {rm_file} failed, using adapter: {e}")
+
+        image_path = render_rm_file(rm_file)
+        try:
+            with open(image_path, "rb") as f:
+                image_data = f.read()
+        finally:
+            # The adapter's image is temporary; the cache keeps its own copy
+            try:
+                os.unlink(image_path)
+            except OSError:
+                pass
+        return cache.put(page_hash, dpi, image_data)
+
+    @staticmethod
+    def _load_strokes(rm_file: str) -> Optional[StrokeBatch]:
+        """
+        Load the strokes of a page, or None if the file cannot be parsed.
+
+        Args:
+            rm_file: Path to the .rm file
+
+        Returns:
+            Strokes of the page, or None
+        """
+        try:
+            return StrokeBatch.from_rm_file(rm_file)
+        except Exception as e:
+            logger.warning(f"Could not load strokes of {rm_file}: {e}")
+            return None
+
     def recognize_multi_page_ink(
         self,
         page_files: List[str],
@@ -330,12 +564,14 @@ class HandwritingRecognitionService(IHandwritingRecognitionService):
         structured_pages = []
         cross_page_links = user_links[:] if user_links else []
 
-        # Render all pages to images
+        # Render all pages to images, which the rendered page cache keeps;
+        # their strokes guide cropping and content classification
         rendered_images = []
         try:
             for rm_file in page_files:
-                image_path = self.adapter.render_rm_file(rm_file)
+                image_path = self._render_page(rm_file)
                 rendered_images.append(image_path)
+            page_strokes = [self._load_strokes(rm_file) for rm_file in page_files]
 
             # Generate a prompt for multi-page processing
             prompt = f"""
@@ -349,7 +585,10 @@ class HandwritingRecognitionService(IHandwritingRecognitionService):
             if hasattr(self.adapter.vision_adapter, "process_multiple_images"):
                 success, combined_result = (
                     self.adapter.vision_adapter.process_multiple_images(
-                        rendered_images, prompt, maintain_context=True
+                        rendered_images,
+                        prompt,
+                        maintain_context=True,
+                        page_strokes=page_strokes,
                     )
                 )
 
@@ -387,10 +626,14 @@ class HandwritingRecognitionService(IHandwritingRecognitionService):
                             }
                             cross_page_links.append(link)
             else:
-                # Process pages individually
-                for i, image_path in enumerate(rendered_images):
+                # Process pages individually; classification stays local so
+                # each page costs one model call
+                for i, (image_path, strokes) in enumerate(
+                    zip(rendered_images, page_strokes)
+                ):
+                    content_type = self._classify_strokes(strokes) or "Text"
                     result = self.adapter.recognize_handwriting(
-                        image_path, "Text", language
+                        image_path, content_type, language
                     )
 
                     if result.get("success", False):
@@ -442,15 +685,6 @@ class HandwritingRecognitionService(IHandwritingRecognitionService):
             logger.error(f"Error processing multiple pages: {e}")
             return {"success": False, "error": str(e)}
 
-        finally:
-            # Clean up rendered images
-            for image_path in rendered_images:
-                try:
-                    if os.path.exists(image_path):
-                        os.unlink(image_path)
-                except Exception:
-                    pass
-
     def convert_to_iink_format(self, strokes: List[Dict[str, Any]]) -> Dict[str, Any]:
         """Convert reMarkable strokes to MyScript Web API compatible format
 
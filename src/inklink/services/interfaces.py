@@ -350,7 +350,7 @@ class IKnowledgeIndexService(ABC):
 
 class ILimitlessLifeLogService(ABC):
     @abstractmethod
-    def sync_life_logs(self, force_full_sync: bool = False) -> Tuple[bool, str]:
+    def sync_life_logs(self, force_full_sync: bool = False) -> Tuple[bool, str, int]:
         """
         Sync life logs from Limitless API to knowledge graph.
 
@@ -358,7 +358,7 @@ class ILimitlessLifeLogService(ABC):
             force_full_sync: If True, sync all life logs regardless of last sync time
 
         Returns:
-            Tuple of (success, message)
+            Tuple of (success, message, number of life logs synced)
         """
 
     @abstractmethod
@@ -6,7 +6,6 @@ tagged with 'Lilly' and processes them with Claude Code using Claude's vision ca
 
 import logging
 import os
-import shutil
 import subprocess
 import tempfile
 from typing import Any, Callable, Dict, List, Optional, Tuple
@@ -14,6 +13,9 @@ from typing import Any, Callable, Dict, List, Optional, Tuple
 from inklink.adapters.cassidy_adapter import CassidyAdapter
 from inklink.config import CONFIG
 from inklink.services.cassidy_monitor_service import CassidyMonitor
+from inklink.services.processed_page_ledger import STATUS_FAILED
+from inklink.utils.stroke_batch import StrokeBatch
+from inklink.utils.vision_image import prepare_vision_image
 
 logger = logging.getLogger(__name__)
 
@@ -21,6 +23,8 @@ logger = logging.getLogger(__name__)
 class LillyMonitor(CassidyMonitor):
     """Service that monitors reMarkable Cloud for notebooks tagged with 'Lilly'."""
 
+    LEDGER_MONITOR = "lilly"
+
     def __init__(
         self,
         adapter: Optional[CassidyAdapter] = None,
@@ -72,8 +76,44 @@ class LillyMonitor(CassidyMonitor):
         logger.info(f"Using Claude command: {claude_command}")
         logger.info(f"Lilly workspace: {self.lilly_workspace}")
 
+    def _prepare_image(self, image_path: str, rm_path: Optional[str] = None) -> str:
+        """
+        Crop a page image to its ink and downscale it before sending it.
+
+        Args:
+            image_path: Path to the rendered page
+            rm_path: Path to the page's .rm file, used for the ink bounding box
+
+        Returns:
+            Path to the prepared image, or the input path if preparation is
+            disabled or fails
+        """
+        if not CONFIG.get("VISION_CROP_TO_INK", True):
+            return image_path
+
+        try:
+            strokes = StrokeBatch.from_rm_file(rm_path) if rm_path else None
+        except Exception as e:
+            logger.debug(f"Using pixel ink bounds for {image_path}: {e}")
+            strokes = None
+
+        try:
+            report = prepare_vision_image(
+                image_path,
+                strokes=strokes,
+                dpi=CONFIG.get("RM_RENDER_DPI", 300),
+                image_format=CONFIG.get("VISION_IMAGE_FORMAT", "png"),
+            )
+        except Exception as e:
+            logger.warning(f"Could not prepare image {image_path}: {e}")
+            return image_path
+        return report["path"]
+
     def process_with_claude_vision(
-        self, image_path: str, prompt: Optional[str] = None
+        self,
+        image_path: str,
+        prompt: Optional[str] = None,
+        rm_path: Optional[str] = None,
     ) -> Tuple[bool, str]:
         """
         Process an image with Claude vision capabilities.
@@ -81,6 +121,7 @@ class LillyMonitor(CassidyMonitor):
         Args:
             image_path: Path to the image file
             prompt: Optional custom prompt for Claude
+            rm_path: Path to the page's .rm file, used to crop the image
 
         Returns:
             Tuple of (success, result)
@@ -108,10 +149,16 @@ class LillyMonitor(CassidyMonitor):
             temp_file.write(prompt)
             prompt_file_path = temp_file.name
 
+        vision_image_path = self._prepare_image(image_path, rm_path)
         try:
             # Run Claude with the image and prompt
             claude_result = subprocess.run(
-                [self.claude_command, image_path, "--prompt-file", prompt_file_path],
+                [
+                    self.claude_command,
+                    vision_image_path,
+                    "--prompt-file",
+                    prompt_file_path,
+                ],
                 capture_output=True,
                 text=True,
             )
@@ -134,6 +181,10 @@ class LillyMonitor(CassidyMonitor):
 
             return False, f"Exception: {str(e)}"
 
+        finally:
+            if vision_image_path != image_path and os.path.exists(vision_image_path):
+                os.unlink(vision_image_path)
+
     def update_knowledge_graph(
         self, image_path: str, claude_response: str, notebook_info: Dict[str, Any]
     ) -> bool:
@@ -172,19 +223,23 @@ class LillyMonitor(CassidyMonitor):
             logger.error(f"Exception updating knowledge graph: {str(e)}")
             return False
 
-    def _process_tagged_document(self, doc: Dict[str, Any]):
+    def _process_tagged_document(self, doc: Dict[str, Any]) -> bool:
         """
         Override the parent method to process a document that has been tagged with 'Lilly'.
 
         Args:
             doc: Document data including ID, name, metadata and tag info
+
+        Returns:
+            True if the notebook and all its tagged pages were processed, False
+            if something failed and the document should be checked again
         """
         doc_id = doc.get("id")
         doc_name = doc.get("name")
 
         if not doc_id or not doc_name:
             logger.error("Missing document ID or name")
-            return
+            return False
 
         logger.info(f"Processing tagged document: {doc_name} ({doc_id})")
 
@@ -193,20 +248,27 @@ class LillyMonitor(CassidyMonitor):
         os.makedirs(document_dir, exist_ok=True)
 
         # If document has notebook tag, process the whole notebook
+        success = True
         if doc.get("has_notebook_tag", False):
-            self._process_notebook(doc)
+            success = self._process_notebook(doc)
 
-        # Process each tagged page
+        # Extract all tagged pages in one pass, then process each of them
         tagged_pages = doc.get("tagged_pages", [])
-        for page in tagged_pages:
-            self._process_page(doc, page)
+        extracted_all, extracted_pages = self._extract_tagged_pages(doc, tagged_pages)
+        for extracted in extracted_pages:
+            if not self._process_page(doc, extracted):
+                success = False
+        return success and extracted_all
 
-    def _process_notebook(self, doc: Dict[str, Any]):
+    def _process_notebook(self, doc: Dict[str, Any]) -> bool:
         """
         Process a notebook that has the Lilly tag at notebook level.
 
         Args:
             doc: Document data including ID, name, metadata and tag info
+
+        Returns:
+            True if every page was answered and appended to the notebook
         """
         doc_id = doc.get("id")
         doc_name = doc.get("name")
@@ -223,7 +285,7 @@ class LillyMonitor(CassidyMonitor):
             logger.error(
                 f"Failed to download and extract notebook {doc_name}: {extract_dir}"
             )
-            return
+            return False
 
         # Convert pages to PNG
         success, png_paths = self.adapter.convert_notebook_pages_to_png(
@@ -231,7 +293,7 @@ class LillyMonitor(CassidyMonitor):
         )
         if not success:
             logger.error(f"Failed to convert notebook {doc_name} to PNG: {png_paths}")
-            return
+            return False
 
         logger.info(f"Converted {len(png_paths)} pages of {doc_name} to PNG")
 
@@ -308,181 +370,92 @@ class LillyMonitor(CassidyMonitor):
             except Exception as e:
                 logger.error(f"Error removing tag from notebook: {str(e)}")
 
-    def _process_page(self, doc: Dict[str, Any], page: Dict[str, Any]):
+        return all_pages_processed
+
+    def _process_page(self, doc: Dict[str, Any], extracted: Dict[str, Any]) -> bool:
         """
         Process a single page that has the Lilly tag.
 
         Args:
             doc: Document data including ID, name, metadata and tag info
-            page: Page data including ID, index, and template
+            extracted: Page entry returned by _extract_tagged_pages
+
+        Returns:
+            True if the response was appended to the notebook
         """
         doc_id = doc.get("id")
         doc_name = doc.get("name")
+        page = extracted["page"]
         page_id = page.get("id")
         page_index = page.get("index")
+        page_hash = extracted["hash"]
+        result = extracted["png_path"]
 
         logger.info(
             f"Processing page {page_index} (ID: {page_id}) in document {doc_name} ({doc_id})"
         )
 
-        # Create directory for this page if it doesn't exist
-        page_dir = os.path.join(self.output_dir, doc_id, page_id)
-        os.makedirs(page_dir, exist_ok=True)
-
-        # Extract the page and convert to PNG
-        with tempfile.TemporaryDirectory() as temp_dir:
-            current_dir = os.getcwd()
-            try:
-                # Change to temp dir for download
-                os.chdir(temp_dir)
+        # Process the page with Claude vision
+        success, claude_response = self.process_with_claude_vision(
+            result, rm_path=extracted.get("rm_path")
+        )
 
-                # Download the document
-                expected_file = f"{doc_name}.rmdoc"
-                logger.info(
-                    f"Downloading {doc_name} to {os.path.join(temp_dir, expected_file)}"
-                )
-                success, stdout, stderr = self.adapter.run_command("get", doc_name, ".")
-                if not success:
-                    logger.error(f"Failed to download {doc_name}: {stderr}")
-                    return
-
-                # Find the downloaded file
-                if not os.path.exists(expected_file):
-                    rmdoc_files = [f for f in os.listdir(".") if f.endswith(".rmdoc")]
-                    if rmdoc_files:
-                        expected_file = rmdoc_files[0]
-                    else:
-                        logger.error("No .rmdoc files found in temp directory")
-                        return
-
-                # Extract the specific page
-                with tempfile.TemporaryDirectory() as extract_dir:
-                    # Extract the .rm file for this page
-                    success, rm_path = self._extract_page_file(
-                        os.path.join(temp_dir, expected_file), page_id, extract_dir
-                    )
-                    if not success:
-                        logger.error(f"Failed to extract page file: {rm_path}")
-                        return
+        if not success:
+            logger.error(f"Failed to process page with Claude: {claude_response}")
+            self.ledger.mark(
+                doc_id,
+                page_id,
+                page_hash,
+                self.LEDGER_MONITOR,
+                status=STATUS_FAILED,
+                detail=claude_response,
+            )
+            return False
 
-                    # Copy the file to the page directory
-                    rm_file_in_page_dir = os.path.join(
-                        page_dir, os.path.basename(rm_path)
-                    )
-                    shutil.copy(rm_path, rm_file_in_page_dir)
-
-                    # Convert the page to PNG
-                    # png_path = os.path.join(  # Currently unused
-                    #     page_dir,
-                    #     f"{os.path.splitext(os.path.basename(rm_path))[0]}.png",
-                    # )
-                    success, result = self.adapter.convert_rm_to_png(rm_path, page_dir)
-
-                    if not success:
-                        logger.error(f"Failed to convert page to PNG: {result}")
-                        return
-
-                    logger.info(f"Converted page to PNG: {result}")
-
-                    # Process the page with Claude vision
-                    success, claude_response = self.process_with_claude_vision(result)
-
-                    if not success:
-                        logger.error(
-                            f"Failed to process page with Claude: {claude_response}"
-                        )
-                        return
-
-                    # Save the response to a file
-                    response_path = f"{os.path.splitext(result)[0]}_response.md"
-                    with open(response_path, "w") as f:
-                        f.write(claude_response)
-                    logger.info(f"Saved response to: {response_path}")
-
-                    # Update the knowledge graph
-                    kg_success = self.update_knowledge_graph(
-                        result, claude_response, doc
-                    )
-                    if not kg_success:
-                        logger.warning(f"Failed to update knowledge graph for {result}")
-
-                    # Append response to the notebook
-                    try:
-                        success, message = self.adapter.append_text_to_notebook(
-                            doc_id=doc_id,
-                            page_id=page_id,
-                            text=claude_response,
-                            remove_tag=True,  # Remove the tag after processing
-                        )
-
-                        if success:
-                            logger.info(
-                                f"Successfully appended response to notebook and removed tag: {message}"
-                            )
-                        else:
-                            logger.error(
-                                f"Failed to append response to notebook: {message}"
-                            )
-                    except Exception as e:
-                        logger.error(f"Error appending response to notebook: {str(e)}")
-
-                    # If callback is defined, call it with the page info
-                    if self.callback:
-                        page_info = {
-                            "doc_id": doc_id,
-                            "doc_name": doc_name,
-                            "page_id": page_id,
-                            "page_index": page_index,
-                            "rm_path": rm_file_in_page_dir,
-                            "png_path": result,
-                            "response_path": response_path,
-                            "type": "page",
-                        }
-                        self.callback(page_info)
-
-            finally:
-                # Change back to original directory
-                os.chdir(current_dir)
-
-    def _extract_page_file(
-        self, zip_path: str, page_id: str, extract_dir: str
-    ) -> Tuple[bool, str]:
-        """
-        Extract a specific page file from a reMarkable notebook.
+        # Save the response to a file
+        response_path = f"{os.path.splitext(result)[0]}_response.md"
+        with open(response_path, "w") as f:
+            f.write(claude_response)
+        logger.info(f"Saved response to: {response_path}")
 
-        Args:
-            zip_path: Path to the .rmdoc file
-            page_id: ID of the page to extract
-            extract_dir: Directory to extract to
+        # Update the knowledge graph
+        kg_success = self.update_knowledge_graph(result, claude_response, doc)
+        if not kg_success:
+            logger.warning(f"Failed to update knowledge graph for {result}")
 
-        Returns:
-            Tuple of (success, path/error_message)
-        """
+        # Append response to the notebook
+        appended = False
         try:
-            import zipfile
-
-            with zipfile.ZipFile(zip_path, "r") as zipf:
-                # Look for .rm file with the page ID
-                rm_paths = [
-                    f for f in zipf.namelist() if f.endswith(".rm") and page_id in f
-                ]
-
-                if not rm_paths:
-                    return False, f"No .rm file found for page ID {page_id}"
-
-                # Extract the .rm file
-                rm_path = rm_paths[0]
-                zipf.extract(rm_path, extract_dir)
-
-                # Get path to the extracted file
-                extracted_rm_path = os.path.join(extract_dir, rm_path)
-                logger.info(f"Extracted page file to {extracted_rm_path}")
-
-                return True, extracted_rm_path
+            success, message = self.adapter.append_text_to_notebook(
+                doc_id=doc_id,
+                page_id=page_id,
+                text=claude_response,
+                remove_tag=True,  # Remove the tag after processing
+            )
 
+            if success:
+                logger.info(
+                    f"Successfully appended response to notebook and removed tag: {message}"
+                )
+                self.ledger.mark(doc_id, page_id, page_hash, self.LEDGER_MONITOR)
+                appended = True
+            else:
+                logger.error(f"Failed to append response to notebook: {message}")
         except Exception as e:
-            logger.error(f"Error extracting page file: {str(e)}")
-            import traceback
+            logger.error(f"Error appending response to notebook: {str(e)}")
+
+        # If callback is defined, call it with the page info
+        if self.callback:
+            page_info = {
+                "doc_id": doc_id,
+                "doc_name": doc_name,
+                "page_id": page_id,
+                "page_index": page_index,
+                "rm_path": extracted["rm_path"],
+                "png_path": result,
+                "response_path": response_path,
+                "type": "page",
+            }
+            self.callback(page_info)
 
-            logger.error(traceback.format_exc())
-            return False, str(e)
+        return appended
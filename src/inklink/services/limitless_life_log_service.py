@@ -94,7 +94,7 @@ class LimitlessLifeLogService(ILimitlessLifeLogService):
         except Exception as e:
             logger.error(f"Error saving sync state: {str(e)}")
 
-    def sync_life_logs(self, force_full_sync: bool = False) -> Tuple[bool, str]:
+    def sync_life_logs(self, force_full_sync: bool = False) -> Tuple[bool, str, int]:
         """
         Sync life logs from Limitless API to knowledge graph.
 
@@ -102,7 +102,7 @@ class LimitlessLifeLogService(ILimitlessLifeLogService):
             force_full_sync: If True, sync all life logs regardless of last sync time
 
         Returns:
-            Tuple of (success, message)
+            Tuple of (success, message, number of life logs synced)
         """
         try:
             # Determine from when to sync
@@ -120,13 +120,13 @@ class LimitlessLifeLogService(ILimitlessLifeLogService):
             if not success:
                 error_msg = f"Failed to retrieve life logs: {life_logs}"
                 logger.error(error_msg)
-                return False, error_msg
+                return False, error_msg, 0
 
             if not life_logs:
                 logger.info("No new life logs to sync")
                 self.last_sync_time = datetime.now()
                 self._save_sync_state()
-                return True, "No new life logs to sync"
+                return True, "No new life logs to sync", 0
 
             # Process and add life logs to knowledge graph
             processed_count = 0
@@ -143,12 +143,12 @@ class LimitlessLifeLogService(ILimitlessLifeLogService):
                 f"Successfully synced {processed_count} of {len(life_logs)} life logs"
             )
             logger.info(result_message)
-            return True, result_message
+            return True, result_message, processed_count
 
         except Exception as e:
             error_message = f"Error syncing life logs: {str(e)}"
             logger.error(error_message)
-            return False, error_message
+            return False, error_message, 0
 
     def _process_life_log(self, life_log: Dict[str, Any]) -> Tuple[bool, str]:
         """
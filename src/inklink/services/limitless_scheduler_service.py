@@ -5,11 +5,12 @@ This module provides a scheduler service for regular Limitless Life Log syncing.
 
 import logging
 import threading
-import time
 from datetime import datetime, timedelta
 from typing import Any, Dict, Optional
 
+from inklink.config import CONFIG
 from inklink.services.limitless_life_log_service import LimitlessLifeLogService
+from inklink.services.polling_scheduler import PollingJob, get_shared_scheduler
 
 logger = logging.getLogger(__name__)
 
@@ -18,8 +19,9 @@ class LimitlessSchedulerService:
     """
     Scheduler service for regular Limitless Life Log syncing.
 
-    This service runs a background thread to periodically sync life logs
-    based on a configurable interval.
+    This service registers a job on the shared polling scheduler to
+    periodically sync life logs, syncing more often after new logs arrive
+    and less often while there are none.
     """
 
     def __init__(
@@ -39,15 +41,18 @@ class LimitlessSchedulerService:
         self.limitless_service = limitless_service
         self.sync_interval = sync_interval
         self.initial_delay = initial_delay
-        self.thread = None
+        self.scheduler = get_shared_scheduler()
+        self._job_name = f"limitless-{id(self):x}"
         self.running = False
         self.last_sync_time = None
         self.next_sync_time = None
         self.sync_status = "idle"
+        # Held by scheduled and manual syncs so they never overlap
+        self._sync_lock = threading.Lock()
 
     def start(self):
         """
-        Start the scheduler background thread.
+        Start syncing on the shared polling scheduler.
 
         Returns:
             True if started, False if already running
@@ -57,8 +62,19 @@ class LimitlessSchedulerService:
             return False
 
         self.running = True
-        self.thread = threading.Thread(target=self._scheduler_loop, daemon=True)
-        self.thread.start()
+        self.scheduler.add_job(
+            PollingJob(
+                name=self._job_name,
+                func=self._scheduled_sync,
+                interval=self.sync_interval,
+                # Nobody waits on a life log sync; idle syncs back off up to a day
+                max_interval=max(self.sync_interval, 24 * 3600),
+                jitter=CONFIG.get("SCHEDULER_JITTER", 0.1),
+                initial_delay=self.initial_delay,
+                # Retry sooner after an error, 5 minutes or less
+                error_interval=min(self.sync_interval, 300),
+            )
+        )
 
         logger.info(
             f"Limitless scheduler started with interval {self.sync_interval}s "
@@ -68,7 +84,7 @@ class LimitlessSchedulerService:
 
     def stop(self):
         """
-        Stop the scheduler background thread.
+        Stop scheduled syncing, letting a running sync finish.
 
         Returns:
             True if stopped, False if not running
@@ -79,63 +95,40 @@ class LimitlessSchedulerService:
 
         logger.info("Stopping Limitless scheduler")
         self.running = False
-
-        if self.thread and self.thread.is_alive():
-            self.thread.join(timeout=10)
+        self.scheduler.remove_job(self._job_name)
 
         return True
 
-    def _scheduler_loop(self):
-        """Main scheduler loop that runs in the background thread."""
-        # Wait for initial delay
-        if self.initial_delay > 0:
-            logger.info(f"Waiting {self.initial_delay}s before first sync")
-            time.sleep(self.initial_delay)
-
-        while self.running:
-            try:
-                # Update status
-                self.sync_status = "syncing"
-                logger.info("Starting scheduled Limitless Life Log sync")
-
-                # Perform sync
-                success, message = self.limitless_service.sync_life_logs()
-
-                # Update status
-                self.last_sync_time = datetime.now()
-                self.next_sync_time = self.last_sync_time + timedelta(
-                    seconds=self.sync_interval
-                )
-                self.sync_status = "idle"
-
-                if success:
-                    logger.info(f"Scheduled sync completed: {message}")
-                else:
-                    logger.error(f"Scheduled sync failed: {message}")
-
-                # Wait for next sync interval
-                wait_time = self.sync_interval
-                logger.info(f"Next sync scheduled for {self.next_sync_time}")
-
-                # Sleep in smaller increments to allow for clean shutdown
-                sleep_increment = 5  # Check for shutdown every 5 seconds
-                for _ in range(int(wait_time / sleep_increment)):
-                    if not self.running:
-                        break
-                    time.sleep(sleep_increment)
+    def _scheduled_sync(self) -> bool:
+        """
+        Run one scheduled sync.
 
-                # Sleep any remaining time
-                remaining_time = wait_time % sleep_increment
-                if remaining_time > 0 and self.running:
-                    time.sleep(remaining_time)
+        Returns:
+            True if new life logs were synced, so the scheduler syncs again
+            sooner; False if there was nothing new or the sync failed
+        """
+        with self._sync_lock:
+            # Update status
+            self.sync_status = "syncing"
+            logger.info("Starting scheduled Limitless Life Log sync")
 
+            try:
+                success, message, synced = self.limitless_service.sync_life_logs()
             except Exception as e:
-                logger.error(f"Error in scheduler loop: {str(e)}")
+                logger.error(f"Error in scheduled sync: {str(e)}")
                 self.sync_status = "error"
+                raise
+
+            # Update status; the scheduler picks the next sync time
+            self.last_sync_time = datetime.now()
+            self.sync_status = "idle"
+
+        if success:
+            logger.info(f"Scheduled sync completed: {message}")
+        else:
+            logger.error(f"Scheduled sync failed: {message}")
 
-                # Sleep for a shorter interval after error
-                recovery_wait = min(self.sync_interval, 300)  # 5 minutes or less
-                time.sleep(recovery_wait)
+        return success and synced > 0
 
     def get_status(self) -> Dict[str, Any]:
         """
@@ -144,6 +137,10 @@ class LimitlessSchedulerService:
         Returns:
             Dictionary with scheduler status information
         """
+        job = self.scheduler.jobs.get(self._job_name)
+        if job and job.next_run:
+            self.next_sync_time = datetime.fromtimestamp(job.next_run)
+
         return {
             "running": self.running,
             "sync_status": self.sync_status,
@@ -161,6 +158,9 @@ class LimitlessSchedulerService:
         """
         Trigger an immediate sync.
 
+        A scheduled sync that is already running is finished first, so the two
+        never overlap.
+
         Args:
             force_full_sync: If True, sync all life logs regardless of last sync time
 
@@ -169,36 +169,37 @@ class LimitlessSchedulerService:
         """
         logger.info(f"Manual sync triggered (force_full_sync={force_full_sync})")
 
-        # Update status
-        self.sync_status = "syncing"
+        with self._sync_lock:
+            # Update status
+            self.sync_status = "syncing"
 
-        try:
-            # Perform sync
-            success, message = self.limitless_service.sync_life_logs(
-                force_full_sync=force_full_sync
-            )
+            try:
+                # Perform sync
+                success, message, _ = self.limitless_service.sync_life_logs(
+                    force_full_sync=force_full_sync
+                )
 
-            # Update status
-            self.last_sync_time = datetime.now()
-            self.next_sync_time = self.last_sync_time + timedelta(
-                seconds=self.sync_interval
-            )
-            self.sync_status = "idle"
+                # Update status
+                self.last_sync_time = datetime.now()
+                self.next_sync_time = self.last_sync_time + timedelta(
+                    seconds=self.sync_interval
+                )
+                self.sync_status = "idle"
+
+                return {
+                    "success": success,
+                    "message": message,
+                    "timestamp": self.last_sync_time.isoformat(),
+                    "next_sync": self.next_sync_time.isoformat(),
+                }
+
+            except Exception as e:
+                error_message = f"Error in manual sync: {str(e)}"
+                logger.error(error_message)
+                self.sync_status = "error"
 
-            return {
-                "success": success,
-                "message": message,
-                "timestamp": self.last_sync_time.isoformat(),
-                "next_sync": self.next_sync_time.isoformat(),
-            }
-
-        except Exception as e:
-            error_message = f"Error in manual sync: {str(e)}"
-            logger.error(error_message)
-            self.sync_status = "error"
-
-            return {
-                "success": False,
-                "message": error_message,
-                "timestamp": datetime.now().isoformat(),
-            }
+                return {
+                    "success": False,
+                    "message": error_message,
+                    "timestamp": datetime.now().isoformat(),
+                }
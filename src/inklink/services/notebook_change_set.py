@@ -0,0 +1,215 @@
+"""Per-notebook change sets for InkLink write-back.
+
+A poll can answer several tagged pages of the same notebook. Instead of
+rewriting and uploading the notebook once per response and once per tag
+removal, the changes are collected in a ``NotebookChangeSet`` and applied to
+the downloaded archive in a single rewrite.
+"""
+
+import copy
+import json
+import logging
+import posixpath
+import time
+import uuid
+from typing import Any, Dict, List, Optional
+
+from inklink.utils.rmdoc_archive import RmdocArchive
+
+logger = logging.getLogger(__name__)
+
+
+class NotebookChangeSet:
+    """Response pages and tag removals pending for one downloaded notebook."""
+
+    def __init__(
+        self,
+        notebook_id: str,
+        notebook_name: str,
+        notebook_path: str,
+        notebook_dir: str,
+    ):
+        """
+        Initialize an empty change set.
+
+        Args:
+            notebook_id: ID of the notebook
+            notebook_name: Name of the notebook
+            notebook_path: Path to the downloaded notebook archive
+            notebook_dir: Directory to write the modified notebook into
+        """
+        self.notebook_id = notebook_id
+        self.notebook_name = notebook_name
+        self.notebook_path = notebook_path
+        self.notebook_dir = notebook_dir
+
+        # Queued responses: query page ID, .content page entry and text
+        self.responses: List[Dict[str, Any]] = []
+        # Page ID to tags to remove from it
+        self.tag_removals: Dict[str, List[str]] = {}
+        # Query pages whose response could not be placed by the last write
+        self.skipped_pages: List[str] = []
+
+    def has_changes(self) -> bool:
+        """Check whether anything needs to be written back."""
+        return bool(self.responses or self.tag_removals)
+
+    def add_response(
+        self, query_page: Dict[str, Any], response_text: str
+    ) -> Dict[str, Any]:
+        """
+        Queue a response page to be inserted after a query page.
+
+        Args:
+            query_page: Query page data
+            response_text: Response text to insert
+
+        Returns:
+            The ``.content`` page entry created for the response
+        """
+        query_title = query_page.get("metadata", {}).get("visibleName", "Query")
+        if not query_title or query_title == "Query":
+            query_title = query_page.get("visibleName", "Query")
+
+        # Millisecond timestamps are stored as strings by the device
+        now_ms = str(int(time.time() * 1000))
+        response_page = {
+            "id": str(uuid.uuid4()),
+            "lastModified": now_ms,
+            "lastOpened": now_ms,
+            "lastOpenedPage": 0,
+            "pinned": False,
+            "type": "DocumentType",
+            "visibleName": f"Response to {query_title}",
+        }
+        self.responses.append(
+            {
+                "after": query_page["id"],
+                "page": response_page,
+                "text": response_text,
+            }
+        )
+        return response_page
+
+    def remove_tags(self, page_id: str, tags: List[str]) -> None:
+        """
+        Queue tags to be removed from a page.
+
+        Args:
+            page_id: ID of the page
+            tags: Tags to remove
+        """
+        pending = self.tag_removals.setdefault(page_id, [])
+        pending.extend(tag for tag in tags if tag not in pending)
+
+    def _apply_to_content(self, content: Dict[str, Any]) -> bool:
+        """
+        Insert response pages and remove tags in a parsed ``.content``.
+
+        Responses to query pages missing from ``pages`` (for example notebooks
+        that only list their pages under ``cPages``) are recorded in
+        ``skipped_pages`` instead of being written.
+        """
+        pages = content.get("pages", [])
+        changed = False
+        self.skipped_pages = []
+
+        for response in self.responses:
+            query_idx = next(
+                (i for i, p in enumerate(pages) if p.get("id") == response["after"]),
+                -1,
+            )
+            if query_idx == -1:
+                logger.error(
+                    f"Query page {response['after']} not found in notebook content"
+                )
+                self.skipped_pages.append(response["after"])
+                continue
+
+            # Place after earlier responses to the same query
+            insert_idx = query_idx + 1
+            while insert_idx < len(pages) and pages[insert_idx].get("id") in {
+                r["page"]["id"] for r in self.responses
+            }:
+                insert_idx += 1
+            pages.insert(insert_idx, response["page"])
+            changed = True
+
+        for page in pages:
+            tags_to_remove = self.tag_removals.get(page.get("id"))
+            if not tags_to_remove or "tags" not in page:
+                continue
+            original_tags = page["tags"] if isinstance(page["tags"], list) else []
+            page["tags"] = [tag for tag in original_tags if tag not in tags_to_remove]
+            if original_tags != page["tags"]:
+                changed = True
+
+        content["pages"] = pages
+        return changed
+
+    @staticmethod
+    def _touch_metadata(metadata: Dict[str, Any]) -> None:
+        """Mark notebook metadata as modified in the form the device expects."""
+        now_ms = str(int(time.time() * 1000))
+        metadata.update(
+            {
+                "lastModified": now_ms,
+                "lastOpened": now_ms,
+                "lastOpenedPage": 0,
+                "parent": metadata.get("parent", "") or "",
+                "version": metadata.get("version", 1) + 1,
+                "pinned": False,
+                # Must be true for reMarkable
+                "synced": True,
+                "modified": False,
+                "deleted": False,
+                "metadatamodified": False,
+            }
+        )
+
+    def write(self, output_path: str) -> Optional[str]:
+        """
+        Write the notebook with all queued changes applied.
+
+        Args:
+            output_path: Path of the modified archive
+
+        Returns:
+            Path of the written archive, or None if nothing changed
+
+        Raises:
+            ValueError: If the notebook has no ``.content`` file
+        """
+        with RmdocArchive(self.notebook_path) as archive:
+            content_name = archive.content_name
+            if not content_name:
+                raise ValueError(
+                    f"No content file found in notebook {self.notebook_path}"
+                )
+
+            # Copy so the archive's cached parse is left untouched
+            content = copy.deepcopy(archive.content)
+            if not self._apply_to_content(content):
+                logger.info(f"No changes to write for notebook {self.notebook_name}")
+                return None
+
+            updates: Dict[str, Any] = {content_name: json.dumps(content)}
+            if self.responses:
+                metadata = copy.deepcopy(archive.metadata)
+                self._touch_metadata(metadata)
+                metadata_name = (
+                    archive.metadata_name
+                    or f"{posixpath.splitext(content_name)[0]}.metadata"
+                )
+                updates[metadata_name] = json.dumps(metadata)
+
+                # Placeholder text pages; a real implementation would render .rm lines
+                page_dir = posixpath.dirname(content_name)
+                inserted = {page.get("id") for page in content["pages"]}
+                for response in self.responses:
+                    if response["page"]["id"] not in inserted:
+                        continue
+                    rm_member = posixpath.join(page_dir, f"{response['page']['id']}.rm")
+                    updates[rm_member] = response["text"]
+
+            return archive.write_updated(output_path, updates)
@@ -0,0 +1,327 @@
+"""Persistent cache of page transcripts for InkLink.
+
+Monitors re-read every page of a polled notebook to look for #tags, and each
+read is a full handwriting recognition round-trip. This module caches the
+recognized text keyed by the SHA-256 of the page's ``.rm`` bytes together
+with the recognizer model, content type and language, so unchanged pages are
+answered locally.
+
+Saving rewrites the whole file, so recognizers call save_if_due() after each
+new transcript and the file is only written every few transcripts or seconds.
+"""
+
+import atexit
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+from inklink.config import CONFIG
+
+logger = logging.getLogger(__name__)
+
+# Caches shared by the recognizers of one process, keyed by directory
+_shared_caches: Dict[str, "PageTranscriptCache"] = {}
+_shared_caches_lock = threading.Lock()
+
+
+class PageTranscriptCache:
+    """LRU cache of page transcripts persisted to a single JSON file."""
+
+    INDEX_FILENAME = "transcripts.json"
+
+    def __init__(
+        self,
+        cache_dir: str,
+        max_entries: int = 10000,
+        max_bytes: int = 50 * 1024 * 1024,
+        save_every: int = 50,
+        save_interval: float = 60.0,
+    ):
+        """
+        Initialize the cache.
+
+        Args:
+            cache_dir: Directory to store the cache file in
+            max_entries: Maximum number of transcripts to keep
+            max_bytes: Maximum total size of cached transcripts in bytes
+            save_every: save_if_due() saves once this many transcripts are unsaved
+            save_interval: save_if_due() saves once unsaved transcripts are this
+                           many seconds old
+        """
+        self.cache_dir = cache_dir
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.save_every = save_every
+        self.save_interval = save_interval
+        self.cache_path = os.path.join(cache_dir, self.INDEX_FILENAME)
+
+        # Least recently used entries first
+        self._entries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._size_bytes = 0
+        self._dirty = False
+        self._unsaved = 0
+        self._last_save = time.monotonic()
+        self._lock = threading.RLock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        os.makedirs(cache_dir, exist_ok=True)
+        self._load()
+
+        logger.info(
+            f"Page transcript cache initialized at {cache_dir} "
+            f"with {len(self._entries)} entries"
+        )
+
+    @staticmethod
+    def compute_page_hash(page_path: str) -> str:
+        """
+        Compute the SHA-256 of a page file.
+
+        Args:
+            page_path: Path to the .rm file
+
+        Returns:
+            Hex digest of the file contents
+        """
+        digest = hashlib.sha256()
+        with open(page_path, "rb") as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b""):
+                digest.update(chunk)
+        return digest.hexdigest()
+
+    @staticmethod
+    def compute_data_hash(page_data: bytes) -> str:
+        """
+        Compute the SHA-256 of page bytes already in memory.
+
+        Args:
+            page_data: Contents of the .rm file
+
+        Returns:
+            Hex digest of the contents
+        """
+        return hashlib.sha256(page_data).hexdigest()
+
+    @staticmethod
+    def _make_key(page_hash: str, model: str, content_type: str, language: str) -> str:
+        """Build the cache key for a page hash, model, content type and language."""
+        return f"{page_hash}:{model or 'default'}:{content_type}:{language}"
+
+    @staticmethod
+    def _entry_size(entry: Dict[str, Any]) -> int:
+        """Approximate the stored size of an entry."""
+        return len(entry.get("text", "").encode("utf-8")) + 64
+
+    def get(
+        self,
+        page_hash: str,
+        model: str,
+        content_type: str,
+        language: str = "en_US",
+    ) -> Optional[str]:
+        """
+        Get the cached transcript for a page.
+
+        Args:
+            page_hash: SHA-256 of the page's .rm bytes
+            model: Recognizer model the transcript was produced with
+            content_type: Content type used for recognition
+            language: Language code used for recognition
+
+        Returns:
+            The cached transcript, or None if not cached
+        """
+        key = self._make_key(page_hash, model, content_type, language)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            entry["last_used"] = time.time()
+            self.hits += 1
+            return entry["text"]
+
+    def put(
+        self,
+        page_hash: str,
+        model: str,
+        content_type: str,
+        text: str,
+        language: str = "en_US",
+    ) -> None:
+        """
+        Store a page transcript, evicting least recently used entries if needed.
+
+        Args:
+            page_hash: SHA-256 of the page's .rm bytes
+            model: Recognizer model the transcript was produced with
+            content_type: Content type used for recognition
+            text: Recognized text
+            language: Language code used for recognition
+        """
+        key = self._make_key(page_hash, model, content_type, language)
+        entry = {"text": text, "last_used": time.time()}
+
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._size_bytes -= self._entry_size(previous)
+
+            self._entries[key] = entry
+            self._size_bytes += self._entry_size(entry)
+            self._evict()
+            self._dirty = True
+            self._unsaved += 1
+
+    def _evict(self) -> None:
+        """Drop least recently used entries until both limits are met."""
+        while self._entries and (
+            len(self._entries) > self.max_entries or self._size_bytes > self.max_bytes
+        ):
+            _, entry = self._entries.popitem(last=False)
+            self._size_bytes -= self._entry_size(entry)
+            self.evictions += 1
+
+    def _load(self) -> None:
+        """Load cached transcripts from disk."""
+        if not os.path.exists(self.cache_path):
+            return
+
+        try:
+            with open(self.cache_path, "r") as f:
+                data = json.load(f)
+        except Exception as e:
+            logger.warning(f"Error reading transcript cache: {e}")
+            return
+
+        # Restore recency order from the stored timestamps
+        for key, entry in sorted(
+            data.items(), key=lambda item: item[1].get("last_used", 0)
+        ):
+            self._entries[key] = entry
+            self._size_bytes += self._entry_size(entry)
+        self._evict()
+
+    def save(self) -> bool:
+        """
+        Write the cache to disk if it changed since the last save.
+
+        Returns:
+            True if the cache is persisted, False on error
+        """
+        with self._lock:
+            if not self._dirty:
+                return True
+            data = dict(self._entries)
+            self._dirty = False
+            unsaved, self._unsaved = self._unsaved, 0
+            self._last_save = time.monotonic()
+
+        try:
+            # Write atomically so a crash never leaves a truncated cache
+            fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+            with os.fdopen(fd, "w") as f:
+                json.dump(data, f)
+            os.replace(tmp_path, self.cache_path)
+            return True
+        except Exception as e:
+            logger.warning(f"Error writing transcript cache: {e}")
+            with self._lock:
+                self._dirty = True
+                self._unsaved += unsaved
+            return False
+
+    def save_if_due(self) -> bool:
+        """
+        Save the cache if enough transcripts are unsaved or they are old enough.
+
+        Returns:
+            True if the cache is persisted or the save is not due yet, False
+            on error
+        """
+        with self._lock:
+            due = self._unsaved >= self.save_every or (
+                self._unsaved
+                and time.monotonic() - self._last_save >= self.save_interval
+            )
+        return self.save() if due else True
+
+    def clear(self) -> int:
+        """
+        Clear all cached transcripts.
+
+        Returns:
+            Number of entries removed
+        """
+        with self._lock:
+            removed_count = len(self._entries)
+            self._entries.clear()
+            self._size_bytes = 0
+            self._dirty = True
+        self.save()
+        logger.info(f"Cleared {removed_count} cached transcripts")
+        return removed_count
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get statistics about the cache.
+
+        Returns:
+            Dictionary with cache statistics
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "cache_dir": self.cache_dir,
+                "entry_count": len(self._entries),
+                "total_size_bytes": self._size_bytes,
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+
+
+def get_shared_transcript_cache(cache_dir: Optional[str] = None) -> PageTranscriptCache:
+    """
+    Get the transcript cache shared by all recognizers of this process.
+
+    Args:
+        cache_dir: Cache directory (defaults to TRANSCRIPT_CACHE_DIR, or
+                   transcript_cache under TEMP_DIR)
+
+    Returns:
+        Shared PageTranscriptCache for that directory
+    """
+    path = os.path.abspath(
+        cache_dir
+        or CONFIG.get("TRANSCRIPT_CACHE_DIR")
+        or os.path.join(CONFIG.get("TEMP_DIR", "/tmp"), "transcript_cache")
+    )
+    with _shared_caches_lock:
+        cache = _shared_caches.get(path)
+        if cache is None:
+            cache = PageTranscriptCache(
+                path,
+                max_entries=CONFIG.get("TRANSCRIPT_CACHE_MAX_ENTRIES", 10000),
+                max_bytes=CONFIG.get("TRANSCRIPT_CACHE_MAX_BYTES", 50 * 1024 * 1024),
+                save_every=CONFIG.get("TRANSCRIPT_CACHE_SAVE_EVERY", 50),
+                save_interval=CONFIG.get("TRANSCRIPT_CACHE_SAVE_INTERVAL", 60.0),
+            )
+            _shared_caches[path] = cache
+            # Keep transcripts that were not due for saving yet
+            atexit.register(cache.save)
+        return cache
@@ -0,0 +1,416 @@
+"""Adaptive scheduler for InkLink's periodic jobs.
+
+The penpal, Cassidy/Lilly and Limitless services used to run one thread each
+that slept a fixed interval between polls, whether or not the last poll found
+anything. This module runs all of them as jobs on a single asyncio loop:
+
+- a job polls faster (``min_interval``) right after it reports activity and
+  backs off towards ``max_interval`` while nothing changes (by default
+  SCHEDULER_MAX_BACKOFF times its interval);
+- a failed run is retried after the job's ``error_interval``;
+- each delay gets random jitter so jobs do not poll the cloud in lockstep;
+- a job never overlaps itself, and triggering a running job queues one
+  follow-up run instead;
+- job bodies, and the work they fan out with ``run_batch``, run on one thread
+  pool, so all jobs share a worker budget.
+"""
+
+import asyncio
+import collections
+import concurrent.futures
+import logging
+import random
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+from inklink.config import CONFIG
+
+logger = logging.getLogger(__name__)
+
+# Scheduler shared by the services of this process
+_shared_scheduler: Optional["PollingScheduler"] = None
+_shared_scheduler_lock = threading.Lock()
+
+
+@dataclass
+class PollingJob:
+    """A periodic job and its adaptive timing state.
+
+    ``func`` runs on a worker thread and returns a truthy value when it found
+    work, which resets the delay to ``min_interval``; falsy results multiply
+    the delay by ``backoff`` up to ``max_interval``. Errors retry after
+    ``error_interval`` if set, and otherwise count as an idle run.
+    """
+
+    name: str
+    func: Callable[[], Any]
+    interval: float
+    min_interval: Optional[float] = None
+    max_interval: Optional[float] = None
+    backoff: float = 2.0
+    jitter: float = 0.1
+    initial_delay: float = 0.0
+    error_interval: Optional[float] = None
+
+    current_interval: float = field(init=False)
+    next_run: Optional[float] = field(default=None, init=False)
+    last_run: Optional[float] = field(default=None, init=False)
+    last_duration: float = field(default=0.0, init=False)
+    last_error: Optional[str] = field(default=None, init=False)
+    running: bool = field(default=False, init=False)
+    retrying: bool = field(default=False, init=False)
+    runs: int = field(default=0, init=False)
+    active_runs: int = field(default=0, init=False)
+    errors: int = field(default=0, init=False)
+    coalesced_triggers: int = field(default=0, init=False)
+
+    def __post_init__(self):
+        if self.min_interval is None:
+            self.min_interval = self.interval * CONFIG.get(
+                "SCHEDULER_ACTIVE_FACTOR", 0.25
+            )
+        if self.max_interval is None:
+            self.max_interval = self.interval * CONFIG.get("SCHEDULER_MAX_BACKOFF", 8.0)
+        self.min_interval = min(self.min_interval, self.interval)
+        self.max_interval = max(self.max_interval, self.interval)
+        self.current_interval = self.interval
+
+    def record_result(self, activity: bool) -> None:
+        """Adapt the polling interval to the outcome of a run."""
+        self.retrying = False
+        if activity:
+            self.active_runs += 1
+            self.current_interval = self.min_interval
+        else:
+            self.current_interval = min(
+                self.current_interval * self.backoff, self.max_interval
+            )
+
+    def record_error(self) -> None:
+        """Schedule the retry of a failed run."""
+        if self.error_interval is None:
+            self.record_result(False)
+        else:
+            # A one-off delay; the polling interval is left as it was
+            self.retrying = True
+
+    def next_delay(self) -> float:
+        """Get the jittered delay before the next run."""
+        interval = self.error_interval if self.retrying else self.current_interval
+        spread = interval * self.jitter
+        return max(0.0, interval + random.uniform(-spread, spread))
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get timing and run statistics of the job."""
+        return {
+            "name": self.name,
+            "running": self.running,
+            "interval": self.interval,
+            "current_interval": self.current_interval,
+            "next_run": self.next_run,
+            "last_run": self.last_run,
+            "last_duration": self.last_duration,
+            "last_error": self.last_error,
+            "runs": self.runs,
+            "active_runs": self.active_runs,
+            "errors": self.errors,
+            "coalesced_triggers": self.coalesced_triggers,
+        }
+
+
+class PollingScheduler:
+    """Runs PollingJobs on an asyncio loop in a background thread."""
+
+    def __init__(self, max_workers: Optional[int] = None):
+        """
+        Initialize the scheduler.
+
+        Args:
+            max_workers: Number of job bodies that may run at the same time
+        """
+        self.max_workers = max(1, max_workers or CONFIG.get("SCHEDULER_MAX_WORKERS", 4))
+        self.jobs: Dict[str, PollingJob] = {}
+
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._executor: Optional[concurrent.futures.ThreadPoolExecutor] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._tasks: Dict[str, asyncio.Task] = {}
+        self._wakeups: Dict[str, asyncio.Event] = {}
+        # Job bodies currently running on the executor
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self._lock = threading.Lock()
+        self._ready = threading.Event()
+
+    @property
+    def running(self) -> bool:
+        """Whether the scheduler thread is running."""
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self) -> None:
+        """Start the scheduler thread if it is not running yet."""
+        with self._lock:
+            if self.running:
+                return
+            self._ready.clear()
+            self._executor = concurrent.futures.ThreadPoolExecutor(
+                max_workers=self.max_workers, thread_name_prefix="scheduler-job"
+            )
+            self._thread = threading.Thread(
+                target=self._run_loop, name="polling-scheduler", daemon=True
+            )
+            self._thread.start()
+        self._ready.wait()
+        logger.info(f"Polling scheduler started with {self.max_workers} workers")
+
+    def stop(self, timeout: float = 10.0) -> None:
+        """
+        Stop all jobs and the scheduler thread.
+
+        Args:
+            timeout: Seconds to wait for running jobs to finish
+        """
+        with self._lock:
+            loop, thread = self._loop, self._thread
+        if not loop or not thread:
+            return
+
+        asyncio.run_coroutine_threadsafe(self._cancel_all(timeout), loop).result()
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join(timeout)
+        self._executor.shutdown(wait=False)
+
+        with self._lock:
+            self.jobs.clear()
+            self._loop = None
+            self._thread = None
+        logger.info("Polling scheduler stopped")
+
+    def _run_loop(self) -> None:
+        """Thread target running the event loop until stopped."""
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        self._loop = loop
+        self._semaphore = asyncio.Semaphore(self.max_workers)
+        self._ready.set()
+        try:
+            loop.run_forever()
+        finally:
+            loop.close()
+
+    def add_job(self, job: PollingJob) -> PollingJob:
+        """
+        Register a job and start polling it, starting the scheduler if needed.
+
+        Args:
+            job: Job to run
+
+        Returns:
+            The registered job
+
+        Raises:
+            ValueError: If a job with the same name is already registered
+        """
+        self.start()
+        with self._lock:
+            if job.name in self.jobs:
+                raise ValueError(f"Job '{job.name}' is already scheduled")
+            self.jobs[job.name] = job
+        asyncio.run_coroutine_threadsafe(self._spawn(job), self._loop).result()
+        logger.info(f"Scheduled job '{job.name}' every {job.interval}s")
+        return job
+
+    def remove_job(self, name: str, timeout: float = 10.0) -> bool:
+        """
+        Stop polling a job, waiting for a running invocation to finish.
+
+        Args:
+            name: Name of the job
+            timeout: Seconds to wait for a running invocation
+
+        Returns:
+            True if the job was registered
+        """
+        with self._lock:
+            job = self.jobs.pop(name, None)
+            loop = self._loop
+        if job is None:
+            return False
+        if loop:
+            asyncio.run_coroutine_threadsafe(self._cancel(name, timeout), loop).result()
+        logger.info(f"Removed job '{name}'")
+        return True
+
+    def trigger(self, name: str) -> bool:
+        """
+        Run a job as soon as possible.
+
+        A job that is currently running runs once more right after it
+        finishes; it is never started twice concurrently.
+
+        Args:
+            name: Name of the job
+
+        Returns:
+            True if the job is registered
+        """
+        job = self.jobs.get(name)
+        if job is None or not self._loop:
+            return False
+        wakeup = self._wakeups.get(name)
+        if wakeup is None:
+            return False
+        if job.running:
+            job.coalesced_triggers += 1
+        self._loop.call_soon_threadsafe(wakeup.set)
+        return True
+
+    async def _spawn(self, job: PollingJob) -> None:
+        """Create the polling task of a job on the loop."""
+        self._wakeups[job.name] = asyncio.Event()
+        self._tasks[job.name] = asyncio.get_running_loop().create_task(
+            self._poll(job), name=f"poll-{job.name}"
+        )
+
+    async def _cancel(self, name: str, timeout: float) -> None:
+        """Cancel the polling task of a job and let a running body finish."""
+        task = self._tasks.pop(name, None)
+        self._wakeups.pop(name, None)
+        if task:
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+
+        inflight = self._inflight.pop(name, None)
+        if inflight and not inflight.done():
+            await asyncio.wait({inflight}, timeout=timeout)
+
+    async def _cancel_all(self, timeout: float) -> None:
+        """Cancel all polling tasks."""
+        for name in list(self._tasks):
+            await self._cancel(name, timeout)
+
+    async def _sleep(self, job: PollingJob, delay: float) -> None:
+        """Wait for a job's next run or an earlier trigger."""
+        wakeup = self._wakeups[job.name]
+        job.next_run = time.time() + delay
+        try:
+            await asyncio.wait_for(wakeup.wait(), timeout=delay)
+        except asyncio.TimeoutError:
+            pass
+        wakeup.clear()
+
+    async def _poll(self, job: PollingJob) -> None:
+        """Run a job forever; one task per job means no self-overlap."""
+        loop = asyncio.get_running_loop()
+        await self._sleep(job, job.initial_delay)
+
+        while True:
+            async with self._semaphore:
+                job.running = True
+                job.last_run = time.time()
+                started = time.monotonic()
+                inflight = loop.run_in_executor(self._executor, job.func)
+                self._inflight[job.name] = inflight
+                try:
+                    # Shielded so cancelling the job lets a running body finish
+                    activity = await asyncio.shield(inflight)
+                    job.last_error = None
+                    job.record_result(bool(activity))
+                except Exception as e:
+                    logger.error(f"Job '{job.name}' failed: {e}")
+                    job.errors += 1
+                    job.last_error = str(e)
+                    job.record_error()
+                finally:
+                    if inflight.done():
+                        self._inflight.pop(job.name, None)
+                        job.runs += 1
+                        job.running = False
+                        job.last_duration = time.monotonic() - started
+
+            delay = job.next_delay()
+            logger.debug(f"Job '{job.name}' runs again in {delay:.1f}s")
+            await self._sleep(job, delay)
+
+    def run_batch(
+        self,
+        func: Callable[[Any], Any],
+        items: Sequence[Any],
+        max_parallel: Optional[int] = None,
+    ) -> List[concurrent.futures.Future]:
+        """
+        Run a function over items within the shared worker budget.
+
+        For job bodies that fan out: the calling thread works through the
+        items itself, and helpers join it on the scheduler's workers as
+        permits free up. A fan-out therefore never runs more bodies than the
+        budget allows and never waits for a permit its own job holds.
+
+        Args:
+            func: Function called with each item
+            items: Items to process
+            max_parallel: Most items processed at once, including the caller
+
+        Returns:
+            Completed futures of the results, in item order
+        """
+        pending = collections.deque(
+            (item, concurrent.futures.Future()) for item in items
+        )
+        futures = [future for _, future in pending]
+        pending_lock = threading.Lock()
+
+        def drain() -> None:
+            while True:
+                with pending_lock:
+                    if not pending:
+                        return
+                    item, future = pending.popleft()
+                future.set_running_or_notify_cancel()
+                try:
+                    future.set_result(func(item))
+                except Exception as e:
+                    future.set_exception(e)
+
+        helpers = min(len(futures), max_parallel or self.max_workers) - 1
+        if helpers > 0:
+            self.start()
+            for _ in range(helpers):
+                asyncio.run_coroutine_threadsafe(self._run_gated(drain), self._loop)
+        drain()
+        concurrent.futures.wait(futures)
+        return futures
+
+    async def _run_gated(self, func: Callable[[], Any]) -> None:
+        """Run a function on the executor once a worker permit is free."""
+        async with self._semaphore:
+            await asyncio.get_running_loop().run_in_executor(self._executor, func)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get statistics for the scheduler and all jobs.
+
+        Returns:
+            Dictionary with scheduler statistics
+        """
+        return {
+            "running": self.running,
+            "max_workers": self.max_workers,
+            "jobs": {name: job.get_stats() for name, job in self.jobs.items()},
+        }
+
+
+def get_shared_scheduler() -> PollingScheduler:
+    """
+    Get the scheduler shared by all polling services of this process.
+
+    Returns:
+        Shared PollingScheduler
+    """
+    global _shared_scheduler
+    with _shared_scheduler_lock:
+        if _shared_scheduler is None:
+            _shared_scheduler = PollingScheduler()
+        return _shared_scheduler
@@ -0,0 +1,283 @@
+"""Durable ledger of processed notebook pages for InkLink monitors.
+
+The penpal, Cassidy and Lilly monitors answer tagged pages and must not
+answer them again. Tracking that in memory means every restart re-recognizes
+and re-answers every tagged page still visible in the cloud. This module
+records processed pages in SQLite, keyed by notebook ID, page ID and the hash
+of the page's ``.rm`` contents, so an edited page is picked up again while
+unchanged pages are skipped across restarts.
+"""
+
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from inklink.config import CONFIG
+
+logger = logging.getLogger(__name__)
+
+STATUS_PROCESSED = "processed"
+STATUS_FAILED = "failed"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS processed_pages (
+    notebook_id TEXT NOT NULL,
+    page_id TEXT NOT NULL,
+    page_hash TEXT NOT NULL,
+    monitor TEXT NOT NULL,
+    status TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 1,
+    first_seen REAL NOT NULL,
+    updated_at REAL NOT NULL,
+    detail TEXT,
+    PRIMARY KEY (notebook_id, page_id, page_hash, monitor)
+);
+CREATE INDEX IF NOT EXISTS idx_processed_pages_updated
+    ON processed_pages (updated_at);
+"""
+
+_UPSERT = """
+INSERT INTO processed_pages (
+    notebook_id, page_id, page_hash, monitor, status,
+    attempts, first_seen, updated_at, detail
+) VALUES (?, ?, ?, ?, ?, 1, ?, ?, ?)
+ON CONFLICT (notebook_id, page_id, page_hash, monitor) DO UPDATE SET
+    status = excluded.status,
+    attempts = processed_pages.attempts + 1,
+    updated_at = excluded.updated_at,
+    detail = excluded.detail
+"""
+
+# Ledgers shared by the monitors of one process, keyed by database path
+_shared_ledgers: Dict[str, "ProcessedPageLedger"] = {}
+_shared_ledgers_lock = threading.Lock()
+
+
+class ProcessedPageLedger:
+    """SQLite-backed record of pages handled by each monitor."""
+
+    def __init__(self, db_path: str, batch_size: int = 100):
+        """
+        Open (or create) a ledger.
+
+        Args:
+            db_path: Path to the SQLite database file
+            batch_size: Pending writes that trigger an automatic flush
+        """
+        self.db_path = db_path
+        self.batch_size = batch_size
+
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        # Monitors call in from worker threads; access is serialized below
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(_SCHEMA)
+        self._conn.commit()
+        self._lock = threading.RLock()
+
+        # Writes queued since the last flush, visible to lookups immediately
+        self._pending: Dict[Tuple[str, str, str, str], Tuple[Any, ...]] = {}
+
+        self.hits = 0
+        self.misses = 0
+        self.flushes = 0
+
+        logger.info(f"Processed page ledger opened at {db_path}")
+
+    def _lookup(self, key: Tuple[str, str, str, str]) -> Optional[str]:
+        """Get the recorded status of a page, including pending writes."""
+        pending = self._pending.get(key)
+        if pending is not None:
+            return pending[4]
+        row = self._conn.execute(
+            "SELECT status FROM processed_pages WHERE notebook_id = ? "
+            "AND page_id = ? AND page_hash = ? AND monitor = ?",
+            key,
+        ).fetchone()
+        return row[0] if row else None
+
+    def is_processed(
+        self, notebook_id: str, page_id: str, page_hash: str, monitor: str
+    ) -> bool:
+        """
+        Check whether a monitor already processed this version of a page.
+
+        Args:
+            notebook_id: ID of the notebook
+            page_id: ID of the page
+            page_hash: Hash of the page's .rm contents
+            monitor: Name of the monitor asking
+
+        Returns:
+            True if the page version was processed successfully
+        """
+        key = (notebook_id, page_id, page_hash or "", monitor)
+        with self._lock:
+            processed = self._lookup(key) == STATUS_PROCESSED
+            if processed:
+                self.hits += 1
+            else:
+                self.misses += 1
+            return processed
+
+    def get(
+        self, notebook_id: str, page_id: str, page_hash: str, monitor: str
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Get the ledger entry of a page version.
+
+        Args:
+            notebook_id: ID of the notebook
+            page_id: ID of the page
+            page_hash: Hash of the page's .rm contents
+            monitor: Name of the monitor
+
+        Returns:
+            Entry with status, attempts, timestamps and detail, or None
+        """
+        self.flush()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT status, attempts, first_seen, updated_at, detail "
+                "FROM processed_pages WHERE notebook_id = ? AND page_id = ? "
+                "AND page_hash = ? AND monitor = ?",
+                (notebook_id, page_id, page_hash or "", monitor),
+            ).fetchone()
+        if not row:
+            return None
+        return dict(
+            zip(("status", "attempts", "first_seen", "updated_at", "detail"), row)
+        )
+
+    def mark(
+        self,
+        notebook_id: str,
+        page_id: str,
+        page_hash: str,
+        monitor: str,
+        status: str = STATUS_PROCESSED,
+        detail: Optional[str] = None,
+    ) -> None:
+        """
+        Record the outcome of processing a page version.
+
+        The write is queued and committed with the rest of the batch on the
+        next flush.
+
+        Args:
+            notebook_id: ID of the notebook
+            page_id: ID of the page
+            page_hash: Hash of the page's .rm contents
+            monitor: Name of the monitor that processed the page
+            status: STATUS_PROCESSED or STATUS_FAILED
+            detail: Optional note, e.g. an error message
+        """
+        now = time.time()
+        key = (notebook_id, page_id, page_hash or "", monitor)
+        with self._lock:
+            self._pending[key] = (*key, status, now, now, detail)
+            should_flush = len(self._pending) >= self.batch_size
+        if should_flush:
+            self.flush()
+
+    def flush(self) -> int:
+        """
+        Commit queued writes in a single transaction.
+
+        Returns:
+            Number of entries written
+        """
+        with self._lock:
+            if not self._pending:
+                return 0
+            rows = list(self._pending.values())
+            try:
+                with self._conn:
+                    self._conn.executemany(_UPSERT, rows)
+            except sqlite3.Error as e:
+                logger.error(f"Failed to write processed page ledger: {e}")
+                return 0
+            self._pending.clear()
+            self.flushes += 1
+        logger.debug(f"Recorded {len(rows)} processed pages")
+        return len(rows)
+
+    def processed_pages(self, notebook_id: str, monitor: str) -> List[str]:
+        """
+        List the IDs of pages of a notebook processed by a monitor.
+
+        Args:
+            notebook_id: ID of the notebook
+            monitor: Name of the monitor
+
+        Returns:
+            Page IDs with at least one processed version
+        """
+        self.flush()
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT DISTINCT page_id FROM processed_pages "
+                "WHERE notebook_id = ? AND monitor = ? AND status = ?",
+                (notebook_id, monitor, STATUS_PROCESSED),
+            ).fetchall()
+        return [row[0] for row in rows]
+
+    def close(self) -> None:
+        """Flush queued writes and close the database."""
+        self.flush()
+        with self._lock:
+            self._conn.close()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get statistics about the ledger.
+
+        Returns:
+            Dictionary with ledger statistics
+        """
+        with self._lock:
+            entry_count = self._conn.execute(
+                "SELECT COUNT(*) FROM processed_pages"
+            ).fetchone()[0]
+            return {
+                "db_path": self.db_path,
+                "entry_count": entry_count,
+                "pending_writes": len(self._pending),
+                "hits": self.hits,
+                "misses": self.misses,
+                "flushes": self.flushes,
+            }
+
+
+def get_default_ledger_path() -> str:
+    """Get the configured ledger path, defaulting under the Lilly root."""
+    return CONFIG.get("PROCESSED_LEDGER_PATH") or os.path.join(
+        CONFIG.get("LILLY_ROOT_DIR", os.path.expanduser("~/dev")),
+        "Lilly",
+        "processed_pages.db",
+    )
+
+
+def get_shared_ledger(db_path: Optional[str] = None) -> ProcessedPageLedger:
+    """
+    Get the ledger shared by all monitors of this process.
+
+    Args:
+        db_path: Path to the database (defaults to get_default_ledger_path())
+
+    Returns:
+        Shared ProcessedPageLedger for that database
+    """
+    path = os.path.abspath(db_path or get_default_ledger_path())
+    with _shared_ledgers_lock:
+        ledger = _shared_ledgers.get(path)
+        if ledger is None:
+            ledger = ProcessedPageLedger(path)
+            _shared_ledgers[path] = ledger
+        return ledger
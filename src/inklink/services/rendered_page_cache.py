@@ -0,0 +1,293 @@
+"""On-disk cache of rendered page images for InkLink.
+
+Every recognition path rasterizes ``.rm`` pages before sending them to a
+vision model, and monitors re-render the same unchanged pages on every poll.
+This module stores rendered PNGs keyed by the SHA-256 of the page's ``.rm``
+bytes and the rendering DPI, so a page version is rasterized once. Cropping
+and preprocessing happen after the cache, on copies of the cached image.
+
+Images are written atomically (temporary file plus rename) and the cache is
+bounded by total size, evicting the least recently used images first.
+Recency is kept in the files' modification times so it survives restarts.
+"""
+
+import hashlib
+import logging
+import os
+import re
+import tempfile
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional
+
+from inklink.config import CONFIG
+
+logger = logging.getLogger(__name__)
+
+# Caches shared by the renderers of one process, keyed by directory
+_shared_caches: Dict[str, "RenderedPageCache"] = {}
+_shared_caches_lock = threading.Lock()
+
+# File name of a cached image: its key, a SHA-256 hex digest
+_KEY_FILE = re.compile(r"^[0-9a-f]{64}\.png$")
+
+
+class RenderedPageCache:
+    """Size-bounded LRU cache of rendered page PNGs, one file per image."""
+
+    def __init__(self, cache_dir: str, max_bytes: int = 512 * 1024 * 1024):
+        """
+        Initialize the cache, indexing images already on disk.
+
+        Args:
+            cache_dir: Directory to store images in
+            max_bytes: Maximum total size of cached images in bytes
+        """
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+
+        # Key to file size, least recently used first
+        self._entries: "OrderedDict[str, int]" = OrderedDict()
+        self._size_bytes = 0
+        self._lock = threading.RLock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.renders = 0
+
+        os.makedirs(cache_dir, exist_ok=True)
+        self._load()
+
+        logger.info(
+            f"Rendered page cache initialized at {cache_dir} "
+            f"with {len(self._entries)} images"
+        )
+
+    @staticmethod
+    def make_key(page_hash: str, dpi: float) -> str:
+        """
+        Build the cache key for a page version and its rendering resolution.
+
+        Args:
+            page_hash: SHA-256 of the page's .rm bytes
+            dpi: Rendering resolution
+
+        Returns:
+            Hex digest identifying the rendered image
+        """
+        raw = f"{page_hash}:{float(dpi):g}"
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def _path(self, key: str) -> str:
+        """Get the file path of a key, fanned out over subdirectories."""
+        return os.path.join(self.cache_dir, key[:2], f"{key}.png")
+
+    def _load(self) -> None:
+        """Index cached images, restoring recency from modification times."""
+        found = []
+        for root, _, files in os.walk(self.cache_dir):
+            for name in files:
+                path = os.path.join(root, name)
+                if name.endswith(".tmp"):
+                    # Leftover of an interrupted write
+                    try:
+                        os.unlink(path)
+                    except OSError:
+                        pass
+                    continue
+                if not _KEY_FILE.match(name) or path != self._path(name[:-4]):
+                    # Not written by this cache
+                    continue
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                found.append((stat.st_mtime, name[: -len(".png")], stat.st_size))
+
+        for _, key, size in sorted(found):
+            self._entries[key] = size
+            self._size_bytes += size
+        self._evict()
+
+    def get(
+        self,
+        page_hash: str,
+        dpi: float,
+    ) -> Optional[str]:
+        """
+        Get the path of a cached image.
+
+        Args:
+            page_hash: SHA-256 of the page's .rm bytes
+            dpi: Rendering resolution
+
+        Returns:
+            Path to the cached PNG, or None if not cached
+        """
+        key = self.make_key(page_hash, dpi)
+        path = self._path(key)
+        with self._lock:
+            if key not in self._entries or not os.path.exists(path):
+                if key in self._entries:
+                    # Removed behind our back
+                    self._size_bytes -= self._entries.pop(key)
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return path
+
+    def put(
+        self,
+        page_hash: str,
+        dpi: float,
+        image_data: bytes,
+    ) -> str:
+        """
+        Store a rendered image, evicting least recently used images if needed.
+
+        Args:
+            page_hash: SHA-256 of the page's .rm bytes
+            dpi: Rendering resolution
+            image_data: PNG bytes
+
+        Returns:
+            Path to the cached PNG
+        """
+        key = self.make_key(page_hash, dpi)
+        path = self._path(key)
+        directory = os.path.dirname(path)
+        os.makedirs(directory, exist_ok=True)
+
+        # Write atomically so readers never see a partial image
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(image_data)
+            os.replace(tmp_path, path)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            raise
+
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._size_bytes -= previous
+            self._entries[key] = len(image_data)
+            self._size_bytes += len(image_data)
+            self._evict(keep=key)
+        return path
+
+    def get_or_render(
+        self,
+        page_hash: str,
+        render: Callable[[], bytes],
+        dpi: float,
+    ) -> str:
+        """
+        Get a cached image, rendering and storing it on a miss.
+
+        Args:
+            page_hash: SHA-256 of the page's .rm bytes
+            render: Function returning the PNG bytes of the page
+            dpi: Rendering resolution
+
+        Returns:
+            Path to the cached PNG
+        """
+        path = self.get(page_hash, dpi)
+        if path is not None:
+            return path
+
+        image_data = render()
+        with self._lock:
+            self.renders += 1
+        return self.put(page_hash, dpi, image_data)
+
+    def _evict(self, keep: Optional[str] = None) -> None:
+        """Delete least recently used images until the size limit is met."""
+        while self._size_bytes > self.max_bytes and len(self._entries) > 1:
+            key, size = next(iter(self._entries.items()))
+            if key == keep:
+                break
+            del self._entries[key]
+            self._size_bytes -= size
+            self.evictions += 1
+            try:
+                os.unlink(self._path(key))
+            except OSError:
+                pass
+
+    def clear(self) -> int:
+        """
+        Delete all cached images.
+
+        Returns:
+            Number of images removed
+        """
+        with self._lock:
+            keys = list(self._entries)
+            self._entries.clear()
+            self._size_bytes = 0
+        for key in keys:
+            try:
+                os.unlink(self._path(key))
+            except OSError:
+                pass
+        logger.info(f"Cleared {len(keys)} rendered page images")
+        return len(keys)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get statistics about the cache.
+
+        Returns:
+            Dictionary with cache statistics
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "cache_dir": self.cache_dir,
+                "entry_count": len(self._entries),
+                "total_size_bytes": self._size_bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "renders": self.renders,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+
+
+def get_shared_render_cache(cache_dir: Optional[str] = None) -> RenderedPageCache:
+    """
+    Get the rendered page cache shared by all renderers of this process.
+
+    Args:
+        cache_dir: Cache directory (defaults to RENDER_CACHE_DIR, or
+                   render_cache under TEMP_DIR)
+
+    Returns:
+        Shared RenderedPageCache for that directory
+    """
+    path = os.path.abspath(
+        cache_dir
+        or CONFIG.get("RENDER_CACHE_DIR")
+        or os.path.join(CONFIG.get("TEMP_DIR", "/tmp"), "render_cache")
+    )
+    with _shared_caches_lock:
+        cache = _shared_caches.get(path)
+        if cache is None:
+            cache = RenderedPageCache(
+                path,
+                max_bytes=CONFIG.get("RENDER_CACHE_MAX_BYTES", 512 * 1024 * 1024),
+            )
+            _shared_caches[path] = cache
+        return cache
@@ -21,6 +21,7 @@ from inklink.utils.html_processor import (
     parse_html_container,
     validate_and_fix_content,
 )
+from inklink.utils.tag_detection import get_page_tags, has_ink_in_top_margin
 from inklink.utils.url_utils import extract_url
 
 __all__ = [
@@ -40,4 +41,6 @@ __all__ = [
     "find_main_content_container",
     "parse_html_container",
     "generate_title_from_url",
+    "get_page_tags",
+    "has_ink_in_top_margin",
 ]
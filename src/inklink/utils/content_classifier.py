@@ -0,0 +1,161 @@
+"""Local content type classifier for handwritten pages.
+
+Picking text, math or diagram for a page used to take a vision request of
+its own before the real recognition request. The strokes of the page already
+tell the kinds apart well enough most of the time:
+
+- text is many small, curvy strokes of a uniform size written densely;
+- math mixes glyph sizes (exponents, indices, big operators) and has short
+  straight horizontal strokes (fraction bars, minus and equals signs);
+- diagrams have long strokes (boxes, arrows, connectors) and sparse ink.
+
+Features are computed with vectorized NumPy over a ``StrokeBatch`` and scored
+with fixed rules, which takes microseconds. The classifier also reports a
+confidence so callers can fall back to a model when the page is ambiguous.
+"""
+
+import logging
+from typing import Dict, Tuple
+
+import numpy as np
+
+from inklink.utils.stroke_batch import StrokeBatch
+
+logger = logging.getLogger(__name__)
+
+CONTENT_TYPES = ("text", "math", "diagram")
+
+# Below this many strokes the features are too noisy to decide
+MIN_STROKES = 3
+
+# Default confidence below which callers should not trust the result
+DEFAULT_MIN_CONFIDENCE = 0.15
+
+# Strokes longer than this many glyph sizes are lines, boxes or arrows
+LONG_STROKE_GLYPHS = 5.0
+
+# Chord / arc length above which a stroke counts as straight
+STRAIGHTNESS = 0.9
+
+# Width / height above which a straight stroke counts as horizontal
+BAR_ASPECT = 3.0
+
+# Glyph size spread (std / mean of stroke heights) that counts as mixed sizes
+MIXED_SIZE_CV = 0.6
+
+
+def stroke_features(strokes: StrokeBatch) -> Dict[str, float]:
+    """
+    Compute the page features the classifier scores.
+
+    Args:
+        strokes: Strokes of the page
+
+    Returns:
+        Dictionary with stroke_count, glyph_size, long_fraction (share of
+        strokes spanning several glyphs), bar_fraction (share of short straight
+        horizontal strokes), curvature (turning per glyph size of ink),
+        size_cv (glyph height spread) and ink_density (ink length per area of
+        the ink bounding box, in glyph sizes)
+    """
+    count = len(strokes)
+    features = {
+        "stroke_count": float(count),
+        "glyph_size": 0.0,
+        "long_fraction": 0.0,
+        "bar_fraction": 0.0,
+        "curvature": 0.0,
+        "size_cv": 0.0,
+        "ink_density": 0.0,
+    }
+    if not count or not strokes.num_points:
+        return features
+
+    bboxes = strokes.bboxes()
+    nonempty = ~np.isnan(bboxes[:, 0])
+    widths = np.where(nonempty, bboxes[:, 2] - bboxes[:, 0], 0.0)
+    heights = np.where(nonempty, bboxes[:, 3] - bboxes[:, 1], 0.0)
+    extents = np.maximum(widths, heights)
+    lengths = strokes.lengths().astype(np.float64)
+
+    # Glyph size: typical height of strokes that are not dots
+    sized = heights[extents > 0]
+    glyph_size = float(np.median(np.maximum(sized, 1.0))) if len(sized) else 1.0
+    features["glyph_size"] = glyph_size
+
+    chords = np.hypot(widths, heights)
+    straightness = np.where(lengths > 0, chords / np.maximum(lengths, 1e-6), 1.0)
+    long_strokes = extents > LONG_STROKE_GLYPHS * glyph_size
+    bars = (
+        (straightness > STRAIGHTNESS)
+        & (widths > BAR_ASPECT * np.maximum(heights, 1.0))
+        & ~long_strokes
+    )
+    features["long_fraction"] = float(np.mean(long_strokes))
+    features["bar_fraction"] = float(np.mean(bars))
+
+    # Glyph-size variance of the small strokes that make up glyphs
+    glyph_heights = heights[~long_strokes & (extents > 0)]
+    if len(glyph_heights) > 1 and glyph_heights.mean() > 0:
+        features["size_cv"] = float(glyph_heights.std() / glyph_heights.mean())
+
+    # Total turning per unit length, in radians per glyph size
+    total_length = lengths.sum()
+    if strokes.num_points > 2 and total_length > 0:
+        point_stroke = np.repeat(np.arange(count), strokes.counts)
+        dx = np.diff(strokes.x).astype(np.float64)
+        dy = np.diff(strokes.y).astype(np.float64)
+        # Segments join two points of one stroke and have a direction
+        valid = (point_stroke[1:] == point_stroke[:-1]) & ((dx != 0) | (dy != 0))
+        angles = np.arctan2(dy[valid], dx[valid])
+        segment_stroke = point_stroke[1:][valid]
+        turns = np.abs(np.angle(np.exp(1j * np.diff(angles))))
+        same_stroke = np.diff(segment_stroke) == 0
+        features["curvature"] = float(
+            turns[same_stroke].sum() / total_length * glyph_size
+        )
+
+    # Ink per area of the ink bounding box, scaled to be size independent
+    min_x, min_y, max_x, max_y = strokes.bbox()
+    area = max(max_x - min_x, glyph_size) * max(max_y - min_y, glyph_size)
+    features["ink_density"] = float(lengths.sum() * glyph_size / area)
+    return features
+
+
+def _scores(features: Dict[str, float]) -> Dict[str, float]:
+    """Score each content type in [0, 1] from page features."""
+    mixed_sizes = min(1.0, features["size_cv"] / MIXED_SIZE_CV)
+    dense = min(1.0, features["ink_density"] / 2.0)
+    long_strokes = min(1.0, features["long_fraction"] * 4)
+    curvy = min(1.0, features["curvature"] / 2.0)
+
+    return {
+        "text": 0.4 * curvy + 0.3 * (1 - mixed_sizes) + 0.3 * (1 - long_strokes),
+        "math": 0.5 * min(1.0, features["bar_fraction"] * 6) + 0.5 * mixed_sizes,
+        "diagram": 0.6 * long_strokes + 0.4 * (1 - dense),
+    }
+
+
+def classify_strokes(strokes: StrokeBatch) -> Tuple[str, float]:
+    """
+    Classify a page as text, math or diagram from its strokes.
+
+    Args:
+        strokes: Strokes of the page
+
+    Returns:
+        Tuple of (content type, confidence); confidence is the lead of the
+        best score over the runner-up, 0.0 for pages with too few strokes
+    """
+    features = stroke_features(strokes)
+    if features["stroke_count"] < MIN_STROKES:
+        return "text", 0.0
+
+    scores = _scores(features)
+    ranked = sorted(scores.items(), key=lambda item: item[1], reverse=True)
+    (best, best_score), (_, second_score) = ranked[0], ranked[1]
+    confidence = float(best_score - second_score)
+    logger.debug(
+        f"Stroke classifier: {best} (confidence {confidence:.2f}) from {features}"
+    )
+    return best, confidence
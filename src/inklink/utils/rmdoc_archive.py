@@ -0,0 +1,338 @@
+"""In-memory access to reMarkable notebook archives.
+
+An ``.rmdoc`` download is a zip holding ``<doc_id>.content``,
+``<doc_id>.metadata`` and one ``<doc_id>/<page_id>.rm`` file per page (plus
+optional ``<page_id>-metadata.json`` files). This module reads those members
+directly from the zip so that inspecting a notebook needs no extraction to
+disk, and writes modified copies by re-using the compressed bytes of every
+member that did not change.
+"""
+
+import io
+import json
+import logging
+import os
+import struct
+import threading
+import zipfile
+from typing import IO, Any, Dict, Iterable, List, Optional, Union
+
+logger = logging.getLogger(__name__)
+
+# Local file header: signature ... file name length, extra field length
+_LOCAL_HEADER_SIZE = 30
+_LOCAL_HEADER_NAME_LENGTHS = struct.Struct("<HH")
+_ZIP64_EXTRA_ID = 0x0001
+_DATA_DESCRIPTOR_FLAG = 0x08
+
+
+def _strip_zip64_extra(extra: bytes) -> bytes:
+    """Remove ZIP64 extra fields; ``ZipInfo.FileHeader`` adds its own."""
+    result = bytearray()
+    offset = 0
+    while offset + 4 <= len(extra):
+        field_id, size = struct.unpack_from("<HH", extra, offset)
+        end = offset + 4 + size
+        if field_id != _ZIP64_EXTRA_ID:
+            result += extra[offset:end]
+        offset = end
+    return bytes(result)
+
+
+class RmdocArchive:
+    """Read-only view of an ``.rmdoc`` zip, indexed once on open."""
+
+    def __init__(self, source: Union[str, bytes, IO[bytes]]):
+        """
+        Open an archive.
+
+        Args:
+            source: Path to the archive, its bytes, or a binary file object
+
+        Raises:
+            zipfile.BadZipFile: If the source is not a zip archive
+        """
+        if isinstance(source, (bytes, bytearray, memoryview)):
+            source = io.BytesIO(source)
+        self.path = source if isinstance(source, str) else None
+        self._zip = zipfile.ZipFile(source, "r")
+        # ZipFile reads share one file handle, so reads are serialized
+        self._lock = threading.Lock()
+
+        self.members: Dict[str, zipfile.ZipInfo] = {}
+        self._pages: Dict[str, str] = {}
+        self._page_metadata_files: Dict[str, str] = {}
+        self.content_name: Optional[str] = None
+        self.metadata_name: Optional[str] = None
+
+        for info in self._zip.infolist():
+            if info.is_dir():
+                continue
+            name = info.filename
+            self.members[name] = info
+            base = os.path.basename(name)
+            if name.endswith(".content") and self.content_name is None:
+                self.content_name = name
+            elif name.endswith(".metadata") and self.metadata_name is None:
+                self.metadata_name = name
+            elif name.endswith(".rm"):
+                self._pages.setdefault(os.path.splitext(base)[0], name)
+            elif name.endswith("-metadata.json"):
+                self._page_metadata_files[base[: -len("-metadata.json")]] = name
+
+        self._content: Optional[Dict[str, Any]] = None
+        self._metadata: Optional[Dict[str, Any]] = None
+
+    def __enter__(self) -> "RmdocArchive":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """Close the underlying zip file."""
+        self._zip.close()
+
+    @classmethod
+    def is_archive(cls, path: str) -> bool:
+        """
+        Check whether a path is a readable zip archive.
+
+        Args:
+            path: Path to check
+
+        Returns:
+            True if the path is a zip file
+        """
+        return os.path.exists(path) and zipfile.is_zipfile(path)
+
+    @property
+    def doc_id(self) -> Optional[str]:
+        """Document ID taken from the ``.content`` member name."""
+        if not self.content_name:
+            return None
+        return os.path.splitext(os.path.basename(self.content_name))[0]
+
+    def read_member(self, name: str) -> bytes:
+        """
+        Read a member's decompressed bytes.
+
+        Args:
+            name: Member name inside the archive
+
+        Returns:
+            Member contents
+
+        Raises:
+            KeyError: If the member does not exist
+        """
+        with self._lock:
+            return self._zip.read(self.members[name])
+
+    def _read_json(self, name: Optional[str]) -> Dict[str, Any]:
+        """Parse a JSON member, returning {} if it is missing or invalid."""
+        if not name:
+            return {}
+        try:
+            return json.loads(self.read_member(name))
+        except (KeyError, ValueError) as e:
+            logger.warning(f"Failed to parse {name}: {e}")
+            return {}
+
+    @property
+    def content(self) -> Dict[str, Any]:
+        """Parsed ``.content`` file (loaded on first access)."""
+        if self._content is None:
+            self._content = self._read_json(self.content_name)
+        return self._content
+
+    @property
+    def metadata(self) -> Dict[str, Any]:
+        """Parsed ``.metadata`` file (loaded on first access)."""
+        if self._metadata is None:
+            self._metadata = self._read_json(self.metadata_name)
+        return self._metadata
+
+    def page_ids(self) -> List[str]:
+        """
+        Get the IDs of pages with ``.rm`` files, in notebook order.
+
+        Pages listed in ``.content`` come first in their listed order, followed
+        by any remaining pages in archive order.
+
+        Returns:
+            List of page IDs
+        """
+        content = self.content
+        listed = content.get("cPages", {}).get("pages") or content.get("pages") or []
+        ordered = []
+        for page in listed:
+            page_id = page.get("id") if isinstance(page, dict) else page
+            if page_id in self._pages and page_id not in ordered:
+                ordered.append(page_id)
+        ordered.extend(p for p in self._pages if p not in ordered)
+        return ordered
+
+    def page_member(self, page_id: str) -> Optional[str]:
+        """
+        Get the member name of a page's ``.rm`` file.
+
+        Args:
+            page_id: ID of the page
+
+        Returns:
+            Member name, or None if the page has no ``.rm`` file
+        """
+        return self._pages.get(page_id)
+
+    def read_page(self, page_id: str) -> bytes:
+        """
+        Read a page's ``.rm`` bytes.
+
+        Args:
+            page_id: ID of the page
+
+        Returns:
+            Contents of the page's ``.rm`` file
+
+        Raises:
+            KeyError: If the page has no ``.rm`` file
+        """
+        return self.read_member(self._pages[page_id])
+
+    def page_view(self, page_id: str) -> memoryview:
+        """
+        Get a page's ``.rm`` bytes as a memoryview for zero-copy slicing.
+
+        Args:
+            page_id: ID of the page
+
+        Returns:
+            Read-only view of the page's contents
+        """
+        return memoryview(self.read_page(page_id))
+
+    def page_metadata(self, page_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Get a page's ``<page_id>-metadata.json`` contents.
+
+        Args:
+            page_id: ID of the page
+
+        Returns:
+            Parsed page metadata, or None if the page has none
+        """
+        name = self._page_metadata_files.get(page_id)
+        return self._read_json(name) if name else None
+
+    def extract_page(self, page_id: str, output_dir: str) -> str:
+        """
+        Write a single page's ``.rm`` file to disk.
+
+        Args:
+            page_id: ID of the page
+            output_dir: Directory to write ``<page_id>.rm`` into
+
+        Returns:
+            Path of the written file
+        """
+        os.makedirs(output_dir, exist_ok=True)
+        output_path = os.path.join(output_dir, f"{page_id}.rm")
+        with open(output_path, "wb") as f:
+            f.write(self.read_page(page_id))
+        return output_path
+
+    def _copy_raw_member(self, info: zipfile.ZipInfo, out: zipfile.ZipFile) -> None:
+        """Copy a member's compressed bytes into another archive as-is."""
+        copied = zipfile.ZipInfo(info.filename, info.date_time)
+        copied.compress_type = info.compress_type
+        copied.create_system = info.create_system
+        copied.external_attr = info.external_attr
+        copied.CRC = info.CRC
+        copied.compress_size = info.compress_size
+        copied.file_size = info.file_size
+        copied.extra = _strip_zip64_extra(info.extra)
+        # Sizes go into the local header, so no data descriptor follows
+        copied.flag_bits = info.flag_bits & ~_DATA_DESCRIPTOR_FLAG
+
+        with self._lock:
+            src = self._zip.fp
+            src.seek(info.header_offset)
+            header = src.read(_LOCAL_HEADER_SIZE)
+            name_length, extra_length = _LOCAL_HEADER_NAME_LENGTHS.unpack_from(
+                header, 26
+            )
+            src.seek(name_length + extra_length, os.SEEK_CUR)
+
+            copied.header_offset = out.fp.tell()
+            out.fp.write(copied.FileHeader())
+            remaining = info.compress_size
+            while remaining > 0:
+                chunk = src.read(min(remaining, 1024 * 1024))
+                if not chunk:
+                    raise zipfile.BadZipFile(f"Truncated member {info.filename}")
+                out.fp.write(chunk)
+                remaining -= len(chunk)
+
+        out.start_dir = out.fp.tell()
+        out.filelist.append(copied)
+        out.NameToInfo[copied.filename] = copied
+
+    def write_updated(
+        self,
+        output_path: str,
+        updates: Optional[Dict[str, Union[bytes, str]]] = None,
+        removals: Iterable[str] = (),
+    ) -> str:
+        """
+        Write a copy of the archive with some members replaced or added.
+
+        Unchanged members are copied as their raw compressed bytes, so the
+        cost of the write is roughly the size of the changed members rather
+        than of the whole notebook. Replaced members keep their position;
+        new members are appended.
+
+        Args:
+            output_path: Path of the archive to write (must differ from the source)
+            updates: Member name to new contents for changed or added members
+            removals: Names of members to leave out
+
+        Returns:
+            Path of the written archive
+        """
+        updates = dict(updates or {})
+        removals = set(removals)
+        if self.path and os.path.abspath(output_path) == os.path.abspath(self.path):
+            raise ValueError("Cannot write an archive over its own source")
+
+        copied_bytes = 0
+        written_bytes = 0
+        tmp_path = f"{output_path}.tmp"
+        try:
+            with zipfile.ZipFile(tmp_path, "w", zipfile.ZIP_DEFLATED) as out:
+                for name, info in self.members.items():
+                    if name in removals:
+                        continue
+                    if name in updates:
+                        data = updates.pop(name)
+                        out.writestr(info.filename, data, info.compress_type)
+                        written_bytes += len(data)
+                    else:
+                        self._copy_raw_member(info, out)
+                        copied_bytes += info.compress_size
+
+                for name, data in updates.items():
+                    out.writestr(name, data)
+                    written_bytes += len(data)
+
+            os.replace(tmp_path, output_path)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+        logger.debug(
+            f"Wrote {output_path}: {written_bytes} bytes compressed, "
+            f"{copied_bytes} bytes copied unchanged"
+        )
+        return output_path
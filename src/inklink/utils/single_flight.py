@@ -0,0 +1,82 @@
+"""Single-flight deduplication of concurrent calls.
+
+When several callers ask for the same expensive result at the same time,
+only the first one (the leader) runs the call; the others wait for it and
+share its result or exception. The key is dropped when the call finishes,
+so later callers run it again unless the caller caches the result before
+returning it.
+"""
+
+import concurrent.futures
+import logging
+import threading
+from typing import Any, Callable, Dict, Hashable, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class SingleFlight:
+    """Collapse concurrent calls with the same key into one execution."""
+
+    def __init__(self):
+        """Initialize an empty group with zeroed counters."""
+        self._calls: Dict[Hashable, concurrent.futures.Future] = {}
+        self._lock = threading.Lock()
+        self._stats = {"calls": 0, "executions": 0, "collapsed": 0}
+
+    def do(
+        self, key: Hashable, function: Callable[..., Any], *args, **kwargs
+    ) -> Tuple[Any, bool]:
+        """
+        Run a call unless one with the same key is in flight.
+
+        Args:
+            key: Identity of the call
+            function: Function to run if no call with the key is in flight
+            *args: Positional arguments for the function
+            **kwargs: Keyword arguments for the function
+
+        Returns:
+            Tuple of (result, shared); shared is True if the result came from
+            another caller's execution
+
+        Raises:
+            Exception: Whatever the leader's call raised
+        """
+        with self._lock:
+            self._stats["calls"] += 1
+            future = self._calls.get(key)
+            leader = future is None
+            if leader:
+                future = concurrent.futures.Future()
+                self._calls[key] = future
+                self._stats["executions"] += 1
+            else:
+                self._stats["collapsed"] += 1
+
+        if not leader:
+            logger.debug(f"Waiting for in-flight call {key}")
+            return future.result(), True
+
+        try:
+            result = function(*args, **kwargs)
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+        finally:
+            with self._lock:
+                del self._calls[key]
+        return result, False
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get deduplication statistics.
+
+        Returns:
+            Dictionary with calls, executions, collapsed (calls that shared
+            another caller's execution) and in_flight counts
+        """
+        with self._lock:
+            return {**self._stats, "in_flight": len(self._calls)}
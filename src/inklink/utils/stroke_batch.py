@@ -0,0 +1,513 @@
+"""Columnar storage for extracted ink strokes.
+
+Stroke extraction used to produce a Python dict per point (or per stroke with
+Python lists), which costs hundreds of bytes per point and makes every later
+pass (fingerprinting, bounding boxes, resampling, rendering) walk Python
+objects. A ``StrokeBatch`` keeps all points of a page in four contiguous NumPy
+columns (x, y, pressure, t) plus an offsets array marking where each stroke
+starts, so per-stroke access is a slice and whole-page helpers are vectorized.
+
+Adapters convert to and from the dict formats the recognition backends use.
+"""
+
+import hashlib
+import io
+import logging
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+def pack_float32(values: Any, quantum: Optional[float] = None) -> bytes:
+    """
+    Pack values as contiguous float32 bytes for hashing.
+
+    Args:
+        values: Sequence or array of numbers
+        quantum: Grid step to snap values to first; the grid indices are
+                 packed as int32 (default: exact values)
+
+    Returns:
+        Raw buffer of the packed values
+    """
+    packed = np.asarray(values, dtype=np.float32)
+    if quantum:
+        packed = np.rint(packed / np.float32(quantum)).astype(np.int32)
+    return packed.tobytes()
+
+
+def _is_missing(values: Any) -> bool:
+    """Whether a column is absent or empty, without testing arrays for truth."""
+    return values is None or len(values) == 0
+
+
+def _first_column(stroke: Dict[str, Any], *keys: str) -> Any:
+    """Get the first non-empty column of a stroke dictionary, or None."""
+    for key in keys:
+        values = stroke.get(key)
+        if not _is_missing(values):
+            return values
+    return None
+
+
+class StrokeBatch:
+    """Points of many strokes in shared columns, split by stroke offsets."""
+
+    def __init__(
+        self,
+        x: Sequence[float],
+        y: Sequence[float],
+        pressure: Optional[Sequence[float]] = None,
+        t: Optional[Sequence[float]] = None,
+        offsets: Optional[Sequence[int]] = None,
+        ids: Optional[List[str]] = None,
+        colors: Optional[List[str]] = None,
+        widths: Optional[Sequence[float]] = None,
+        pens: Optional[List[Optional[int]]] = None,
+    ):
+        """
+        Create a batch from columns.
+
+        Args:
+            x: X coordinates of all points
+            y: Y coordinates of all points
+            pressure: Pressure of all points (default: zeros)
+            t: Timestamps of all points (default: zeros)
+            offsets: Start index of each stroke followed by the point count
+                     (default: a single stroke holding all points)
+            ids: Stroke IDs (default: stroke indices)
+            colors: Stroke colors (default: "#000000")
+            widths: Stroke widths (default: 2.0)
+            pens: Pen (tool) codes of the strokes (default: None)
+
+        Raises:
+            ValueError: If column lengths or offsets do not match
+        """
+        self.x = np.asarray(x, dtype=np.float32)
+        self.y = np.asarray(y, dtype=np.float32)
+        count = len(self.x)
+        self.pressure = (
+            np.zeros(count, dtype=np.float32)
+            if pressure is None
+            else np.asarray(pressure, dtype=np.float32)
+        )
+        self.t = (
+            np.zeros(count, dtype=np.float64)
+            if t is None
+            else np.asarray(t, dtype=np.float64)
+        )
+        self.offsets = np.asarray(
+            [0, count] if offsets is None else offsets, dtype=np.int64
+        )
+
+        if not (len(self.y) == len(self.pressure) == len(self.t) == count):
+            raise ValueError("Stroke columns must have the same length")
+        if (
+            len(self.offsets) == 0
+            or self.offsets[0] != 0
+            or self.offsets[-1] != count
+            or np.any(np.diff(self.offsets) < 0)
+        ):
+            raise ValueError("Offsets must rise from 0 to the number of points")
+
+        strokes = len(self.offsets) - 1
+        self.ids = list(ids) if ids is not None else [str(i) for i in range(strokes)]
+        self.colors = list(colors) if colors is not None else ["#000000"] * strokes
+        self.widths = (
+            np.full(strokes, 2.0, dtype=np.float32)
+            if widths is None
+            else np.asarray(widths, dtype=np.float32)
+        )
+        self.pens = list(pens) if pens is not None else [None] * strokes
+        if not (
+            len(self.ids)
+            == len(self.colors)
+            == len(self.widths)
+            == len(self.pens)
+            == strokes
+        ):
+            raise ValueError("Per-stroke attributes must match the stroke count")
+
+    def __len__(self) -> int:
+        """Number of strokes."""
+        return len(self.offsets) - 1
+
+    @property
+    def num_points(self) -> int:
+        """Number of points across all strokes."""
+        return len(self.x)
+
+    @property
+    def counts(self) -> np.ndarray:
+        """Number of points of each stroke."""
+        return np.diff(self.offsets)
+
+    def stroke(self, index: int) -> Dict[str, np.ndarray]:
+        """
+        Get the columns of one stroke as views into the batch.
+
+        Args:
+            index: Stroke index
+
+        Returns:
+            Dictionary of x, y, pressure and t arrays (no copies)
+        """
+        start, end = self.offsets[index], self.offsets[index + 1]
+        return {
+            "x": self.x[start:end],
+            "y": self.y[start:end],
+            "pressure": self.pressure[start:end],
+            "t": self.t[start:end],
+        }
+
+    @classmethod
+    def from_strokes(
+        cls,
+        strokes: Iterable[Tuple[Sequence[float], ...]],
+        ids: Optional[List[str]] = None,
+    ) -> "StrokeBatch":
+        """
+        Build a batch from per-stroke (x, y[, pressure[, t]]) sequences.
+
+        Args:
+            strokes: One tuple of point sequences per stroke
+            ids: Stroke IDs
+
+        Returns:
+            New StrokeBatch
+        """
+        columns: List[List[Any]] = [[], [], [], []]
+        offsets = [0]
+        for stroke in strokes:
+            count = len(stroke[0])
+            for i, column in enumerate(columns):
+                values = stroke[i] if len(stroke) > i else None
+                column.append([0] * count if _is_missing(values) else values)
+            offsets.append(offsets[-1] + count)
+
+        def join(parts: List[Any]) -> np.ndarray:
+            return np.concatenate(parts) if parts else np.empty(0)
+
+        return cls(*(join(column) for column in columns), offsets=offsets, ids=ids)
+
+    @classmethod
+    def from_dicts(cls, strokes: List[Dict[str, Any]]) -> "StrokeBatch":
+        """
+        Build a batch from stroke dictionaries.
+
+        Accepts the column format ("x", "y", "p"/"pressure", "t"/"timestamp"
+        lists) and the point format ("points" list of x/y/pressure/timestamp
+        dicts).
+
+        Args:
+            strokes: Stroke dictionaries
+
+        Returns:
+            New StrokeBatch
+        """
+        per_stroke = []
+        for stroke in strokes:
+            if "points" in stroke:
+                points = stroke["points"]
+                per_stroke.append(
+                    (
+                        [p.get("x", 0) for p in points],
+                        [p.get("y", 0) for p in points],
+                        [p.get("pressure", 0) for p in points],
+                        [p.get("timestamp", 0) for p in points],
+                    )
+                )
+            else:
+                x = _first_column(stroke, "x")
+                y = _first_column(stroke, "y")
+                per_stroke.append(
+                    (
+                        [] if x is None else x,
+                        [] if y is None else y,
+                        _first_column(stroke, "pressure", "p"),
+                        _first_column(stroke, "timestamp", "t"),
+                    )
+                )
+
+        batch = cls.from_strokes(
+            per_stroke,
+            ids=[str(stroke.get("id", i)) for i, stroke in enumerate(strokes)],
+        )
+        batch.colors = [str(stroke.get("color", "#000000")) for stroke in strokes]
+        batch.widths = np.asarray(
+            [stroke.get("width", 2.0) for stroke in strokes], dtype=np.float32
+        )
+        batch.pens = [stroke.get("pen") for stroke in strokes]
+        return batch
+
+    @classmethod
+    def from_rm_file(cls, rm_file: Union[str, bytes]) -> "StrokeBatch":
+        """
+        Read the strokes of a page straight into columns.
+
+        Each stroke keeps its pen (tool) code in ``pens`` and its color. Widths
+        are the default 2.0 the MyScript adapter has always sent, since rmscene
+        lines carry a tool rather than a stroke width.
+
+        Args:
+            rm_file: Path to the .rm file or its bytes
+
+        Returns:
+            New StrokeBatch
+
+        Raises:
+            ImportError: If rmscene is not installed
+            ValueError: If the file cannot be parsed
+        """
+        from rmscene import read_blocks
+        from rmscene.scene_stream import SceneLineItemBlock
+
+        stream = (
+            open(rm_file, "rb") if isinstance(rm_file, str) else io.BytesIO(rm_file)
+        )
+        try:
+            with stream as f:
+                blocks = [
+                    block
+                    for block in read_blocks(f)
+                    if isinstance(block, SceneLineItemBlock)
+                    and block.item.value is not None
+                ]
+        except Exception as e:
+            raise ValueError(f"Could not parse .rm data: {e}") from e
+
+        lines = [block.item.value for block in blocks]
+        counts = [len(line.points) for line in lines]
+        values = np.array(
+            [
+                (p.x, p.y, p.pressure, getattr(p, "t", 0))
+                for line in lines
+                for p in line.points
+            ],
+            dtype=np.float64,
+        ).reshape(-1, 4)
+        pens = [
+            line.tool.value if getattr(line, "tool", None) is not None else None
+            for line in lines
+        ]
+
+        return cls(
+            values[:, 0],
+            values[:, 1],
+            values[:, 2],
+            values[:, 3],
+            offsets=np.concatenate(([0], np.cumsum(counts, dtype=np.int64))),
+            ids=[str(block.item.item_id) for block in blocks],
+            colors=[str(line.color) for line in lines],
+            widths=[2.0] * len(lines),
+            pens=pens,
+        )
+
+    def to_dicts(self) -> List[Dict[str, Any]]:
+        """
+        Convert to column-format stroke dictionaries (MyScript Web API style).
+
+        Returns:
+            One dict per stroke with id, x, y, p, t, color, width and pen
+        """
+        return [
+            {
+                "id": self.ids[i],
+                "x": self.x[start:end].tolist(),
+                "y": self.y[start:end].tolist(),
+                "p": self.pressure[start:end].tolist(),
+                "t": self.t[start:end].tolist(),
+                "color": self.colors[i],
+                "width": float(self.widths[i]),
+                "pen": self.pens[i],
+            }
+            for i, (start, end) in enumerate(
+                zip(self.offsets[:-1].tolist(), self.offsets[1:].tolist())
+            )
+        ]
+
+    def to_point_dicts(self) -> List[Dict[str, Any]]:
+        """
+        Convert to point-format stroke dictionaries (iink SDK style).
+
+        Returns:
+            One dict per stroke with a "points" list of x/y/pressure/timestamp
+        """
+        strokes = []
+        for i, (start, end) in enumerate(
+            zip(self.offsets[:-1].tolist(), self.offsets[1:].tolist())
+        ):
+            points = zip(
+                self.x[start:end].tolist(),
+                self.y[start:end].tolist(),
+                self.pressure[start:end].tolist(),
+                self.t[start:end].tolist(),
+            )
+            strokes.append(
+                {
+                    "points": [
+                        {"x": x, "y": y, "pressure": p, "timestamp": t}
+                        for x, y, p, t in points
+                    ],
+                    "width": float(self.widths[i]),
+                    "pen": self.pens[i],
+                    "color": self.colors[i],
+                    "timestamp": float(self.t[start]) if end > start else 0,
+                }
+            )
+        return strokes
+
+    def _stroke_index(self) -> np.ndarray:
+        """Stroke index of every point."""
+        return np.repeat(np.arange(len(self)), self.counts)
+
+    def bboxes(self) -> np.ndarray:
+        """
+        Get the bounding box of every stroke.
+
+        Returns:
+            Array of shape (strokes, 4) with min_x, min_y, max_x, max_y;
+            empty strokes get NaN
+        """
+        result = np.full((len(self), 4), np.nan, dtype=np.float32)
+        nonempty = self.counts > 0
+        if not nonempty.any():
+            return result
+        starts = self.offsets[:-1][nonempty]
+        result[nonempty, 0] = np.minimum.reduceat(self.x, starts)
+        result[nonempty, 1] = np.minimum.reduceat(self.y, starts)
+        result[nonempty, 2] = np.maximum.reduceat(self.x, starts)
+        result[nonempty, 3] = np.maximum.reduceat(self.y, starts)
+        return result
+
+    def bbox(self) -> Optional[Tuple[float, float, float, float]]:
+        """
+        Get the bounding box of all points.
+
+        Returns:
+            (min_x, min_y, max_x, max_y), or None for an empty batch
+        """
+        if not self.num_points:
+            return None
+        return (
+            float(self.x.min()),
+            float(self.y.min()),
+            float(self.x.max()),
+            float(self.y.max()),
+        )
+
+    def _segment_lengths(self) -> np.ndarray:
+        """Length of the segment ending at each point (0 at stroke starts)."""
+        segments = np.zeros(self.num_points, dtype=np.float32)
+        if self.num_points > 1:
+            segments[1:] = np.hypot(np.diff(self.x), np.diff(self.y))
+            # Drop the jumps between the end of one stroke and the next
+            segments[self.offsets[:-1][self.offsets[:-1] < self.num_points]] = 0
+        return segments
+
+    def lengths(self) -> np.ndarray:
+        """
+        Get the arc length of every stroke.
+
+        Returns:
+            Array of stroke lengths in page units
+        """
+        segments = self._segment_lengths()
+        totals = np.zeros(len(self), dtype=np.float64)
+        np.add.at(totals, self._stroke_index(), segments)
+        return totals.astype(np.float32)
+
+    def resample(self, spacing: float) -> "StrokeBatch":
+        """
+        Resample every stroke to points evenly spaced along its length.
+
+        Args:
+            spacing: Distance between resampled points in page units
+
+        Returns:
+            New StrokeBatch; strokes shorter than the spacing keep their
+            endpoints, single points are kept as they are
+
+        Raises:
+            ValueError: If spacing is not positive
+        """
+        if spacing <= 0:
+            raise ValueError("Spacing must be positive")
+
+        segments = self._segment_lengths().astype(np.float64)
+        parts: List[Tuple[np.ndarray, ...]] = []
+        offsets = [0]
+        for start, end in zip(self.offsets[:-1].tolist(), self.offsets[1:].tolist()):
+            if end - start < 2:
+                positions = np.arange(start, end, dtype=np.float64)
+                parts.append(
+                    tuple(
+                        column[start:end]
+                        for column in (self.x, self.y, self.pressure, self.t)
+                    )
+                )
+                offsets.append(offsets[-1] + len(positions))
+                continue
+
+            distance = np.cumsum(segments[start:end])
+            distance -= distance[0]
+            samples = np.arange(0.0, distance[-1], spacing)
+            samples = np.append(samples, distance[-1])
+            parts.append(
+                tuple(
+                    np.interp(samples, distance, column[start:end])
+                    for column in (self.x, self.y, self.pressure, self.t)
+                )
+            )
+            offsets.append(offsets[-1] + len(samples))
+
+        columns = (
+            [np.concatenate([part[i] for part in parts]) for i in range(4)]
+            if parts
+            else [np.empty(0)] * 4
+        )
+        return StrokeBatch(
+            *columns,
+            offsets=offsets,
+            ids=self.ids,
+            colors=self.colors,
+            widths=self.widths,
+            pens=self.pens,
+        )
+
+    def fingerprint(
+        self,
+        coord_quantum: Optional[float] = None,
+        pressure_quantum: Optional[float] = None,
+    ) -> str:
+        """
+        Hash the x, y and pressure columns.
+
+        Gives the same digest as ``compute_stroke_fingerprint`` on the
+        equivalent stroke dictionaries.
+
+        Args:
+            coord_quantum: Grid step for x and y (default: exact values)
+            pressure_quantum: Grid step for pressure (default: exact values)
+
+        Returns:
+            SHA-256 hex digest
+        """
+        counts = self.counts
+        lengths = np.repeat(counts, 3).astype(np.uint32)
+
+        # Lay out each stroke's x values followed by its y values
+        stroke_index = self._stroke_index()
+        local = np.arange(self.num_points) - self.offsets[:-1][stroke_index]
+        x_positions = 2 * self.offsets[:-1][stroke_index] + local
+        coords = np.empty(2 * self.num_points, dtype=np.float32)
+        coords[x_positions] = self.x
+        coords[x_positions + counts[stroke_index]] = self.y
+
+        digest = hashlib.sha256()
+        digest.update(lengths.tobytes())
+        digest.update(pack_float32(coords, coord_quantum))
+        digest.update(pack_float32(self.pressure, pressure_quantum))
+        return digest.hexdigest()
@@ -0,0 +1,103 @@
+"""Cheap tag detection for reMarkable pages.
+
+These helpers find tag candidates without handwriting recognition: page tags
+stored in the notebook's ``.content``/page metadata, and a local check for
+ink in the page's top margin, where handwritten #tags are written.
+"""
+
+import io
+import logging
+from typing import Any, Dict, List, Optional, Union
+
+logger = logging.getLogger(__name__)
+
+
+def get_page_tags(
+    content_data: Dict[str, Any],
+    page_id: str,
+    page_metadata: Optional[Dict[str, Any]] = None,
+) -> List[str]:
+    """
+    Collect the tags stored for a page in notebook metadata.
+
+    Args:
+        content_data: Parsed ``.content`` file of the notebook
+        page_id: ID of the page
+        page_metadata: Parsed per-page metadata file, if present
+
+    Returns:
+        List of tag names (without duplicates, in first-seen order)
+    """
+    tags: List[str] = []
+
+    def add(tag: Any) -> None:
+        if isinstance(tag, dict):
+            tag = tag.get("name") or tag.get("tag")
+        if tag and tag not in tags:
+            tags.append(str(tag))
+
+    # Page entries carrying their own tag list
+    for page in content_data.get("pages") or []:
+        if isinstance(page, dict) and page.get("id") == page_id:
+            for tag in page.get("tags") or []:
+                add(tag)
+
+    # Notebook-level pageTags section ({"name"/"tag": ..., "pageId": ...})
+    for page_tag in content_data.get("pageTags") or []:
+        if isinstance(page_tag, dict) and page_tag.get("pageId") == page_id:
+            add(page_tag)
+
+    for tag in (page_metadata or {}).get("tags") or []:
+        add(tag)
+
+    return tags
+
+
+def has_ink_in_top_margin(
+    rm_file: Union[str, bytes], margin_height: float = 200.0, min_strokes: int = 1
+) -> bool:
+    """
+    Check whether a page has strokes entirely inside its top margin.
+
+    Only the line blocks of the ``.rm`` file are parsed; nothing is rendered
+    or recognized. When the file cannot be parsed the page is reported as a
+    candidate so that tags are never missed.
+
+    Args:
+        rm_file: Path to the .rm file or its bytes
+        margin_height: Height of the top margin in page units
+        min_strokes: Number of margin strokes needed to count as a candidate
+
+    Returns:
+        True if the page may carry a handwritten tag, False otherwise
+    """
+    try:
+        from rmscene import read_blocks
+        from rmscene.scene_stream import SceneLineItemBlock
+    except ImportError:
+        logger.warning("rmscene not installed - cannot check page margins")
+        return True
+
+    try:
+        margin_strokes = 0
+        if isinstance(rm_file, str):
+            stream = open(rm_file, "rb")
+        else:
+            stream = io.BytesIO(rm_file)
+        with stream as f:
+            for block in read_blocks(f):
+                if not isinstance(block, SceneLineItemBlock):
+                    continue
+                line = block.item.value
+                if line is None or not line.points:
+                    continue
+                if max(point.y for point in line.points) <= margin_height:
+                    margin_strokes += 1
+                    if margin_strokes >= min_strokes:
+                        return True
+        return False
+
+    except Exception as e:
+        name = rm_file if isinstance(rm_file, str) else "page data"
+        logger.warning(f"Could not check margin of {name}: {e}")
+        return True
@@ -0,0 +1,368 @@
+"""Prepare rendered pages for vision models.
+
+Full-page renders are mostly paper: a few lines of notes on a 300 DPI page
+still upload a 1755x2340 image, and vision models bill by image area. This
+module shrinks a page before it is sent:
+
+- the ink bounding box comes from the page's strokes when they are known
+  (otherwise from the pixels) and the image is cropped to it with a margin;
+- the crop is downscaled to a long side chosen from the ink density, so
+  sparse notes go out small while dense writing keeps its detail;
+- the result is encoded as grayscale PNG or lossless WebP.
+
+Several sparse pages can also be packed into one composite image, each crop
+under a "PAGE n" label, so a single vision request covers them; the layout
+map returned with the composite says which region belongs to which page.
+
+Images are never upscaled.
+"""
+
+import logging
+import os
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from PIL import Image, ImageDraw, ImageFont
+
+from inklink.utils.rm_rasterizer import DEFAULT_DPI, DEVICE_DPI, PAGE_WIDTH
+from inklink.utils.stroke_batch import StrokeBatch
+
+logger = logging.getLogger(__name__)
+
+# Margin around the ink in output pixels of the render
+DEFAULT_MARGIN = 32
+
+# Long side limits of the image sent to the model
+MAX_SIDE = 1568
+MIN_SIDE = 640
+
+# Ink coverage at which a crop keeps the full MAX_SIDE resolution
+DENSE_COVERAGE = 0.08
+
+# Gray level below which a pixel counts as ink
+INK_THRESHOLD = 200
+
+# Composite tiling: label band above each tile and gap between tiles
+TILE_LABEL_HEIGHT = 28
+TILE_GAP = 12
+TILE_MAX_SIDE = MAX_SIDE // 2
+COMPOSITE_MAX_SIDE = 2048
+
+_FORMATS = {"png": ("PNG", {"optimize": True}), "webp": ("WEBP", {"lossless": True})}
+
+Box = Tuple[int, int, int, int]
+
+
+def stroke_ink_bbox(
+    strokes: StrokeBatch, image_size: Tuple[int, int], dpi: float = DEFAULT_DPI
+) -> Optional[Box]:
+    """
+    Get the ink bounding box of a page render from its strokes.
+
+    Args:
+        strokes: Strokes of the page
+        image_size: (width, height) of the render
+        dpi: Resolution the page was rendered at
+
+    Returns:
+        (left, top, right, bottom) in pixels, or None if the page has no ink
+        or the render does not use the native rasterizer's page layout
+    """
+    bbox = strokes.bbox()
+    scale = dpi / DEVICE_DPI
+    if bbox is None or image_size[0] != int(round(PAGE_WIDTH * scale)):
+        return None
+
+    # v6 pages center x on the page
+    min_x, min_y, max_x, max_y = bbox
+    x_offset = PAGE_WIDTH / 2
+    return (
+        int(np.floor((min_x + x_offset) * scale)),
+        int(np.floor(min_y * scale)),
+        int(np.ceil((max_x + x_offset) * scale)) + 1,
+        int(np.ceil(max_y * scale)) + 1,
+    )
+
+
+def pixel_ink_bbox(gray: np.ndarray, threshold: int = INK_THRESHOLD) -> Optional[Box]:
+    """
+    Get the bounding box of dark pixels.
+
+    Args:
+        gray: Grayscale pixel array
+        threshold: Gray level below which a pixel counts as ink
+
+    Returns:
+        (left, top, right, bottom) in pixels, or None if there is no ink
+    """
+    ink = gray < threshold
+    rows = np.flatnonzero(ink.any(axis=1))
+    if not len(rows):
+        return None
+    cols = np.flatnonzero(ink.any(axis=0))
+    return int(cols[0]), int(rows[0]), int(cols[-1]) + 1, int(rows[-1]) + 1
+
+
+def target_long_side(
+    coverage: float, max_side: int = MAX_SIDE, min_side: int = MIN_SIDE
+) -> int:
+    """
+    Pick the long side of the image sent to the model from the ink density.
+
+    Args:
+        coverage: Fraction of ink pixels in the crop
+        max_side: Long side for dense writing
+        min_side: Long side for sparse ink
+
+    Returns:
+        Target long side in pixels
+    """
+    density = min(1.0, coverage / DENSE_COVERAGE)
+    return int(round(min_side + (max_side - min_side) * density))
+
+
+def crop_to_ink(
+    image: Image.Image,
+    strokes: Optional[StrokeBatch] = None,
+    dpi: float = DEFAULT_DPI,
+    margin: int = DEFAULT_MARGIN,
+    max_side: int = MAX_SIDE,
+    min_side: int = MIN_SIDE,
+) -> Tuple[Image.Image, Box, float, float]:
+    """
+    Crop a grayscale page render to its ink and downscale it.
+
+    Args:
+        image: Grayscale ("L") page render
+        strokes: Strokes of the page, used for the ink bounding box
+        dpi: Resolution the page was rendered at
+        margin: Margin around the ink in pixels of the render
+        max_side: Long side for dense writing
+        min_side: Long side for sparse ink
+
+    Returns:
+        Tuple of (prepared image, crop box, scale, ink coverage)
+    """
+    gray = np.asarray(image)
+    width, height = image.size
+
+    bbox = stroke_ink_bbox(strokes, image.size, dpi) if strokes is not None else None
+    if bbox is None:
+        bbox = pixel_ink_bbox(gray)
+
+    if bbox is None:
+        # Blank page: send the whole page at the smallest size
+        crop = (0, 0, width, height)
+    else:
+        left, top, right, bottom = bbox
+        crop = (
+            max(0, left - margin),
+            max(0, top - margin),
+            min(width, right + margin),
+            min(height, bottom + margin),
+        )
+    cropped = image.crop(crop)
+
+    coverage = float(
+        np.mean(gray[crop[1] : crop[3], crop[0] : crop[2]] < INK_THRESHOLD)
+    )
+    long_side = max(cropped.size)
+    scale = min(1.0, target_long_side(coverage, max_side, min_side) / long_side)
+    if scale < 1.0:
+        cropped = cropped.resize(
+            (
+                max(1, int(round(cropped.width * scale))),
+                max(1, int(round(cropped.height * scale))),
+            ),
+            Image.LANCZOS,
+        )
+    return cropped, crop, scale, coverage
+
+
+def prepare_vision_image(
+    image_path: str,
+    output_path: Optional[str] = None,
+    strokes: Optional[StrokeBatch] = None,
+    dpi: float = DEFAULT_DPI,
+    margin: int = DEFAULT_MARGIN,
+    image_format: str = "png",
+    max_side: int = MAX_SIDE,
+    min_side: int = MIN_SIDE,
+) -> Dict[str, Any]:
+    """
+    Crop a rendered page to its ink, downscale it and encode it in grayscale.
+
+    Args:
+        image_path: Path to the rendered page
+        output_path: Path to write the prepared image to (default: next to the
+                     input with a _vision suffix)
+        strokes: Strokes of the page, used for the ink bounding box
+        dpi: Resolution the page was rendered at
+        margin: Margin around the ink in pixels of the render
+        image_format: "png" or "webp"
+        max_side: Long side for dense writing
+        min_side: Long side for sparse ink
+
+    Returns:
+        Dictionary with the prepared image path, the crop box, the scale,
+        the ink coverage and the image sizes and byte counts before and after
+
+    Raises:
+        ValueError: If the image format is unknown
+    """
+    if image_format not in _FORMATS:
+        raise ValueError(f"Unknown image format: {image_format}")
+    pil_format, save_options = _FORMATS[image_format]
+
+    with Image.open(image_path) as source:
+        image = source.convert("L")
+    width, height = image.size
+    cropped, crop, scale, coverage = crop_to_ink(
+        image, strokes, dpi, margin, max_side, min_side
+    )
+
+    if output_path is None:
+        base, _ = os.path.splitext(image_path)
+        output_path = f"{base}_vision.{image_format}"
+    cropped.save(output_path, format=pil_format, **save_options)
+
+    report = {
+        "path": output_path,
+        "crop": crop,
+        "scale": scale,
+        "coverage": coverage,
+        "size_before": (width, height),
+        "size_after": cropped.size,
+        "bytes_before": os.path.getsize(image_path),
+        "bytes_after": os.path.getsize(output_path),
+    }
+    logger.info(
+        f"Prepared {image_path} for vision: {width}x{height} -> "
+        f"{cropped.width}x{cropped.height}, "
+        f"{report['bytes_before']} -> {report['bytes_after']} bytes"
+    )
+    return report
+
+
+def _pack_tiles(
+    sizes: Sequence[Tuple[int, int]], max_tiles: int, max_side: int
+) -> List[List[Tuple[int, int, int]]]:
+    """
+    Pack tiles into composites row by row, left to right.
+
+    Args:
+        sizes: (width, height) of each tile including its label
+        max_tiles: Maximum number of tiles per composite
+        max_side: Maximum width and height of a composite
+
+    Returns:
+        Per composite, a list of (tile index, left, top)
+    """
+    composites: List[List[Tuple[int, int, int]]] = []
+    current: List[Tuple[int, int, int]] = []
+    x = y = row_height = 0
+    for index, (width, height) in enumerate(sizes):
+        if current and x + width > max_side:
+            # Next row
+            x, y, row_height = 0, y + row_height + TILE_GAP, 0
+        if current and (y + height > max_side or len(current) >= max_tiles):
+            composites.append(current)
+            current, x, y, row_height = [], 0, 0, 0
+        current.append((index, x, y))
+        x += width + TILE_GAP
+        row_height = max(row_height, height)
+    if current:
+        composites.append(current)
+    return composites
+
+
+def tile_pages(
+    image_paths: Sequence[str],
+    output_dir: str,
+    strokes: Optional[Sequence[Optional[StrokeBatch]]] = None,
+    dpi: float = DEFAULT_DPI,
+    max_tiles: int = 4,
+    max_side: int = COMPOSITE_MAX_SIDE,
+    tile_max_side: int = TILE_MAX_SIDE,
+    image_format: str = "png",
+) -> List[Dict[str, Any]]:
+    """
+    Pack the ink of several pages into labeled composite images.
+
+    Each page is cropped to its ink and downscaled to at most tile_max_side,
+    then placed under a "PAGE n" label (n counts from 1 over image_paths).
+    Pages go into composites in order until a composite holds max_tiles
+    pages or runs out of room.
+
+    Args:
+        image_paths: Paths to the rendered pages
+        output_dir: Directory to write the composites to
+        strokes: Strokes of each page, used for the ink bounding boxes
+        dpi: Resolution the pages were rendered at
+        max_tiles: Maximum number of pages per composite (the tile budget)
+        max_side: Maximum width and height of a composite in pixels
+        tile_max_side: Maximum long side of one page's tile in pixels
+        image_format: "png" or "webp"
+
+    Returns:
+        One dictionary per composite with its path, size and byte count, and
+        a "pages" layout map of {"page": n, "box": (left, top, right, bottom)}
+
+    Raises:
+        ValueError: If the image format or the tile budget is invalid
+    """
+    if image_format not in _FORMATS:
+        raise ValueError(f"Unknown image format: {image_format}")
+    if max_tiles < 1:
+        raise ValueError("Tile budget must be at least one page")
+    pil_format, save_options = _FORMATS[image_format]
+
+    tile_max_side = min(tile_max_side, max_side - TILE_LABEL_HEIGHT)
+    tiles = []
+    for i, path in enumerate(image_paths):
+        with Image.open(path) as source:
+            image = source.convert("L")
+        page_strokes = strokes[i] if strokes else None
+        tile, _, _, _ = crop_to_ink(
+            image,
+            page_strokes,
+            dpi,
+            max_side=tile_max_side,
+            min_side=min(MIN_SIDE, tile_max_side),
+        )
+        tiles.append(tile)
+
+    font = ImageFont.load_default(size=TILE_LABEL_HEIGHT - 8)
+    sizes = [(tile.width, tile.height + TILE_LABEL_HEIGHT) for tile in tiles]
+    composites = []
+    for number, placements in enumerate(_pack_tiles(sizes, max_tiles, max_side)):
+        width = max(left + sizes[i][0] for i, left, _ in placements)
+        height = max(top + sizes[i][1] for i, _, top in placements)
+        canvas = Image.new("L", (width, height), 255)
+        draw = ImageDraw.Draw(canvas)
+
+        layout = []
+        for i, left, top in placements:
+            tile = tiles[i]
+            draw.text((left + 4, top + 4), f"PAGE {i + 1}", fill=0, font=font)
+            tile_top = top + TILE_LABEL_HEIGHT
+            canvas.paste(tile, (left, tile_top))
+            box = (left, tile_top, left + tile.width, tile_top + tile.height)
+            draw.rectangle(
+                (box[0], box[1], box[2] - 1, box[3] - 1), outline=160, width=1
+            )
+            layout.append({"page": i + 1, "box": box})
+
+        output_path = os.path.join(output_dir, f"composite_{number + 1}.{image_format}")
+        canvas.save(output_path, format=pil_format, **save_options)
+        composites.append(
+            {
+                "path": output_path,
+                "size": canvas.size,
+                "bytes": os.path.getsize(output_path),
+                "pages": layout,
+            }
+        )
+
+    logger.info(f"Tiled {len(tiles)} pages into {len(composites)} composite image(s)")
+    return composites
@@ -373,6 +373,19 @@ def test_claude_penpal_full_workflow(args, rmapi_path, claude_command):
         pre_filter_tag=args.test_tag,
     )
 
+    def count_processed_pages():
+        """Count pages of known notebooks the ledger records as processed."""
+        return sum(
+            len(
+                claude_penpal_service.ledger.processed_pages(
+                    notebook_id, claude_penpal_service.LEDGER_MONITOR
+                )
+            )
+            for notebook_id in list(claude_penpal_service.notebook_states)
+        )
+
+    processed_before = count_processed_pages()
+
     # Start monitoring
     logger.info("Starting monitoring...")
     claude_penpal_service.start_monitoring()
@@ -383,7 +396,7 @@ def test_claude_penpal_full_workflow(args, rmapi_path, claude_command):
         time.sleep(30)
 
         # Check if any pages were processed
-        processed_count = len(claude_penpal_service.processed_pages)
+        processed_count = count_processed_pages() - processed_before
         logger.info(f"Processed {processed_count} pages")
 
         return processed_count > 0
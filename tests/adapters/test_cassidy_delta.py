@@ -0,0 +1,204 @@
+"""Tests for listing-based change detection in the Cassidy adapter."""
+
+import os
+import zipfile
+from unittest.mock import MagicMock
+
+import pytest
+
+from inklink.adapters.cassidy_adapter import CassidyAdapter
+from inklink.adapters.cloud_document_index import CloudDocumentIndex
+
+DOC_A = "0f5b6d8e-1a2b-4c3d-8e9f-001122334455"
+DOC_B = "7c1d2e3f-4a5b-4c6d-9e8f-66778899aabb"
+
+
+def listing(*entries):
+    """Build a detailed listing from (id, version, name) entries."""
+    return "".join(
+        f"[f]\t{doc_id}\tv{version}\t2025-05-01 10:00:00\t{name}\n"
+        for doc_id, version, name in entries
+    )
+
+
+@pytest.fixture
+def cassidy(tmp_path):
+    """Adapter with a mocked cloud listing and tag check."""
+    adapter = CassidyAdapter(
+        "/usr/local/bin/rmapi", snapshot_path=str(tmp_path / "snapshot.json")
+    )
+    adapter._validate_executable = MagicMock(return_value=True)
+
+    cloud = MagicMock()
+    cloud.listing = listing((DOC_A, 1, "Notes"), (DOC_B, 1, "Journal"))
+    cloud.run_command.side_effect = lambda *args: (True, cloud.listing, "")
+    adapter.get_document_index = MagicMock(return_value=CloudDocumentIndex(cloud))
+    adapter.cloud = cloud
+
+    adapter._check_document_for_tag = MagicMock(
+        side_effect=lambda name, tag: (name == "Notes", {"tags": []})
+    )
+    return adapter
+
+
+def test_first_check_reports_tagged_notebooks_as_created(cassidy):
+    """Every tagged notebook is new on the first check."""
+    changes = cassidy.check_for_updates()
+
+    assert [(c["id"], c["change"], c["tagged"]) for c in changes] == [
+        (DOC_A, "created", True)
+    ]
+    assert cassidy._check_document_for_tag.call_count == 2
+
+
+def test_unchanged_notebooks_are_not_downloaded(cassidy):
+    """A second check with the same listing downloads and reports nothing."""
+    cassidy.check_for_updates()
+    cassidy._check_document_for_tag.reset_mock()
+
+    assert cassidy.check_for_updates() == []
+    cassidy._check_document_for_tag.assert_not_called()
+
+
+def test_modified_and_deleted_notebooks_are_reported(cassidy, tmp_path):
+    """Version bumps and removals are detected against the persisted snapshot."""
+    cassidy.check_for_updates()
+
+    restarted = CassidyAdapter(
+        "/usr/local/bin/rmapi", snapshot_path=str(tmp_path / "snapshot.json")
+    )
+    restarted._validate_executable = cassidy._validate_executable
+    restarted.get_document_index = cassidy.get_document_index
+    restarted._check_document_for_tag = cassidy._check_document_for_tag
+    cassidy._check_document_for_tag.reset_mock()
+
+    cassidy.cloud.listing = listing((DOC_A, 2, "Notes"))
+    changes = restarted.check_for_updates()
+    assert [(c["id"], c["change"]) for c in changes] == [(DOC_A, "modified")]
+    cassidy._check_document_for_tag.assert_called_once_with("Notes", "Cass")
+
+    cassidy.cloud.listing = ""
+    changes = restarted.check_for_updates()
+    assert [(c["id"], c["change"], c["tagged"]) for c in changes] == [
+        (DOC_A, "deleted", False)
+    ]
+
+
+def test_failed_listing_reports_no_deletions(cassidy):
+    """A listing that cannot be fetched is not mistaken for an empty library."""
+    cassidy.check_for_updates()
+    cassidy.get_document_index.return_value = CloudDocumentIndex(
+        MagicMock(run_command=MagicMock(return_value=(False, "", "offline")))
+    )
+
+    assert cassidy.check_for_updates() == []
+    cassidy.get_document_index.return_value = CloudDocumentIndex(cassidy.cloud)
+    assert cassidy.check_for_updates() == []
+
+
+def test_failed_download_is_retried_with_previous_entry(cassidy):
+    """A download error keeps the old stamp so the next check tries again."""
+    cassidy.check_for_updates()
+
+    cassidy.cloud.listing = listing((DOC_A, 2, "Notes"), (DOC_B, 1, "Journal"))
+    cassidy._check_document_for_tag.side_effect = lambda name, tag: (None, {})
+    assert cassidy.check_for_updates() == []
+
+    cassidy._check_document_for_tag.side_effect = lambda name, tag: (True, {})
+    changes = cassidy.check_for_updates()
+    assert [(c["id"], c["change"], c["tagged"]) for c in changes] == [
+        (DOC_A, "modified", True)
+    ]
+
+
+def test_failed_stat_is_not_reported_as_deleted(cassidy):
+    """A document whose stat fails keeps its entry instead of vanishing."""
+    cassidy.cloud.listing = "[f] Notes\n[f] Journal\n"
+    stats = {
+        "Notes": (True, f'{{"ID": "{DOC_A}", "Version": 1}}', ""),
+        "Journal": (True, f'{{"ID": "{DOC_B}", "Version": 1}}', ""),
+    }
+    cassidy.run_command = MagicMock(side_effect=lambda cmd, name: stats[name])
+    cassidy.check_for_updates()
+
+    stats["Notes"] = (False, "", "timeout")
+    assert cassidy.check_for_updates() == []
+
+    stats["Notes"] = (True, f'{{"ID": "{DOC_A}", "Version": 1}}', "")
+    assert cassidy.check_for_updates() == []
+
+
+def test_pending_snapshot_retries_unprocessed_documents(cassidy):
+    """Documents left unhandled are reported again after a deferred save."""
+    changes = cassidy.check_for_updates(save_snapshot=False)
+    assert [c["id"] for c in changes] == [DOC_A]
+
+    cassidy.save_pending_snapshot(retry=[DOC_A])
+    changes = cassidy.check_for_updates()
+    assert [(c["id"], c["change"]) for c in changes] == [(DOC_A, "created")]
+    assert cassidy.check_for_updates() == []
+
+
+def test_page_tags_count_as_tagged(cassidy):
+    """A notebook with only a tagged page is reported as tagged."""
+    cassidy._check_document_for_tag.side_effect = lambda name, tag: (
+        False,
+        {"pageTags": [{"pageId": "p1", "tag": "cass"}]} if name == "Journal" else {},
+    )
+
+    changes = cassidy.check_for_updates()
+    assert [(c["id"], c["tagged"]) for c in changes] == [(DOC_B, True)]
+
+
+def test_add_tag_rewrites_only_the_content_member(tmp_path):
+    """Tagging copies the page members and replaces just the content file."""
+    import json
+    import zipfile
+
+    adapter = CassidyAdapter("/usr/local/bin/rmapi")
+    adapter._validate_executable = MagicMock(return_value=True)
+
+    def download(doc_id, path, export_type):
+        with zipfile.ZipFile(path, "w") as zf:
+            zf.writestr(f"{DOC_A}.content", json.dumps({"tags": []}))
+            zf.writestr(f"{DOC_A}/page-1.rm", b"page bytes")
+        return True, "downloaded"
+
+    uploaded = {}
+
+    def upload(path, name):
+        with zipfile.ZipFile(path) as zf:
+            uploaded.update({n: zf.read(n) for n in zf.namelist()})
+        return True, "uploaded"
+
+    adapter.download_file = MagicMock(side_effect=download)
+    adapter.upload_file = MagicMock(side_effect=upload)
+
+    success, _ = adapter.add_tag_to_notebook(DOC_A)
+
+    assert success
+    assert json.loads(uploaded[f"{DOC_A}.content"])["tags"] == ["Cass"]
+    assert uploaded[f"{DOC_A}/page-1.rm"] == b"page bytes"
+
+
+def test_download_notebook_writes_pages_from_archive(cassidy, tmp_path):
+    """Only the content, metadata and page files are written out."""
+
+    def download_file(doc_id, output_path, export_format):
+        with zipfile.ZipFile(output_path, "w") as zf:
+            zf.writestr(f"{DOC_A}.content", '{"cPages": {"pages": [{"id": "p1"}]}}')
+            zf.writestr(f"{DOC_A}.metadata", '{"visibleName": "Notes"}')
+            zf.writestr(f"{DOC_A}/p1.rm", b"page")
+            zf.writestr(f"{DOC_A}.thumbnails/p1.png", b"thumb")
+        return True, ""
+
+    cassidy.download_file = MagicMock(side_effect=download_file)
+
+    success, extract_dir = cassidy.download_notebook(DOC_A, str(tmp_path / "out"))
+
+    assert success
+    assert sorted(
+        os.path.relpath(os.path.join(root, name), extract_dir)
+        for root, _, files in os.walk(extract_dir)
+        for name in files
+    ) == sorted([f"{DOC_A}.content", f"{DOC_A}.metadata", f"{DOC_A}/p1.rm"])
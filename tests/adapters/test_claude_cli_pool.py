@@ -0,0 +1,194 @@
+"""Tests for pooled Claude CLI sessions."""
+
+import concurrent.futures
+import shlex
+import stat
+import sys
+import textwrap
+
+import pytest
+
+from inklink.adapters.claude_cli_adapter import ClaudeCliAdapter
+from inklink.adapters.claude_cli_pool import (
+    ClaudeWorkerPool,
+    build_content,
+    close_shared_pools,
+    get_session_pool,
+)
+from inklink.adapters.cli_ai_adapter import CLIAIAdapter
+
+FAKE_CLAUDE = textwrap.dedent("""\
+    #!{python}
+    import json
+    import os
+    import sys
+    import time
+
+    assert "stream-json" in sys.argv
+    for line in sys.stdin:
+        content = json.loads(line)["message"]["content"]
+        text = content[-1]["text"]
+        images = sum(1 for block in content if block["type"] == "image")
+        if text == "crash":
+            sys.exit(1)
+        if text.startswith("sleep"):
+            time.sleep(float(text.split()[1]))
+        if text == "pid":
+            text = str(os.getpid())
+        reply = f"{{text}} ({{images}} images)"
+        print(json.dumps({{"type": "system", "subtype": "init"}}), flush=True)
+        print("not json", flush=True)
+        print(
+            json.dumps(
+                {{
+                    "type": "assistant",
+                    "message": {{"content": [{{"type": "text", "text": reply}}]}},
+                }}
+            ),
+            flush=True,
+        )
+        print(
+            json.dumps({{"type": "result", "is_error": False, "result": reply}}),
+            flush=True,
+        )
+    """)
+
+
+@pytest.fixture
+def fake_claude(tmp_path):
+    """Create a fake streaming Claude CLI executable."""
+    path = tmp_path / "claude"
+    path.write_text(FAKE_CLAUDE.format(python=sys.executable))
+    path.chmod(path.stat().st_mode | stat.S_IXUSR)
+    return str(path)
+
+
+@pytest.fixture
+def pool(fake_claude):
+    """Create a session pool backed by the fake CLI."""
+    pool = ClaudeWorkerPool(fake_claude, size=2, request_timeout=10)
+    yield pool
+    pool.close()
+
+
+def test_request_with_images(pool, tmp_path):
+    """Prompts and inline images reach the session and the result comes back."""
+    png = b"\x89PNG\r\n\x1a\n" + b"\0" * 16
+    path = tmp_path / "page.png"
+    path.write_bytes(png)
+
+    assert pool.run("hello") == (True, "hello (0 images)")
+    assert pool.run("two pages", images=[str(path), png]) == (
+        True,
+        "two pages (2 images)",
+    )
+    stats = pool.get_stats()
+    assert stats["requests"] == 2
+    assert stats["ready"] == 2
+
+
+def test_system_prompt_and_unknown_images():
+    """System prompts are prepended to the text; unknown bytes are rejected."""
+    content = build_content("question", system_prompt="Be brief.")
+    assert content == [{"type": "text", "text": "System: Be brief.\n\nquestion"}]
+    with pytest.raises(ValueError):
+        build_content("question", images=[b"not an image"])
+
+
+def test_concurrent_requests_are_matched_to_their_callers(pool):
+    """Concurrent requests each get a session and their own result."""
+    prompts = [f"page {i}" for i in range(8)]
+    with concurrent.futures.ThreadPoolExecutor(max_workers=8) as executor:
+        results = list(executor.map(pool.run, prompts))
+
+    assert results == [(True, f"{prompt} (0 images)") for prompt in prompts]
+    assert pool.get_stats()["active"] == 0
+
+
+def test_crashed_session_fails_only_its_request(pool):
+    """A session that exits fails its request; the next one gets a new session."""
+    success, error = pool.run("crash")
+    assert not success
+    assert "exited" in error
+
+    assert pool.run("again") == (True, "again (0 images)")
+    assert pool.get_stats()["failures"] == 1
+
+
+def test_timeout_replaces_the_session(fake_claude):
+    """A request that does not finish in time fails and resets its session."""
+    pool = ClaudeWorkerPool(fake_claude, size=1, request_timeout=10)
+    try:
+        success, error = pool.run("sleep 5", timeout=0.5)
+        assert not success
+        assert "timed out" in error
+        assert pool.run("ok") == (True, "ok (0 images)")
+        assert pool.get_stats()["timeouts"] == 1
+    finally:
+        pool.close()
+
+
+def test_each_request_gets_a_fresh_session(fake_claude):
+    """Sessions answer one request and are replaced by pre-started ones."""
+    pool = ClaudeWorkerPool(fake_claude, size=1)
+    try:
+        pids = [pool.run("pid")[1] for _ in range(3)]
+        assert len(set(pids)) == 3
+        stats = pool.get_stats()
+        assert stats["ready"] == 1
+        # The first request starts its own session, later ones take ready ones
+        assert stats["started"] == 4
+    finally:
+        pool.close()
+
+
+def test_dead_ready_sessions_are_discarded(fake_claude):
+    """A ready session that exited before use is replaced, not handed out."""
+    pool = ClaudeWorkerPool(fake_claude, size=1)
+    try:
+        assert pool.run("first")[0]
+        pool._ready[0]._process.kill()
+        pool._ready[0]._process.wait()
+
+        assert pool.run("second") == (True, "second (0 images)")
+        assert pool.get_stats()["discarded"] == 1
+    finally:
+        pool.close()
+
+
+def test_cli_adapter_uses_sessions(fake_claude):
+    """One-off completions go through the shared session pool."""
+    adapter = ClaudeCliAdapter(claude_command=fake_claude, session_pool_size=1)
+    try:
+        success, response = adapter.generate_completion(
+            "What is 2 + 2?", system_prompt="Answer briefly."
+        )
+        assert success
+        assert response == "System: Answer briefly.\n\nWhat is 2 + 2? (0 images)"
+    finally:
+        close_shared_pools()
+
+
+def test_cli_ai_adapter_passes_its_timeout_per_request(fake_claude, monkeypatch):
+    """An adapter's timeout applies even when another adapter made the pool."""
+    adapter = CLIAIAdapter(
+        cli_type="claude", cli_path=fake_claude, timeout=7, session_pool_size=1
+    )
+    try:
+        # Created first with the configured default timeout
+        pool = get_session_pool(shlex.quote(fake_claude), adapter.model, 1)
+        timeouts = []
+        original_run = pool.run
+
+        def run(*args, **kwargs):
+            timeouts.append(kwargs.get("timeout"))
+            return original_run(*args, **kwargs)
+
+        monkeypatch.setattr(pool, "run", run)
+        success, _ = adapter.generate_completion("hello")
+
+        assert success
+        assert timeouts == [7]
+        assert get_session_pool(fake_claude, None, 0) is None
+    finally:
+        close_shared_pools()
@@ -598,7 +598,7 @@ def test_process_single_image_for_batch_content_detection(
         )
 
         # Assert
-        mock_detect.assert_called_once_with(image_path)
+        mock_detect.assert_called_once_with(image_path, None)
         mock_process.assert_called_once()
         # Verify detected content type was used
         assert mock_process.call_args[1]["content_type"] == "diagram"
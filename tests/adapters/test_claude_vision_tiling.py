@@ -0,0 +1,131 @@
+"""Tests for multi-page tiling in the ClaudeVisionAdapter."""
+
+import re
+import subprocess
+from unittest.mock import MagicMock, patch
+
+import numpy as np
+from PIL import Image
+
+from inklink.adapters.claude_vision_adapter import ClaudeVisionAdapter
+
+
+def sparse_page(path, row):
+    """Write a white page with one line of ink."""
+    pixels = np.full((1200, 900), 255, dtype=np.uint8)
+    pixels[100 + 40 * row : 130 + 40 * row, 100:500] = 0
+    Image.fromarray(pixels).save(path)
+    return str(path)
+
+
+def fake_cli(command, **kwargs):
+    """Answer every labeled page of a composite on stdout."""
+    if command[-1] == "--version":
+        return MagicMock(returncode=0, stdout="claude 1.0", stderr="")
+    labels = sorted(set(re.findall(r"PAGE (\d+)", command[-1])), key=int)
+    response = "\n".join(f"=== PAGE {n} ===\ntext {n}" for n in labels)
+    return MagicMock(returncode=0, stdout=response, stderr="")
+
+
+def test_pages_are_sent_in_tiled_requests(tmp_path):
+    """Five pages with a budget of two take three requests."""
+    paths = [sparse_page(tmp_path / f"p{i}.png", i) for i in range(5)]
+    with patch("subprocess.run", side_effect=fake_cli) as run:
+        adapter = ClaudeVisionAdapter(
+            claude_command="claude", enable_tiling=True, tile_budget=2
+        )
+        run.reset_mock()
+
+        success, result = adapter.process_multiple_images(
+            paths, maintain_context=False, preprocess=False
+        )
+
+    assert success
+    assert run.call_count == 3
+    for i in range(5):
+        assert f"--- PAGE {i + 1} ---\ntext {i + 1}\n" in result
+
+
+def test_split_tiled_response_uses_layout_pages():
+    """Text is assigned by marker; unknown or missing pages are not invented."""
+    response = "=== PAGE 3 ===\nthird\n=== PAGE 9 ===\nstray\n== page 4 ==\nfourth"
+
+    pages = ClaudeVisionAdapter.split_tiled_response(response, [3, 4, 5])
+
+    assert pages == {3: "third", 4: "fourth"}
+    assert ClaudeVisionAdapter.split_tiled_response("only", [7]) == {7: "only"}
+
+
+def test_failed_request_reports_error(tmp_path):
+    """A CLI failure fails the whole tiled run."""
+    paths = [sparse_page(tmp_path / f"p{i}.png", i) for i in range(2)]
+    failed = subprocess.CompletedProcess([], 1, stdout="", stderr="boom")
+    with patch("subprocess.run", return_value=failed):
+        adapter = ClaudeVisionAdapter(claude_command="claude", enable_tiling=True)
+        success, result = adapter.process_multiple_images(paths, prompt="notes")
+
+    assert not success
+    assert "boom" in result
+
+
+def test_tiled_requests_carry_context(tmp_path):
+    """With maintain_context, later composites see the text before them."""
+    paths = [sparse_page(tmp_path / f"p{i}.png", i) for i in range(3)]
+    with patch("subprocess.run", side_effect=fake_cli) as run:
+        adapter = ClaudeVisionAdapter(
+            claude_command="claude", enable_tiling=True, tile_budget=2
+        )
+        run.reset_mock()
+
+        success, _ = adapter.process_multiple_images(paths, maintain_context=True)
+
+    assert success
+    prompts = [call.args[0][-1] for call in run.call_args_list]
+    assert "previous pages" not in prompts[0]
+    assert "the previous pages end with: text 1 text 2" in prompts[1]
+
+
+def test_per_page_options_disable_tiling(tmp_path):
+    """Content types or explicit preprocessing process pages one by one."""
+    paths = [sparse_page(tmp_path / f"p{i}.png", i) for i in range(2)]
+    adapter = ClaudeVisionAdapter(claude_command="claude", enable_tiling=True)
+    adapter.process_tiled_images = MagicMock()
+    adapter._process_single_image_for_batch = MagicMock(return_value=(True, "page"))
+
+    for options in ({"content_types": ["Math", "Text"]}, {"preprocess": True}):
+        success, _ = adapter.process_multiple_images(paths, **options)
+        assert success
+
+    adapter.process_tiled_images.assert_not_called()
+    types = [
+        call.kwargs["content_type"]
+        for call in adapter._process_single_image_for_batch.call_args_list
+    ]
+    assert types[:2] == ["Math", "Text"]
+
+
+def test_tiled_requests_do_not_use_a_shell(tmp_path):
+    """Prompt and context text reach the CLI as one argument, never a shell."""
+    paths = [sparse_page(tmp_path / f"p{i}.png", i) for i in range(2)]
+
+    def cli(command, **kwargs):
+        if command[-1] == "--version":
+            return MagicMock(returncode=0, stdout="claude 1.0", stderr="")
+        return MagicMock(returncode=0, stdout="=== PAGE 1 ===\n$(touch x)", stderr="")
+
+    with patch("subprocess.run", side_effect=cli) as run:
+        adapter = ClaudeVisionAdapter(
+            claude_command="claude", enable_tiling=True, tile_budget=1
+        )
+        run.reset_mock()
+
+        success, _ = adapter.process_multiple_images(
+            paths, prompt='say "hi" `now`', maintain_context=True
+        )
+
+    assert success
+    for call in run.call_args_list:
+        assert not call.kwargs.get("shell")
+        assert call.args[0][:2] == ["claude", "--max-tokens"]
+    assert 'say "hi" `now`' in run.call_args_list[0].args[0][-1]
+    assert "$(touch x)" in run.call_args_list[1].args[0][-1]
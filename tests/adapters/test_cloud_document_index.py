@@ -0,0 +1,148 @@
+"""Tests for the cached cloud document index."""
+
+from unittest.mock import MagicMock
+
+import pytest
+
+from inklink.adapters import cloud_document_index
+from inklink.adapters.cloud_document_index import (
+    CloudDocumentIndex,
+    get_shared_document_index,
+)
+from inklink.adapters.rmapi_adapter import RmapiAdapter
+
+DOC_A = "0f5b6d8e-1a2b-4c3d-8e9f-001122334455"
+DOC_B = "7c1d2e3f-4a5b-4c6d-9e8f-66778899aabb"
+
+LISTING = (
+    f"[d]\tFolder\n"
+    f"[f]\t{DOC_A}\tv12\t2025-05-01 10:00:00\tMeeting Notes\t#HasLilly\n"
+    f"[f]\t{DOC_B}\tv3\t2025-05-02 11:30:00\tJournal\ttags: [Cass, Todo]\n"
+)
+
+
+@pytest.fixture(autouse=True)
+def clear_shared_indexes():
+    """Keep the shared registry from leaking between tests."""
+    cloud_document_index._shared_indexes.clear()
+    yield
+    cloud_document_index._shared_indexes.clear()
+
+
+@pytest.fixture
+def adapter():
+    """Adapter mock returning a fixed detailed listing."""
+    adapter = MagicMock()
+    adapter.rmapi_path = "/usr/local/bin/rmapi"
+    adapter.run_command.return_value = (True, LISTING, "")
+    return adapter
+
+
+def test_parse_text_listing():
+    """Fields are classified by shape and extra name fields become tags."""
+    docs = {d.id: d for d in CloudDocumentIndex.parse_listing(LISTING)}
+
+    assert docs[DOC_A].name == "Meeting Notes"
+    assert docs[DOC_A].version == 12
+    assert docs[DOC_A].last_modified == "2025-05-01 10:00:00"
+    assert docs[DOC_A].tags == ["HasLilly"]
+    assert docs[DOC_B].tags == ["Cass", "Todo"]
+    assert docs["Folder"].type == "CollectionType"
+
+
+def test_parse_name_only_listing():
+    """Plain listings fall back to using the name as the ID."""
+    docs = CloudDocumentIndex.parse_listing("[f]\tNotebook One\n[f] Notebook Two\n")
+
+    assert [d.id for d in docs] == ["Notebook One", "Notebook Two"]
+    assert not docs[0].has_cloud_id
+
+
+@pytest.mark.parametrize("name", ["2024-05-01", "Version 2", "[Draft]", "Tags: ideas"])
+def test_names_shaped_like_fields_are_kept(name):
+    """A name matching a field shape is still the name when nothing else is."""
+    (doc,) = CloudDocumentIndex.parse_listing(f"[f]\t{name}\n")
+    assert doc.name == name
+    assert doc.id == name
+    assert doc.version is None and doc.last_modified is None and not doc.tags
+
+    (doc,) = CloudDocumentIndex.parse_listing(f"[f]\t{DOC_A}\t{name}\n")
+    assert (doc.id, doc.name) == (DOC_A, name)
+
+
+def test_same_named_documents_without_ids_stay_separate():
+    """Entries keyed by name are not collapsed into one."""
+    index = CloudDocumentIndex(MagicMock())
+    index.load_listing("[d]\tNotes\n[f]\tNotes\n[f]\tNotes\n")
+
+    assert len(index.documents(doc_type=None)) == 3
+    assert len(index.documents()) == 2
+    assert index.get("Notes").type == "CollectionType"
+
+
+def test_tag_lookup(adapter):
+    """Tag queries are answered from the secondary index."""
+    index = CloudDocumentIndex(adapter)
+    index.refresh()
+
+    assert index.ids_with_tag("haslilly") == {DOC_A}
+    assert index.has_tag("Journal", "Cass")
+    assert not index.has_tag(DOC_A, "Cass")
+    assert [d.name for d in index.documents()] == ["Meeting Notes", "Journal"]
+
+
+def test_untagged_line_text_is_not_a_tag():
+    """Only parsed tags count; other text on the listing line does not."""
+    index = CloudDocumentIndex(MagicMock())
+    index.load_listing(f"[f]\t{DOC_A}\tv2\t2025-05-01 10:00:00\tReading\n")
+
+    assert not index.has_tag(DOC_A, "2025")
+
+
+def test_refresh_reuses_fresh_listing(adapter):
+    """Only one ls -l is issued within the freshness window."""
+    index = CloudDocumentIndex(adapter, max_age=60)
+
+    assert index.refresh()
+    assert index.refresh()
+    assert adapter.run_command.call_count == 1
+
+    assert index.refresh(force=True)
+    assert index.get_stats()["fetch_count"] == 2
+
+
+def test_shared_index_per_executable(adapter):
+    """Monitors using the same rmapi share one index."""
+    other = MagicMock(rmapi_path=adapter.rmapi_path)
+
+    assert get_shared_document_index(adapter) is get_shared_document_index(other)
+
+
+def test_find_tagged_notebooks_prefilter_lists_once():
+    """The pre-filter uses one detailed listing for all documents."""
+    rmapi = RmapiAdapter("/usr/local/bin/rmapi")
+    rmapi._validate_executable = MagicMock(return_value=True)
+    rmapi.list_files = MagicMock()
+    rmapi.run_command = MagicMock(return_value=(True, LISTING, ""))
+    rmapi._check_document_for_tag = MagicMock(return_value=(True, {"tags": ["Lilly"]}))
+
+    notebooks = rmapi.find_tagged_notebooks("Lilly", pre_filter_tag="HasLilly")
+
+    assert [nb["id"] for nb in notebooks] == [DOC_A]
+    rmapi.run_command.assert_called_once_with("ls", "-l")
+    rmapi.list_files.assert_not_called()
+    rmapi._check_document_for_tag.assert_called_once_with(DOC_A, "Lilly")
+
+
+def test_list_documents_with_tag_downloads_nothing():
+    """Tagged documents come straight from the listing, with their versions."""
+    rmapi = RmapiAdapter("/usr/local/bin/rmapi")
+    rmapi._validate_executable = MagicMock(return_value=True)
+    rmapi.run_command = MagicMock(return_value=(True, LISTING, ""))
+    rmapi.download_file = MagicMock()
+
+    success, documents = rmapi.list_documents_with_tag("haslilly")
+
+    assert success
+    assert [(d["ID"], d["Version"]) for d in documents] == [(DOC_A, 12)]
+    rmapi.download_file.assert_not_called()
@@ -128,7 +128,7 @@ class LimitlessLiveTest:
     def test_sync_service(self):
         """Test syncing life logs."""
         logger.info("Testing Limitless sync service...")
-        success, message = self.service.sync_life_logs()
+        success, message, _ = self.service.sync_life_logs()
 
         if success:
             logger.info(f"✅ Sync successful: {message}")
@@ -0,0 +1,65 @@
+"""Tests for concurrent rmapi downloads."""
+
+import os
+import stat
+import sys
+import textwrap
+import time
+
+import pytest
+
+from inklink.adapters.rmapi_adapter import RmapiAdapter
+
+FAKE_RMAPI = textwrap.dedent(
+    """\
+    #!{python}
+    import sys
+    import time
+
+    cmd, args = sys.argv[1], sys.argv[2:]
+    if cmd == "get":
+        if args[0] == "missing":
+            print("Error: entry doesn't exist", file=sys.stderr)
+            sys.exit(1)
+        time.sleep(0.3)
+        with open(args[0] + ".rmdoc", "w") as f:
+            f.write("zip:" + args[0])
+    """
+)
+
+
+@pytest.fixture
+def adapter(tmp_path):
+    """Create an adapter backed by a fake one-shot rmapi."""
+    path = tmp_path / "rmapi"
+    path.write_text(FAKE_RMAPI.format(python=sys.executable))
+    path.chmod(path.stat().st_mode | stat.S_IXUSR)
+    return RmapiAdapter(str(path), pool_size=0, command_timeout=10)
+
+
+def test_download_file_keeps_process_cwd(adapter, tmp_path):
+    """Downloads run in their own directory without changing the process cwd."""
+    cwd = os.getcwd()
+    output_path = str(tmp_path / "out" / "notes.rmdoc")
+
+    success, _ = adapter.download_file("notes", output_path, "zip")
+
+    assert success
+    assert os.getcwd() == cwd
+    with open(output_path) as f:
+        assert f.read() == "zip:notes"
+
+
+def test_download_many_runs_in_parallel(adapter, tmp_path):
+    """download_many returns per-item results and overlaps downloads."""
+    dest_dir = str(tmp_path / "batch")
+    names = ["a", "b", "c", "d", "missing"]
+
+    started = time.monotonic()
+    results = adapter.download_many(names, dest_dir, max_parallel=5)
+    elapsed = time.monotonic() - started
+
+    assert set(results) == set(names)
+    assert results["a"] == (True, os.path.join(dest_dir, "a.rmdoc"))
+    assert results["missing"][0] is False
+    assert elapsed < 1.0
@@ -0,0 +1,232 @@
+"""Tests for the pooled rmapi executor."""
+
+import os
+import stat
+import sys
+import textwrap
+import threading
+import time
+
+import pytest
+
+from inklink.adapters.rmapi_adapter import RmapiAdapter
+from inklink.adapters.rmapi_pool import RmapiShellWorker, RmapiWorkerPool
+
+FAKE_RMAPI = textwrap.dedent("""\
+    #!{python}
+    import os
+    import sys
+    import time
+
+    print("ReMarkable Cloud API Shell", flush=True)
+    for line in sys.stdin:
+        parts = line.split()
+        if not parts:
+            continue
+        cmd, args = parts[0], parts[1:]
+        if cmd == "exit":
+            break
+        elif cmd == "pwd":
+            print("/", flush=True)
+        elif cmd == "ls" and args:
+            print("Error: directory doesn't exist", flush=True)
+        elif cmd == "ls":
+            print("[f]\\tNotebook One", flush=True)
+            print("[f]\\tNotebook Two", flush=True)
+            print("[f]\\tFailed experiments: not found", flush=True)
+        elif cmd == "pid":
+            print(os.getpid(), flush=True)
+        elif cmd == "get" and args[0] == "missing":
+            print("2025/05/01 10:00:00 missing: no such file or directory", flush=True)
+        elif cmd == "get" and args[0] == "silent":
+            pass
+        elif cmd == "get":
+            with open(args[0] + ".rmdoc", "w") as f:
+                f.write("zipdata")
+        elif cmd == "sleep":
+            time.sleep(float(args[0]))
+        elif cmd == "crash":
+            sys.exit(1)
+        else:
+            print(f"Error: unknown command {{cmd}}", flush=True)
+    """)
+
+
+@pytest.fixture
+def fake_rmapi(tmp_path):
+    """Create a fake interactive rmapi executable."""
+    path = tmp_path / "rmapi"
+    path.write_text(FAKE_RMAPI.format(python=sys.executable))
+    path.chmod(path.stat().st_mode | stat.S_IXUSR)
+    return str(path)
+
+
+@pytest.fixture
+def pool(fake_rmapi):
+    """Create a worker pool backed by the fake rmapi."""
+    pool = RmapiWorkerPool(fake_rmapi, size=2, command_timeout=5)
+    yield pool
+    pool.close()
+
+
+def test_commands_reuse_warm_shell(pool):
+    """Consecutive commands run in the same shell process."""
+    success, first_pid, _ = pool.run_command("pid")
+    assert success
+    success, second_pid, _ = pool.run_command("pid")
+    assert success
+    assert first_pid == second_pid
+    assert pool.get_stats()["workers"] == 1
+
+
+def test_command_output_and_errors(pool):
+    """Output is collected up to the sentinel and error lines mark failure."""
+    success, stdout, stderr = pool.run_command("ls")
+    assert success
+    assert stdout.splitlines() == [
+        "[f]\tNotebook One",
+        "[f]\tNotebook Two",
+        "[f]\tFailed experiments: not found",
+    ]
+    assert stderr == ""
+
+    success, _, stderr = pool.run_command("bogus")
+    assert not success
+    assert "unknown command" in stderr
+
+
+def test_errors_without_the_entry_name_end_the_command(pool):
+    """The end of a command does not depend on how rmapi words its errors."""
+    success, _, stderr = pool.run_command("ls", "Missing Folder")
+    assert not success
+    assert stderr == "Error: directory doesn't exist"
+
+    success, _, _ = pool.run_command("ls")
+    assert success
+    assert pool.get_stats()["timeouts"] == 0
+
+
+def test_go_style_errors_mark_failure(pool):
+    """Errors reported after the path, with no leading "Error", still fail."""
+    success, _, stderr = pool.run_command("get", "missing")
+    assert not success
+    assert "no such file or directory" in stderr
+
+
+def test_get_without_downloaded_file_fails(pool):
+    """A get that prints nothing but writes no file is not a success."""
+    success, _, stderr = pool.run_command("get", "silent")
+    assert not success
+    assert "did not write a file" in stderr
+
+    success, _, _ = pool.run_command("get", "Notes")
+    assert success
+
+
+def test_directory_changes_are_rejected(pool):
+    """Workers stay in the root directory the sentinel relies on."""
+    success, _, stderr = pool.run_command("cd", "Notes")
+    assert not success
+    assert "root directory" in stderr
+
+
+def test_crashed_worker_is_restarted(pool):
+    """A worker whose shell exits is replaced on next use."""
+    _, first_pid, _ = pool.run_command("pid")
+    success, _, _ = pool.run_command("crash")
+    assert not success
+
+    success, second_pid, _ = pool.run_command("pid")
+    assert success
+    assert first_pid != second_pid
+    assert pool.get_stats()["restarts"] >= 1
+
+
+def test_timeout_restarts_worker(pool):
+    """A command exceeding its timeout fails and the worker is replaced."""
+    success, _, stderr = pool.run_command("sleep", "2", timeout=0.2)
+    assert not success
+    assert "timed out" in stderr
+    assert pool.get_stats()["timeouts"] == 1
+
+    success, _, _ = pool.run_command("ls")
+    assert success
+
+
+def test_workers_start_outside_the_pool_lock(pool, monkeypatch):
+    """Starting a shell does not block the pool, and a failed start frees its slot."""
+    original_start = RmapiShellWorker.start
+    lock_held = []
+
+    def failing_start(worker, timeout=30.0):
+        lock_held.append(pool._lock.locked())
+        raise RuntimeError("rmapi did not start")
+
+    monkeypatch.setattr(RmapiShellWorker, "start", failing_start)
+    success, _, stderr = pool.run_command("ls")
+    assert not success
+    assert "did not start" in stderr
+    assert lock_held == [False]
+    assert pool.get_stats()["workers"] == 0
+
+    monkeypatch.setattr(RmapiShellWorker, "start", original_start)
+    success, _, _ = pool.run_command("ls")
+    assert success
+    assert pool.get_stats()["workers"] == 1
+
+
+def test_adapter_uses_pool_for_download(fake_rmapi, tmp_path):
+    """RmapiAdapter downloads through the worker's private directory."""
+    adapter = RmapiAdapter(fake_rmapi, pool_size=1, command_timeout=5)
+    try:
+        output_path = str(tmp_path / "out" / "notebook.rmdoc")
+        success, _ = adapter.download_file("abc", output_path)
+        assert success
+        with open(output_path) as f:
+            assert f.read() == "zipdata"
+
+        success, documents = adapter.list_files()
+        assert success
+        assert [d["VissibleName"] for d in documents] == [
+            "Notebook One",
+            "Notebook Two",
+            "Failed experiments: not found",
+        ]
+        assert adapter._pool.get_stats()["workers"] == 1
+    finally:
+        adapter.close()
+    assert os.getcwd() != str(tmp_path)
+
+
+def test_close_waits_for_checked_out_workers(pool):
+    """Closing the pool does not stop a shell another caller is using."""
+    with pool.acquire() as worker:
+        pool.close()
+        assert worker.alive
+        success, _, _ = worker.execute("ls", timeout=5)
+        assert success
+    assert not worker.alive
+    assert pool.get_stats()["workers"] == 0
+
+
+def test_adapter_creates_one_pool_across_threads(fake_rmapi, monkeypatch):
+    """Concurrent first calls share a single pool."""
+    adapter = RmapiAdapter(fake_rmapi, pool_size=1, command_timeout=5)
+    created = []
+    original_init = RmapiWorkerPool.__init__
+
+    def slow_init(pool, *args, **kwargs):
+        created.append(pool)
+        time.sleep(0.05)
+        original_init(pool, *args, **kwargs)
+
+    monkeypatch.setattr(RmapiWorkerPool, "__init__", slow_init)
+    try:
+        threads = [threading.Thread(target=adapter._get_pool) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert len(created) == 1
+    finally:
+        adapter.close()
@@ -26,3 +26,11 @@ httpx.Client.__init__ = _patched_httpx_client_init
 def anyio_backend():
     """Force asyncio backend for all anyio tests."""
     return "asyncio"
+
+
+@pytest.fixture(autouse=True)
+def isolated_transcript_cache(tmp_path, monkeypatch):
+    """Keep transcripts cached by one test from answering another."""
+    from inklink.config import CONFIG
+
+    monkeypatch.setitem(CONFIG, "TRANSCRIPT_CACHE_DIR", str(tmp_path / "transcripts"))
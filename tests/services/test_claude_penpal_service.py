@@ -0,0 +1,410 @@
+"""Tests for polling optimizations in the ClaudePenpalService."""
+
+import json
+import os
+import subprocess
+import threading
+import time
+import zipfile
+from unittest.mock import MagicMock
+
+import pytest
+
+from inklink.config import CONFIG
+from inklink.services.claude_penpal_service import ClaudePenpalService
+from inklink.services.handwriting_recognition_service import (
+    HandwritingRecognitionService,
+)
+from inklink.services.processed_page_ledger import ProcessedPageLedger
+from inklink.utils.single_flight import SingleFlight
+
+
+@pytest.fixture
+def penpal(tmp_path, monkeypatch):
+    """Create a penpal service with storage under a temporary directory."""
+    monkeypatch.setitem(CONFIG, "LILLY_ROOT_DIR", str(tmp_path / "root"))
+    monkeypatch.setitem(CONFIG, "TEMP_DIR", str(tmp_path / "temp"))
+    service = ClaudePenpalService(rmapi_path="/usr/local/bin/rmapi")
+
+    def fake_download(doc_id, output_path, export_format="pdf"):
+        with open(output_path, "wb") as f:
+            f.write(b"rmdoc bytes")
+        return True, "downloaded"
+
+    service.rmapi_adapter = MagicMock()
+    service.rmapi_adapter.download_file.side_effect = fake_download
+    service._extract_notebook_pages = MagicMock(return_value=[])
+    return service
+
+
+def test_unchanged_notebook_is_skipped(penpal):
+    """A notebook with the same cloud version and local hash is not re-scanned."""
+    notebook = {"ID": "nb-1", "VissibleName": "Notes", "Version": 4}
+
+    penpal._check_notebook_for_tagged_pages(notebook)
+    penpal._check_notebook_for_tagged_pages(notebook)
+
+    assert penpal.rmapi_adapter.download_file.call_count == 1
+    assert penpal._extract_notebook_pages.call_count == 1
+    assert penpal.get_notebook_stats() == {"skipped": 1, "refreshed": 1, "tracked": 1}
+
+
+def test_new_version_is_refreshed(penpal):
+    """A bumped cloud version triggers a fresh download and scan."""
+    penpal._check_notebook_for_tagged_pages(
+        {"ID": "nb-1", "VissibleName": "Notes", "Version": 4}
+    )
+    penpal._check_notebook_for_tagged_pages(
+        {"ID": "nb-1", "VissibleName": "Notes", "Version": 5}
+    )
+
+    assert penpal.rmapi_adapter.download_file.call_count == 2
+    assert penpal.notebook_stats == {"skipped": 0, "refreshed": 2}
+
+
+def test_state_survives_restart(penpal, tmp_path):
+    """Recorded versions are persisted and reloaded by a new service."""
+    penpal._check_notebook_for_tagged_pages(
+        {"ID": "nb-1", "VissibleName": "Notes", "Version": 4}
+    )
+
+    restarted = ClaudePenpalService(rmapi_path="/usr/local/bin/rmapi")
+    assert restarted.notebook_states["nb-1"]["version"] == 4
+
+
+def test_page_transcripts_are_cached(penpal, tmp_path):
+    """Recognition runs once per unchanged page."""
+    page = tmp_path / "page.rm"
+    page.write_bytes(b"rm lines")
+    adapter = MagicMock()
+    adapter.process_rm_file.return_value = {
+        "success": True,
+        "text": "#Lilly question",
+    }
+    penpal.handwriting_service = HandwritingRecognitionService(
+        model=penpal.model,
+        handwriting_adapter=adapter,
+        transcript_cache=penpal.transcript_cache,
+        single_flight=SingleFlight(),
+    )
+
+    assert penpal._extract_text_from_page(str(page)) == "#Lilly question"
+    assert penpal._extract_text_from_page(str(page)) == "#Lilly question"
+
+    adapter.process_rm_file.assert_called_once()
+    # Filled once by the handwriting service, then answered by penpal's lookup
+    stats = penpal.transcript_cache.get_stats()
+    assert stats["hits"] == 1
+    assert stats["entry_count"] == 1
+
+
+def test_metadata_mode_skips_untagged_pages(penpal, monkeypatch):
+    """Only pages with metadata tags or margin ink are recognized."""
+    penpal.tag_detection_mode = "metadata"
+    monkeypatch.setattr(
+        "inklink.services.claude_penpal_service.has_ink_in_top_margin",
+        lambda path, margin_height: path.endswith("margin.rm"),
+    )
+
+    assert penpal._is_tag_candidate("/tmp/a.rm", ["Lilly"])
+    assert penpal._is_tag_candidate("/tmp/margin.rm", [])
+    assert not penpal._is_tag_candidate("/tmp/plain.rm", ["Unrelated"])
+
+    penpal.tag_detection_mode = "full"
+    assert penpal._is_tag_candidate("/tmp/plain.rm", [])
+
+
+def test_notebooks_processed_concurrently(penpal):
+    """Independent notebooks run in parallel; one notebook never overlaps itself."""
+    penpal.max_concurrent_notebooks = 4
+    active = {}
+    peak = {"all": 0, "same": 0}
+    guard = threading.Lock()
+
+    def slow_check(notebook):
+        notebook_id = notebook["ID"]
+        with guard:
+            active[notebook_id] = active.get(notebook_id, 0) + 1
+            peak["all"] = max(peak["all"], sum(active.values()))
+            peak["same"] = max(peak["same"], active[notebook_id])
+        time.sleep(0.1)
+        with guard:
+            active[notebook_id] -= 1
+
+    penpal._check_notebook_for_tagged_pages = slow_check
+    notebooks = [{"ID": f"nb-{i}", "VissibleName": f"Notes {i}"} for i in range(4)]
+
+    started = time.monotonic()
+    penpal._process_notebooks(notebooks)
+    assert time.monotonic() - started < 0.35
+    assert peak["all"] > 1
+
+    # Concurrent polls of the same notebook are serialized by its lock
+    threads = [
+        threading.Thread(target=penpal._check_notebook_locked, args=(notebooks[0],))
+        for _ in range(2)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert peak["same"] == 1
+
+    metrics = penpal.get_poll_metrics()
+    assert metrics["polls"] == 1
+    assert metrics["last_poll_notebooks"] == 4
+    assert metrics["last_max_queue_depth"] == 4
+    assert metrics["queue_depth"] == 0
+
+
+def test_pages_read_without_extraction(penpal, tmp_path):
+    """Notebook pages are inspected in memory; cached pages are never written."""
+    notebook_path = tmp_path / "notebook.rmdoc"
+    with zipfile.ZipFile(notebook_path, "w") as zf:
+        zf.writestr(
+            "doc.content", json.dumps({"pages": [{"id": "p1", "tags": ["Lilly"]}]})
+        )
+        zf.writestr("doc/p1.rm", b"query page")
+    page_hash = penpal.transcript_cache.compute_data_hash(b"query page")
+    penpal.transcript_cache.put(page_hash, penpal.model, "Text", "#Lilly hi")
+    penpal.handwriting_service = MagicMock(model=penpal.model)
+    extract_dir = tmp_path / "extracted"
+
+    pages = ClaudePenpalService._extract_notebook_pages(
+        penpal, str(notebook_path), str(extract_dir)
+    )
+
+    assert [(p["id"], p["text"], p["path"]) for p in pages] == [
+        ("p1", "#Lilly hi", None)
+    ]
+    assert not extract_dir.exists()
+    penpal.handwriting_service.recognize_from_ink.assert_not_called()
+
+
+def test_response_insert_rewrites_changed_members(penpal, tmp_path, monkeypatch):
+    """Inserting a response keeps untouched pages and adds only the new page."""
+    monkeypatch.setattr(time, "sleep", lambda seconds: None)
+    penpal.rmapi_adapter.run_command.return_value = (True, "", "")
+    penpal.rmapi_adapter.upload_file.return_value = (True, "uploaded")
+    notebook_path = tmp_path / "notebook.rmdoc"
+    with zipfile.ZipFile(notebook_path, "w", zipfile.ZIP_DEFLATED) as zf:
+        zf.writestr("doc.content", json.dumps({"pages": [{"id": "p1"}]}))
+        zf.writestr("doc.metadata", json.dumps({"visibleName": "Notes"}))
+        zf.writestr("doc/p1.rm", b"query page")
+
+    penpal._insert_response_after_query(
+        "doc", "Notes", str(notebook_path), str(tmp_path), {"id": "p1"}, "Hi", []
+    )
+
+    modified_path = penpal.rmapi_adapter.upload_file.call_args[0][0]
+    with zipfile.ZipFile(modified_path) as zf:
+        pages = json.loads(zf.read("doc.content"))["pages"]
+        assert [p["id"] for p in pages][0] == "p1"
+        assert zf.read(f"{pages[1]['id']}.rm") == b"Hi"
+        assert zf.read("doc/p1.rm") == b"query page"
+        assert json.loads(zf.read("doc.metadata"))["synced"] is True
+
+
+def test_poll_writes_back_once_per_notebook(penpal, tmp_path, monkeypatch):
+    """Several answered pages are committed with one rewrite and one upload."""
+    monkeypatch.setattr(time, "sleep", lambda seconds: None)
+    penpal.rmapi_adapter.run_command.return_value = (True, "", "")
+    penpal.rmapi_adapter.upload_file.return_value = (True, "uploaded")
+    penpal.remove_tags_after_processing = True
+    penpal._process_with_claude = MagicMock(side_effect=["Answer 1", "Answer 2"])
+
+    def download_notebook(doc_id, output_path, export_format="pdf"):
+        pages = [{"id": "q1", "tags": ["Lilly"]}, {"id": "q2", "tags": ["Lilly"]}]
+        with zipfile.ZipFile(output_path, "w") as zf:
+            zf.writestr("doc.content", json.dumps({"pages": pages}))
+            zf.writestr("doc/q1.rm", b"first")
+            zf.writestr("doc/q2.rm", b"second")
+        return True, "downloaded"
+
+    penpal.rmapi_adapter.download_file.side_effect = download_notebook
+    penpal._extract_notebook_pages.return_value = [
+        {"id": "q1", "text": "#Lilly one", "tags": ["Lilly"]},
+        {"id": "q2", "text": "#Lilly two", "tags": ["Lilly"]},
+    ]
+
+    penpal._check_notebook_for_tagged_pages({"ID": "doc", "VissibleName": "Notes"})
+
+    penpal.rmapi_adapter.upload_file.assert_called_once()
+    penpal.rmapi_adapter.download_file.assert_called_once()
+    modified_path = penpal.rmapi_adapter.upload_file.call_args[0][0]
+    with zipfile.ZipFile(modified_path) as zf:
+        pages = json.loads(zf.read("doc.content"))["pages"]
+        responses = [zf.read(f"{p['id']}.rm") for p in pages[1::2]]
+    assert [p["id"] for p in pages[::2]] == ["q1", "q2"]
+    assert [p["tags"] for p in pages[::2]] == [[], []]
+    assert responses == [b"Answer 1", b"Answer 2"]
+
+
+def test_processed_pages_skipped_after_restart(penpal):
+    """Pages answered before a restart are not answered again."""
+    penpal._extract_notebook_pages.return_value = [
+        {"id": "q1", "text": "#Lilly one", "tags": ["Lilly"], "hash": "h1"}
+    ]
+    penpal._process_query_with_context = MagicMock()
+
+    penpal._process_notebooks([{"ID": "doc", "VissibleName": "Notes", "Version": 1}])
+    assert penpal.ledger.get_stats()["entry_count"] == 1
+
+    restarted = ClaudePenpalService(rmapi_path="/usr/local/bin/rmapi")
+    restarted.rmapi_adapter = penpal.rmapi_adapter
+    restarted._extract_notebook_pages = penpal._extract_notebook_pages
+    restarted._process_query_with_context = MagicMock()
+    restarted._process_notebooks([{"ID": "doc", "VissibleName": "Notes", "Version": 2}])
+
+    restarted._process_query_with_context.assert_not_called()
+
+
+def test_poll_reports_activity_for_scheduler(penpal):
+    """A poll reports activity only when some notebook changed."""
+    penpal.rmapi_adapter.list_documents_with_tag.return_value = (
+        True,
+        [{"ID": "nb-1", "VissibleName": "Notes", "Version": 3}],
+    )
+
+    assert penpal._poll_once() is True
+    assert penpal._poll_once() is False
+    assert penpal.get_notebook_stats()["skipped"] == 1
+    penpal.rmapi_adapter.list_documents_with_tag.assert_called_with(
+        penpal.pre_filter_tag
+    )
+    penpal.rmapi_adapter.find_tagged_notebooks.assert_not_called()
+
+
+def test_unchanged_notebook_is_not_downloaded_for_metadata(penpal):
+    """Skipping happens before metadata lookup, so nothing is downloaded."""
+    notebook = {"ID": "nb-1", "VissibleName": "Notes", "Version": 4}
+    penpal._check_notebook_for_tagged_pages(notebook)
+    penpal.rmapi_adapter.reset_mock()
+
+    penpal._check_notebook_for_tagged_pages(notebook)
+
+    penpal.rmapi_adapter.download_file.assert_not_called()
+    penpal.rmapi_adapter._check_document_for_tag.assert_not_called()
+    assert penpal.notebook_stats["skipped"] == 1
+
+
+def test_same_named_notebooks_download_to_separate_files(penpal):
+    """Local copies are keyed by notebook ID, not by name."""
+    paths = []
+    penpal.rmapi_adapter.download_file.side_effect = (
+        lambda doc_id, output_path, export_format="pdf": (
+            paths.append(output_path) or (False, "offline")
+        )
+    )
+
+    penpal._check_notebook_for_tagged_pages({"ID": "nb-1", "VissibleName": "Notes"})
+    penpal._check_notebook_for_tagged_pages({"ID": "nb-2", "VissibleName": "Notes"})
+
+    assert len(set(paths)) == 2
+    assert [os.path.basename(path) for path in paths] == ["nb-1.rmdoc", "nb-2.rmdoc"]
+
+
+def test_conversation_ids_are_captured_per_call(penpal, monkeypatch):
+    """Concurrent notebooks each keep the conversation ID of their own call."""
+    penpal.use_conversation_ids = True
+    penpal.claude_command = "claude"
+
+    def fake_run(cmd, **kwargs):
+        input_path = cmd.split("< ")[1].split()[0]
+        output_path = cmd.split("> ")[1].split()[0]
+        with open(input_path) as f:
+            notebook = f.read()
+        time.sleep(0.1)
+        with open(output_path, "w") as f:
+            f.write(f"answer for {notebook}")
+        return subprocess.CompletedProcess(cmd, 0, "", f"Conversation: id{notebook}")
+
+    monkeypatch.setattr(
+        "inklink.services.claude_penpal_service.subprocess.run", fake_run
+    )
+    threads = [
+        threading.Thread(
+            target=penpal._process_with_claude, args=(f"nb{i}", f"{i}", True)
+        )
+        for i in range(4)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(timeout=10)
+
+    assert penpal.notebook_conversation_ids == {f"nb{i}": f"id{i}" for i in range(4)}
+    assert penpal.notebook_contexts == {f"nb{i}": True for i in range(4)}
+
+
+def test_failed_write_back_is_retried(penpal, monkeypatch):
+    """Pages and notebook state are only recorded after a successful upload."""
+    monkeypatch.setattr(time, "sleep", lambda seconds: None)
+    penpal.rmapi_adapter.run_command.return_value = (True, "", "")
+    penpal.rmapi_adapter.upload_file.return_value = (False, "offline")
+    penpal._process_with_claude = MagicMock(return_value="Answer")
+
+    def download_notebook(doc_id, output_path, export_format="pdf"):
+        with zipfile.ZipFile(output_path, "w") as zf:
+            zf.writestr("doc.content", json.dumps({"pages": [{"id": "q1"}]}))
+            zf.writestr("doc/q1.rm", b"query")
+        return True, "downloaded"
+
+    penpal.rmapi_adapter.download_file.side_effect = download_notebook
+    penpal._extract_notebook_pages.return_value = [
+        {"id": "q1", "text": "#Lilly one", "tags": ["Lilly"], "hash": "h1"}
+    ]
+    notebook = {"ID": "doc", "VissibleName": "Notes", "Version": 1}
+
+    penpal._check_notebook_for_tagged_pages(notebook)
+
+    assert penpal.ledger.processed_pages("doc", penpal.LEDGER_MONITOR) == []
+    assert "doc" not in penpal.notebook_states
+
+    penpal.rmapi_adapter.upload_file.return_value = (True, "uploaded")
+    penpal._check_notebook_for_tagged_pages(notebook)
+
+    assert penpal._process_with_claude.call_count == 2
+    assert penpal.notebook_states["doc"]["version"] == 1
+    # Written through as soon as the upload is confirmed, not at poll end
+    reopened = ProcessedPageLedger(penpal.ledger.db_path)
+    assert reopened.processed_pages("doc", penpal.LEDGER_MONITOR) == ["q1"]
+    reopened.close()
+
+
+@pytest.mark.parametrize(
+    "members",
+    [
+        # No .content member at all
+        {"doc/q1.rm": b"query"},
+        # Query page only listed under cPages
+        {
+            "doc.content": json.dumps({"cPages": {"pages": [{"id": "q1"}]}}),
+            "doc/q1.rm": b"query",
+        },
+    ],
+)
+def test_unwritable_responses_are_not_marked_processed(penpal, monkeypatch, members):
+    """Pages whose response could not be written back are retried."""
+    monkeypatch.setattr(time, "sleep", lambda seconds: None)
+    penpal.rmapi_adapter.run_command.return_value = (True, "", "")
+    penpal.rmapi_adapter.upload_file.return_value = (True, "uploaded")
+    penpal._process_with_claude = MagicMock(return_value="Answer")
+
+    def download_notebook(doc_id, output_path, export_format="pdf"):
+        with zipfile.ZipFile(output_path, "w") as zf:
+            for name, data in members.items():
+                zf.writestr(name, data)
+        return True, "downloaded"
+
+    penpal.rmapi_adapter.download_file.side_effect = download_notebook
+    penpal._extract_notebook_pages.return_value = [
+        {"id": "q1", "text": "#Lilly one", "tags": ["Lilly"], "hash": "h1"}
+    ]
+
+    penpal._check_notebook_for_tagged_pages(
+        {"ID": "doc", "VissibleName": "Notes", "Version": 1}
+    )
+
+    assert penpal.ledger.processed_pages("doc", penpal.LEDGER_MONITOR) == []
+    assert "doc" not in penpal.notebook_states
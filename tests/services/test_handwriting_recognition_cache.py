@@ -0,0 +1,142 @@
+"""Tests for the SQLite-backed handwriting recognition cache."""
+
+import json
+import time
+
+from inklink.services.handwriting_recognition_cache import (
+    HandwritingRecognitionCache,
+    compute_stroke_fingerprint,
+)
+
+STROKES = [{"x": [1, 2, 3], "y": [4, 5, 6], "pressure": [0.5, 0.6, 0.7]}]
+OTHER_STROKES = [{"x": [9, 8], "y": [7, 6], "pressure": [0.1, 0.2]}]
+
+
+def test_round_trip_and_stats(tmp_path):
+    """Stored results come back and statistics track entries per type."""
+    cache = HandwritingRecognitionCache(str(tmp_path))
+    cache.put(STROKES, "Text", "en_US", {"text": "hello"})
+    cache.put(OTHER_STROKES, "Math", "en_US", {"text": "x^2"})
+
+    assert cache.get(STROKES, "Text", "en_US") == {"text": "hello"}
+    assert cache.get(STROKES, "Math", "en_US") is None
+
+    stats = cache.get_stats()
+    assert stats["entry_count"] == 2
+    assert stats["content_types"] == {"Text": 1, "Math": 1}
+    assert stats["languages"] == {"en_US": 2}
+    assert stats["hits"] == 1 and stats["misses"] == 1
+    assert list(tmp_path.iterdir()) != []
+    assert not list(tmp_path.glob("*.json"))
+
+
+def test_results_are_compressed(tmp_path):
+    """Large repetitive results take less space than their JSON."""
+    cache = HandwritingRecognitionCache(str(tmp_path))
+    result = {"text": "the same words " * 500}
+    cache.put(STROKES, "Text", "en_US", result)
+
+    assert cache.get_stats()["total_size_bytes"] < len(json.dumps(result)) / 10
+    assert cache.get(STROKES, "Text", "en_US") == result
+
+
+def test_expired_entries_removed_on_startup(tmp_path):
+    """Expired entries are dropped by the startup cleanup."""
+    cache = HandwritingRecognitionCache(str(tmp_path), max_age_seconds=0)
+    cache.put(STROKES, "Text", "en_US", {"text": "old"})
+    time.sleep(0.01)
+    cache.close()
+
+    restarted = HandwritingRecognitionCache(str(tmp_path), max_age_seconds=0)
+
+    assert restarted.get_stats()["entry_count"] == 0
+    assert restarted.get(STROKES, "Text", "en_US") is None
+
+
+def test_size_limit_evicts_least_recently_used(tmp_path):
+    """Exceeding max_bytes evicts the entry used longest ago."""
+    cache = HandwritingRecognitionCache(str(tmp_path))
+    cache.put(STROKES, "Text", "en_US", {"text": "first " * 10})
+    # Room for two entries of this size
+    cache.max_bytes = int(cache.get_stats()["total_size_bytes"] * 2.5)
+    cache.put(OTHER_STROKES, "Text", "en_US", {"text": "second " * 10})
+    cache.get(STROKES, "Text", "en_US")
+    cache.put(STROKES, "Math", "en_US", {"text": "third " * 10})
+
+    assert cache.get(OTHER_STROKES, "Text", "en_US") is None
+    assert cache.get(STROKES, "Text", "en_US") is not None
+    assert cache.get_stats()["evictions"] >= 1
+    assert cache.get_stats()["total_size_bytes"] <= cache.max_bytes
+
+
+def test_invalidate_clear_and_totals_after_restart(tmp_path):
+    """Totals are restored from the database and follow deletions."""
+    cache = HandwritingRecognitionCache(str(tmp_path))
+    cache.put(STROKES, "Text", "en_US", {"text": "a"})
+    cache.put(OTHER_STROKES, "Text", "de_DE", {"text": "b"})
+    assert cache.invalidate(STROKES, "Text", "en_US")
+    cache.close()
+
+    restarted = HandwritingRecognitionCache(str(tmp_path))
+    assert restarted.get_stats()["languages"] == {"de_DE": 1}
+    assert restarted.clear() == 1
+    assert restarted.get_stats()["entry_count"] == 0
+
+
+def test_legacy_json_entries_removed(tmp_path):
+    """Entry files of the old layout are deleted, other JSON files are kept."""
+    legacy = tmp_path / f"{'ab' * 32}_Text_en_US.json"
+    legacy.write_text(
+        json.dumps(
+            {
+                "timestamp": time.time(),
+                "result": {"text": "stale"},
+                "metadata": {"content_type": "Text", "language": "en_US"},
+            }
+        )
+    )
+    unrelated = tmp_path / "settings.json"
+    unrelated.write_text("{}")
+
+    cache = HandwritingRecognitionCache(str(tmp_path))
+
+    assert not legacy.exists()
+    assert unrelated.exists()
+    assert cache.get_stats()["entry_count"] == 0
+
+
+def test_fingerprint_depends_on_values_and_stroke_boundaries():
+    """Changing a value or moving a point between strokes changes the key."""
+    base = compute_stroke_fingerprint(STROKES)
+
+    assert compute_stroke_fingerprint([dict(STROKES[0])]) == base
+    assert compute_stroke_fingerprint([{**STROKES[0], "x": [1, 2, 4]}]) != base
+    split = [
+        {"x": [1], "y": [4], "pressure": [0.5]},
+        {"x": [2, 3], "y": [5, 6], "pressure": [0.6, 0.7]},
+    ]
+    assert compute_stroke_fingerprint(split) != base
+    assert (
+        compute_stroke_fingerprint(
+            [{**STROKES[0], "pressure": None, "p": [0.5, 0.6, 0.7]}]
+        )
+        == base
+    )
+
+
+def test_quantized_fingerprint_ignores_jitter(tmp_path):
+    """With a quantum, sub-step jitter hits the same cache entry."""
+    jittered = [
+        {
+            "x": [1.01, 1.98, 3.02],
+            "y": [4.0, 5.01, 5.99],
+            "pressure": [0.501, 0.6, 0.699],
+        }
+    ]
+    assert compute_stroke_fingerprint(jittered) != compute_stroke_fingerprint(STROKES)
+
+    cache = HandwritingRecognitionCache(
+        str(tmp_path), coord_quantum=0.5, pressure_quantum=0.05
+    )
+    cache.put(STROKES, "Text", "en_US", {"text": "hello"})
+    assert cache.get(jittered, "Text", "en_US") == {"text": "hello"}
@@ -1,12 +1,19 @@
 """Tests for the HandwritingRecognitionService using Claude Vision."""
 
+import os
+import threading
+import time
 from unittest.mock import MagicMock
 
 import pytest
 
+from inklink.config import CONFIG
 from inklink.services.handwriting_recognition_service import (
     HandwritingRecognitionService,
 )
+from inklink.services.page_transcript_cache import PageTranscriptCache
+from inklink.services.rendered_page_cache import RenderedPageCache
+from inklink.utils.single_flight import SingleFlight
 
 
 @pytest.fixture
@@ -40,6 +47,28 @@ def recognition_service(mock_handwriting_adapter):
     )
 
 
+@pytest.fixture
+def ink_files(recognition_service, tmp_path, monkeypatch):
+    """Write two pages and render them into a private cache."""
+    renders = []
+
+    def fake_render(page_data, dpi):
+        renders.append(page_data)
+        return b"png of " + page_data
+
+    monkeypatch.setattr(
+        "inklink.services.handwriting_recognition_service.render_page_png",
+        fake_render,
+    )
+    recognition_service.render_cache = RenderedPageCache(str(tmp_path / "renders"))
+    paths = []
+    for i in (1, 2):
+        path = tmp_path / f"test{i}.rm"
+        path.write_bytes(f"page {i}".encode())
+        paths.append(str(path))
+    return paths, renders
+
+
 def test_recognize_from_ink(recognition_service, mock_handwriting_adapter):
     """Test recognizing handwriting from an ink file."""
     # Arrange
@@ -55,10 +84,12 @@ def test_recognize_from_ink(recognition_service, mock_handwriting_adapter):
     )
 
 
-def test_recognize_multi_page_ink(recognition_service, mock_handwriting_adapter):
+def test_recognize_multi_page_ink(
+    recognition_service, mock_handwriting_adapter, ink_files
+):
     """Test recognizing handwriting from multiple ink files."""
     # Arrange
-    ink_files = ["/tmp/test1.rm", "/tmp/test2.rm"]
+    ink_files, renders = ink_files
     # Mock the vision adapter's multi-page processing to return formatted pages
     mock_handwriting_adapter.vision_adapter.process_multiple_images.return_value = (
         True,
@@ -73,8 +104,62 @@ def test_recognize_multi_page_ink(recognition_service, mock_handwriting_adapter)
     assert len(result["pages"]) == 2  # We have 2 pages
     assert result["pages"][0]["page_number"] == 1
     assert result["pages"][1]["page_number"] == 2
-    # Verify that render_rm_file was called for each file
-    assert mock_handwriting_adapter.render_rm_file.call_count == 2
+    # Each page was rendered once and stays in the cache
+    assert renders == [b"page 1", b"page 2"]
+    images = mock_handwriting_adapter.vision_adapter.process_multiple_images.call_args
+    for path in images.args[0]:
+        with open(path, "rb") as f:
+            assert f.read().startswith(b"png of page")
+
+    recognition_service.recognize_multi_page_ink(ink_files)
+    assert len(renders) == 2
+
+
+def test_multi_page_recognition_uses_page_strokes(
+    recognition_service, mock_handwriting_adapter, ink_files, monkeypatch
+):
+    """Each page's strokes reach the vision adapter and the page classifier."""
+    monkeypatch.setattr(
+        "inklink.services.handwriting_recognition_service.StrokeBatch.from_rm_file",
+        lambda path: f"strokes of {path}",
+    )
+    ink_files, _ = ink_files
+
+    recognition_service.recognize_multi_page_ink(ink_files)
+    call = mock_handwriting_adapter.vision_adapter.process_multiple_images.call_args
+    assert call.kwargs["page_strokes"] == [f"strokes of {path}" for path in ink_files]
+
+    # Without multi-image support, pages are classified locally from the strokes
+    mock_handwriting_adapter.vision_adapter = object()
+    classified = []
+    monkeypatch.setattr(
+        "inklink.services.handwriting_recognition_service.classify_strokes",
+        lambda strokes: classified.append(strokes) or ("math", 0.95),
+    )
+    recognition_service.recognize_multi_page_ink(ink_files)
+    assert classified == [f"strokes of {path}" for path in ink_files]
+    assert mock_handwriting_adapter.recognize_handwriting.call_args.args[1] == "Math"
+
+
+def test_per_page_fallback_never_asks_model_to_classify(
+    recognition_service, mock_handwriting_adapter, ink_files, monkeypatch
+):
+    """Pages the local classifier is unsure about are recognized as Text."""
+    monkeypatch.setattr(
+        "inklink.services.handwriting_recognition_service.StrokeBatch.from_rm_file",
+        lambda path: f"strokes of {path}",
+    )
+    monkeypatch.setattr(
+        "inklink.services.handwriting_recognition_service.classify_strokes",
+        lambda strokes: ("diagram", 0.1),
+    )
+    mock_handwriting_adapter.vision_adapter = object()
+    ink_files, _ = ink_files
+
+    recognition_service.recognize_multi_page_ink(ink_files)
+
+    calls = mock_handwriting_adapter.recognize_handwriting.call_args_list
+    assert [c.args[1] for c in calls] == ["Text", "Text"]
 
 
 def test_recognize_handwriting_direct(recognition_service, mock_handwriting_adapter):
@@ -139,3 +224,131 @@ def test_export_content(recognition_service, mock_handwriting_adapter):
     mock_handwriting_adapter.export_content.assert_called_once_with(
         content_id, format_type
     )
+
+
+def test_classify_region_uses_strokes_first(
+    recognition_service, mock_handwriting_adapter, monkeypatch
+):
+    """Confident stroke classification skips the vision request."""
+    monkeypatch.setattr(
+        "inklink.services.handwriting_recognition_service.StrokeBatch.from_rm_file",
+        MagicMock(),
+    )
+    monkeypatch.setattr(
+        "inklink.services.handwriting_recognition_service.classify_strokes",
+        MagicMock(side_effect=[("diagram", 0.8), ("math", 0.01)]),
+    )
+    mock_handwriting_adapter.recognize_handwriting.return_value = {
+        "success": True,
+        "result": "math",
+    }
+
+    assert recognition_service.classify_region("/tmp/a.png", "/tmp/a.rm") == "Diagram"
+    mock_handwriting_adapter.recognize_handwriting.assert_not_called()
+
+    assert recognition_service.classify_region("/tmp/b.png", "/tmp/b.rm") == "Math"
+    mock_handwriting_adapter.recognize_handwriting.assert_called_once()
+
+
+def test_concurrent_recognitions_of_a_page_are_collapsed(
+    mock_handwriting_adapter, tmp_path
+):
+    """One model call serves concurrent callers and fills the transcript cache."""
+    page = tmp_path / "page.rm"
+    page.write_bytes(b"rm lines")
+
+    def slow_recognition(path, content_type, language):
+        time.sleep(0.2)
+        return {"success": True, "text": "hello"}
+
+    mock_handwriting_adapter.process_rm_file.side_effect = slow_recognition
+    service = HandwritingRecognitionService(
+        claude_command="/usr/bin/claude",
+        model="claude-3",
+        handwriting_adapter=mock_handwriting_adapter,
+        transcript_cache=PageTranscriptCache(str(tmp_path / "cache")),
+        single_flight=SingleFlight(),
+    )
+    results = []
+
+    def recognize():
+        results.append(service.recognize_from_ink(file_path=str(page)))
+
+    threads = [threading.Thread(target=recognize) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(timeout=10)
+    # Same bytes sent as ink data arrive after the flight: answered by the cache
+    results.append(service.recognize_from_ink(ink_data=b"rm lines"))
+
+    assert results == [{"success": True, "text": "hello"}] * 5
+    mock_handwriting_adapter.process_rm_file.assert_called_once()
+    stats = service.get_recognition_stats()
+    assert stats["collapsed"] == 3
+    assert stats["executions"] == 2
+    assert stats["transcript_cache"]["hits"] == 1
+
+
+def test_default_transcript_cache_keys_on_language(
+    tmp_path, mock_handwriting_adapter, monkeypatch
+):
+    """Without an injected cache, results are cached per language and saved."""
+    monkeypatch.setitem(CONFIG, "TRANSCRIPT_CACHE_DIR", str(tmp_path / "transcripts"))
+    monkeypatch.setitem(CONFIG, "TRANSCRIPT_CACHE_SAVE_EVERY", 2)
+    page = tmp_path / "page.rm"
+    page.write_bytes(b"rm lines")
+    mock_handwriting_adapter.process_rm_file.return_value = {
+        "success": True,
+        "text": "hello",
+    }
+    service = HandwritingRecognitionService(
+        claude_command="/usr/bin/claude",
+        model="claude-3",
+        handwriting_adapter=mock_handwriting_adapter,
+        single_flight=SingleFlight(),
+    )
+
+    service.recognize_from_ink(file_path=str(page))
+    service.recognize_from_ink(file_path=str(page))
+    # Saving rewrites the whole file, so it waits for a second transcript
+    assert not os.path.exists(service.transcript_cache.cache_path)
+    service.recognize_from_ink(file_path=str(page), language="de_DE")
+
+    assert mock_handwriting_adapter.process_rm_file.call_count == 2
+    assert os.path.exists(service.transcript_cache.cache_path)
+
+
+def test_pages_the_rasterizer_rejects_use_adapter_renderer(
+    recognition_service, mock_handwriting_adapter, ink_files, monkeypatch, tmp_path
+):
+    """A page rmscene cannot parse is rendered by the adapter and cached."""
+    ink_files, _ = ink_files
+
+    def reject(page_data, dpi):
+        raise ValueError("Could not parse .rm data")
+
+    rendered = []
+
+    def adapter_render(rm_file):
+        image_path = tmp_path / (os.path.basename(rm_file) + ".png")
+        image_path.write_bytes(b"adapter png")
+        rendered.append(image_path)
+        return str(image_path)
+
+    monkeypatch.setattr(
+        "inklink.services.handwriting_recognition_service.render_page_png", reject
+    )
+    mock_handwriting_adapter.render_rm_file.side_effect = adapter_render
+
+    result = recognition_service.recognize_multi_page_ink(ink_files)
+    recognition_service.recognize_multi_page_ink(ink_files)
+
+    assert result["success"] is True
+    assert mock_handwriting_adapter.render_rm_file.call_count == 2
+    images = mock_handwriting_adapter.vision_adapter.process_multiple_images.call_args
+    for path in images.args[0]:
+        with open(path, "rb") as f:
+            assert f.read() == b"adapter png"
+    # The adapter's temporary images are removed once cached
+    assert rendered and not any(path.exists() for path in rendered)
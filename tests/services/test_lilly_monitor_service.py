@@ -0,0 +1,140 @@
+"""Tests for batched page extraction in the LillyMonitor."""
+
+import zipfile
+from unittest.mock import MagicMock
+
+import pytest
+
+from inklink.config import CONFIG
+from inklink.services.lilly_monitor_service import LillyMonitor
+
+
+@pytest.fixture
+def monitor(tmp_path, monkeypatch):
+    """Create a monitor with a mocked adapter downloading a three-page notebook."""
+    monkeypatch.setitem(CONFIG, "PROCESSED_LEDGER_PATH", str(tmp_path / "ledger.db"))
+    adapter = MagicMock()
+
+    def fake_download(doc_name, output_path, export_format="pdf"):
+        with zipfile.ZipFile(output_path, "w") as zf:
+            zf.writestr("doc.content", "{}")
+            for page_id in ("p1", "p2", "p3"):
+                zf.writestr(f"doc/{page_id}.rm", f"ink {page_id}".encode())
+        return True, "downloaded"
+
+    def fake_convert(rm_path, output_dir):
+        return True, rm_path[: -len(".rm")] + ".png"
+
+    adapter.download_file.side_effect = fake_download
+    adapter.convert_rm_to_png.side_effect = fake_convert
+    adapter.append_text_to_notebook.return_value = (True, "appended")
+
+    service = LillyMonitor(
+        adapter=adapter,
+        output_dir=str(tmp_path / "out"),
+        lilly_workspace=str(tmp_path / "workspace"),
+    )
+    service.process_with_claude_vision = MagicMock(return_value=(True, "Answer"))
+    service.update_knowledge_graph = MagicMock(return_value=True)
+    return service
+
+
+def test_tagged_pages_extracted_with_one_download(monitor):
+    """All tagged pages of a notebook come from a single download."""
+    doc = {
+        "id": "doc",
+        "name": "Notes",
+        "tagged_pages": [{"id": "p1", "index": 0}, {"id": "p3", "index": 2}],
+    }
+
+    monitor._process_tagged_document(doc)
+
+    monitor.adapter.download_file.assert_called_once()
+    assert monitor.adapter.convert_rm_to_png.call_count == 2
+    assert monitor.process_with_claude_vision.call_count == 2
+    assert monitor.adapter.append_text_to_notebook.call_count == 2
+
+
+def test_processed_pages_skipped_before_rendering(monitor):
+    """Pages answered earlier are neither written nor rendered again."""
+    doc = {
+        "id": "doc",
+        "name": "Notes",
+        "tagged_pages": [{"id": "p1", "index": 0}, {"id": "p2", "index": 1}],
+    }
+    monitor._process_tagged_document(doc)
+    monitor.adapter.convert_rm_to_png.reset_mock()
+
+    doc["tagged_pages"].append({"id": "p3", "index": 2})
+    success, extracted = monitor._extract_tagged_pages(doc, doc["tagged_pages"])
+
+    assert success
+    assert [entry["page"]["id"] for entry in extracted] == ["p3"]
+    monitor.adapter.convert_rm_to_png.assert_called_once()
+    assert extracted[0]["rm_path"].endswith("p3.rm")
+
+
+def test_check_consumes_adapter_changes(monitor):
+    """Tagged changes are processed and a failed one is left for a retry."""
+    content = {
+        "pageTags": [{"pageId": "p1", "tag": "Lilly"}],
+        "cPages": {"pages": [{"id": "p1"}]},
+    }
+    monitor.adapter.check_for_updates.return_value = [
+        {"id": "doc", "name": "Notes", "metadata": content, "tagged": True},
+        {
+            "id": "old",
+            "name": "Old",
+            "metadata": {},
+            "change": "deleted",
+            "tagged": False,
+        },
+    ]
+    monitor._process_tagged_document = MagicMock(side_effect=RuntimeError("boom"))
+
+    assert monitor._check_for_tagged_notebooks() is False
+
+    monitor.adapter.check_for_updates.assert_called_once_with(save_snapshot=False)
+    (doc,), _ = monitor._process_tagged_document.call_args
+    assert doc["tagged_pages"] == [{"index": 0, "id": "p1", "template": "Unknown"}]
+    assert not doc["has_notebook_tag"]
+    monitor.adapter.save_pending_snapshot.assert_called_once_with(retry=["doc"])
+
+
+@pytest.mark.parametrize("failure", ["claude", "append", "download"])
+def test_check_retries_documents_that_fail_without_raising(monitor, failure):
+    """Failed vision calls, write-backs and downloads keep the document pending."""
+    content = {
+        "pageTags": [{"pageId": "p1", "tag": "Lilly"}],
+        "cPages": {"pages": [{"id": "p1"}]},
+    }
+    monitor.adapter.check_for_updates.return_value = [
+        {"id": "doc", "name": "Notes", "metadata": content, "tagged": True},
+    ]
+    if failure == "claude":
+        monitor.process_with_claude_vision.return_value = (False, "Error: busy")
+    elif failure == "append":
+        monitor.adapter.append_text_to_notebook.return_value = (False, "upload failed")
+    else:
+        monitor.adapter.download_file.side_effect = None
+        monitor.adapter.download_file.return_value = (False, "not found")
+
+    assert monitor._check_for_tagged_notebooks() is True
+
+    monitor.adapter.save_pending_snapshot.assert_called_once_with(retry=["doc"])
+    assert monitor.ledger.processed_pages("doc", "lilly") == []
+
+
+def test_check_saves_snapshot_after_successful_processing(monitor):
+    """A processed document is not retried."""
+    content = {
+        "pageTags": [{"pageId": "p1", "tag": "Lilly"}],
+        "cPages": {"pages": [{"id": "p1"}]},
+    }
+    monitor.adapter.check_for_updates.return_value = [
+        {"id": "doc", "name": "Notes", "metadata": content, "tagged": True},
+    ]
+
+    assert monitor._check_for_tagged_notebooks() is True
+
+    monitor.adapter.save_pending_snapshot.assert_called_once_with(retry=[])
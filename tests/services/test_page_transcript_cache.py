@@ -0,0 +1,90 @@
+"""Tests for the persistent page transcript cache."""
+
+import pytest
+
+from inklink.services.page_transcript_cache import PageTranscriptCache
+
+
+@pytest.fixture
+def cache(tmp_path):
+    """Create a transcript cache in a temporary directory."""
+    return PageTranscriptCache(str(tmp_path / "cache"), max_entries=3)
+
+
+def test_hit_and_miss_stats(cache):
+    """Lookups are keyed by hash, model, content type and language."""
+    cache.put("abc", "sonnet", "Text", "#Lilly hello")
+
+    assert cache.get("abc", "sonnet", "Text") == "#Lilly hello"
+    assert cache.get("abc", "opus", "Text") is None
+    assert cache.get("abc", "sonnet", "Math") is None
+    assert cache.get("abc", "sonnet", "Text", "de_DE") is None
+
+    stats = cache.get_stats()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 3
+    assert stats["entry_count"] == 1
+
+
+def test_lru_eviction(cache):
+    """The least recently used entry is evicted first."""
+    for page_hash in ("a", "b", "c"):
+        cache.put(page_hash, "m", "Text", page_hash)
+    cache.get("a", "m", "Text")
+    cache.put("d", "m", "Text", "d")
+
+    assert cache.get("b", "m", "Text") is None
+    assert cache.get("a", "m", "Text") == "a"
+    assert cache.get_stats()["evictions"] == 1
+
+
+def test_size_limit(tmp_path):
+    """Entries are evicted to stay under the byte limit."""
+    cache = PageTranscriptCache(str(tmp_path), max_bytes=200)
+    cache.put("a", "m", "Text", "x" * 100)
+    cache.put("b", "m", "Text", "y" * 100)
+
+    assert cache.get("a", "m", "Text") is None
+    assert cache.get_stats()["total_size_bytes"] <= 200
+
+
+def test_persists_across_instances(cache, tmp_path):
+    """Saved transcripts are reloaded by a new cache."""
+    page = tmp_path / "page.rm"
+    page.write_bytes(b"rm lines")
+    page_hash = PageTranscriptCache.compute_page_hash(str(page))
+
+    cache.put(page_hash, "m", "Text", "#kg notes")
+    assert cache.save()
+
+    reloaded = PageTranscriptCache(cache.cache_dir)
+    assert reloaded.get(page_hash, "m", "Text") == "#kg notes"
+
+
+def test_save_if_due_batches_writes(tmp_path):
+    """The file is rewritten once enough transcripts are unsaved."""
+    cache = PageTranscriptCache(str(tmp_path), save_every=3, save_interval=3600)
+
+    for page_hash in ("a", "b"):
+        cache.put(page_hash, "m", "Text", page_hash)
+        assert cache.save_if_due()
+    assert not (tmp_path / PageTranscriptCache.INDEX_FILENAME).exists()
+
+    cache.put("c", "m", "Text", "c")
+    cache.save_if_due()
+    assert PageTranscriptCache(str(tmp_path)).get("c", "m", "Text") == "c"
+
+
+def test_save_if_due_saves_old_transcripts(tmp_path, monkeypatch):
+    """A few unsaved transcripts are written once they are old enough."""
+    cache = PageTranscriptCache(str(tmp_path), save_every=100, save_interval=60)
+    cache.put("a", "m", "Text", "a")
+    cache.save_if_due()
+    assert not (tmp_path / PageTranscriptCache.INDEX_FILENAME).exists()
+
+    later = cache._last_save + 61
+    monkeypatch.setattr(
+        "inklink.services.page_transcript_cache.time.monotonic", lambda: later
+    )
+    cache.save_if_due()
+    assert (tmp_path / PageTranscriptCache.INDEX_FILENAME).exists()
@@ -0,0 +1,176 @@
+"""Tests for the shared adaptive polling scheduler."""
+
+import threading
+import time
+
+import pytest
+
+from inklink.config import CONFIG
+from inklink.services.polling_scheduler import PollingJob, PollingScheduler
+
+
+@pytest.fixture
+def scheduler():
+    scheduler = PollingScheduler(max_workers=2)
+    yield scheduler
+    scheduler.stop(timeout=2)
+
+
+def wait_for(condition, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return condition()
+
+
+def test_idle_backoff_is_capped_by_config(monkeypatch):
+    """Without a job cap, idle runs back off to the configured multiple."""
+    monkeypatch.setitem(CONFIG, "SCHEDULER_MAX_BACKOFF", 8)
+    assert PollingJob("job", func=lambda: None, interval=60).max_interval == 480
+
+    monkeypatch.setitem(CONFIG, "SCHEDULER_MAX_BACKOFF", 1)
+    job = PollingJob("job", func=lambda: None, interval=60, jitter=0)
+    job.record_result(False)
+    assert job.current_interval == 60
+
+
+def test_interval_adapts_to_activity():
+    """Idle runs back off to the maximum; activity drops to the minimum."""
+    job = PollingJob("job", func=lambda: None, interval=10, max_interval=80, jitter=0)
+    assert (job.min_interval, job.max_interval) == (2.5, 80)
+
+    for expected in (20, 40, 80, 80):
+        job.record_result(False)
+        assert job.current_interval == expected
+
+    job.record_result(True)
+    assert job.current_interval == 2.5
+    assert job.next_delay() == 2.5
+
+
+def test_jitter_spreads_delays():
+    """Delays vary within the jitter fraction of the interval."""
+    job = PollingJob("job", func=lambda: None, interval=10, jitter=0.2)
+    delays = {job.next_delay() for _ in range(20)}
+
+    assert len(delays) > 1
+    assert all(8 <= delay <= 12 for delay in delays)
+
+
+def test_job_never_overlaps_itself(scheduler):
+    """Triggers during a run are coalesced into one follow-up run."""
+    active = []
+    peak = []
+
+    def slow_job():
+        active.append(1)
+        peak.append(len(active))
+        time.sleep(0.1)
+        active.pop()
+
+    job = scheduler.add_job(PollingJob("slow", func=slow_job, interval=60))
+    assert wait_for(lambda: job.running)
+    for _ in range(5):
+        scheduler.trigger("slow")
+
+    assert wait_for(lambda: job.runs == 2)
+    time.sleep(0.15)
+    assert job.runs == 2
+    assert max(peak) == 1
+    assert job.coalesced_triggers == 5
+
+
+def test_jobs_share_worker_budget():
+    """No more job bodies run at once than the scheduler has workers."""
+    scheduler = PollingScheduler(max_workers=1)
+    active = []
+    peak = []
+    guard = threading.Lock()
+
+    def job_body():
+        with guard:
+            active.append(1)
+            peak.append(len(active))
+        time.sleep(0.05)
+        with guard:
+            active.pop()
+        return True
+
+    try:
+        jobs = [
+            scheduler.add_job(PollingJob(f"job-{i}", func=job_body, interval=0.01))
+            for i in range(3)
+        ]
+        assert wait_for(lambda: all(job.runs >= 2 for job in jobs))
+    finally:
+        scheduler.stop(timeout=2)
+
+    assert max(peak) == 1
+
+
+def test_errors_back_off_and_removal_stops_job(scheduler):
+    """A failing job keeps being scheduled with a growing interval."""
+
+    def failing():
+        raise RuntimeError("cloud unavailable")
+
+    job = scheduler.add_job(
+        PollingJob("failing", func=failing, interval=0.01, max_interval=0.04)
+    )
+    assert wait_for(lambda: job.errors >= 3)
+    assert job.last_error == "cloud unavailable"
+    assert job.current_interval == pytest.approx(0.04)
+
+    assert scheduler.remove_job("failing")
+    runs = job.runs
+    time.sleep(0.1)
+    assert job.runs == runs
+    assert "failing" not in scheduler.get_stats()["jobs"]
+
+
+def test_errors_retry_after_error_interval():
+    """A job with an error interval retries failures after that delay."""
+    job = PollingJob(
+        "job", func=lambda: None, interval=3600, jitter=0, error_interval=300
+    )
+    job.record_error()
+    assert job.next_delay() == 300
+    assert job.current_interval == 3600
+
+    # Idle backoff resumes from the base interval, not the error delay
+    job.record_result(False)
+    assert job.next_delay() == 7200
+
+
+def test_fan_out_stays_within_worker_budget():
+    """Work fanned out by a job shares the budget and cannot deadlock on it."""
+    scheduler = PollingScheduler(max_workers=2)
+    active = []
+    peak = []
+    guard = threading.Lock()
+    results = []
+
+    def item_body(item):
+        with guard:
+            active.append(item)
+            peak.append(len(active))
+        time.sleep(0.02)
+        with guard:
+            active.remove(item)
+        return item * 2
+
+    def fan_out():
+        futures = scheduler.run_batch(item_body, range(6), max_parallel=4)
+        results.append([future.result() for future in futures])
+        return False
+
+    try:
+        # Both permits are held by jobs, so each fan-out runs on its own thread
+        for i in range(2):
+            scheduler.add_job(PollingJob(f"fan-out-{i}", func=fan_out, interval=60))
+        assert wait_for(lambda: len(results) == 2)
+    finally:
+        scheduler.stop(timeout=2)
+
+    assert results == [[0, 2, 4, 6, 8, 10]] * 2
+    assert max(peak) <= 2
@@ -0,0 +1,84 @@
+"""Tests for the durable processed-page ledger."""
+
+import pytest
+
+from inklink.services import processed_page_ledger
+from inklink.services.processed_page_ledger import (
+    STATUS_FAILED,
+    ProcessedPageLedger,
+    get_shared_ledger,
+)
+
+
+@pytest.fixture(autouse=True)
+def clear_shared_ledgers():
+    """Keep the shared registry from leaking between tests."""
+    processed_page_ledger._shared_ledgers.clear()
+    yield
+    processed_page_ledger._shared_ledgers.clear()
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    return str(tmp_path / "ledger.db")
+
+
+def test_processed_pages_survive_restart(db_path):
+    """Entries written by one ledger are seen by a reopened one."""
+    ledger = ProcessedPageLedger(db_path)
+    ledger.mark("nb-1", "p1", "hash-a", "penpal")
+    ledger.close()
+
+    reopened = ProcessedPageLedger(db_path)
+    assert reopened.is_processed("nb-1", "p1", "hash-a", "penpal")
+    assert reopened.processed_pages("nb-1", "penpal") == ["p1"]
+
+
+def test_key_includes_content_hash_and_monitor(db_path):
+    """An edited page or another monitor is not treated as processed."""
+    ledger = ProcessedPageLedger(db_path)
+    ledger.mark("nb-1", "p1", "hash-a", "penpal")
+
+    assert ledger.is_processed("nb-1", "p1", "hash-a", "penpal")
+    assert not ledger.is_processed("nb-1", "p1", "hash-b", "penpal")
+    assert not ledger.is_processed("nb-1", "p1", "hash-a", "lilly")
+
+
+def test_writes_are_batched(db_path):
+    """Marks are visible at once but committed together on flush."""
+    ledger = ProcessedPageLedger(db_path, batch_size=10)
+    for i in range(3):
+        ledger.mark("nb-1", f"p{i}", "hash", "cassidy")
+
+    assert ledger.is_processed("nb-1", "p0", "hash", "cassidy")
+    assert ledger.get_stats()["pending_writes"] == 3
+    assert ledger.get_stats()["entry_count"] == 0
+
+    assert ledger.flush() == 3
+    stats = ledger.get_stats()
+    assert (stats["entry_count"], stats["pending_writes"], stats["flushes"]) == (
+        3,
+        0,
+        1,
+    )
+
+
+def test_failed_attempts_are_recorded(db_path):
+    """Failures are kept with their attempt count but allow retries."""
+    ledger = ProcessedPageLedger(db_path)
+    ledger.mark("nb-1", "p1", "hash", "lilly", status=STATUS_FAILED, detail="boom")
+    ledger.flush()
+    ledger.mark("nb-1", "p1", "hash", "lilly", status=STATUS_FAILED, detail="boom")
+
+    assert not ledger.is_processed("nb-1", "p1", "hash", "lilly")
+    entry = ledger.get("nb-1", "p1", "hash", "lilly")
+    assert (entry["status"], entry["attempts"], entry["detail"]) == (
+        STATUS_FAILED,
+        2,
+        "boom",
+    )
+
+
+def test_shared_ledger_per_path(db_path):
+    """Monitors opening the same database share one ledger."""
+    assert get_shared_ledger(db_path) is get_shared_ledger(db_path)
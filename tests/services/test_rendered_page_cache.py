@@ -0,0 +1,95 @@
+"""Tests for the rendered page image cache."""
+
+import os
+from unittest.mock import MagicMock
+
+from inklink.services.rendered_page_cache import RenderedPageCache
+
+
+def test_key_covers_page_and_dpi(tmp_path):
+    """The page version and the DPI each select a different image."""
+    cache = RenderedPageCache(str(tmp_path))
+    cache.put("h1", 300, b"plain")
+    cache.put("h1", 150, b"small")
+
+    with open(cache.get("h1", 300), "rb") as f:
+        assert f.read() == b"plain"
+    with open(cache.get("h1", 150), "rb") as f:
+        assert f.read() == b"small"
+    assert cache.get("h2", 300) is None
+
+
+def test_get_or_render_renders_once(tmp_path):
+    """An unchanged page is rasterized only on the first request."""
+    cache = RenderedPageCache(str(tmp_path))
+    render = MagicMock(return_value=b"png")
+
+    first = cache.get_or_render("h1", render, 300)
+    second = cache.get_or_render("h1", render, 300)
+
+    assert first == second
+    render.assert_called_once()
+    assert cache.get_stats()["renders"] == 1
+    assert cache.get_stats()["hits"] == 1
+
+
+def test_least_recently_used_evicted_by_size(tmp_path):
+    """The size bound evicts the image used longest ago, on disk too."""
+    cache = RenderedPageCache(str(tmp_path), max_bytes=25)
+    old = cache.put("old", 300, b"x" * 10)
+    cache.put("used", 300, b"x" * 10)
+    cache.get("used", 300)
+    cache.put("new", 300, b"x" * 10)
+
+    assert not os.path.exists(old)
+    assert cache.get("used", 300) and cache.get("new", 300)
+    assert cache.get_stats()["evictions"] == 1
+
+
+def test_index_survives_restart(tmp_path):
+    """Images written by a previous process are found and counted."""
+    cache = RenderedPageCache(str(tmp_path))
+    cache.put("h1", 300, b"png")
+    (tmp_path / "ab").mkdir(exist_ok=True)
+    (tmp_path / "ab" / "partial.tmp").write_bytes(b"half")
+
+    restarted = RenderedPageCache(str(tmp_path))
+
+    assert restarted.get("h1", 300)
+    assert restarted.get_stats()["total_size_bytes"] == 3
+    assert not (tmp_path / "ab" / "partial.tmp").exists()
+
+
+def test_foreign_images_are_not_indexed(tmp_path):
+    """Images other code wrote into the cache directory are left alone."""
+    path = RenderedPageCache(str(tmp_path)).put("h1", 300, b"png")
+    foreign = os.path.splitext(path)[0] + "_preprocessed.png"
+    with open(foreign, "wb") as f:
+        f.write(b"x" * 100)
+
+    restarted = RenderedPageCache(str(tmp_path))
+
+    assert restarted.get_stats()["entry_count"] == 1
+    assert restarted.get_stats()["total_size_bytes"] == 3
+
+
+def test_cassidy_conversion_uses_cache(tmp_path, monkeypatch):
+    """Converting an unchanged page twice rasterizes it once."""
+    from inklink.adapters import cassidy_adapter
+
+    render = MagicMock(return_value=MagicMock())
+    monkeypatch.setattr(cassidy_adapter, "render_page", render)
+    monkeypatch.setattr(cassidy_adapter, "to_png_bytes", lambda image: b"png")
+    adapter = cassidy_adapter.CassidyAdapter(
+        "/usr/local/bin/rmapi",
+        render_cache=RenderedPageCache(str(tmp_path / "cache")),
+    )
+    page = tmp_path / "page.rm"
+    page.write_bytes(b"rm data")
+
+    for output in ("a", "b"):
+        success, png_path = adapter.convert_rm_to_png(str(page), str(tmp_path / output))
+        assert success
+        with open(png_path, "rb") as f:
+            assert f.read() == b"png"
+    render.assert_called_once()
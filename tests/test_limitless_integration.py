@@ -4,6 +4,7 @@ This module tests the Limitless adapter, service, and scheduler.
 """
 
 import os
+import threading
 from unittest.mock import Mock
 
 import pytest
@@ -147,11 +148,12 @@ def test_limitless_service_sync_logs(
     ]
 
     # Call method
-    success, message = limitless_service.sync_life_logs()
+    success, message, synced = limitless_service.sync_life_logs()
 
     # Check results
     assert success is True
     assert "Successfully synced" in message
+    assert synced == len(life_logs)
 
     # Verify knowledge graph service calls
     mock_kg_service.add_entity.assert_called()
@@ -179,7 +181,9 @@ def test_limitless_scheduler(limitless_scheduler, limitless_service):
 def test_limitless_scheduler_trigger_sync(limitless_scheduler, limitless_service):
     """Test Limitless scheduler trigger_sync method."""
     # Mock service sync method
-    limitless_service.sync_life_logs = Mock(return_value=(True, "Synced successfully"))
+    limitless_service.sync_life_logs = Mock(
+        return_value=(True, "Synced successfully", 1)
+    )
 
     # Call trigger_sync
     result = limitless_scheduler.trigger_sync()
@@ -194,3 +198,51 @@ def test_limitless_scheduler_trigger_sync(limitless_scheduler, limitless_service
     # Test force_full_sync
     limitless_scheduler.trigger_sync(force_full_sync=True)
     limitless_service.sync_life_logs.assert_called_with(force_full_sync=True)
+
+
+def test_limitless_scheduler_trigger_sync_waits_for_scheduled_sync(
+    limitless_scheduler,
+):
+    """A manual sync runs after a scheduled one instead of alongside it."""
+    started = threading.Event()
+    release = threading.Event()
+    calls = []
+
+    def sync_life_logs(force_full_sync=False):
+        calls.append(force_full_sync)
+        if len(calls) == 1:
+            started.set()
+            release.wait(5)
+        return True, "Synced", 1
+
+    limitless_scheduler.limitless_service.sync_life_logs = sync_life_logs
+    scheduled = threading.Thread(target=limitless_scheduler._scheduled_sync)
+    scheduled.start()
+    assert started.wait(5)
+
+    results = []
+    manual = threading.Thread(
+        target=lambda: results.append(
+            limitless_scheduler.trigger_sync(force_full_sync=True)
+        )
+    )
+    manual.start()
+    manual.join(0.2)
+    assert calls == [False]
+
+    release.set()
+    scheduled.join(5)
+    manual.join(5)
+    assert calls == [False, True]
+    assert results[0]["success"] is True
+    assert results[0]["message"] == "Synced"
+
+
+def test_limitless_scheduled_sync_reports_activity(limitless_scheduler):
+    """Only syncs that stored new life logs count as activity."""
+    service = limitless_scheduler.limitless_service
+    service.sync_life_logs = Mock(return_value=(True, "No new life logs to sync", 0))
+    assert limitless_scheduler._scheduled_sync() is False
+
+    service.sync_life_logs.return_value = (True, "Synced 2 life logs", 2)
+    assert limitless_scheduler._scheduled_sync() is True
@@ -406,7 +406,7 @@ class TestLimitlessMockIntegration:
         )
 
         # Run sync
-        success, message = mock_limitless_service.sync_life_logs()
+        success, message, _ = mock_limitless_service.sync_life_logs()
 
         assert success is True
         assert "Successfully synced" in message
@@ -469,7 +469,7 @@ class TestLimitlessMockIntegration:
         """Test manually triggering a sync."""
         # Replace sync_life_logs with mock to avoid actual processing
         mock_limitless_service.sync_life_logs = Mock(
-            return_value=(True, "Mock sync success")
+            return_value=(True, "Mock sync success", 1)
         )
 
         # Trigger sync
@@ -492,7 +492,7 @@ class TestLimitlessMockIntegration:
         """Test the scheduler loop with a very short interval."""
         # Replace sync_life_logs with mock to avoid actual processing
         mock_limitless_service.sync_life_logs = Mock(
-            return_value=(True, "Mock sync success")
+            return_value=(True, "Mock sync success", 1)
         )
 
         # Override sync interval for test
@@ -662,7 +662,7 @@ class TestLimitlessLiveIntegration:
 
         # Run a sync with limited logs (from past day to avoid too many)
         live_limitless_service.last_sync_time = datetime.now() - timedelta(days=1)
-        success, message = live_limitless_service.sync_life_logs()
+        success, message, _ = live_limitless_service.sync_life_logs()
 
         assert success is True
         logger.info(f"Sync result: {message}")
@@ -177,7 +177,7 @@ class TestLimitlessLiveIntegration:
         limitless_service.last_sync_time = datetime.now() - timedelta(days=7)
 
         start_time = time.time()
-        success, message = limitless_service.sync_life_logs()
+        success, message, _ = limitless_service.sync_life_logs()
         end_time = time.time()
 
         assert success is True
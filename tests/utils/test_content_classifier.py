@@ -0,0 +1,125 @@
+"""Tests for the local stroke-statistics content classifier."""
+
+from unittest.mock import MagicMock, patch
+
+import numpy as np
+import pytest
+
+from inklink.adapters.claude_vision_adapter import ClaudeVisionAdapter
+from inklink.utils.content_classifier import classify_strokes, stroke_features
+from inklink.utils.stroke_batch import StrokeBatch
+
+
+def loop(cx, cy, size, rng):
+    """A small closed glyph-like stroke."""
+    t = np.linspace(0, 2 * np.pi * 1.3, 24)
+    return (
+        cx + size * 0.4 * np.cos(t) + rng.normal(0, 0.5, 24),
+        cy + size * 0.5 * np.sin(t) + rng.normal(0, 0.5, 24),
+    )
+
+
+def line(x0, y0, x1, y1):
+    """A straight stroke."""
+    return np.linspace(x0, x1, 20), np.linspace(y0, y1, 20)
+
+
+def text_page(rng):
+    """Rows of evenly sized glyphs."""
+    return [
+        loop(-500 + col * 32, 200 + row * 70, 30 * rng.uniform(0.9, 1.1), rng)
+        for row in range(6)
+        for col in range(30)
+    ]
+
+
+def math_page(rng):
+    """Glyphs of mixed sizes with equals signs and fraction bars."""
+    strokes = []
+    for row in range(4):
+        y = 200 + row * 150
+        x = -500
+        for k in range(12):
+            size = 30 * rng.choice([0.5, 1, 1, 2.2])
+            strokes.append(loop(x, y, size, rng))
+            x += 40
+            if k % 4 == 3:
+                strokes += [line(x, y, x + 25, y), line(x, y + 10, x + 25, y + 10)]
+                x += 40
+        strokes.append(line(-500, y + 40, -300, y + 40))
+    return strokes
+
+
+def diagram_page(rng):
+    """Labeled boxes joined by connectors."""
+    strokes = []
+    for i in range(4):
+        x0, y0 = -500 + (i % 2) * 500, 200 + (i // 2) * 400
+        xs = np.concatenate(
+            [
+                np.linspace(x0, x0 + 300, 10),
+                np.full(10, x0 + 300),
+                np.linspace(x0 + 300, x0, 10),
+                np.full(10, x0),
+            ]
+        )
+        ys = np.concatenate(
+            [
+                np.full(10, y0),
+                np.linspace(y0, y0 + 150, 10),
+                np.full(10, y0 + 150),
+                np.linspace(y0 + 150, y0, 10),
+            ]
+        )
+        strokes.append((xs, ys))
+        strokes += [loop(x0 + 40 + c * 32, y0 + 75, 30, rng) for c in range(5)]
+    strokes += [line(-200, 275 + i * 100, 0, 275 + i * 100) for i in range(3)]
+    return strokes
+
+
+def batch(strokes):
+    """Build a StrokeBatch from (x, y) arrays."""
+    return StrokeBatch.from_strokes([(list(x), list(y)) for x, y in strokes])
+
+
+@pytest.mark.parametrize(
+    "page, expected",
+    [(text_page, "text"), (math_page, "math"), (diagram_page, "diagram")],
+)
+def test_pages_are_classified(page, expected):
+    """Each kind of page is recognized with a usable confidence."""
+    content_type, confidence = classify_strokes(batch(page(np.random.default_rng(0))))
+
+    assert content_type == expected
+    assert confidence > 0.3
+
+
+def test_features_describe_the_page():
+    """Long strokes and bars show up in the features of their pages."""
+    rng = np.random.default_rng(1)
+
+    diagram = stroke_features(batch(diagram_page(rng)))
+    math = stroke_features(batch(math_page(rng)))
+
+    assert diagram["long_fraction"] > 0.2
+    assert math["bar_fraction"] > 0.2
+    assert math["size_cv"] > diagram["size_cv"]
+
+
+def test_too_few_strokes_have_no_confidence():
+    """A nearly empty page is left to the fallback."""
+    assert classify_strokes(batch([line(0, 0, 10, 0)])) == ("text", 0.0)
+
+
+def test_adapter_uses_strokes_before_image_heuristic(tmp_path):
+    """The image is only inspected when the stroke classifier is unsure."""
+    with patch("subprocess.run", return_value=MagicMock(returncode=0)):
+        adapter = ClaudeVisionAdapter(claude_command="claude")
+    missing_image = str(tmp_path / "missing.png")
+    rng = np.random.default_rng(0)
+
+    assert adapter.detect_content_type(missing_image, batch(math_page(rng))) == "math"
+    with patch.object(adapter.logger, "warning") as warning:
+        sparse = batch([line(0, 0, 10, 0)])
+        assert adapter.detect_content_type(missing_image, sparse) == "text"
+    warning.assert_called_once()
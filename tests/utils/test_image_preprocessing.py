@@ -0,0 +1,111 @@
+"""Tests for in-memory NumPy image preprocessing."""
+
+import io
+import os
+
+import numpy as np
+import pytest
+from PIL import Image
+
+from inklink.adapters.claude_vision_adapter import ClaudeVisionAdapter
+from inklink.utils.image_preprocessing import (
+    binarize,
+    encode_gray,
+    load_gray,
+    preprocess_array,
+    preprocess_batch,
+    preprocess_image_bytes,
+)
+
+
+def shaded_page():
+    """A page whose paper darkens from left to right, with faint strokes."""
+    width = 400
+    paper = np.linspace(250, 120, width)
+    page = np.tile(paper, (200, 1))
+    ink_columns = [40, 200, 360]
+    for x in ink_columns:
+        page[50:150, x : x + 4] -= 60
+    return page.astype(np.uint8), ink_columns
+
+
+def test_sauvola_survives_uneven_paper():
+    """Local thresholds keep strokes and paper where a global one cannot."""
+    page, ink_columns = shaded_page()
+
+    result = binarize(page)
+
+    for x in ink_columns:
+        assert (result[60:140, x : x + 4] == 0).mean() > 0.9
+    # Paper away from the strokes stays white on both the light and dark side
+    assert (result[:, 100:160] == 255).mean() > 0.95
+    assert (result[:, 280:340] == 255).mean() > 0.95
+    # A single global threshold cannot separate dark paper from light ink
+    global_level = page.mean()
+    assert (page[:, 280:340] < global_level).all()
+
+
+def test_profiles_by_content_type():
+    """Text is binarized; math and diagrams keep their gray levels."""
+    page, _ = shaded_page()
+
+    text = preprocess_array(page, "text")
+    math = preprocess_array(page, "math")
+    diagram = preprocess_array(page, "Diagram")
+
+    assert set(np.unique(text)) <= {0, 255}
+    assert len(np.unique(math)) > 2
+    assert len(np.unique(diagram)) > 2
+    assert text.shape == math.shape == diagram.shape == page.shape
+    # Unknown types fall back to text, thresholding can be turned off
+    assert np.array_equal(preprocess_array(page, "other"), text)
+    assert len(np.unique(preprocess_array(page, apply_thresholding=False))) > 2
+
+
+def test_bytes_round_trip(tmp_path):
+    """Paths and bytes give the same encoded result in the asked format."""
+    page, _ = shaded_page()
+    path = tmp_path / "page.png"
+    Image.fromarray(page).save(path)
+
+    from_path = preprocess_image_bytes(str(path))
+    from_bytes = preprocess_image_bytes(path.read_bytes())
+
+    assert from_path == from_bytes
+    assert np.array_equal(load_gray(from_path), preprocess_array(page))
+    webp = Image.open(io.BytesIO(encode_gray(page, "webp")))
+    assert webp.format == "WEBP"
+    with pytest.raises(ValueError):
+        encode_gray(page, "gif")
+
+
+def test_batch_in_process_pool_matches_serial():
+    """The process pool returns the serial results in input order."""
+    page, _ = shaded_page()
+    images = [encode_gray(page), encode_gray(np.flipud(page).copy())]
+    types = ["text", "math"]
+
+    serial = preprocess_batch(images, types, max_workers=1)
+    pooled = preprocess_batch(images, types, max_workers=2)
+
+    assert pooled == serial
+    assert serial[0] == preprocess_image_bytes(images[0], "text")
+
+
+def test_adapter_sends_preprocessed_image_without_intermediate_file(tmp_path):
+    """The NumPy backend writes only the image handed to the CLI."""
+    page, _ = shaded_page()
+    path = tmp_path / "page.png"
+    Image.fromarray(page).save(path)
+    adapter = ClaudeVisionAdapter(
+        claude_command="true", preprocessing_backend="numpy", crop_to_ink=False
+    )
+
+    vision_path = adapter._write_preprocessed(str(path), "text")
+
+    try:
+        with open(vision_path, "rb") as f:
+            assert f.read() == adapter.preprocess_image_bytes(str(path), "text")
+    finally:
+        os.unlink(vision_path)
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["page.png"]
@@ -0,0 +1,149 @@
+"""Tests for the in-process .rm page rasterizer."""
+
+import io
+import json
+import zipfile
+
+import numpy as np
+import pytest
+from PIL import Image
+
+rmscene = pytest.importorskip("rmscene")
+
+from rmscene import CrdtId, si, write_blocks  # noqa: E402
+from rmscene.crdt_sequence import CrdtSequenceItem  # noqa: E402
+from rmscene.scene_stream import SceneLineItemBlock  # noqa: E402
+
+from inklink.utils.rm_rasterizer import (  # noqa: E402
+    DEVICE_DPI,
+    PAGE_HEIGHT,
+    PAGE_WIDTH,
+    render_notebook,
+    render_page,
+    render_page_array,
+    render_page_png,
+)
+
+
+def rm_bytes(strokes):
+    """Build .rm data from (tool, [(x, y, pressure), ...][, width]) strokes."""
+    blocks = []
+    for i, (tool, points, *width) in enumerate(strokes):
+        line = si.Line(
+            color=si.PenColor.BLACK,
+            tool=tool,
+            points=[
+                si.Point(
+                    x=x, y=y, speed=0, direction=0, width=(width or [16])[0], pressure=p
+                )
+                for x, y, p in points
+            ],
+            thickness_scale=1.0,
+            starting_length=0.0,
+        )
+        blocks.append(
+            SceneLineItemBlock(
+                parent_id=CrdtId(0, 11),
+                item=CrdtSequenceItem(
+                    item_id=CrdtId(1, 20 + i),
+                    left_id=CrdtId(0, 0),
+                    right_id=CrdtId(0, 0),
+                    deleted_length=0,
+                    value=line,
+                ),
+            )
+        )
+    buffer = io.BytesIO()
+    write_blocks(buffer, blocks)
+    return buffer.getvalue()
+
+
+def horizontal(y, pressure=255, x0=-300, x1=300):
+    """Points of a horizontal stroke."""
+    return [(float(x), float(y), pressure) for x in range(x0, x1 + 1, 20)]
+
+
+def ink_rows(pixels, x):
+    """Number of inked pixels in a column."""
+    return int((pixels[:, x] < 128).sum())
+
+
+def test_page_rendered_at_device_resolution():
+    """At device DPI one page unit is one pixel and x is page-centered."""
+    data = rm_bytes([(si.Pen.FINELINER_2, horizontal(500))])
+
+    pixels = render_page_array(data, dpi=DEVICE_DPI)
+
+    assert pixels.shape == (PAGE_HEIGHT, PAGE_WIDTH)
+    assert pixels[500, PAGE_WIDTH // 2] == 0
+    assert pixels[100, PAGE_WIDTH // 2] == 255
+    assert pixels[500, 100] == 255
+
+
+def test_pressure_changes_ballpoint_width():
+    """Light pressure draws a thinner line for pressure-sensitive pens."""
+    data = rm_bytes(
+        [
+            (si.Pen.BALLPOINT_2, horizontal(400, pressure=255)),
+            (si.Pen.BALLPOINT_2, horizontal(800, pressure=20)),
+            (si.Pen.FINELINER_2, horizontal(1200, pressure=20)),
+        ]
+    )
+
+    pixels = render_page_array(data, dpi=DEVICE_DPI)
+    column = PAGE_WIDTH // 2
+    firm = ink_rows(pixels[:600], column)
+    light = ink_rows(pixels[600:1000], column)
+    fineliner = ink_rows(pixels[1000:], column)
+
+    assert firm > light > 0
+    assert fineliner == firm
+
+
+def test_highlighter_does_not_cover_ink():
+    """Highlights are composited under the ink drawn before them."""
+    data = rm_bytes(
+        [
+            (si.Pen.FINELINER_2, horizontal(500)),
+            (si.Pen.HIGHLIGHTER_2, horizontal(500, x0=-100, x1=100), 120),
+        ]
+    )
+
+    pixels = render_page_array(data, dpi=DEVICE_DPI)
+
+    assert pixels[500, PAGE_WIDTH // 2] == 0
+    assert 0 < pixels[490, PAGE_WIDTH // 2] < 255
+
+
+def test_png_and_scaled_output():
+    """PNG bytes decode to a grayscale image scaled by the requested DPI."""
+    data = rm_bytes([(si.Pen.FINELINER_2, horizontal(500))])
+
+    image = Image.open(io.BytesIO(render_page_png(data, dpi=2 * DEVICE_DPI)))
+
+    assert image.mode == "L"
+    assert image.size == (2 * PAGE_WIDTH, 2 * PAGE_HEIGHT)
+    assert render_page(data).size[0] > PAGE_WIDTH
+
+
+def test_invalid_data_raises_value_error():
+    """Unparseable pages raise ValueError."""
+    with pytest.raises(ValueError):
+        render_page(b"not an rm file")
+
+
+def test_render_notebook_batch(tmp_path):
+    """All pages of an archive are rendered from one open archive."""
+    path = tmp_path / "notebook.rmdoc"
+    with zipfile.ZipFile(path, "w") as zf:
+        zf.writestr("doc.content", json.dumps({"pages": [{"id": "p1"}, {"id": "p2"}]}))
+        zf.writestr("doc/p1.rm", rm_bytes([(si.Pen.FINELINER_2, horizontal(300))]))
+        zf.writestr("doc/p2.rm", b"broken")
+
+    pages = render_notebook(str(path), dpi=DEVICE_DPI, output="array")
+
+    assert list(pages) == ["p1"]
+    assert isinstance(pages["p1"], np.ndarray)
+    assert pages["p1"][300, PAGE_WIDTH // 2] == 0
+    with pytest.raises(ValueError):
+        render_notebook(str(path), output="svg")
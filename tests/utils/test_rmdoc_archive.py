@@ -0,0 +1,103 @@
+"""Tests for in-memory rmdoc archive reading."""
+
+import json
+import zipfile
+
+import pytest
+
+from inklink.utils.rmdoc_archive import RmdocArchive
+
+DOC_ID = "doc-1"
+
+
+@pytest.fixture
+def rmdoc_path(tmp_path):
+    """Create a small notebook archive."""
+    path = tmp_path / "notebook.rmdoc"
+    content = {
+        "cPages": {"pages": [{"id": "p2"}, {"id": "p1"}]},
+        "pageTags": [{"name": "Lilly", "pageId": "p2"}],
+    }
+    with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as zf:
+        zf.writestr(f"{DOC_ID}.content", json.dumps(content))
+        zf.writestr(f"{DOC_ID}.metadata", json.dumps({"visibleName": "Notes"}))
+        zf.writestr(f"{DOC_ID}/p1.rm", b"page one")
+        zf.writestr(f"{DOC_ID}/p2.rm", b"page two")
+        zf.writestr(f"{DOC_ID}/p3.rm", b"page three")
+        zf.writestr(f"{DOC_ID}/p1-metadata.json", json.dumps({"tags": ["kg"]}))
+    return str(path)
+
+
+def test_index_and_lazy_json(rmdoc_path):
+    """Members are indexed and JSON files parsed on access."""
+    with RmdocArchive(rmdoc_path) as archive:
+        assert archive.doc_id == DOC_ID
+        assert archive.metadata == {"visibleName": "Notes"}
+        assert archive.content["pageTags"][0]["pageId"] == "p2"
+        assert archive.page_metadata("p1") == {"tags": ["kg"]}
+        assert archive.page_metadata("p2") is None
+
+
+def test_pages_in_notebook_order(rmdoc_path):
+    """Listed pages keep their .content order; unlisted pages follow."""
+    with RmdocArchive(rmdoc_path) as archive:
+        assert archive.page_ids() == ["p2", "p1", "p3"]
+        assert archive.read_page("p1") == b"page one"
+        assert bytes(archive.page_view("p2")[:4]) == b"page"
+
+
+def test_extract_single_page(rmdoc_path, tmp_path):
+    """Only the requested page is written to disk."""
+    out_dir = tmp_path / "out"
+    with RmdocArchive(rmdoc_path) as archive:
+        path = archive.extract_page("p3", str(out_dir))
+
+    assert [p.name for p in out_dir.iterdir()] == ["p3.rm"]
+    with open(path, "rb") as f:
+        assert f.read() == b"page three"
+
+
+def test_open_from_bytes(rmdoc_path):
+    """Archives can be read from bytes already in memory."""
+    with open(rmdoc_path, "rb") as f:
+        data = f.read()
+    with RmdocArchive(data) as archive:
+        assert archive.page_member("p1") == f"{DOC_ID}/p1.rm"
+        assert archive.path is None
+
+
+def test_write_updated_copies_unchanged_members(rmdoc_path, tmp_path):
+    """Only changed members are recompressed; the rest keep their bytes."""
+    output = str(tmp_path / "updated.rmdoc")
+    with RmdocArchive(rmdoc_path) as archive:
+        archive.write_updated(
+            output,
+            {f"{DOC_ID}.content": json.dumps({"pages": []}), f"{DOC_ID}/p4.rm": b"new"},
+            removals=[f"{DOC_ID}/p3.rm"],
+        )
+
+    with zipfile.ZipFile(rmdoc_path) as src, zipfile.ZipFile(output) as out:
+        assert out.testzip() is None
+        assert out.namelist() == [
+            f"{DOC_ID}.content",
+            f"{DOC_ID}.metadata",
+            f"{DOC_ID}/p1.rm",
+            f"{DOC_ID}/p2.rm",
+            f"{DOC_ID}/p1-metadata.json",
+            f"{DOC_ID}/p4.rm",
+        ]
+        assert json.loads(out.read(f"{DOC_ID}.content")) == {"pages": []}
+        assert out.read(f"{DOC_ID}/p4.rm") == b"new"
+        original = src.getinfo(f"{DOC_ID}/p1.rm")
+        copied = out.getinfo(f"{DOC_ID}/p1.rm")
+        assert (copied.CRC, copied.compress_size) == (
+            original.CRC,
+            original.compress_size,
+        )
+
+
+def test_write_updated_refuses_own_source(rmdoc_path):
+    """Writing over the source archive would corrupt the copied members."""
+    with RmdocArchive(rmdoc_path) as archive:
+        with pytest.raises(ValueError):
+            archive.write_updated(rmdoc_path, {})
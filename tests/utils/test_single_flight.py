@@ -0,0 +1,74 @@
+"""Tests for single-flight call deduplication."""
+
+import threading
+import time
+
+import pytest
+
+from inklink.utils.single_flight import SingleFlight
+
+
+def run_concurrently(count, target):
+    """Start count threads running target and wait for them."""
+    threads = [threading.Thread(target=target) for _ in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(timeout=10)
+
+
+def test_concurrent_calls_share_one_execution():
+    """Callers with the same key wait for the leader and share its result."""
+    group = SingleFlight()
+    executions = []
+    results = []
+
+    def work():
+        executions.append(1)
+        time.sleep(0.2)
+        return "result"
+
+    run_concurrently(5, lambda: results.append(group.do("page", work)))
+
+    assert len(executions) == 1
+    assert sorted(shared for _, shared in results) == [False, True, True, True, True]
+    assert {result for result, _ in results} == {"result"}
+    assert group.get_stats() == {
+        "calls": 5,
+        "executions": 1,
+        "collapsed": 4,
+        "in_flight": 0,
+    }
+
+
+def test_keys_are_independent_and_sequential_calls_rerun():
+    """Different keys run separately; a finished call is not remembered."""
+    group = SingleFlight()
+
+    assert group.do("a", lambda: 1) == (1, False)
+    assert group.do("b", lambda: 2) == (2, False)
+    assert group.do("a", lambda: 3) == (3, False)
+    assert group.get_stats()["collapsed"] == 0
+
+
+def test_errors_reach_every_waiter():
+    """An exception in the leader is raised in all callers sharing it."""
+    group = SingleFlight()
+    errors = []
+
+    def fail():
+        time.sleep(0.2)
+        raise RuntimeError("model unavailable")
+
+    def call():
+        try:
+            group.do("page", fail)
+        except RuntimeError as e:
+            errors.append(str(e))
+
+    run_concurrently(3, call)
+
+    assert errors == ["model unavailable"] * 3
+    with pytest.raises(RuntimeError):
+        group.do("page", fail)
+    assert group.get_stats()["executions"] == 2
@@ -0,0 +1,157 @@
+"""Tests for the columnar stroke representation."""
+
+import io
+
+import numpy as np
+import pytest
+
+from inklink.services.handwriting_recognition_cache import compute_stroke_fingerprint
+from inklink.utils.stroke_batch import StrokeBatch
+
+STROKES = [
+    {"id": "a", "x": [0.0, 3.0, 3.0], "y": [0.0, 4.0, 8.0], "p": [0.1, 0.2, 0.3]},
+    {"id": "b", "x": [10.0], "y": [5.0], "p": [0.5]},
+    {"id": "c", "x": [-2.0, 6.0], "y": [1.0, 1.0], "p": [0.4, 0.6]},
+]
+
+
+def test_round_trips_both_dict_formats():
+    """Column and point dictionaries convert to the same batch and back."""
+    batch = StrokeBatch.from_dicts(STROKES)
+    assert len(batch) == 3
+    assert batch.num_points == 6
+    assert batch.offsets.tolist() == [0, 3, 4, 6]
+
+    columns = batch.to_dicts()
+    assert [s["id"] for s in columns] == ["a", "b", "c"]
+    assert columns[0]["x"] == [0.0, 3.0, 3.0]
+    assert columns[2]["p"] == pytest.approx([0.4, 0.6])
+
+    again = StrokeBatch.from_dicts(batch.to_point_dicts())
+    assert again.offsets.tolist() == batch.offsets.tolist()
+    np.testing.assert_array_equal(again.y, batch.y)
+    np.testing.assert_array_equal(again.pressure, batch.pressure)
+
+
+def test_accepts_numpy_columns():
+    """Array columns are used as given; empty ones are filled with zeros."""
+    batch = StrokeBatch.from_strokes([(np.array([1.0, 2.0]), np.array([3.0, 4.0]))])
+    assert batch.x.tolist() == [1.0, 2.0]
+    assert batch.y.tolist() == [3.0, 4.0]
+    assert batch.pressure.tolist() == [0.0, 0.0]
+
+    batch = StrokeBatch.from_dicts(
+        [
+            {
+                "x": np.array([1.0, 2.0]),
+                "y": np.array([3.0, 4.0]),
+                "pressure": np.array([]),
+                "p": np.array([0.5, 0.7]),
+            }
+        ]
+    )
+    assert batch.y.tolist() == [3.0, 4.0]
+    assert batch.pressure.tolist() == pytest.approx([0.5, 0.7])
+    assert batch.t.tolist() == [0.0, 0.0]
+
+
+def test_stroke_views_and_geometry():
+    """Per-stroke access is a view and geometry is computed per stroke."""
+    batch = StrokeBatch.from_dicts(STROKES)
+
+    stroke = batch.stroke(2)
+    assert stroke["x"].tolist() == [-2.0, 6.0]
+    assert np.shares_memory(stroke["x"], batch.x)
+
+    assert batch.bboxes().tolist() == [
+        [0.0, 0.0, 3.0, 8.0],
+        [10.0, 5.0, 10.0, 5.0],
+        [-2.0, 1.0, 6.0, 1.0],
+    ]
+    assert batch.bbox() == (-2.0, 0.0, 10.0, 8.0)
+    assert batch.lengths().tolist() == pytest.approx([9.0, 0.0, 8.0])
+
+
+def test_resample_spaces_points_evenly():
+    """Resampled strokes keep their endpoints with points at the spacing."""
+    batch = StrokeBatch.from_dicts(STROKES).resample(2.0)
+
+    first = batch.stroke(0)
+    assert first["x"][0] == 0.0 and first["y"][-1] == 8.0
+    # Arc positions 0, 2, 4, 6, 8 plus the end at 9
+    assert len(first["x"]) == 6
+    assert first["x"][1:3].tolist() == pytest.approx([1.2, 2.4])
+    assert batch.stroke(1)["x"].tolist() == [10.0]
+    assert batch.stroke(2)["x"].tolist() == pytest.approx([-2.0, 0.0, 2.0, 4.0, 6.0])
+    assert batch.ids == ["a", "b", "c"]
+
+
+@pytest.mark.parametrize("quantum", [None, 0.5])
+def test_fingerprint_matches_dict_fingerprint(quantum):
+    """Hashing the columns gives the digest of the equivalent dictionaries."""
+    batch = StrokeBatch.from_dicts(STROKES)
+
+    expected = compute_stroke_fingerprint(STROKES, quantum, quantum)
+    assert batch.fingerprint(quantum, quantum) == expected
+    assert compute_stroke_fingerprint(batch, quantum, quantum) == expected
+
+
+def test_mismatched_columns_rejected():
+    """Offsets must cover exactly the points in the columns."""
+    with pytest.raises(ValueError):
+        StrokeBatch([0, 1], [0, 1], offsets=[0, 3])
+    with pytest.raises(ValueError):
+        StrokeBatch([0, 1], [0])
+
+
+def test_reads_rm_file_into_columns():
+    """Line blocks of an .rm page are read straight into columns."""
+    pytest.importorskip("rmscene")
+    from rmscene import CrdtId, si, write_blocks
+    from rmscene.crdt_sequence import CrdtSequenceItem
+    from rmscene.scene_stream import SceneLineItemBlock
+
+    blocks = []
+    pages = [
+        (si.Pen.BALLPOINT_2, [(1, 2, 100), (3, 4, 120)]),
+        (si.Pen.FINELINER_2, [(5, 6, 90)]),
+    ]
+    for i, (tool, points) in enumerate(pages):
+        line = si.Line(
+            color=si.PenColor.BLACK,
+            tool=tool,
+            points=[
+                si.Point(x=x, y=y, speed=0, direction=0, width=16, pressure=p)
+                for x, y, p in points
+            ],
+            thickness_scale=1.0,
+            starting_length=0.0,
+        )
+        blocks.append(
+            SceneLineItemBlock(
+                parent_id=CrdtId(0, 11),
+                item=CrdtSequenceItem(
+                    item_id=CrdtId(1, 20 + i),
+                    left_id=CrdtId(0, 0),
+                    right_id=CrdtId(0, 0),
+                    deleted_length=0,
+                    value=line,
+                ),
+            )
+        )
+    buffer = io.BytesIO()
+    write_blocks(buffer, blocks)
+
+    batch = StrokeBatch.from_rm_file(buffer.getvalue())
+
+    assert batch.offsets.tolist() == [0, 2, 3]
+    assert batch.x.tolist() == [1.0, 3.0, 5.0]
+    assert batch.pressure.tolist() == [100.0, 120.0, 90.0]
+    assert batch.ids == ["CrdtId(1, 20)", "CrdtId(1, 21)"]
+    pens = [si.Pen.BALLPOINT_2.value, si.Pen.FINELINER_2.value]
+    assert batch.pens == pens
+    assert batch.widths.tolist() == [2.0, 2.0]
+    assert [(s["width"], s["pen"]) for s in batch.to_dicts()] == [
+        (2.0, pen) for pen in pens
+    ]
+    assert batch.resample(1.0).pens == pens
@@ -0,0 +1,81 @@
+"""Tests for metadata-first tag detection helpers."""
+
+import pytest
+
+from inklink.utils.tag_detection import get_page_tags, has_ink_in_top_margin
+
+rmscene = pytest.importorskip("rmscene")
+
+from rmscene import CrdtId, si, write_blocks  # noqa: E402
+from rmscene.crdt_sequence import CrdtSequenceItem  # noqa: E402
+from rmscene.scene_stream import SceneLineItemBlock  # noqa: E402
+
+
+def write_rm_file(path, strokes):
+    """Write a .rm file with one line per list of y coordinates."""
+    blocks = []
+    for i, ys in enumerate(strokes):
+        points = [
+            si.Point(x=0.0, y=float(y), speed=0, direction=0, width=2, pressure=100)
+            for y in ys
+        ]
+        line = si.Line(
+            color=si.PenColor.BLACK,
+            tool=si.Pen.FINELINER_2,
+            points=points,
+            thickness_scale=1.0,
+            starting_length=0.0,
+        )
+        blocks.append(
+            SceneLineItemBlock(
+                parent_id=CrdtId(0, 11),
+                item=CrdtSequenceItem(
+                    item_id=CrdtId(1, 20 + i),
+                    left_id=CrdtId(0, 0),
+                    right_id=CrdtId(0, 0),
+                    deleted_length=0,
+                    value=line,
+                ),
+            )
+        )
+    with open(path, "wb") as f:
+        write_blocks(f, blocks)
+    return str(path)
+
+
+def test_get_page_tags_merges_sources():
+    """Tags come from page entries, pageTags and per-page metadata."""
+    content = {
+        "pages": [{"id": "p1", "tags": ["Lilly"]}, {"id": "p2", "tags": ["kg"]}],
+        "pageTags": [
+            {"name": "Context", "pageId": "p1"},
+            {"name": "Lilly", "pageId": "p1"},
+            {"name": "Other", "pageId": "p2"},
+        ],
+    }
+
+    assert get_page_tags(content, "p1", {"tags": ["new"]}) == [
+        "Lilly",
+        "Context",
+        "new",
+    ]
+    assert get_page_tags({}, "p1") == []
+
+
+def test_margin_ink_detected(tmp_path):
+    """A stroke inside the top margin makes the page a candidate."""
+    path = write_rm_file(tmp_path / "tagged.rm", [[40, 80], [900, 1000]])
+    assert has_ink_in_top_margin(path, margin_height=200)
+
+
+def test_body_ink_only(tmp_path):
+    """Pages with ink only below the margin are not candidates."""
+    path = write_rm_file(tmp_path / "plain.rm", [[150, 400], [900, 1000]])
+    assert not has_ink_in_top_margin(path, margin_height=200)
+
+
+def test_unreadable_page_is_candidate(tmp_path):
+    """Files that cannot be parsed are never ruled out."""
+    path = tmp_path / "broken.rm"
+    path.write_bytes(b"not an rm file")
+    assert has_ink_in_top_margin(str(path))
@@ -0,0 +1,128 @@
+"""Tests for preparing rendered pages for vision models."""
+
+import numpy as np
+import pytest
+from PIL import Image
+
+from inklink.utils.rm_rasterizer import DEVICE_DPI, PAGE_HEIGHT, PAGE_WIDTH
+from inklink.utils.stroke_batch import StrokeBatch
+from inklink.utils.vision_image import (
+    COMPOSITE_MAX_SIDE,
+    INK_THRESHOLD,
+    MAX_SIDE,
+    MIN_SIDE,
+    pixel_ink_bbox,
+    prepare_vision_image,
+    stroke_ink_bbox,
+    target_long_side,
+    tile_pages,
+)
+
+DPI = 300
+SCALE = DPI / DEVICE_DPI
+
+
+def page_with_ink(tmp_path, boxes):
+    """Write a white page render with black rectangles at page-unit boxes."""
+    size = (int(round(PAGE_WIDTH * SCALE)), int(round(PAGE_HEIGHT * SCALE)))
+    pixels = np.full((size[1], size[0]), 255, dtype=np.uint8)
+    for x0, y0, x1, y1 in boxes:
+        # Page x is centered like the native rasterizer's renders
+        left = int((x0 + PAGE_WIDTH / 2) * SCALE)
+        right = int((x1 + PAGE_WIDTH / 2) * SCALE)
+        pixels[int(y0 * SCALE) : int(y1 * SCALE), left:right] = 0
+    path = tmp_path / "page.png"
+    Image.fromarray(pixels).save(path)
+    return str(path)
+
+
+def test_sparse_page_is_cropped_and_shrunk(tmp_path):
+    """A few words on a page are sent as a small crop around the ink."""
+    path = page_with_ink(tmp_path, [(-300, 200, 100, 260)])
+
+    report = prepare_vision_image(path)
+
+    with Image.open(report["path"]) as image:
+        assert image.mode == "L"
+        assert image.size == report["size_after"]
+    assert max(report["size_after"]) <= max(report["size_before"])
+    assert report["size_after"][0] < 600
+    assert report["bytes_after"] < report["bytes_before"]
+    left, top, right, bottom = report["crop"]
+    assert left < (-300 + PAGE_WIDTH / 2) * SCALE < right
+    assert top < 200 * SCALE and bottom > 260 * SCALE
+
+
+def test_strokes_give_the_same_crop_as_pixels(tmp_path):
+    """The stroke bounding box maps onto the render like the ink pixels."""
+    path = page_with_ink(tmp_path, [(-300, 200, 100, 260), (0, 900, 400, 1000)])
+    strokes = StrokeBatch([-300, 400, 100, 0], [200, 1000, 260, 900])
+
+    with Image.open(path) as image:
+        from_pixels = pixel_ink_bbox(np.asarray(image))
+        from_strokes = stroke_ink_bbox(strokes, image.size, DPI)
+
+    assert np.allclose(from_strokes, from_pixels, atol=3)
+    report = prepare_vision_image(path, strokes=strokes)
+    assert report["crop"][2] - report["crop"][0] < report["size_before"][0]
+
+
+def test_renders_in_another_layout_fall_back_to_pixels(tmp_path):
+    """Stroke bounds are ignored for images that are not native renders."""
+    strokes = StrokeBatch([0, 10], [0, 10])
+    assert stroke_ink_bbox(strokes, (800, 600), DPI) is None
+
+
+def test_blank_page_and_webp(tmp_path):
+    """A blank page goes out whole at the smallest size, as WebP if asked."""
+    path = page_with_ink(tmp_path, [])
+
+    report = prepare_vision_image(path, image_format="webp")
+
+    assert report["path"].endswith(".webp")
+    assert max(report["size_after"]) == MIN_SIDE
+    with Image.open(report["path"]) as image:
+        assert image.format == "WEBP"
+
+    with pytest.raises(ValueError):
+        prepare_vision_image(path, image_format="gif")
+
+
+def test_dense_ink_keeps_more_resolution():
+    """Target size grows with ink coverage up to the maximum."""
+    assert target_long_side(0.0) == MIN_SIDE
+    assert MIN_SIDE < target_long_side(0.03) < MAX_SIDE
+    assert target_long_side(0.5) == MAX_SIDE
+
+
+def test_pages_are_tiled_within_the_budget(tmp_path):
+    """Pages are packed in order, at most max_tiles per composite."""
+    paths = []
+    for i in range(5):
+        page_dir = tmp_path / f"p{i}"
+        page_dir.mkdir()
+        paths.append(page_with_ink(page_dir, [(-300, 200 + 50 * i, 100, 300 + 50 * i)]))
+    out_dir = tmp_path / "tiles"
+    out_dir.mkdir()
+
+    composites = tile_pages(paths, str(out_dir), max_tiles=2)
+
+    assert [[t["page"] for t in c["pages"]] for c in composites] == [
+        [1, 2],
+        [3, 4],
+        [5],
+    ]
+    for composite in composites:
+        with Image.open(composite["path"]) as image:
+            assert image.size == composite["size"]
+            pixels = np.asarray(image)
+        assert max(composite["size"]) <= COMPOSITE_MAX_SIDE
+        boxes = [t["box"] for t in composite["pages"]]
+        for left, top, right, bottom in boxes:
+            # Every tile holds its page's ink
+            assert (pixels[top:bottom, left:right] < INK_THRESHOLD).any()
+        if len(boxes) == 2:
+            assert boxes[0][2] <= boxes[1][0] or boxes[0][3] <= boxes[1][1]
+
+    with pytest.raises(ValueError):
+        tile_pages(paths, str(out_dir), max_tiles=0)